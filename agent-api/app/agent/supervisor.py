@@ -2,6 +2,7 @@
 import json
 import logging
 import asyncio
+import time
 from typing import List, Optional, Union
 from supabase import Client
 
@@ -14,6 +15,7 @@ from app.agent.models.types import (
     ToolContext,
 )
 from app.agent.tools.router import ToolRouter
+from app.redis.event_stream import RunEventStream, TERMINAL_RUN_STATUSES, insert_run_message
 from app.llm import LLMProvider, LLMMessage as ProviderLLMMessage, create_llm_provider
 from app.config import get_settings
 
@@ -41,6 +43,7 @@ class AgentSupervisor:
         self.tool_router = ToolRouter(supabase)
         self.max_iterations = 50
         self.max_context_tokens = 100000
+        self._event_stream = None
 
         # Initialize multi-provider LLM
         if llm_provider:
@@ -137,6 +140,10 @@ class AgentSupervisor:
                     self.supabase.table("agent_runs").update({
                         "current_phase": self.current_phase_number
                     }).eq("id", self.run_id).execute()
+                    await self._emit_event("status", {
+                        "status": "executing",
+                        "current_phase": self.current_phase_number,
+                    })
 
                     # Check if all phases complete
                     if self.current_phase_number > len(self.plan.phases):
@@ -262,6 +269,12 @@ class AgentSupervisor:
                     "status": "running",
                     "started_at": "now()",
                 }).eq("id", step["id"]).execute()
+                await self._emit_event("tool_call", {
+                    "step_id": step["id"],
+                    "tool_name": action.tool_name,
+                    "tool_input": action.tool_input,
+                    "status": "running",
+                })
 
                 # Execute tool
                 tool_context = ToolContext(
@@ -270,11 +283,13 @@ class AgentSupervisor:
                     step_id=step["id"],
                 )
 
+                tool_started = time.monotonic()
                 tool_result = await self.tool_router.execute(
                     action.tool_name,
                     action.tool_input,
                     tool_context,
                 )
+                duration_ms = int((time.monotonic() - tool_started) * 1000)
 
                 # Deduct credits
                 if tool_result.credits_used > 0:
@@ -288,6 +303,14 @@ class AgentSupervisor:
                     "credits_used": tool_result.credits_used,
                     "completed_at": "now()",
                 }).eq("id", step["id"]).execute()
+                await self._emit_event("tool_result", {
+                    "step_id": step["id"],
+                    "tool_name": action.tool_name,
+                    "success": tool_result.success,
+                    "output": tool_result.output,
+                    "error": tool_result.error,
+                    "duration_ms": duration_ms,
+                })
 
                 # Add tool result to conversation
                 self.conversation_history.append(LLMMessage(
@@ -309,11 +332,13 @@ class AgentSupervisor:
                 if not action.message:
                     return False, "Message action missing message"
 
-                self.supabase.table("agent_messages").insert({
-                    "run_id": self.run_id,
-                    "role": "assistant",
-                    "content": action.message,
-                }).execute()
+                await insert_run_message(
+                    self.supabase,
+                    self.run_id,
+                    "assistant",
+                    action.message,
+                    events=self._get_event_stream(),
+                )
 
                 # Add to conversation
                 self.conversation_history.append(LLMMessage(
@@ -472,6 +497,26 @@ IMPORTANT:
 
         self.supabase.table("agent_runs").update(update_data).eq("id", self.run_id).execute()
 
+        event_data = {"current_phase": self.current_phase_number}
+        if "error_message" in kwargs:
+            event_data["error_message"] = kwargs["error_message"]
+        await self._get_event_stream().append_status(self.run_id, status, **event_data)
+
+        if status in TERMINAL_RUN_STATUSES:
+            # Ends log streams without waiting for their status fallback
+            from app.redis.publisher import get_log_publisher
+            await get_log_publisher().publish_completion(self.run_id, status)
+
+    def _get_event_stream(self):
+        """Get the run's Redis Stream event log (created on first use)"""
+        if self._event_stream is None:
+            self._event_stream = RunEventStream()
+        return self._event_stream
+
+    async def _emit_event(self, event_type: str, data: dict):
+        """Append a user-visible event to the run's SSE stream"""
+        await self._get_event_stream().append(self.run_id, event_type, data)
+
     async def _log_info(self, message: str):
         """Log info message"""
         # Write to DB (persistence)
@@ -482,8 +527,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "info", message)
 
     async def _log_success(self, message: str):
@@ -496,8 +541,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "success", message)
 
     async def _log_error(self, message: str):
@@ -510,8 +555,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "error", message)
 
     async def _log_tool_success(self, tool_name: str, credits_used: float):
@@ -528,8 +573,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "tool_success", message, metadata)
 
     async def _log_tool_error(self, tool_name: str, error: str):
@@ -546,8 +591,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "tool_error", message, metadata)
 
     async def _log_phase_advance(self, from_phase: int, to_phase: int):
@@ -564,8 +609,8 @@ IMPORTANT:
         }).execute()
 
         # Publish to Redis (real-time)
-        from app.redis.publisher import LogPublisher
-        publisher = LogPublisher()
+        from app.redis.publisher import get_log_publisher
+        publisher = get_log_publisher()
         await publisher.publish_log(self.run_id, "phase_advance", message, metadata)
 
     def _extract_json(self, content: str) -> Optional[dict]:
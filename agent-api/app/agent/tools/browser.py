@@ -11,6 +11,7 @@ Provides SwissBrain browser automation capabilities:
 import logging
 from typing import Dict, Any, Optional, List
 from app.sandbox import get_sandbox_manager
+from app.sandbox.layer_cache import PLAYWRIGHT_LAYER, get_layer_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,8 @@ class BrowserTool:
 
     def __init__(self):
         self.sandbox_manager = get_sandbox_manager()
+        self.layer_cache = get_layer_cache()
+        self._playwright_ready: set = set()
 
     async def execute(
         self,
@@ -87,8 +90,21 @@ class BrowserTool:
                 "error": str(e)
             }
 
+    def _sandbox_id(self, run_id: str) -> Optional[str]:
+        sandbox = self.sandbox_manager.active_sandboxes.get(run_id)
+        return sandbox.id if sandbox else None
+
+    def _forget_closed_sandboxes(self):
+        """Evict readiness entries for sandboxes that have since closed"""
+        active = {sandbox.id for sandbox in self.sandbox_manager.active_sandboxes.values()}
+        self._playwright_ready &= active
+
     async def _ensure_playwright_installed(self, run_id: str):
-        """Ensure Playwright is installed in sandbox (cached per run_id)"""
+        """Ensure Playwright is installed in sandbox (cached per sandbox)"""
+        self._forget_closed_sandboxes()
+        if self._sandbox_id(run_id) in self._playwright_ready:
+            return
+
         # Check if already installed
         check_code = """
 import sys
@@ -101,6 +117,16 @@ except ImportError:
         result = await self.sandbox_manager.execute_code(run_id, "python", check_code)
 
         if "PLAYWRIGHT_NOT_INSTALLED" in result.get("stdout", ""):
+            # Playwright plus Chromium as one cached layer: a single
+            # download and extract instead of pip and browser installs
+            async def run_shell(command: str, timeout: int) -> Dict[str, Any]:
+                return await self.sandbox_manager.execute_shell(run_id, command, timeout)
+
+            if await self.layer_cache.ensure_layer(run_shell, PLAYWRIGHT_LAYER):
+                self._playwright_ready.add(self._sandbox_id(run_id))
+                logger.info(f"Playwright layer ready for run {run_id}")
+                return
+
             logger.info(f"Installing Playwright in sandbox for run {run_id}")
 
             # Install Playwright and browsers
@@ -123,6 +149,8 @@ print("PLAYWRIGHT_SETUP_COMPLETE")
 
             logger.info(f"Playwright installed successfully for run {run_id}")
 
+        self._playwright_ready.add(self._sandbox_id(run_id))
+
     async def _navigate(self, run_id: str, url: str, timeout: int) -> Dict[str, Any]:
         """Navigate to URL"""
         code = f"""
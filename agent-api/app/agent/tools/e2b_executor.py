@@ -1,6 +1,6 @@
 """E2B sandbox executor for reliable tool execution"""
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Union
 from app.sandbox import get_sandbox_manager
 
 logger = logging.getLogger(__name__)
@@ -175,3 +175,77 @@ class E2BSandboxExecutor:
         except Exception as e:
             logger.error(f"E2B list files failed: {e}")
             return []
+
+    async def write_files(
+        self,
+        run_id: str,
+        files: Dict[str, Union[str, bytes]],
+        base_dir: str = "/home/user",
+        known_manifest: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write many files to E2B sandbox in one tar transfer.
+
+        Args:
+            run_id: Agent run ID (used for sandbox pooling)
+            files: Relative path -> content
+            base_dir: Directory the paths are relative to
+            known_manifest: Manifest of files already present (unchanged
+                files are skipped)
+
+        Returns:
+            Dict with success, written paths, skipped count and manifest
+        """
+        logger.info(f"Writing {len(files)} files to E2B for run {run_id}: {base_dir}")
+
+        try:
+            return await self.sandbox_manager.write_files(
+                run_id=run_id,
+                files=files,
+                base_dir=base_dir,
+                known_manifest=known_manifest
+            )
+
+        except Exception as e:
+            logger.error(f"E2B bulk file write failed: {e}")
+            return {"success": False, "written": [], "skipped": 0, "manifest": {}, "error": str(e)}
+
+    async def read_tree(
+        self,
+        run_id: str,
+        root: str,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        known_manifest: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Read a directory tree from E2B sandbox in one tar transfer.
+
+        Args:
+            run_id: Agent run ID (used for sandbox pooling)
+            root: Directory to read
+            include: Globs to include
+            exclude: Globs to exclude (defaults to node_modules and .git)
+            known_manifest: Manifest from a previous read (only changed
+                files are transferred)
+
+        Returns:
+            Dict with success, files, manifest, deleted and too_large
+        """
+        logger.info(f"Reading tree from E2B for run {run_id}: {root}")
+
+        try:
+            return await self.sandbox_manager.read_tree(
+                run_id=run_id,
+                root=root,
+                include=include,
+                exclude=exclude,
+                known_manifest=known_manifest
+            )
+
+        except Exception as e:
+            logger.error(f"E2B tree read failed: {e}")
+            return {
+                "success": False, "files": {}, "manifest": {}, "unchanged": 0,
+                "deleted": [], "too_large": [], "error": str(e),
+            }
@@ -8,6 +8,7 @@ from app.agent.models.types import ToolResult, ToolContext
 from app.agent.tools.e2b_executor import E2BSandboxExecutor
 from app.agent.tools.webdev import get_webdev_tools
 from app.config import get_settings
+from app.redis.event_stream import insert_run_message
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +53,8 @@ class ToolRouter:
                 "file_read": self._file_read,
                 "file_write": self._file_write,
                 "file_list": self._file_list,
+                "file_write_many": self._file_write_many,
+                "file_read_tree": self._file_read_tree,
                 "connector": self._connector_access,
                 # Document generation tools
                 "generate_document": self._generate_document,
@@ -180,11 +183,7 @@ class ToolRouter:
         message = input_data.get("message")
 
         try:
-            self.supabase.table("agent_messages").insert({
-                "run_id": context.run_id,
-                "role": "assistant",
-                "content": message,
-            }).execute()
+            await insert_run_message(self.supabase, context.run_id, "assistant", message)
 
             return ToolResult(
                 output={"sent": True, "message": message},
@@ -406,6 +405,91 @@ class ToolRouter:
                 credits_used=0,
             )
 
+    async def _file_write_many(self, input_data: Dict[str, Any], context: ToolContext) -> ToolResult:
+        """Write many files into the E2B sandbox in one transfer"""
+        files = input_data.get("files", {})
+        base_dir = input_data.get("base_dir", "/home/user")
+
+        logger.info(f"[File Write Many] {len(files)} files into {base_dir}")
+
+        if not self.e2b_executor:
+            logger.warning("E2B not configured, returning mock response")
+            return ToolResult(
+                output={"written": list(files), "skipped": 0, "base_dir": base_dir},
+                success=True,
+                credits_used=0.0,
+            )
+
+        result = await self.e2b_executor.write_files(
+            run_id=context.run_id,
+            files=files,
+            base_dir=base_dir,
+            known_manifest=input_data.get("manifest"),
+        )
+        if not result.get("success"):
+            return ToolResult(
+                output=None,
+                success=False,
+                error=result.get("error", "Failed to write files"),
+                credits_used=0,
+            )
+
+        return ToolResult(
+            output={
+                "written": result["written"],
+                "skipped": result["skipped"],
+                "base_dir": base_dir,
+                "manifest": result["manifest"],
+            },
+            success=True,
+            credits_used=1.0,
+        )
+
+    async def _file_read_tree(self, input_data: Dict[str, Any], context: ToolContext) -> ToolResult:
+        """Read a directory tree from the E2B sandbox in one transfer"""
+        root = input_data.get("root", "/home/user")
+
+        logger.info(f"[File Read Tree] Root: {root}")
+
+        if not self.e2b_executor:
+            logger.warning("E2B not configured, returning mock response")
+            return ToolResult(
+                output={"root": root, "files": {}, "manifest": {}, "deleted": []},
+                success=True,
+                credits_used=0.0,
+            )
+
+        result = await self.e2b_executor.read_tree(
+            run_id=context.run_id,
+            root=root,
+            include=input_data.get("include"),
+            exclude=input_data.get("exclude"),
+            known_manifest=input_data.get("manifest"),
+        )
+        if not result.get("success"):
+            return ToolResult(
+                output=None,
+                success=False,
+                error=result.get("error", "Failed to read tree"),
+                credits_used=0,
+            )
+
+        return ToolResult(
+            output={
+                "root": root,
+                "files": {
+                    path: data.decode("utf-8", errors="replace")
+                    for path, data in result["files"].items()
+                },
+                "manifest": result["manifest"],
+                "unchanged": result["unchanged"],
+                "deleted": result["deleted"],
+                "too_large": result["too_large"],
+            },
+            success=True,
+            credits_used=1.0,
+        )
+
     async def _connector_access(self, input_data: Dict[str, Any], context: ToolContext) -> ToolResult:
         """Access external service via connector"""
         from app.connectors import ConnectorManager
@@ -12,9 +12,18 @@ from dataclasses import dataclass
 from app.agent.models.types import ToolResult, ToolContext
 from app.agent.tools.e2b_executor import E2BSandboxExecutor
 from app.config import get_settings
+from app.sandbox.dev_server import (
+    CUSTOM_READY_PATTERNS,
+    FRAMEWORK_CONFIGS,
+    Framework,
+    ready_wait_command,
+)
 
 logger = logging.getLogger(__name__)
 
+DEV_SERVER_LOG = "/tmp/dev-server.log"
+DEV_SERVER_READY_TIMEOUT = 60
+
 
 # Template definitions
 TEMPLATES = {
@@ -23,6 +32,7 @@ TEMPLATES = {
         "description": "Vite + React + Tailwind CSS static website",
         "repo": "https://github.com/swissbrain/template-web-static.git",
         "default_port": 5173,
+        "ready_patterns": FRAMEWORK_CONFIGS[Framework.VITE].ready_patterns,
         "features": [],
         "install_cmd": "pnpm install",
         "dev_cmd": "pnpm dev",
@@ -33,6 +43,7 @@ TEMPLATES = {
         "description": "tRPC + Drizzle ORM + Manus Auth full-stack application",
         "repo": "https://github.com/swissbrain/template-web-db-user.git",
         "default_port": 3000,
+        "ready_patterns": CUSTOM_READY_PATTERNS,
         "features": ["db", "server", "user"],
         "install_cmd": "pnpm install",
         "dev_cmd": "pnpm dev",
@@ -170,13 +181,10 @@ class WebdevTools:
             # 6. Start dev server
             dev_port = template_config["default_port"]
             await sandbox.exec(
-                f"cd {project_path} && nohup {template_config['dev_cmd']} > /tmp/dev-server.log 2>&1 &",
+                f"cd {project_path} && nohup {template_config['dev_cmd']} > {DEV_SERVER_LOG} 2>&1 &",
                 timeout=10
             )
             
-            # Wait for server to start
-            await asyncio.sleep(3)
-            
             # 7. Create initial git commit
             version_id = str(uuid.uuid4())[:8]
             await sandbox.exec(
@@ -190,6 +198,12 @@ class WebdevTools:
             # 9. Read README
             readme_result = await sandbox.exec(f"cat {project_path}/README.md 2>/dev/null || echo '# {project_name}'")
             readme = readme_result.get("stdout", f"# {project_name}")
+
+            # Wait for the server's ready marker (the steps above overlap its startup)
+            server_ready = await self._wait_for_dev_server(
+                sandbox, dev_port, template_config["ready_patterns"]
+            )
+            status = "running" if server_ready else "starting"
             
             # Get dev server URL (E2B provides public URL)
             dev_server_url = f"https://{sandbox.id}-{dev_port}.e2b.dev"
@@ -203,7 +217,7 @@ class WebdevTools:
                 version_id=version_id,
                 dev_server_url=dev_server_url,
                 dev_server_port=dev_port,
-                status="running",
+                status=status,
             )
             self.active_projects[context.run_id] = project
             
@@ -215,7 +229,7 @@ class WebdevTools:
                     "features": project.features,
                     "dev_server_url": dev_server_url,
                     "dev_server_port": dev_port,
-                    "status": "running",
+                    "status": status,
                     "created_files": created_files,
                     "secrets": ["VITE_APP_ID", "DATABASE_URL", "JWT_SECRET"],
                     "readme": readme,
@@ -291,7 +305,7 @@ class WebdevTools:
             tsc_success = tsc_result.get("exit_code", 1) == 0
             
             # Get recent server logs
-            logs_result = await sandbox.exec("tail -50 /tmp/dev-server.log 2>/dev/null || echo 'No logs'")
+            logs_result = await sandbox.exec(f"tail -50 {DEV_SERVER_LOG} 2>/dev/null || echo 'No logs'")
             recent_logs = logs_result.get("stdout", "")
             
             return ToolResult(
@@ -438,16 +452,16 @@ class WebdevTools:
             
             # Start server
             await sandbox.exec(
-                f"cd {project_path} && nohup {dev_cmd} > /tmp/dev-server.log 2>&1 &",
+                f"cd {project_path} && nohup {dev_cmd} > {DEV_SERVER_LOG} 2>&1 &",
                 timeout=10
             )
             
-            # Wait for server to start
-            await asyncio.sleep(3)
-            
             # Verify server is running
-            ps_result = await sandbox.exec("pgrep -f 'vite|next' || echo 'not_running'")
-            server_running = "not_running" not in ps_result.get("stdout", "")
+            project = self.active_projects.get(context.run_id)
+            port = project.dev_server_port if project and project.dev_server_port else 5173
+            server_running = await self._wait_for_dev_server(
+                sandbox, port, FRAMEWORK_CONFIGS[Framework.VITE].ready_patterns + CUSTOM_READY_PATTERNS
+            )
             
             return ToolResult(
                 output={
@@ -551,6 +565,19 @@ export default defineConfig({
                 error=str(e),
             )
             
+    async def _wait_for_dev_server(self, sandbox, port: int, ready_patterns: List[str]) -> bool:
+        """Block until the dev server logs a ready marker or accepts connections"""
+        result = await sandbox.exec(
+            ready_wait_command(DEV_SERVER_LOG, port, ready_patterns, DEV_SERVER_READY_TIMEOUT),
+            timeout=DEV_SERVER_READY_TIMEOUT + 10
+        )
+        ready = result.get("exit_code", 1) == 0
+        if ready:
+            logger.info(f"[WebDev] Dev server on port {port} ready ({result.get('stdout', '').strip()})")
+        else:
+            logger.warning(f"[WebDev] Dev server on port {port} not ready after {DEV_SERVER_READY_TIMEOUT}s")
+        return ready
+
     def _generate_env_file(self, user_id: str, project_name: str, features: List[str]) -> str:
         """Generate .env file content"""
         env_vars = [
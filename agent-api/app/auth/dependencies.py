@@ -6,9 +6,14 @@ Cross-project authentication supporting tokens from both:
 - Lovable project (rljnrgscmosgkcjdvlrq)
 
 Uses JWT decode without signature verification for cross-project compatibility.
+
+Hot-path costs are paid once per token rather than per request: verified
+tokens are cached by hash until they expire, and every route shares one
+service-role Supabase client (and its HTTP connection pool).
 """
 
 from fastapi import Depends, HTTPException, Header
+from functools import lru_cache
 from typing import Optional
 from supabase import create_client, Client
 import structlog
@@ -16,6 +21,7 @@ import base64
 import json
 import time
 
+from app.auth.token_cache import VerifiedTokenCache
 from app.config import get_settings
 
 logger = structlog.get_logger()
@@ -24,6 +30,9 @@ logger = structlog.get_logger()
 LOVABLE_PROJECT_REF = 'rljnrgscmosgkcjdvlrq'
 DIRECT_PROJECT_REF = 'ghmmdochvlrnwbruyrqk'
 
+# Identities of already-verified bearer tokens
+token_cache = VerifiedTokenCache()
+
 
 def base64url_decode(data: str) -> bytes:
     """Decode base64url (JWT uses URL-safe base64)"""
@@ -48,7 +57,7 @@ def decode_jwt(token: str) -> Optional[dict]:
         payload_bytes = base64url_decode(parts[1])
         payload = json.loads(payload_bytes.decode('utf-8'))
 
-        logger.info("jwt_decoded", sub=payload.get('sub'), iss=payload.get('iss'))
+        logger.debug("jwt_decoded", sub=payload.get('sub'), iss=payload.get('iss'))
         return payload
     except Exception as e:
         logger.error("jwt_decode_error", error=str(e))
@@ -63,9 +72,12 @@ def is_token_expired(payload: dict) -> bool:
     return time.time() >= exp
 
 
+@lru_cache()
 def get_supabase_client() -> Client:
     """
-    Get Supabase client instance.
+    Get the shared Supabase client instance.
+
+    Created once per process so all requests reuse its HTTP connection pool.
 
     Returns:
         Supabase client
@@ -77,27 +89,8 @@ def get_supabase_client() -> Client:
     )
 
 
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase_client)
-) -> str:
-    """
-    Extract and validate current user from JWT token.
-
-    Supports cross-project authentication:
-    - Tokens from Direct project are verified via Supabase
-    - Tokens from Lovable project are decoded and validated without signature check
-
-    Args:
-        authorization: Authorization header with Bearer token
-        supabase: Supabase client
-
-    Returns:
-        User ID
-
-    Raises:
-        HTTPException: If authentication fails
-    """
+def _bearer_token(authorization: Optional[str]) -> str:
+    """Extract the token from an Authorization header"""
     if not authorization:
         raise HTTPException(
             status_code=401,
@@ -114,7 +107,30 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    token = parts[1]
+    return parts[1]
+
+
+def authenticate_token(token: str, supabase: Client) -> dict:
+    """
+    Resolve a bearer token to the user it authenticates.
+
+    Cached tokens return immediately; otherwise the token is decoded, checked
+    and (for Direct project tokens) verified with Supabase, then cached until
+    its `exp`.
+
+    Args:
+        token: Bearer token
+        supabase: Supabase client
+
+    Returns:
+        Dict with 'id' and 'email' keys
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
 
     # First, try to decode the JWT to check which project it's from
     payload = decode_jwt(token)
@@ -150,83 +166,61 @@ async def get_current_user(
     iss = payload.get('iss', '')
     is_lovable = LOVABLE_PROJECT_REF in iss
     is_direct = DIRECT_PROJECT_REF in iss
-
-    logger.info(
-        "cross_project_auth",
-        user_id=user_id,
-        is_lovable=is_lovable,
-        is_direct=is_direct,
-        iss=iss
-    )
+    email = payload.get('email')
+    source = "lovable" if is_lovable else "decoded"
 
     # For direct project tokens, optionally verify with Supabase
     if is_direct:
         try:
             user_response = supabase.auth.get_user(token)
             if user_response.user:
-                logger.info("direct_project_verified", user_id=user_response.user.id)
-                return user_response.user.id
+                user_id = user_response.user.id
+                source = "direct"
         except Exception as e:
             logger.warning("direct_verification_failed", error=str(e))
             # Fall through to use decoded user_id
 
     # For Lovable project or failed direct verification, trust the decoded token
-    email = payload.get('email')
-    logger.info("user_authenticated_cross_project", user_id=user_id, email=email, source="lovable" if is_lovable else "decoded")
-    return user_id
+    logger.debug("user_authenticated_cross_project", user_id=user_id, source=source, iss=iss)
 
+    identity = {"id": user_id, "email": email}
+    token_cache.put(token, identity, exp=payload.get('exp'))
+    return identity
 
-async def get_current_user_with_email(
+
+async def get_current_user(
     authorization: Optional[str] = Header(None),
     supabase: Client = Depends(get_supabase_client)
-) -> dict:
-    """
-    Extract user ID and email from JWT token.
-    Returns dict with 'id' and 'email' keys.
+) -> str:
     """
-    if not authorization:
-        raise HTTPException(
-            status_code=401,
-            detail="Missing authorization header",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-
-    parts = authorization.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authorization header format",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    Extract and validate current user from JWT token.
 
-    token = parts[1]
-    payload = decode_jwt(token)
+    Supports cross-project authentication:
+    - Tokens from Direct project are verified via Supabase
+    - Tokens from Lovable project are decoded and validated without signature check
 
-    if not payload:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid token format",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    Args:
+        authorization: Authorization header with Bearer token
+        supabase: Supabase client
 
-    if is_token_expired(payload):
-        raise HTTPException(
-            status_code=401,
-            detail="Token expired",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    Returns:
+        User ID
 
-    user_id = payload.get('sub') or payload.get('user_id') or payload.get('id')
-    email = payload.get('email')
+    Raises:
+        HTTPException: If authentication fails
+    """
+    return authenticate_token(_bearer_token(authorization), supabase)["id"]
 
-    if not user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid token: no user ID",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
 
-    return {"id": user_id, "email": email}
+async def get_current_user_with_email(
+    authorization: Optional[str] = Header(None),
+    supabase: Client = Depends(get_supabase_client)
+) -> dict:
+    """
+    Extract user ID and email from JWT token.
+    Returns dict with 'id' and 'email' keys.
+    """
+    return dict(authenticate_token(_bearer_token(authorization), supabase))
 
 
 async def get_optional_user(
@@ -0,0 +1,99 @@
+"""
+Verified token cache.
+
+Maps a SHA-256 hash of a bearer token to the identity it authenticated, so
+repeat requests with the same token skip JWT decoding and the Supabase
+get_user round trip. Raw tokens are never stored.
+
+- Entries expire at the token's own `exp` (capped at max_ttl_seconds so
+  revoked sessions of long-lived tokens age out)
+- Bounded LRU: the least recently used token is evicted when full
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def hash_token(token: str) -> str:
+    """Cache key for a bearer token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified tokens with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 10000, max_ttl_seconds: float = 300.0):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum cached tokens
+            max_ttl_seconds: Longest time an entry is trusted
+        """
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Get the cached identity for a token.
+
+        Returns:
+            Identity dict, or None if absent or expired
+        """
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, identity = entry
+            if now >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return identity
+
+    def put(self, token: str, identity: dict, exp: Optional[float] = None):
+        """
+        Cache a verified identity.
+
+        Args:
+            token: Bearer token
+            identity: Identity to return on later hits
+            exp: Token expiry (unix seconds) from the JWT payload
+        """
+        now = time.time()
+        expires_at = now + self.max_ttl_seconds
+        if exp:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = (expires_at, identity)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        """Drop a token (e.g. on sign-out)."""
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,10 +3,11 @@ Billing Module for Token Counting and Credit Management
 
 Implements:
 - Multi-provider token counting (tiktoken, Google, etc.)
-- Token caching (Memory → Redis → DB)
+- Preloaded, versioned pricing snapshot (no network on the hot path)
 - Billing ledger with idempotent record_token_call()
 - Credit deduction with rollback support
 - Billing failure → read-only mode
+- Redis-resident credit reservations with ledger settlement
 """
 
 from app.billing.types import (
@@ -15,13 +16,16 @@ from app.billing.types import (
     BillingResult,
     CreditBalance,
     ModelPricing,
+    RollupGranularity,
     BillingError,
     InsufficientCreditsError,
     RateLimitError,
 )
 from app.billing.tokenizer import MultiProviderTokenizer
 from app.billing.token_counter import TokenCounter
+from app.billing.pricing import PricingSnapshot
 from app.billing.ledger import BillingLedger
+from app.billing.credit_cache import RedisCreditCache
 from app.billing.billing import BillingService
 
 __all__ = [
@@ -31,12 +35,15 @@ __all__ = [
     "BillingResult",
     "CreditBalance",
     "ModelPricing",
+    "RollupGranularity",
     "BillingError",
     "InsufficientCreditsError",
     "RateLimitError",
     # Services
     "MultiProviderTokenizer",
     "TokenCounter",
+    "PricingSnapshot",
     "BillingLedger",
+    "RedisCreditCache",
     "BillingService",
 ]
@@ -12,6 +12,7 @@ Implements:
 - Credit management
 - Billing failure → read-only mode
 - Rate limiting
+- Redis-resident credit reservations with periodic ledger settlement
 """
 
 from __future__ import annotations
@@ -24,7 +25,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from enum import Enum
 from typing import Optional, Any, Callable, Awaitable
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from app.billing.types import (
     Provider,
@@ -39,6 +40,7 @@ from app.billing.types import (
 from app.billing.tokenizer import get_tokenizer
 from app.billing.token_counter import TokenCounter
 from app.billing.ledger import BillingLedger
+from app.billing.credit_cache import RedisCreditCache
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,14 @@ class BillingConfig:
     # Estimation buffer (add % to estimates for safety)
     estimation_buffer_pct: Decimal = Decimal("0.20")
 
+    # Pricing snapshot refresh
+    pricing_refresh_interval_seconds: int = 300
+
+    # Redis credit cache (requires redis_client)
+    credit_cache_enabled: bool = True
+    credit_settlement_interval_seconds: float = 5.0
+    credit_reservation_ttl_seconds: int = 3600  # Leaked holds lapse after this
+
 
 @dataclass
 class BillingState:
@@ -118,13 +128,25 @@ class BillingService:
         self.config = config or BillingConfig()
 
         # Initialize components
-        self.token_counter = TokenCounter(supabase, redis_client)
-        self.ledger = BillingLedger(supabase)
+        self.token_counter = TokenCounter(
+            supabase,
+            pricing_refresh_interval=self.config.pricing_refresh_interval_seconds,
+        )
+        self.credit_cache = (
+            RedisCreditCache(
+                redis_client,
+                reservation_ttl_seconds=self.config.credit_reservation_ttl_seconds,
+            )
+            if redis_client is not None and self.config.credit_cache_enabled
+            else None
+        )
+        self.ledger = BillingLedger(supabase, credit_cache=self.credit_cache)
         self.tokenizer = get_tokenizer()
 
         # Runtime state
         self._state = BillingState()
         self._lock = asyncio.Lock()
+        self._settlement_task: Optional[asyncio.Task] = None
 
     @property
     def mode(self) -> BillingMode:
@@ -275,14 +297,22 @@ class BillingService:
         org_id: UUID,
         estimated_cost: Decimal,
         run_budget: Optional[Decimal] = None,
+        run_id: Optional[UUID] = None,
+        reservation_id: Optional[str] = None,
     ) -> tuple[bool, CreditBalance]:
         """
         Check if organization has budget for an operation.
 
+        With the credit cache enabled and a reservation_id given, the
+        estimated cost is also held atomically in Redis until the call is
+        billed or the reservation is released.
+
         Args:
             org_id: Organization ID
             estimated_cost: Estimated cost of operation
             run_budget: Optional run-specific budget limit
+            run_id: Optional run ID the reservation belongs to
+            reservation_id: Optional reservation to hold for the call
 
         Returns:
             Tuple of (has_budget, CreditBalance)
@@ -290,8 +320,6 @@ class BillingService:
         Raises:
             InsufficientCreditsError: If insufficient credits
         """
-        balance = await self.ledger.get_or_create_balance(org_id)
-
         # Check per-call limit
         if estimated_cost > self.config.max_cost_per_call:
             raise BillingError(
@@ -299,14 +327,6 @@ class BillingService:
                 f"${self.config.max_cost_per_call:.4f}"
             )
 
-        # Check available balance
-        if balance.available_usd < estimated_cost:
-            raise InsufficientCreditsError(
-                required=estimated_cost,
-                available=balance.available_usd,
-                org_id=org_id,
-            )
-
         # Check run budget if specified
         if run_budget and estimated_cost > run_budget:
             raise BillingError(
@@ -314,6 +334,24 @@ class BillingService:
                 f"${run_budget:.4f}"
             )
 
+        reserved = False
+        if reservation_id and self.credit_cache:
+            reserved = await self.ledger.reserve_credits(
+                org_id, estimated_cost, run_id, reservation_id=reservation_id
+            )
+
+        has_sufficient, balance = await self.ledger.check_sufficient_balance(
+            org_id, estimated_cost
+        )
+
+        # Check available balance (a successful hold already proved it)
+        if not reserved and not has_sufficient:
+            raise InsufficientCreditsError(
+                required=estimated_cost,
+                available=balance.available_usd,
+                org_id=org_id,
+            )
+
         return True, balance
 
     async def bill_token_call(
@@ -328,6 +366,7 @@ class BillingService:
         task_id: Optional[UUID] = None,
         step_id: Optional[UUID] = None,
         idempotency_key: Optional[str] = None,
+        reservation_id: Optional[str] = None,
     ) -> BillingResult:
         """
         Bill an organization for a completed API call.
@@ -345,6 +384,7 @@ class BillingService:
             task_id: Optional task ID
             step_id: Optional step ID
             idempotency_key: Unique key for idempotency
+            reservation_id: Reservation taken by check_budget (released here)
 
         Returns:
             BillingResult
@@ -354,6 +394,7 @@ class BillingService:
             logger.warning(
                 f"Billing in {self.mode.value} mode, skipping charge"
             )
+            await self.release_reservation(org_id, reservation_id)
             return BillingResult(
                 success=True,
                 error_code="BILLING_DISABLED",
@@ -364,6 +405,7 @@ class BillingService:
         try:
             await self.check_rate_limit(org_id)
         except RateLimitError as e:
+            await self.release_reservation(org_id, reservation_id)
             return BillingResult(
                 success=False,
                 error_code=e.code,
@@ -390,6 +432,13 @@ class BillingService:
 
                 if result.success:
                     await self._record_success()
+                    if result.is_idempotent_replay:
+                        # The first attempt's charge is already mirrored
+                        await self.release_reservation(org_id, reservation_id)
+                    else:
+                        await self.ledger.apply_cached_charge(
+                            org_id, result.cost_usd or Decimal("0"), reservation_id
+                        )
                     await self._increment_rate_limit(
                         org_id, input_tokens + output_tokens
                     )
@@ -411,6 +460,7 @@ class BillingService:
 
         # All retries failed
         await self._record_failure(last_error or "Unknown error")
+        await self.release_reservation(org_id, reservation_id)
         return BillingResult(
             success=False,
             error_code="BILLING_FAILED",
@@ -482,6 +532,60 @@ class BillingService:
             # Post-call: bill actual usage
             await ctx.post_call()
 
+    async def start(self):
+        """Preload pricing and start background refresh/settlement tasks."""
+        await self.token_counter.start_pricing_refresh()
+        await self.start_settlement()
+
+    async def stop(self):
+        """Stop background tasks."""
+        await self.token_counter.stop_pricing_refresh()
+        await self.stop_settlement()
+
+    async def release_reservation(
+        self,
+        org_id: UUID,
+        reservation_id: Optional[str],
+    ):
+        """Release a call reservation that will not be billed."""
+        if reservation_id and self.credit_cache:
+            await self.ledger.release_reserved_credits(
+                org_id, Decimal("0"), None, reservation_id=reservation_id
+            )
+
+    async def settle_credits(self) -> int:
+        """Settle cached reservations into the ledger (one pass)."""
+        return await self.ledger.settle_credit_cache()
+
+    async def start_settlement(self):
+        """Start the background credit settlement loop."""
+        if not self.credit_cache or self._settlement_task:
+            return
+        self._settlement_task = asyncio.create_task(self._settlement_loop())
+        logger.info("Credit settlement loop started")
+
+    async def stop_settlement(self):
+        """Stop the settlement loop after a final settlement pass."""
+        if self._settlement_task:
+            self._settlement_task.cancel()
+            try:
+                await self._settlement_task
+            except asyncio.CancelledError:
+                pass
+            self._settlement_task = None
+            await self.settle_credits()
+
+    async def _settlement_loop(self):
+        """Periodically settle cached reservations into the ledger."""
+        while True:
+            try:
+                await asyncio.sleep(self.config.credit_settlement_interval_seconds)
+                await self.settle_credits()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Credit settlement loop error: {e}")
+
     async def get_balance(self, org_id: UUID) -> Optional[CreditBalance]:
         """Get organization balance."""
         return await self.ledger.get_balance(org_id)
@@ -569,6 +673,7 @@ class BillingContext:
     # Set after estimation
     estimated_tokens: Optional[TokenCount] = None
     estimated_cost: Optional[Decimal] = None
+    reservation_id: Optional[str] = None
 
     # Set by caller after LLM call
     actual_input_tokens: Optional[int] = None
@@ -588,11 +693,15 @@ class BillingContext:
             max_tokens=self.max_tokens,
         )
 
-        # Check budget (raises if insufficient)
+        # Check budget and hold the estimate (raises if insufficient)
+        reservation_id = f"{self.run_id or 'call'}:{uuid4().hex}"
         await self.billing_service.check_budget(
             org_id=self.org_id,
             estimated_cost=self.estimated_cost,
+            run_id=self.run_id,
+            reservation_id=reservation_id,
         )
+        self.reservation_id = reservation_id
 
     def set_output(
         self,
@@ -645,6 +754,9 @@ class BillingContext:
                     self.actual_input_tokens = self.estimated_tokens.input_tokens
                     self.actual_output_tokens = self.estimated_tokens.output_tokens
                 else:
+                    await self.billing_service.release_reservation(
+                        self.org_id, self.reservation_id
+                    )
                     return  # Nothing to bill
 
         # Bill actual usage
@@ -659,4 +771,5 @@ class BillingContext:
             task_id=self.task_id,
             step_id=self.step_id,
             idempotency_key=self.idempotency_key,
+            reservation_id=self.reservation_id,
         )
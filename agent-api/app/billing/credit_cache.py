@@ -0,0 +1,370 @@
+"""
+Redis Credit Cache
+
+Keeps a per-organization balance and reservation counter in Redis so that
+pre-call budget checks are a single atomic Lua call instead of a database
+round trip.
+
+Layout (amounts are integers in units of 1e-8 USD, matching DECIMAL(12, 8)):
+- billing:credits:{org_id}               hash: balance, reserved, seq
+- billing:credits:{org_id}:reservations  hash: reservation_id -> "amount:expires_at"
+- billing:credits:dirty                  set of org_ids awaiting settlement
+
+Every hold carries its own deadline (unix seconds, Redis clock). The
+reserve, release and charge scripts first drop expired holds and take
+them off the reserved total, so a hold leaked by a crashed worker lapses
+after reservation_ttl_seconds even while the org stays busy and its keys
+never expire.
+
+The database ledger stays the source of truth for balances: charges are
+committed by record_token_call() first and only then mirrored here, and the
+settlement loop periodically re-syncs the cached balance from credit_balances
+and writes the reserved total back. Reservations are soft holds that only
+live in Redis; if Redis loses state the next check re-primes the balance from
+the database with no reservations, which at worst admits a call that the
+ledger still bills.
+"""
+
+from __future__ import annotations
+
+import logging
+from decimal import Decimal, ROUND_CEILING
+from enum import Enum
+from typing import Optional, Any
+from uuid import UUID
+
+from app.billing.types import CreditBalance
+
+logger = logging.getLogger(__name__)
+
+
+_SCALE = Decimal("100000000")
+
+# Shared by the scripts that touch holds (KEYS[1] state, KEYS[2] holds)
+_HOLDS_LUA = """
+local function hold_amount(value)
+    local sep = string.find(value, ':', 1, true)
+    return tonumber(sep and string.sub(value, 1, sep - 1) or value)
+end
+
+local function drop_expired_holds()
+    local now = tonumber(redis.call('TIME')[1])
+    local entries = redis.call('HGETALL', KEYS[2])
+    local expired = 0
+    for i = 1, #entries, 2 do
+        local sep = string.find(entries[i + 1], ':', 1, true)
+        -- Holds written without a deadline are treated as expired
+        if not sep or tonumber(string.sub(entries[i + 1], sep + 1)) <= now then
+            expired = expired + hold_amount(entries[i + 1])
+            redis.call('HDEL', KEYS[2], entries[i])
+        end
+    end
+    if expired > 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+        local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved'))
+        redis.call('HSET', KEYS[1], 'reserved', math.max(0, reserved - expired))
+        redis.call('SADD', KEYS[3], ARGV[3])
+    end
+    return now
+end
+"""
+
+# Returns {status, available}: status 1 = reserved, 0 = insufficient, -1 = not loaded
+_RESERVE_SCRIPT = _HOLDS_LUA + """
+local now = drop_expired_holds()
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, 0}
+end
+local balance = tonumber(redis.call('HGET', KEYS[1], 'balance'))
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved'))
+local available = balance - reserved
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    return {1, available}
+end
+local amount = tonumber(ARGV[2])
+if available < amount then
+    return {0, available}
+end
+redis.call('HINCRBY', KEYS[1], 'reserved', amount)
+redis.call('HSET', KEYS[2], ARGV[1], amount .. ':' .. (now + tonumber(ARGV[5])))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('SADD', KEYS[3], ARGV[3])
+return {1, available - amount}
+"""
+
+# Releases one reservation (exact id) or every reservation with a prefix.
+# Returns the total amount released.
+_RELEASE_SCRIPT = _HOLDS_LUA + """
+drop_expired_holds()
+local released = 0
+if ARGV[2] == '1' then
+    local entries = redis.call('HGETALL', KEYS[2])
+    for i = 1, #entries, 2 do
+        if string.sub(entries[i], 1, #ARGV[1]) == ARGV[1] then
+            released = released + hold_amount(entries[i + 1])
+            redis.call('HDEL', KEYS[2], entries[i])
+        end
+    end
+else
+    local amount = redis.call('HGET', KEYS[2], ARGV[1])
+    if amount then
+        released = hold_amount(amount)
+        redis.call('HDEL', KEYS[2], ARGV[1])
+    end
+end
+if released > 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved'))
+    redis.call('HSET', KEYS[1], 'reserved', math.max(0, reserved - released))
+    redis.call('SADD', KEYS[3], ARGV[3])
+end
+return released
+"""
+
+# Applies a committed charge and releases its reservation.
+# Returns {status, balance}: status 1 = applied, -1 = not loaded
+_CHARGE_SCRIPT = _HOLDS_LUA + """
+drop_expired_holds()
+if ARGV[1] ~= '' then
+    local amount = redis.call('HGET', KEYS[2], ARGV[1])
+    if amount then
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved'))
+            redis.call('HSET', KEYS[1], 'reserved', math.max(0, reserved - hold_amount(amount)))
+        end
+    end
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, 0}
+end
+local balance = redis.call('HINCRBY', KEYS[1], 'balance', -tonumber(ARGV[2]))
+redis.call('HINCRBY', KEYS[1], 'seq', 1)
+redis.call('SADD', KEYS[3], ARGV[3])
+return {1, balance}
+"""
+
+# Loads state only if absent so live counters are never clobbered.
+_PRIME_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+redis.call('HSET', KEYS[1], 'balance', ARGV[1], 'reserved', 0, 'seq', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Overwrites the balance with the ledger value unless a charge landed since
+# the caller read seq (that charge would otherwise be lost).
+_RESYNC_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+if redis.call('HGET', KEYS[1], 'seq') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'balance', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+def _to_units(amount: Decimal) -> int:
+    """Convert USD to integer 1e-8 units (rounding up, never under-reserving)."""
+    return int((Decimal(amount) * _SCALE).to_integral_value(rounding=ROUND_CEILING))
+
+
+def _from_units(units: Any) -> Decimal:
+    """Convert integer 1e-8 units to USD."""
+    return Decimal(int(units)) / _SCALE
+
+
+class ReservationOutcome(str, Enum):
+    """Result of an atomic reservation attempt."""
+    RESERVED = "reserved"
+    INSUFFICIENT = "insufficient"
+    NOT_LOADED = "not_loaded"
+
+
+class RedisCreditCache:
+    """
+    Redis-resident credit balances and reservations.
+
+    All mutations are single Lua scripts, so concurrent workers never
+    over-reserve an organization's available balance.
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        key_prefix: str = "billing:credits",
+        state_ttl_seconds: int = 86400,
+        reservation_ttl_seconds: int = 3600,
+    ):
+        """
+        Initialize credit cache.
+
+        Args:
+            redis_client: Async Redis client
+            key_prefix: Prefix for all cache keys
+            state_ttl_seconds: Idle expiry for per-org state
+            reservation_ttl_seconds: Default lifetime of a hold; one that is
+                neither charged nor released by then is dropped
+        """
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.state_ttl_seconds = state_ttl_seconds
+        self.reservation_ttl_seconds = reservation_ttl_seconds
+
+        self._reserve = redis_client.register_script(_RESERVE_SCRIPT)
+        self._release = redis_client.register_script(_RELEASE_SCRIPT)
+        self._charge = redis_client.register_script(_CHARGE_SCRIPT)
+        self._prime = redis_client.register_script(_PRIME_SCRIPT)
+        self._resync = redis_client.register_script(_RESYNC_SCRIPT)
+
+    @property
+    def dirty_key(self) -> str:
+        """Set of org_ids with unsettled reservation changes."""
+        return f"{self.key_prefix}:dirty"
+
+    def _keys(self, org_id: UUID) -> list[str]:
+        state_key = f"{self.key_prefix}:{org_id}"
+        return [state_key, f"{state_key}:reservations", self.dirty_key]
+
+    async def get_balance(self, org_id: UUID) -> Optional[CreditBalance]:
+        """
+        Get cached balance.
+
+        Returns:
+            CreditBalance or None if the org is not loaded
+        """
+        balance, reserved = await self.redis.hmget(
+            self._keys(org_id)[0], ["balance", "reserved"]
+        )
+        if balance is None:
+            return None
+        return CreditBalance(
+            org_id=org_id,
+            balance_usd=_from_units(balance),
+            reserved_usd=_from_units(reserved or 0),
+        )
+
+    async def get_seq(self, org_id: UUID) -> Optional[str]:
+        """Get the charge sequence number used to guard re-syncs."""
+        return await self.redis.hget(self._keys(org_id)[0], "seq")
+
+    async def prime(self, balance: CreditBalance) -> bool:
+        """
+        Load an org's balance from the ledger if not already cached.
+
+        Returns:
+            True if state was loaded, False if it already existed
+        """
+        loaded = await self._prime(
+            keys=self._keys(balance.org_id)[:2],
+            args=[_to_units(balance.balance_usd), self.state_ttl_seconds],
+        )
+        if loaded:
+            logger.info(f"Primed credit cache for org {balance.org_id}")
+        return bool(loaded)
+
+    async def reserve(
+        self,
+        org_id: UUID,
+        reservation_id: str,
+        amount_usd: Decimal,
+        ttl_seconds: Optional[int] = None,
+    ) -> tuple[ReservationOutcome, Decimal]:
+        """
+        Atomically reserve credits if available.
+
+        Re-reserving an existing reservation_id is a no-op success (the
+        deadline is not extended).
+
+        Args:
+            org_id: Organization ID
+            reservation_id: Unique hold ID
+            amount_usd: Amount to hold
+            ttl_seconds: Hold lifetime (defaults to reservation_ttl_seconds)
+
+        Returns:
+            Tuple of (outcome, available balance after the attempt)
+        """
+        status, available = await self._reserve(
+            keys=self._keys(org_id),
+            args=[
+                reservation_id, _to_units(amount_usd), str(org_id), self.state_ttl_seconds,
+                self.reservation_ttl_seconds if ttl_seconds is None else ttl_seconds,
+            ],
+        )
+        status = int(status)
+        if status < 0:
+            return ReservationOutcome.NOT_LOADED, Decimal("0")
+        outcome = ReservationOutcome.RESERVED if status == 1 else ReservationOutcome.INSUFFICIENT
+        return outcome, _from_units(available)
+
+    async def release(self, org_id: UUID, reservation_id: str) -> Decimal:
+        """Release a single reservation. Returns amount released."""
+        released = await self._release(
+            keys=self._keys(org_id),
+            args=[reservation_id, "0", str(org_id)],
+        )
+        return _from_units(released)
+
+    async def release_prefix(self, org_id: UUID, prefix: str) -> Decimal:
+        """Release every reservation whose id starts with prefix (e.g. a run)."""
+        released = await self._release(
+            keys=self._keys(org_id),
+            args=[prefix, "1", str(org_id)],
+        )
+        return _from_units(released)
+
+    async def apply_charge(
+        self,
+        org_id: UUID,
+        amount_usd: Decimal,
+        reservation_id: Optional[str] = None,
+    ) -> Optional[Decimal]:
+        """
+        Mirror a committed ledger charge and release its reservation.
+
+        Returns:
+            New cached balance, or None if the org is not loaded
+        """
+        status, balance = await self._charge(
+            keys=self._keys(org_id),
+            args=[reservation_id or "", _to_units(amount_usd), str(org_id)],
+        )
+        if int(status) < 0:
+            return None
+        return _from_units(balance)
+
+    async def resync(self, org_id: UUID, balance_usd: Decimal, seq: Optional[str]) -> bool:
+        """
+        Replace the cached balance with the ledger value.
+
+        Skipped if a charge was applied after seq was read.
+
+        Returns:
+            True if the balance was updated
+        """
+        if seq is None:
+            return False
+        updated = await self._resync(
+            keys=self._keys(org_id)[:1],
+            args=[_to_units(balance_usd), seq, self.state_ttl_seconds],
+        )
+        return int(updated) == 1
+
+    async def pop_dirty(self, count: int = 100) -> list[UUID]:
+        """Pop org_ids awaiting settlement."""
+        org_ids = await self.redis.spop(self.dirty_key, count) or []
+        return [UUID(org_id) for org_id in org_ids]
+
+    async def mark_dirty(self, org_id: UUID):
+        """Re-queue an org for settlement (e.g. after a failed settle)."""
+        await self.redis.sadd(self.dirty_key, str(org_id))
+
+    async def invalidate(self, org_id: UUID):
+        """Drop cached state; the next check re-primes from the ledger."""
+        await self.redis.delete(*self._keys(org_id)[:2])
@@ -6,6 +6,8 @@ Implements the append-only billing ledger with:
 - Credit balance management
 - Transaction history
 - Reconciliation support
+- Usage summaries served from hourly/daily rollups
+- Optional Redis credit cache for hot-path balance checks and reservations
 
 Key Invariants:
 1. Ledger is append-only (never UPDATE or DELETE)
@@ -35,6 +37,8 @@ from app.billing.types import (
     InsufficientCreditsError,
     IdempotencyViolationError,
 )
+from app.billing.rollups import UsageRange, plan_usage_ranges
+from app.billing.credit_cache import RedisCreditCache, ReservationOutcome
 
 logger = logging.getLogger(__name__)
 
@@ -49,14 +53,20 @@ class BillingLedger:
     - Audit trail
     """
 
-    def __init__(self, supabase: Any):
+    def __init__(
+        self,
+        supabase: Any,
+        credit_cache: Optional[RedisCreditCache] = None,
+    ):
         """
         Initialize billing ledger.
 
         Args:
             supabase: Supabase client for DB operations
+            credit_cache: Optional Redis credit cache for hot-path checks
         """
         self.supabase = supabase
+        self.credit_cache = credit_cache
 
     async def record_token_call(
         self,
@@ -287,29 +297,63 @@ class BillingLedger:
         Returns:
             Tuple of (has_sufficient, CreditBalance)
         """
-        balance = await self.get_or_create_balance(org_id)
+        balance = await self._get_cached_balance(org_id)
+        if balance is None:
+            balance = await self.get_or_create_balance(org_id)
         has_sufficient = balance.available_usd >= required_amount
         return has_sufficient, balance
 
+    async def _get_cached_balance(self, org_id: UUID) -> Optional[CreditBalance]:
+        """Get balance from the credit cache, priming it from the DB on a miss."""
+        if not self.credit_cache:
+            return None
+
+        try:
+            balance = await self.credit_cache.get_balance(org_id)
+            if balance is None:
+                await self.credit_cache.prime(await self.get_or_create_balance(org_id))
+                balance = await self.credit_cache.get_balance(org_id)
+            return balance
+        except Exception as e:
+            logger.warning(f"Credit cache read failed, using database: {e}")
+            return None
+
     async def reserve_credits(
         self,
         org_id: UUID,
         amount_usd: Decimal,
-        run_id: UUID,
+        run_id: Optional[UUID],
+        reservation_id: Optional[str] = None,
     ) -> bool:
         """
         Reserve credits for an in-progress run.
 
-        Reserved credits cannot be used by other operations.
+        Reserved credits cannot be used by other operations. With a credit
+        cache this is a single atomic Redis call; the reserved total is
+        written back to credit_balances by settle_credit_cache().
 
         Args:
             org_id: Organization ID
             amount_usd: Amount to reserve
             run_id: Run that is reserving credits
+            reservation_id: Unique hold ID (defaults to the run ID);
+                ids prefixed with the run ID are released with the run
 
         Returns:
             True if reserved successfully
         """
+        if self.credit_cache:
+            reservation_id = reservation_id or str(run_id)
+            try:
+                outcome, _ = await self.credit_cache.reserve(org_id, reservation_id, amount_usd)
+                if outcome == ReservationOutcome.NOT_LOADED:
+                    await self.credit_cache.prime(await self.get_or_create_balance(org_id))
+                    outcome, _ = await self.credit_cache.reserve(org_id, reservation_id, amount_usd)
+                if outcome != ReservationOutcome.NOT_LOADED:
+                    return outcome == ReservationOutcome.RESERVED
+            except Exception as e:
+                logger.warning(f"Credit cache reserve failed, using database: {e}")
+
         try:
             # Atomic update with balance check
             result = self.supabase.table("credit_balances").update({
@@ -330,19 +374,29 @@ class BillingLedger:
         self,
         org_id: UUID,
         amount_usd: Decimal,
-        run_id: UUID,
+        run_id: Optional[UUID],
+        reservation_id: Optional[str] = None,
     ) -> bool:
         """
         Release reserved credits after run completes.
 
         Args:
             org_id: Organization ID
-            amount_usd: Amount to release
+            amount_usd: Amount to release (database path only; the credit
+                cache releases exactly what was reserved)
             run_id: Run that reserved the credits
+            reservation_id: Hold to release (defaults to the run ID)
 
         Returns:
             True if released successfully
         """
+        if self.credit_cache:
+            try:
+                await self.credit_cache.release(org_id, reservation_id or str(run_id))
+                return True
+            except Exception as e:
+                logger.warning(f"Credit cache release failed, using database: {e}")
+
         try:
             result = self.supabase.table("credit_balances").update({
                 "reserved_usd": self.supabase.sql(f"GREATEST(0, reserved_usd - {amount_usd})"),
@@ -356,6 +410,84 @@ class BillingLedger:
             logger.error(f"release_reserved_credits failed: {e}")
             return False
 
+    async def apply_cached_charge(
+        self,
+        org_id: UUID,
+        amount_usd: Decimal,
+        reservation_id: Optional[str] = None,
+    ):
+        """
+        Mirror a committed charge into the credit cache.
+
+        Called after record_token_call() succeeds. Releases the call's
+        reservation and decrements the cached balance in one step.
+
+        Args:
+            org_id: Organization ID
+            amount_usd: Charged amount
+            reservation_id: Reservation held for the call (optional)
+        """
+        if not self.credit_cache:
+            return
+
+        try:
+            await self.credit_cache.apply_charge(org_id, amount_usd, reservation_id)
+        except Exception as e:
+            # The next settlement re-syncs the balance from the ledger
+            logger.warning(f"Credit cache charge failed: {e}")
+
+    async def settle_credit_cache(self, max_orgs: int = 100) -> int:
+        """
+        Settle cached reservations into the ledger.
+
+        For each org touched since the last settlement: writes the Redis
+        reserved total to credit_balances.reserved_usd and re-syncs the
+        cached balance from credit_balances.balance_usd (picking up credits
+        added elsewhere and correcting any drift).
+
+        Args:
+            max_orgs: Max orgs to settle in one pass
+
+        Returns:
+            Number of orgs settled
+        """
+        if not self.credit_cache:
+            return 0
+
+        try:
+            org_ids = await self.credit_cache.pop_dirty(max_orgs)
+        except Exception as e:
+            logger.error(f"settle_credit_cache failed: {e}")
+            return 0
+
+        settled = 0
+        for org_id in org_ids:
+            try:
+                seq = await self.credit_cache.get_seq(org_id)
+                cached = await self.credit_cache.get_balance(org_id)
+                if cached is None:
+                    continue
+
+                result = self.supabase.table("credit_balances").update({
+                    "reserved_usd": str(cached.reserved_usd),
+                }).eq(
+                    "org_id", str(org_id)
+                ).execute()
+
+                if result.data:
+                    ledger_balance = CreditBalance.from_db_row(result.data[0])
+                    await self.credit_cache.resync(org_id, ledger_balance.balance_usd, seq)
+
+                settled += 1
+            except Exception as e:
+                logger.error(f"Credit settlement failed for org {org_id}: {e}")
+                try:
+                    await self.credit_cache.mark_dirty(org_id)
+                except Exception:
+                    pass
+
+        return settled
+
     async def get_transaction_history(
         self,
         org_id: UUID,
@@ -456,7 +588,9 @@ class BillingLedger:
                 ).single().execute()
 
                 if rec_result.data:
-                    return TokenReconciliation.from_db_row(rec_result.data)
+                    reconciliation = TokenReconciliation.from_db_row(rec_result.data)
+                    await self._release_run_reservations(reconciliation.org_id, run_id)
+                    return reconciliation
 
             return None
 
@@ -464,6 +598,19 @@ class BillingLedger:
             logger.error(f"reconcile_run failed: {e}")
             return None
 
+    async def _release_run_reservations(self, org_id: UUID, run_id: UUID):
+        """Release any cached holds left by a reconciled run and settle the org."""
+        if not self.credit_cache:
+            return
+
+        try:
+            released = await self.credit_cache.release_prefix(org_id, str(run_id))
+            if released:
+                logger.info(f"Released ${released} of leftover reservations for run {run_id}")
+            await self.credit_cache.mark_dirty(org_id)
+        except Exception as e:
+            logger.warning(f"Credit cache run release failed: {e}")
+
     async def get_run_cost(self, run_id: UUID) -> Decimal:
         """
         Get total cost for a run.
@@ -498,6 +645,9 @@ class BillingLedger:
         """
         Get usage summary for an organization.
 
+        Reads hourly/daily rollups for whole buckets inside the period and
+        raw token records only for the partial hours at either edge.
+
         Args:
             org_id: Organization ID
             start_date: Start of period (optional)
@@ -507,47 +657,37 @@ class BillingLedger:
             Usage summary dict
         """
         try:
-            query = self.supabase.table("token_records").select(
-                "input_tokens, output_tokens, cost_usd, model, created_at"
-            ).eq(
-                "org_id", str(org_id)
-            ).eq(
-                "is_estimated", False
-            )
-
-            if start_date:
-                query = query.gte("created_at", start_date.isoformat())
-            if end_date:
-                query = query.lte("created_at", end_date.isoformat())
-
-            result = query.execute()
-
-            total_input = sum(row["input_tokens"] for row in result.data)
-            total_output = sum(row["output_tokens"] for row in result.data)
-            total_cost = sum(Decimal(str(row["cost_usd"])) for row in result.data)
-
-            # Group by model
-            by_model = {}
-            for row in result.data:
-                model = row["model"]
-                if model not in by_model:
-                    by_model[model] = {
-                        "input_tokens": 0,
-                        "output_tokens": 0,
-                        "cost_usd": Decimal("0"),
-                        "call_count": 0,
-                    }
-                by_model[model]["input_tokens"] += row["input_tokens"]
-                by_model[model]["output_tokens"] += row["output_tokens"]
-                by_model[model]["cost_usd"] += Decimal(str(row["cost_usd"]))
-                by_model[model]["call_count"] += 1
+            by_model: dict[str, dict] = {}
+
+            for usage_range in plan_usage_ranges(start_date, end_date):
+                if usage_range.granularity is None:
+                    rows = self._fetch_raw_usage(org_id, usage_range)
+                else:
+                    rows = self._fetch_rollup_usage(org_id, usage_range)
+
+                for row in rows:
+                    model = row["model"]
+                    if model not in by_model:
+                        by_model[model] = {
+                            "input_tokens": 0,
+                            "output_tokens": 0,
+                            "cost_usd": Decimal("0"),
+                            "call_count": 0,
+                        }
+                    by_model[model]["input_tokens"] += row["input_tokens"]
+                    by_model[model]["output_tokens"] += row["output_tokens"]
+                    by_model[model]["cost_usd"] += Decimal(str(row["cost_usd"]))
+                    by_model[model]["call_count"] += row.get("call_count", 1)
+
+            total_input = sum(m["input_tokens"] for m in by_model.values())
+            total_output = sum(m["output_tokens"] for m in by_model.values())
 
             return {
                 "total_input_tokens": total_input,
                 "total_output_tokens": total_output,
                 "total_tokens": total_input + total_output,
-                "total_cost_usd": total_cost,
-                "call_count": len(result.data),
+                "total_cost_usd": sum((m["cost_usd"] for m in by_model.values()), Decimal("0")),
+                "call_count": sum(m["call_count"] for m in by_model.values()),
                 "by_model": by_model,
             }
 
@@ -561,3 +701,72 @@ class BillingLedger:
                 "call_count": 0,
                 "by_model": {},
             }
+
+    def _fetch_rollup_usage(self, org_id: UUID, usage_range: UsageRange) -> list[dict]:
+        """Fetch rollup buckets whose start falls inside the range."""
+        query = self.supabase.table("token_usage_rollups").select(
+            "model, input_tokens, output_tokens, cost_usd, call_count"
+        ).eq(
+            "org_id", str(org_id)
+        ).eq(
+            "granularity", usage_range.granularity.value
+        )
+
+        if usage_range.start:
+            query = query.gte("bucket_start", usage_range.start.isoformat())
+        if usage_range.end:
+            query = query.lt("bucket_start", usage_range.end.isoformat())
+
+        return query.execute().data
+
+    def _fetch_raw_usage(self, org_id: UUID, usage_range: UsageRange) -> list[dict]:
+        """Fetch actual token records inside a (sub-hour) range."""
+        query = self.supabase.table("token_records").select(
+            "model, input_tokens, output_tokens, cost_usd"
+        ).eq(
+            "org_id", str(org_id)
+        ).eq(
+            "is_estimated", False
+        )
+
+        if usage_range.start:
+            query = query.gte("created_at", usage_range.start.isoformat())
+        if usage_range.end:
+            query = query.lt("created_at", usage_range.end.isoformat())
+
+        return query.execute().data
+
+    async def rebuild_usage_rollups(
+        self,
+        org_id: Optional[UUID] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Optional[int]:
+        """
+        Rebuild usage rollups from token records (backfill).
+
+        The range is widened to whole UTC days by the database function.
+
+        Args:
+            org_id: Organization ID (all organizations if omitted)
+            start_date: Start of period (optional)
+            end_date: End of period (optional)
+
+        Returns:
+            Number of rollup rows written, or None on failure
+        """
+        try:
+            result = self.supabase.rpc(
+                "rebuild_token_usage_rollups",
+                {
+                    "p_org_id": str(org_id) if org_id else None,
+                    "p_start": start_date.isoformat() if start_date else None,
+                    "p_end": end_date.isoformat() if end_date else None,
+                }
+            ).execute()
+
+            return int(result.data or 0)
+
+        except Exception as e:
+            logger.error(f"rebuild_usage_rollups failed: {e}")
+            return None
@@ -0,0 +1,123 @@
+"""
+Pricing Snapshot
+
+Immutable, versioned in-memory copy of the full model_pricing table.
+
+The snapshot holds every pricing row (current and historical) so lookups can
+be answered for any point in time via effective_from/effective_until. It is
+built once at startup and replaced wholesale by a background refresh; readers
+grab the current reference and never observe a partially updated table.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from app.billing.types import ModelPricing
+
+
+def _as_utc(value: datetime | str) -> datetime:
+    """Normalize DB/naive timestamps to aware UTC (naive values are UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass(frozen=True)
+class _PricingHistory:
+    """All pricing rows for one (model, provider), sorted by effective_from."""
+    effective_from: tuple[datetime, ...]
+    effective_until: tuple[Optional[datetime], ...]
+    pricing: tuple[ModelPricing, ...]
+
+    def at(self, when: datetime) -> Optional[ModelPricing]:
+        """Latest row effective at the given time."""
+        index = bisect_right(self.effective_from, when) - 1
+        if index < 0:
+            return None
+        until = self.effective_until[index]
+        if until is not None and until <= when:
+            return None
+        return self.pricing[index]
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """
+    Immutable pricing table.
+
+    Lookups are pure in-memory operations: O(log n) in the number of
+    historical rows for a model.
+    """
+    version: int
+    loaded_at: datetime
+    _entries: Mapping[tuple[str, str], _PricingHistory] = field(repr=False)
+
+    @classmethod
+    def build(
+        cls,
+        pricing_rows: Iterable[ModelPricing],
+        version: int,
+    ) -> PricingSnapshot:
+        """
+        Build a snapshot from pricing rows.
+
+        Args:
+            pricing_rows: Every model_pricing row (any effective range)
+            version: Monotonic snapshot version
+
+        Returns:
+            PricingSnapshot
+        """
+        grouped: dict[tuple[str, str], list[ModelPricing]] = {}
+        for pricing in pricing_rows:
+            grouped.setdefault((pricing.model, pricing.provider.value), []).append(pricing)
+
+        entries = {}
+        for key, rows in grouped.items():
+            rows.sort(key=lambda p: _as_utc(p.effective_from))
+            entries[key] = _PricingHistory(
+                effective_from=tuple(_as_utc(p.effective_from) for p in rows),
+                effective_until=tuple(
+                    _as_utc(p.effective_until) if p.effective_until else None
+                    for p in rows
+                ),
+                pricing=tuple(rows),
+            )
+
+        return cls(
+            version=version,
+            loaded_at=datetime.now(timezone.utc),
+            _entries=MappingProxyType(entries),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(
+        self,
+        model: str,
+        provider: str,
+        at: Optional[datetime] = None,
+    ) -> Optional[ModelPricing]:
+        """
+        Get pricing effective at a point in time.
+
+        Args:
+            model: Model name
+            provider: Provider value
+            at: Point in time (defaults to now)
+
+        Returns:
+            ModelPricing or None if no row is effective
+        """
+        history = self._entries.get((model, provider))
+        if history is None:
+            return None
+        return history.at(_as_utc(at) if at else datetime.now(timezone.utc))
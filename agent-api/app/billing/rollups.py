@@ -0,0 +1,149 @@
+"""
+Usage Rollups
+
+Token usage is aggregated into hourly and daily buckets by the
+token_usage_rollups table (maintained by a trigger on token_records inserts).
+This module plans which bucket granularity to read for an arbitrary period so
+that usage summaries read O(buckets) rows instead of every token record:
+
+    [start .. next hour)        raw token_records (< 1 hour of rows)
+    [next hour .. next day)     hourly rollups
+    [next day .. last day)      daily rollups
+    [last day .. last hour)     hourly rollups
+    [last hour .. end]          raw token_records (< 1 hour of rows)
+
+Also provides the rebuild/backfill command:
+
+    python -m app.billing.rollups --org-id <uuid> --start 2026-01-01 --end 2026-02-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from app.billing.types import RollupGranularity
+
+
+@dataclass(frozen=True)
+class UsageRange:
+    """A half-open time range [start, end) read at a single granularity."""
+    start: Optional[datetime]  # None = unbounded
+    end: Optional[datetime]    # None = unbounded
+    granularity: Optional[RollupGranularity]  # None = raw token_records
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Normalize to an aware UTC datetime (naive values are assumed UTC)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _floor(value: datetime, granularity: RollupGranularity) -> datetime:
+    """Truncate to the start of the containing bucket."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == RollupGranularity.DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def _ceil(value: datetime, granularity: RollupGranularity) -> datetime:
+    """Round up to the next bucket boundary (identity if already aligned)."""
+    floored = _floor(value, granularity)
+    if floored == value:
+        return value
+    step = timedelta(days=1) if granularity == RollupGranularity.DAY else timedelta(hours=1)
+    return floored + step
+
+
+def plan_usage_ranges(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> list[UsageRange]:
+    """
+    Split a reporting period into rollup-aligned ranges.
+
+    Args:
+        start_date: Start of period, inclusive (optional)
+        end_date: End of period, inclusive (optional)
+
+    Returns:
+        Non-overlapping ranges covering exactly the requested period
+    """
+    start = _as_utc(start_date) if start_date else None
+    # Postgres timestamps have microsecond resolution, so an inclusive end
+    # is the same as an exclusive end one microsecond later.
+    end = _as_utc(end_date) + timedelta(microseconds=1) if end_date else None
+
+    ranges: list[UsageRange] = []
+
+    def add(a: Optional[datetime], b: Optional[datetime], granularity: Optional[RollupGranularity]):
+        if a is not None and b is not None and a >= b:
+            return
+        ranges.append(UsageRange(start=a, end=b, granularity=granularity))
+
+    if start is not None and end is not None and start >= end:
+        return ranges
+
+    hour_start = _ceil(start, RollupGranularity.HOUR) if start else None
+    day_start = _ceil(start, RollupGranularity.DAY) if start else None
+    day_end = _floor(end, RollupGranularity.DAY) if end else None
+    hour_end = _floor(end, RollupGranularity.HOUR) if end else None
+
+    if day_start is None or day_end is None or day_start <= day_end:
+        if start is not None:
+            add(start, hour_start, None)
+            add(hour_start, day_start, RollupGranularity.HOUR)
+        add(day_start, day_end, RollupGranularity.DAY)
+        if end is not None:
+            add(day_end, hour_end, RollupGranularity.HOUR)
+            add(hour_end, end, None)
+    elif hour_start <= hour_end:
+        add(start, hour_start, None)
+        add(hour_start, hour_end, RollupGranularity.HOUR)
+        add(hour_end, end, None)
+    else:
+        add(start, end, None)
+
+    return ranges
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Rebuild usage rollups from token_records (backfill command)."""
+    parser = argparse.ArgumentParser(
+        description="Rebuild token usage rollups from token_records",
+    )
+    parser.add_argument("--org-id", type=UUID, default=None, help="Only rebuild this organization")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="ISO start (widened to UTC day)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="ISO end (widened to UTC day)")
+    args = parser.parse_args(argv)
+
+    from supabase import create_client
+
+    from app.billing.ledger import BillingLedger
+    from app.config import get_settings
+
+    settings = get_settings()
+    ledger = BillingLedger(
+        create_client(settings.supabase_url, settings.supabase_service_role_key)
+    )
+    rows = asyncio.run(ledger.rebuild_usage_rollups(
+        org_id=args.org_id,
+        start_date=args.start,
+        end_date=args.end,
+    ))
+    if rows is None:
+        print("Rollup rebuild failed")
+        return 1
+
+    print(f"Rebuilt {rows} rollup rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,21 +1,21 @@
 """
-Token Counter with Multi-Level Caching
+Token Counter with Preloaded Pricing
 
-Implements token counting with a hierarchical cache:
-1. Memory (LRU) - Fastest, per-process
-2. Redis - Shared across processes
-3. Database - Persistent, source of truth
+Implements token counting and costing with:
+1. Pricing snapshot - Full model_pricing table held in memory, loaded once
+   and swapped atomically by a background refresh (never on the hot path)
+2. Memory token-count cache - For repeated similar requests (5 minutes)
 
 Cache Strategy:
-- Pricing: Cache for 1 hour (rarely changes)
+- Pricing: Versioned snapshot, refreshed every pricing_refresh_interval
 - Token counts: Cache for 5 minutes (for repeated similar requests)
 - Balances: Always fresh from DB (critical for billing)
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import json
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -30,6 +30,7 @@ from app.billing.types import (
     PricingNotFoundError,
 )
 from app.billing.tokenizer import MultiProviderTokenizer, get_tokenizer
+from app.billing.pricing import PricingSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -90,24 +91,25 @@ class TokenCounter:
     def __init__(
         self,
         supabase: Any,
-        redis_client: Optional[Any] = None,
-        pricing_cache_ttl: int = 3600,  # 1 hour
+        pricing_refresh_interval: int = 300,  # 5 minutes
     ):
         """
         Initialize token counter.
 
         Args:
             supabase: Supabase client for DB operations
-            redis_client: Optional Redis client for distributed cache
-            pricing_cache_ttl: Pricing cache TTL in seconds
+            pricing_refresh_interval: Seconds between pricing snapshot refreshes
         """
         self.supabase = supabase
-        self.redis = redis_client
-        self.pricing_cache_ttl = pricing_cache_ttl
+        self.pricing_refresh_interval = pricing_refresh_interval
         self.tokenizer = get_tokenizer()
 
+        # Pricing snapshot (swapped atomically, never mutated)
+        self._pricing_snapshot: Optional[PricingSnapshot] = None
+        self._snapshot_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
         # In-memory caches
-        self._pricing_cache: dict[tuple[str, str], tuple[ModelPricing, datetime]] = {}
         self._token_cache: dict[str, tuple[int, datetime]] = {}
 
     def _cache_key(self, text: str, model: str) -> str:
@@ -116,25 +118,70 @@ class TokenCounter:
         text_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
         return f"tokens:{model}:{text_hash}"
 
+    @property
+    def pricing_snapshot(self) -> Optional[PricingSnapshot]:
+        """Current pricing snapshot (None until first load)."""
+        return self._pricing_snapshot
+
+    async def load_pricing_snapshot(self) -> PricingSnapshot:
+        """
+        Load the full model_pricing table and swap in a new snapshot.
+
+        On failure the current snapshot is kept; if there is none yet, a
+        snapshot of DEFAULT_PRICING is installed so lookups never block on
+        the database again until the next refresh.
+
+        Returns:
+            The current PricingSnapshot after the load attempt
+        """
+        async with self._snapshot_lock:
+            return await self._reload_snapshot()
+
+    async def _reload_snapshot(self) -> PricingSnapshot:
+        """Load a new snapshot; caller must hold _snapshot_lock."""
+        current = self._pricing_snapshot
+        version = (current.version + 1) if current else 1
+
+        try:
+            result = self.supabase.table("model_pricing").select("*").execute()
+            snapshot = PricingSnapshot.build(
+                (ModelPricing.from_db_row(row) for row in result.data),
+                version=version,
+            )
+            self._pricing_snapshot = snapshot
+            logger.info(
+                f"Loaded pricing snapshot v{snapshot.version} "
+                f"with {len(snapshot)} models"
+            )
+        except Exception as e:
+            logger.error(f"Failed to load pricing snapshot: {e}")
+            if current is None:
+                self._pricing_snapshot = PricingSnapshot.build(
+                    DEFAULT_PRICING.values(), version=0
+                )
+
+        return self._pricing_snapshot
+
     async def get_pricing(
         self,
         model: str,
         provider: Provider = Provider.OPENAI,
         use_fallback: bool = True,
+        at: Optional[datetime] = None,
     ) -> ModelPricing:
         """
-        Get pricing for a model with caching.
+        Get pricing for a model from the in-memory snapshot.
 
-        Cache hierarchy:
-        1. Memory cache (check TTL)
-        2. Redis cache (if available)
-        3. Database lookup
-        4. Default/fallback pricing
+        Lookup order:
+        1. Pricing snapshot (loaded on first use if not preloaded)
+        2. Default pricing
+        3. Fallback pricing
 
         Args:
             model: Model name
             provider: LLM provider
             use_fallback: Whether to use fallback pricing if not found
+            at: Price as of this time (defaults to now)
 
         Returns:
             ModelPricing object
@@ -142,80 +189,23 @@ class TokenCounter:
         Raises:
             PricingNotFoundError: If pricing not found and use_fallback=False
         """
-        cache_key = (model, provider.value)
-
-        # Check memory cache
-        if cache_key in self._pricing_cache:
-            pricing, cached_at = self._pricing_cache[cache_key]
-            if datetime.utcnow() - cached_at < timedelta(seconds=self.pricing_cache_ttl):
-                return pricing
-
-        # Check Redis cache
-        if self.redis:
-            try:
-                redis_key = f"pricing:{model}:{provider.value}"
-                cached = await self.redis.get(redis_key)
-                if cached:
-                    data = json.loads(cached)
-                    pricing = ModelPricing(
-                        model=data["model"],
-                        provider=Provider(data["provider"]),
-                        input_price_per_million=Decimal(data["input_price_per_million"]),
-                        output_price_per_million=Decimal(data["output_price_per_million"]),
-                        effective_from=datetime.fromisoformat(data["effective_from"]),
-                    )
-                    self._pricing_cache[cache_key] = (pricing, datetime.utcnow())
-                    return pricing
-            except Exception as e:
-                logger.warning(f"Redis cache error: {e}")
-
-        # Database lookup
-        try:
-            result = self.supabase.table("model_pricing").select("*").eq(
-                "model", model
-            ).eq(
-                "provider", provider.value
-            ).lte(
-                "effective_from", datetime.utcnow().isoformat()
-            ).or_(
-                "effective_until.is.null,effective_until.gt." + datetime.utcnow().isoformat()
-            ).order(
-                "effective_from", desc=True
-            ).limit(1).execute()
-
-            if result.data:
-                pricing = ModelPricing.from_db_row(result.data[0])
-
-                # Cache in memory
-                self._pricing_cache[cache_key] = (pricing, datetime.utcnow())
-
-                # Cache in Redis
-                if self.redis:
-                    try:
-                        redis_key = f"pricing:{model}:{provider.value}"
-                        await self.redis.setex(
-                            redis_key,
-                            self.pricing_cache_ttl,
-                            json.dumps({
-                                "model": pricing.model,
-                                "provider": pricing.provider.value,
-                                "input_price_per_million": str(pricing.input_price_per_million),
-                                "output_price_per_million": str(pricing.output_price_per_million),
-                                "effective_from": pricing.effective_from.isoformat(),
-                            })
-                        )
-                    except Exception as e:
-                        logger.warning(f"Redis cache write error: {e}")
-
-                return pricing
-        except Exception as e:
-            logger.warning(f"Database pricing lookup failed: {e}")
+        snapshot = self._pricing_snapshot
+        if snapshot is None:
+            async with self._snapshot_lock:
+                # Re-check: a concurrent first caller may have loaded it
+                # while we waited for the lock
+                snapshot = self._pricing_snapshot
+                if snapshot is None:
+                    snapshot = await self._reload_snapshot()
+
+        pricing = snapshot.lookup(model, provider.value, at)
+        if pricing:
+            return pricing
 
         # Try default pricing
+        cache_key = (model, provider.value)
         if cache_key in DEFAULT_PRICING:
-            pricing = DEFAULT_PRICING[cache_key]
-            self._pricing_cache[cache_key] = (pricing, datetime.utcnow())
-            return pricing
+            return DEFAULT_PRICING[cache_key]
 
         # Use fallback or raise
         if use_fallback:
@@ -361,23 +351,38 @@ class TokenCounter:
         return count
 
     def clear_cache(self):
-        """Clear all caches."""
-        self._pricing_cache.clear()
+        """Clear token count cache (the pricing snapshot is kept)."""
         self._token_cache.clear()
         logger.info("Token counter caches cleared")
 
     async def refresh_pricing_cache(self):
-        """Refresh pricing cache from database."""
-        try:
-            result = self.supabase.table("model_pricing").select("*").or_(
-                "effective_until.is.null,effective_until.gt." + datetime.utcnow().isoformat()
-            ).execute()
-
-            for row in result.data:
-                pricing = ModelPricing.from_db_row(row)
-                cache_key = (pricing.model, pricing.provider.value)
-                self._pricing_cache[cache_key] = (pricing, datetime.utcnow())
-
-            logger.info(f"Refreshed pricing cache with {len(result.data)} entries")
-        except Exception as e:
-            logger.error(f"Failed to refresh pricing cache: {e}")
+        """Refresh pricing snapshot from database."""
+        await self.load_pricing_snapshot()
+
+    async def start_pricing_refresh(self):
+        """Load the pricing snapshot and start the background refresh loop."""
+        if self._refresh_task:
+            return
+        await self.load_pricing_snapshot()
+        self._refresh_task = asyncio.create_task(self._pricing_refresh_loop())
+
+    async def stop_pricing_refresh(self):
+        """Stop the background refresh loop."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _pricing_refresh_loop(self):
+        """Periodically rebuild and swap the pricing snapshot."""
+        while True:
+            try:
+                await asyncio.sleep(self.pricing_refresh_interval)
+                await self.load_pricing_snapshot()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pricing refresh loop error: {e}")
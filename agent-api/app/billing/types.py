@@ -52,6 +52,12 @@ class ReconciliationStatus(str, Enum):
     DISPUTED = "DISPUTED"
 
 
+class RollupGranularity(str, Enum):
+    """Usage rollup bucket sizes."""
+    HOUR = "hour"
+    DAY = "day"
+
+
 # =============================================================================
 # Token Types
 # =============================================================================
@@ -197,6 +203,7 @@ class BillingResult:
             new_balance_usd=Decimal(str(row["new_balance_usd"])) if row.get("new_balance_usd") else None,
             error_code=row.get("error_code"),
             error_message=row.get("error_message"),
+            is_idempotent_replay=bool(row.get("is_idempotent_replay")),
         )
 
 
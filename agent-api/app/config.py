@@ -42,6 +42,24 @@ class Settings(BaseSettings):
     s3_region: str = "ch-gva-2"
     s3_access_key: str | None = None
     s3_secret_key: str | None = None
+    s3_blob_prefix: str = "blobs/"  # Content-addressed workspace blobs
+    s3_blob_gc_grace_seconds: int = 86400
+    s3_blob_gc_interval_seconds: int = 6 * 3600
+    # Local hash caches of synced directories (kept outside them)
+    s3_workspace_state_dir: str = "/tmp/swissbrain-workspace-state"
+
+    # Sandbox package layer cache (tarballs in the workspace bucket)
+    sandbox_layer_cache_prefix: str = "layer-cache/"
+    sandbox_layer_max_age_days: int = 7
+    # E2B template ID -> packages baked into it, e.g. {"py-data": ["pandas", "numpy"]}
+    sandbox_prebaked_templates: dict[str, list[str]] = {}
+
+    # Live cgroup sampling of sandboxes (see sandbox/resource_sampler.py)
+    sandbox_sample_interval_seconds: float = 5.0
+    sandbox_enforce_limits: bool = True
+
+    # Dev server port bitmap shared by the workers on a host (None = in memory)
+    dev_server_port_state_path: str | None = "/tmp/swissbrain-dev-ports.json"
 
     # Worker Settings
     worker_job_timeout: int = 5  # BRPOP timeout seconds
@@ -50,6 +68,7 @@ class Settings(BaseSettings):
     # K8s Configuration
     k8s_namespace: str = "agents"
     k8s_in_cluster: bool = True
+    k8s_pod_pool_enabled: bool = False  # Run short steps in pre-warmed executor pods
 
     # CORS - Allow all origins (API is protected by auth tokens)
     cors_origins: list[str] = ["*"]
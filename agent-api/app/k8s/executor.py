@@ -2,12 +2,21 @@
 import logging
 import time
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 from kubernetes import client
 from kubernetes.client.rest import ApiException
 from app.k8s.client import get_k8s_clients
+from app.k8s.pod_pool import ExecutorPodPool, get_executor_pod_pool
+from app.k8s.watch import (
+    follow_pod_logs,
+    pod_exit_code,
+    pod_finished,
+    pod_started,
+    wait_for_pod,
+)
 from app.storage.s3_workspace import S3Workspace
 from app.config import get_settings
+from app.sandbox.resource_limits import get_user_tier
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +26,34 @@ class K8sExecutor:
     Spawns Kubernetes jobs for isolated tool execution.
 
     Infrastructure ready but not used yet (tools remain mocked in Phase 2B.1).
+
+    Pod state is followed with the watch API and logs are streamed, both in
+    worker threads, so waiting never blocks the event loop or polls the
+    API server.
+
+    When settings.k8s_pod_pool_enabled is set, commands run over exec in a
+    pre-warmed per-tenant pod (see ExecutorPodPool) and only fall back to a
+    one-off Job if the pool cannot provide one.
     """
 
-    def __init__(self, run_id: str, user_id: str, step_id: str):
+    # Images for execute_code (also used by the pod pool)
+    CODE_IMAGES = {
+        "python": "python:3.11-slim",
+        "javascript": "node:20-slim",
+        "typescript": "node:20-slim",
+        "bash": "bash:latest",
+        "ruby": "ruby:3.2-slim",
+        "go": "golang:1.21-alpine"
+    }
+    SHELL_IMAGE = "alpine:latest"
+
+    def __init__(
+        self,
+        run_id: str,
+        user_id: str,
+        step_id: str,
+        pod_pool: Optional[ExecutorPodPool] = None
+    ):
         """
         Initialize K8s executor.
 
@@ -27,6 +61,8 @@ class K8sExecutor:
             run_id: Agent run ID
             user_id: User ID
             step_id: Step ID
+            pod_pool: Executor pod pool (defaults to the shared pool when
+                settings.k8s_pod_pool_enabled)
         """
         self.run_id = run_id
         self.user_id = user_id
@@ -35,18 +71,35 @@ class K8sExecutor:
         self.workspace = S3Workspace(user_id, run_id)
         self.settings = get_settings()
         self.namespace = self.settings.k8s_namespace
+        self.tier = get_user_tier(user_id)
+        self.pod_pool = pod_pool
+        if self.pod_pool is None and self.settings.k8s_pod_pool_enabled:
+            self.pod_pool = get_executor_pod_pool()
 
-    async def execute_shell(self, command: str, timeout: int = 300) -> Dict[str, Any]:
+    async def execute_shell(
+        self,
+        command: str,
+        timeout: int = 300,
+        on_output: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Execute shell command in isolated K8s job.
 
         Args:
             command: Shell command to execute
             timeout: Maximum execution time in seconds
+            on_output: Called on the event loop with each chunk of output
 
         Returns:
             Dictionary with stdout, stderr, exit_code
         """
+        if self.pod_pool:
+            result = await self._execute_in_pool(
+                self.SHELL_IMAGE, ["/bin/sh", "-c", command], timeout, on_output
+            )
+            if result is not None:
+                return result
+
         job_name = f"agent-shell-{self.run_id[:8]}-{self.step_id[:8]}"
 
         # Create job manifest
@@ -54,7 +107,8 @@ class K8sExecutor:
 
         try:
             # Create job
-            self.batch_client.create_namespaced_job(
+            await asyncio.to_thread(
+                self.batch_client.create_namespaced_job,
                 namespace=self.namespace,
                 body=manifest
             )
@@ -67,7 +121,7 @@ class K8sExecutor:
 
             # Wait for completion
             exit_code, stdout, stderr = await self._wait_for_pod_completion(
-                pod_name, timeout
+                pod_name, timeout, on_output
             )
 
             return {
@@ -88,7 +142,8 @@ class K8sExecutor:
         self,
         language: str,
         code: str,
-        timeout: int = 120
+        timeout: int = 120,
+        on_output: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Execute code in isolated K8s job.
@@ -97,10 +152,23 @@ class K8sExecutor:
             language: Programming language (python, javascript, etc.)
             code: Code to execute
             timeout: Maximum execution time in seconds
+            on_output: Called on the event loop with each chunk of output
 
         Returns:
             Dictionary with result, execution_time_ms, error
         """
+        if self.pod_pool:
+            start = time.monotonic()
+            result = await self._execute_in_pool(
+                self._code_image(language), self._code_command(language, code), timeout, on_output
+            )
+            if result is not None:
+                return {
+                    "result": result["stdout"],
+                    "error": result["stderr"] if result["exit_code"] != 0 else None,
+                    "execution_time_ms": int((time.monotonic() - start) * 1000)
+                }
+
         job_name = f"agent-code-{self.run_id[:8]}-{self.step_id[:8]}"
 
         # Create job manifest
@@ -108,7 +176,8 @@ class K8sExecutor:
 
         try:
             # Create job
-            self.batch_client.create_namespaced_job(
+            await asyncio.to_thread(
+                self.batch_client.create_namespaced_job,
                 namespace=self.namespace,
                 body=manifest
             )
@@ -120,7 +189,7 @@ class K8sExecutor:
                 raise TimeoutError(f"Job pod not created within {timeout}s")
 
             exit_code, stdout, stderr = await self._wait_for_pod_completion(
-                pod_name, timeout
+                pod_name, timeout, on_output
             )
 
             return {
@@ -136,6 +205,44 @@ class K8sExecutor:
         finally:
             await self._cleanup_job(job_name)
 
+    async def _execute_in_pool(
+        self,
+        image: str,
+        command: list,
+        timeout: int,
+        on_output: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run a command in a pooled pod (None if no pod could be leased)"""
+        try:
+            pod = await self.pod_pool.acquire(self.user_id, self.tier, image)
+        except Exception as e:
+            logger.warning(f"Executor pod pool unavailable, falling back to a Job: {e}")
+            return None
+
+        healthy = True
+        try:
+            result = await self.pod_pool.exec(pod, command, timeout, on_output)
+            # Killed by the in-pod timeout: the pod may hold stray processes
+            healthy = result["exit_code"] not in (124, 137)
+            return result
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            await self.pod_pool.release(pod, healthy=healthy)
+
+    def _code_image(self, language: str) -> str:
+        return self.CODE_IMAGES.get(language.lower(), "python:3.11-slim")
+
+    def _code_command(self, language: str, code: str) -> list:
+        # Language-specific commands
+        if language.lower() == "python":
+            return ["python", "-c", code]
+        elif language.lower() in ["javascript", "typescript"]:
+            return ["node", "-e", code]
+        else:
+            return ["/bin/sh", "-c", code]
+
     def _create_shell_job_manifest(
         self,
         job_name: str,
@@ -199,25 +306,8 @@ class K8sExecutor:
         timeout: int
     ) -> Dict[str, Any]:
         """Create K8s job manifest for code execution"""
-        # Language-specific images
-        images = {
-            "python": "python:3.11-slim",
-            "javascript": "node:20-slim",
-            "typescript": "node:20-slim",
-            "bash": "bash:latest",
-            "ruby": "ruby:3.2-slim",
-            "go": "golang:1.21-alpine"
-        }
-
-        image = images.get(language.lower(), "python:3.11-slim")
-
-        # Language-specific commands
-        if language.lower() == "python":
-            cmd = ["python", "-c", code]
-        elif language.lower() in ["javascript", "typescript"]:
-            cmd = ["node", "-e", code]
-        else:
-            cmd = ["/bin/sh", "-c", code]
+        image = self._code_image(language)
+        cmd = self._code_command(language, code)
 
         return {
             "apiVersion": "batch/v1",
@@ -261,73 +351,91 @@ class K8sExecutor:
 
     async def _wait_for_job_pod(self, job_name: str, timeout: int) -> Optional[str]:
         """Wait for job's pod to be created"""
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            try:
-                pods = self.core_client.list_namespaced_pod(
-                    namespace=self.namespace,
-                    label_selector=f"job-name={job_name}"
-                )
-
-                if pods.items:
-                    pod_name = pods.items[0].metadata.name
-                    logger.info(f"Job pod created: {pod_name}")
-                    return pod_name
-
-            except ApiException as e:
-                logger.error(f"Error listing pods: {e}")
-
-            await asyncio.sleep(1)
+        try:
+            pod = await asyncio.to_thread(
+                wait_for_pod,
+                self.core_client,
+                self.namespace,
+                lambda pod: True,
+                timeout,
+                label_selector=f"job-name={job_name}",
+            )
+        except ApiException as e:
+            logger.error(f"Error watching pods: {e}")
+            return None
 
-        return None
+        if pod is None:
+            return None
+        logger.info(f"Job pod created: {pod.metadata.name}")
+        return pod.metadata.name
 
     async def _wait_for_pod_completion(
         self,
         pod_name: str,
-        timeout: int
+        timeout: int,
+        on_output: Optional[Callable[[str], None]] = None
     ) -> tuple[int, str, str]:
-        """Wait for pod to complete and get logs"""
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            try:
-                pod = self.core_client.read_namespaced_pod(
-                    name=pod_name,
-                    namespace=self.namespace
-                )
-
-                phase = pod.status.phase
-
-                if phase == "Succeeded":
-                    logs = self.core_client.read_namespaced_pod_log(
-                        name=pod_name,
-                        namespace=self.namespace
-                    )
-                    logger.info(f"Pod {pod_name} succeeded")
-                    return 0, logs, ""
-
-                elif phase == "Failed":
-                    logs = self.core_client.read_namespaced_pod_log(
-                        name=pod_name,
-                        namespace=self.namespace
-                    )
-                    logger.warning(f"Pod {pod_name} failed")
-                    return 1, "", logs
-
-            except ApiException as e:
-                logger.error(f"Error reading pod status: {e}")
-
-            await asyncio.sleep(1)
-
-        # Timeout
-        logger.error(f"Pod {pod_name} timed out after {timeout}s")
-        raise TimeoutError(f"Pod {pod_name} execution timeout")
+        """Wait for pod to complete, streaming its logs as they are written"""
+        deadline = time.monotonic() + timeout
+        field_selector = f"metadata.name={pod_name}"
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.monotonic())
+
+        # Logs can only be followed once the container has started
+        pod = await asyncio.to_thread(
+            wait_for_pod, self.core_client, self.namespace, pod_started,
+            remaining(), field_selector=field_selector,
+        )
+        if pod is None:
+            logger.error(f"Pod {pod_name} timed out after {timeout}s")
+            raise TimeoutError(f"Pod {pod_name} execution timeout")
+
+        loop = asyncio.get_running_loop()
+        on_chunk = None
+        if on_output:
+            def on_chunk(chunk: str):
+                loop.call_soon_threadsafe(on_output, chunk)
+
+        logs = None
+        try:
+            # The follow stream ends when the container exits
+            logs = await asyncio.to_thread(
+                follow_pod_logs, self.core_client, self.namespace, pod_name,
+                on_chunk, remaining(),
+            )
+        except Exception as e:
+            logger.warning(f"Log stream for pod {pod_name} interrupted: {e}")
+
+        if not pod_finished(pod):
+            pod = await asyncio.to_thread(
+                wait_for_pod, self.core_client, self.namespace, pod_finished,
+                remaining(), field_selector=field_selector,
+            )
+        if pod is None:
+            logger.error(f"Pod {pod_name} timed out after {timeout}s")
+            raise TimeoutError(f"Pod {pod_name} execution timeout")
+
+        if logs is None:
+            logs = await asyncio.to_thread(
+                self.core_client.read_namespaced_pod_log,
+                name=pod_name,
+                namespace=self.namespace
+            )
+
+        exit_code = pod_exit_code(pod)
+        if pod.status.phase == "Succeeded":
+            logger.info(f"Pod {pod_name} succeeded")
+            return 0, logs, ""
+
+        logger.warning(f"Pod {pod_name} failed with exit code {exit_code}")
+        return exit_code or 1, "", logs
 
     async def _cleanup_job(self, job_name: str):
         """Delete job (pods will be cleaned up by propagation policy)"""
         try:
-            self.batch_client.delete_namespaced_job(
+            await asyncio.to_thread(
+                self.batch_client.delete_namespaced_job,
                 name=job_name,
                 namespace=self.namespace,
                 propagation_policy="Background"
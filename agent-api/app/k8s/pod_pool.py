@@ -0,0 +1,487 @@
+"""
+Pre-warmed executor pod pool
+
+Short shell/code steps are dominated by Job scheduling and image pulls, so
+K8sExecutor can instead run them over exec in long-lived pods:
+- Pods are keyed by (tenant, tier, image) and never shared across tenants;
+  each carries the tier's requests/limits from sandbox/resource_limits.py
+- A lease hands out an idle pod (or creates one and waits for Running via
+  the watch API); on release /workspace and /tmp are wiped so the next
+  run of the same tenant starts clean
+- Pods are recycled after max_uses commands, after a failed cleanup, and
+  when idle for longer than max_idle_seconds
+- Commands run with `timeout` inside the pod and a client-side deadline
+- Pods are labelled with the worker host and a per-process instance ID; on
+  startup the pool deletes pods a previous process on the same host left
+  behind, and activeDeadlineSeconds bounds pods whose worker never returns
+- Exec output is passed to on_output chunk by chunk as the pod writes it
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes.stream import stream
+
+from app.config import get_settings
+from app.k8s.client import get_k8s_clients
+from app.k8s.watch import pod_started, wait_for_pod
+from app.sandbox.resource_limits import get_tier_limits
+from app.sandbox.resource_sampler import ResourceSampler, get_resource_sampler
+
+logger = logging.getLogger(__name__)
+
+POOL_LABEL = "agent-executor-pool"
+
+CLEANUP_COMMAND = "rm -rf /workspace/* /workspace/.[!.]* /tmp/* 2>/dev/null; true"
+
+PoolKey = Tuple[str, str, str]  # (tenant, tier, image)
+
+
+def worker_label() -> str:
+    """Label-safe name of this worker host (the pod name in a cluster)"""
+    host = re.sub(r"[^A-Za-z0-9_.-]", "-", socket.gethostname())[:63].strip("-_.")
+    return host or "unknown"
+
+
+def tenant_label(user_id: str) -> str:
+    """Label-safe tenant identifier (user IDs are not exposed in labels)"""
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class PooledPod:
+    """A long-lived executor pod"""
+    name: str
+    key: PoolKey
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    in_use: bool = False
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class ExecutorPodPool:
+    """
+    Per-tenant pools of long-lived executor pods that accept commands over exec.
+    """
+
+    def __init__(
+        self,
+        core_client: Any = None,
+        namespace: Optional[str] = None,
+        max_uses: int = 50,
+        max_idle_seconds: int = 300,
+        max_pods_per_tenant: int = 4,
+        startup_timeout: int = 120,
+        max_lifetime_seconds: int = 3600,
+        sampler: Optional[ResourceSampler] = None,
+    ):
+        """
+        Initialize pod pool.
+
+        Args:
+            core_client: CoreV1Api (defaults to the shared client)
+            namespace: Namespace for pool pods (defaults to settings)
+            max_uses: Commands a pod runs before it is replaced
+            max_idle_seconds: Idle pods older than this are deleted
+            max_pods_per_tenant: Cap on pods (busy + idle) per tenant
+            startup_timeout: Seconds to wait for a new pod to run
+            max_lifetime_seconds: activeDeadlineSeconds of pool pods; pods
+                are retired at half this age so leases never hit it
+            sampler: Samples and enforces tier limits on pool pods whose
+                cgroup is visible on this node
+        """
+        self.core_client = core_client or get_k8s_clients()[1]
+        self.namespace = namespace or get_settings().k8s_namespace
+        self.max_uses = max_uses
+        self.max_idle_seconds = max_idle_seconds
+        self.max_pods_per_tenant = max_pods_per_tenant
+        self.startup_timeout = startup_timeout
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.sampler = sampler
+        self.worker = worker_label()
+        self.instance_id = uuid.uuid4().hex[:12]
+
+        self.pods: Dict[str, PooledPod] = {}
+        self.metrics = {"created": 0, "reused": 0, "recycled": 0, "reaped": 0, "orphans": 0}
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Condition(self._lock)
+        self._reaper: Optional[asyncio.Task] = None
+        self._deletions: Set[asyncio.Task] = set()
+
+    def _tenant_pods(self, tenant: str) -> List[PooledPod]:
+        return [pod for pod in self.pods.values() if pod.key[0] == tenant]
+
+    def _expired(self, pod: PooledPod) -> bool:
+        return pod.age_seconds > self.max_lifetime_seconds / 2
+
+    def pod_manifest(self, name: str, key: PoolKey) -> Dict[str, Any]:
+        """Pod spec for a pool pod: idle shell, tier resources, locked down"""
+        tenant, tier, image = key
+        limits = get_tier_limits(tier)
+        return {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {
+                "name": name,
+                "namespace": self.namespace,
+                "labels": {
+                    "app": POOL_LABEL,
+                    "tenant": tenant,
+                    "tier": limits.tier.value,
+                    "worker": self.worker,
+                    "pool-instance": self.instance_id,
+                },
+                "annotations": limits.network.to_kubernetes_annotations(),
+            },
+            "spec": {
+                "restartPolicy": "Never",
+                "activeDeadlineSeconds": self.max_lifetime_seconds,
+                "automountServiceAccountToken": False,
+                "enableServiceLinks": False,
+                "containers": [{
+                    "name": "executor",
+                    "image": image,
+                    "command": ["/bin/sh", "-c", "trap 'exit 0' TERM; while :; do sleep 3600 & wait; done"],
+                    "workingDir": "/workspace",
+                    "resources": limits.to_kubernetes_pod_spec(),
+                    "securityContext": {
+                        "allowPrivilegeEscalation": False,
+                        "capabilities": {"drop": ["ALL"]},
+                    },
+                    "volumeMounts": [
+                        {"name": "workspace", "mountPath": "/workspace"},
+                        {"name": "tmp", "mountPath": "/tmp"},
+                    ],
+                }],
+                "volumes": [
+                    {"name": "workspace", "emptyDir": {}},
+                    {"name": "tmp", "emptyDir": {
+                        "medium": "Memory",
+                        "sizeLimit": f"{limits.storage.tmpfs_size_bytes // (1024 * 1024)}Mi",
+                    }},
+                ],
+            },
+        }
+
+    @asynccontextmanager
+    async def lease(self, user_id: str, tier: str, image: str) -> AsyncIterator[PooledPod]:
+        """
+        Lease a pod for one command.
+
+        Args:
+            user_id: Tenant the pod is dedicated to
+            tier: Resource tier (see ResourceTier)
+            image: Container image
+        """
+        pod = await self.acquire(user_id, tier, image)
+        try:
+            yield pod
+        finally:
+            await self.release(pod)
+
+    async def acquire(self, user_id: str, tier: str, image: str) -> PooledPod:
+        """Take an idle pod for the key, creating one if the tenant has room"""
+        key = (tenant_label(user_id), get_tier_limits(tier).tier.value, image)
+        self.start()
+        deadline = time.monotonic() + self.startup_timeout
+        async with self._lock:
+            while True:
+                for pod in self.pods.values():
+                    if pod.key == key and not pod.in_use:
+                        pod.in_use = True
+                        self.metrics["reused"] += 1
+                        return pod
+
+                tenant_pods = self._tenant_pods(key[0])
+                if len(tenant_pods) < self.max_pods_per_tenant:
+                    break
+
+                # Make room with an idle pod of another key, else wait
+                idle = [pod for pod in tenant_pods if not pod.in_use]
+                if idle:
+                    await self._delete(min(idle, key=lambda p: p.last_used))
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No executor pod free for tenant {key[0]}")
+                try:
+                    await asyncio.wait_for(self._released.wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"No executor pod free for tenant {key[0]}")
+
+            pod = PooledPod(name=f"agent-exec-{uuid.uuid4().hex[:12]}", key=key, in_use=True)
+            self.pods[pod.name] = pod
+
+        try:
+            await self._create(pod)
+        except Exception:
+            async with self._lock:
+                self.pods.pop(pod.name, None)
+                self._released.notify_all()
+            raise
+        return pod
+
+    async def release(self, pod: PooledPod, healthy: bool = True):
+        """Return a pod: wipe it for reuse, or delete it when spent"""
+        pod.uses += 1
+        pod.last_used = time.monotonic()
+
+        recycle = not healthy or pod.uses >= self.max_uses or self._expired(pod)
+        if not recycle:
+            try:
+                result = await self.exec(pod, ["/bin/sh", "-c", CLEANUP_COMMAND], timeout=15)
+                recycle = result["exit_code"] != 0
+            except Exception as e:
+                logger.warning(f"Cleanup of executor pod {pod.name} failed: {e}")
+                recycle = True
+
+        async with self._lock:
+            if recycle:
+                self.metrics["recycled"] += 1
+                await self._delete(pod)
+            else:
+                pod.in_use = False
+            self._released.notify_all()
+
+    async def exec(
+        self,
+        pod: PooledPod,
+        command: List[str],
+        timeout: int = 300,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a command in a pod over exec.
+
+        Args:
+            pod: Leased pod
+            command: Command and arguments
+            timeout: Seconds before the command is killed
+            on_output: Called on the event loop with each chunk of stdout
+
+        Returns:
+            Dictionary with stdout, stderr, exit_code
+        """
+        wrapped = ["timeout", "-s", "KILL", str(timeout), *command]
+        loop = asyncio.get_running_loop()
+        on_chunk = None
+        if on_output:
+            def on_chunk(chunk: str):
+                loop.call_soon_threadsafe(on_output, chunk)
+
+        return await asyncio.to_thread(self._exec_blocking, pod.name, wrapped, timeout + 5, on_chunk)
+
+    def _exec_blocking(
+        self,
+        pod_name: str,
+        command: List[str],
+        deadline_seconds: float,
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        # stream() swaps ApiClient.request for the duration of the call, so
+        # each exec gets its own ApiClient instead of the shared one
+        with client.ApiClient() as api_client:
+            core = client.CoreV1Api(api_client)
+            response = stream(
+                core.connect_get_namespaced_pod_exec,
+                pod_name,
+                self.namespace,
+                container="executor",
+                command=command,
+                stdout=True,
+                stderr=True,
+                stdin=False,
+                tty=False,
+                _preload_content=False,
+            )
+            stdout, stderr = [], []
+            deadline = time.monotonic() + deadline_seconds
+            try:
+                while response.is_open() and time.monotonic() < deadline:
+                    response.update(timeout=1)
+                    if response.peek_stdout():
+                        chunk = response.read_stdout()
+                        stdout.append(chunk)
+                        if on_chunk:
+                            on_chunk(chunk)
+                    if response.peek_stderr():
+                        stderr.append(response.read_stderr())
+                timed_out = response.is_open()
+            finally:
+                response.close()
+
+            if timed_out:
+                return {"stdout": "".join(stdout), "stderr": "".join(stderr) + "\nTimed out", "exit_code": 124}
+            exit_code = response.returncode
+            return {
+                "stdout": "".join(stdout),
+                "stderr": "".join(stderr),
+                "exit_code": 1 if exit_code is None else exit_code,
+            }
+
+    async def prewarm(self, user_id: str, tier: str, image: str, count: int = 1):
+        """Start idle pods for a tenant ahead of its first command"""
+        pods = []
+        for _ in range(count):
+            try:
+                pods.append(await self.acquire(user_id, tier, image))
+            except Exception as e:
+                logger.warning(f"Failed to prewarm executor pod: {e}")
+                break
+        async with self._lock:
+            for pod in pods:
+                pod.in_use = False
+            self._released.notify_all()
+
+    async def _create(self, pod: PooledPod):
+        await asyncio.to_thread(
+            self.core_client.create_namespaced_pod,
+            namespace=self.namespace,
+            body=self.pod_manifest(pod.name, pod.key),
+        )
+        try:
+            running = await asyncio.to_thread(
+                wait_for_pod, self.core_client, self.namespace, pod_started,
+                self.startup_timeout, field_selector=f"metadata.name={pod.name}",
+            )
+            if running is None or running.status.phase != "Running":
+                raise TimeoutError(f"Executor pod {pod.name} did not start")
+        except BaseException:
+            # Also covers watch errors and cancellation: no lease owns the pod yet
+            await self._delete_pod(pod.name)
+            raise
+        self.metrics["created"] += 1
+        if self.sampler:
+            self.sampler.register_pod(pod.name, pod.key[1], running.metadata.uid)
+        logger.info(f"Started executor pod {pod.name} (tier={pod.key[1]}, image={pod.key[2]})")
+
+    async def _delete(self, pod: PooledPod):
+        """Forget a pod and delete it (caller holds the lock)"""
+        self.pods.pop(pod.name, None)
+        if self.sampler:
+            self.sampler.unregister(pod.name)
+        task = asyncio.create_task(self._delete_pod(pod.name))
+        self._deletions.add(task)
+        task.add_done_callback(self._deletions.discard)
+
+    async def _delete_pod(self, name: str):
+        try:
+            await asyncio.to_thread(
+                self.core_client.delete_namespaced_pod,
+                name=name,
+                namespace=self.namespace,
+                grace_period_seconds=0,
+            )
+            logger.info(f"Deleted executor pod {name}")
+        except ApiException as e:
+            if e.status != 404:
+                logger.warning(f"Failed to delete executor pod {name}: {e}")
+
+    async def reap_idle(self) -> int:
+        """Delete pods idle longer than max_idle_seconds or past half their lifetime"""
+        async with self._lock:
+            stale = [
+                pod for pod in self.pods.values()
+                if not pod.in_use
+                and (pod.idle_seconds > self.max_idle_seconds or self._expired(pod))
+            ]
+            for pod in stale:
+                await self._delete(pod)
+            self.metrics["reaped"] += len(stale)
+        return len(stale)
+
+    async def reap_orphans(self) -> int:
+        """Delete pool pods left by earlier processes on this worker host"""
+        selector = f"app={POOL_LABEL},worker={self.worker},pool-instance!={self.instance_id}"
+        pods = await asyncio.to_thread(
+            self.core_client.list_namespaced_pod,
+            namespace=self.namespace,
+            label_selector=selector,
+        )
+        names = [pod.metadata.name for pod in pods.items]
+        await asyncio.gather(*(self._delete_pod(name) for name in names))
+        if names:
+            logger.info(f"Deleted {len(names)} orphaned executor pods")
+        self.metrics["orphans"] += len(names)
+        return len(names)
+
+    async def _reap_loop(self):
+        try:
+            await self.reap_orphans()
+        except Exception as e:
+            logger.error(f"Executor pod orphan cleanup error: {e}")
+        while True:
+            await asyncio.sleep(max(self.max_idle_seconds / 4, 5))
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                logger.error(f"Executor pod reaper error: {e}")
+
+    def start(self):
+        """Start the orphan cleanup and idle reaper (done on first acquire)"""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def close(self):
+        """Stop the reaper and delete every pool pod"""
+        if self._reaper:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        names = list(self.pods)
+        self.pods.clear()
+        if self.sampler:
+            for name in names:
+                self.sampler.unregister(name)
+        await asyncio.gather(
+            *(self._delete_pod(name) for name in names),
+            *list(self._deletions),
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool size and lifecycle counters"""
+        return {
+            "pods": len(self.pods),
+            "in_use": sum(1 for pod in self.pods.values() if pod.in_use),
+            "tenants": len({pod.key[0] for pod in self.pods.values()}),
+            **self.metrics,
+        }
+
+
+_pod_pool: Optional[ExecutorPodPool] = None
+
+
+def get_executor_pod_pool() -> ExecutorPodPool:
+    """Get the per-process executor pod pool"""
+    global _pod_pool
+    if _pod_pool is None:
+        _pod_pool = ExecutorPodPool(sampler=get_resource_sampler())
+    return _pod_pool
+
+
+async def close_executor_pod_pool():
+    """Delete all pool pods"""
+    global _pod_pool
+    if _pod_pool:
+        await _pod_pool.close()
+        _pod_pool = None
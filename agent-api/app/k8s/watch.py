@@ -0,0 +1,161 @@
+"""
+Kubernetes watch helpers
+
+Replace per-second polling of pod state with the watch API:
+- List once to get the current state and a resourceVersion, then watch
+  from that version so no event between list and watch is missed
+- When the server closes the watch (timeoutSeconds, connection drop) it is
+  resumed from the last seen resourceVersion; a 410 Gone relists
+- Pod logs are followed as a stream and handed out chunk by chunk
+
+The kubernetes client is blocking, so these functions are meant to run in
+a worker thread (asyncio.to_thread); they never touch the event loop.
+"""
+import codecs
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_POD_PHASES = ("Succeeded", "Failed")
+
+
+def wait_for_pod(
+    core_client: Any,
+    namespace: str,
+    predicate: Callable[[Any], bool],
+    timeout: float,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+) -> Optional[Any]:
+    """
+    Block until a pod matching the selectors satisfies predicate.
+
+    Args:
+        core_client: CoreV1Api
+        namespace: Namespace to watch
+        predicate: Called with each V1Pod seen; True ends the wait
+        timeout: Seconds to wait in total
+        label_selector: Label selector for the pods
+        field_selector: Field selector for the pods
+
+    Returns:
+        The matching pod, or None on timeout
+    """
+    deadline = time.monotonic() + timeout
+    selectors = {}
+    if label_selector:
+        selectors["label_selector"] = label_selector
+    if field_selector:
+        selectors["field_selector"] = field_selector
+
+    resource_version = None
+    while time.monotonic() < deadline:
+        if resource_version is None:
+            pods = core_client.list_namespaced_pod(namespace=namespace, **selectors)
+            for pod in pods.items:
+                if predicate(pod):
+                    return pod
+            resource_version = pods.metadata.resource_version
+
+        remaining = max(1, int(deadline - time.monotonic()))
+        watcher = watch.Watch()
+        try:
+            for event in watcher.stream(
+                core_client.list_namespaced_pod,
+                namespace=namespace,
+                resource_version=resource_version,
+                timeout_seconds=remaining,
+                **selectors,
+            ):
+                # ERROR events (e.g. 410 Gone) are raised as ApiException
+                pod = event["object"]
+                resource_version = pod.metadata.resource_version
+                if event["type"] != "DELETED" and predicate(pod):
+                    return pod
+        except ApiException as e:
+            if e.status == 410:
+                # resourceVersion too old: relist
+                logger.debug(f"Pod watch expired in {namespace}, relisting")
+                resource_version = None
+                continue
+            raise
+        finally:
+            watcher.stop()
+        # Stream ended (server-side timeout); resume from resource_version
+
+    return None
+
+
+def follow_pod_logs(
+    core_client: Any,
+    namespace: str,
+    pod_name: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    timeout: Optional[float] = None,
+    container: Optional[str] = None,
+) -> str:
+    """
+    Stream a pod's logs until the container exits.
+
+    Args:
+        core_client: CoreV1Api
+        namespace: Pod namespace
+        pod_name: Pod name
+        on_chunk: Called with each decoded chunk as it arrives
+        timeout: Read timeout for the stream
+        container: Container name (when the pod has several)
+
+    Returns:
+        The full log
+    """
+    kwargs = {"container": container} if container else {}
+    response = core_client.read_namespaced_pod_log(
+        name=pod_name,
+        namespace=namespace,
+        follow=True,
+        _preload_content=False,
+        _request_timeout=timeout,
+        **kwargs,
+    )
+    # Incremental decoding: a multi-byte character may span two chunks
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = []
+    try:
+        for raw in response.stream(amt=4096, decode_content=True):
+            chunk = decoder.decode(raw)
+            if not chunk:
+                continue
+            chunks.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            chunks.append(tail)
+            if on_chunk:
+                on_chunk(tail)
+    finally:
+        response.release_conn()
+    return "".join(chunks)
+
+
+def pod_started(pod: Any) -> bool:
+    """Containers are running or already finished"""
+    return pod.status is not None and pod.status.phase in ("Running", *TERMINAL_POD_PHASES)
+
+
+def pod_finished(pod: Any) -> bool:
+    return pod.status is not None and pod.status.phase in TERMINAL_POD_PHASES
+
+
+def pod_exit_code(pod: Any) -> int:
+    """Exit code of the pod's first terminated container"""
+    for status in (pod.status.container_statuses or []):
+        terminated = status.state.terminated if status.state else None
+        if terminated is not None and terminated.exit_code is not None:
+            return terminated.exit_code
+    return 0 if pod.status.phase == "Succeeded" else 1
@@ -27,6 +27,10 @@ settings = get_settings()
 
 # Background task tracking
 cleanup_task: Optional[asyncio.Task] = None
+workspace_gc_task: Optional[asyncio.Task] = None
+
+# Held for one GC interval by the replica that runs the pass
+WORKSPACE_GC_LOCK = "storage:workspace-gc"
 
 # Create FastAPI app
 app = FastAPI(
@@ -186,11 +190,39 @@ async def cleanup_expired_sandboxes_task():
             # Continue running despite errors
 
 
+async def collect_workspace_garbage_task():
+    """Background task to delete workspace blobs no manifest references"""
+    from app.redis.clients import get_worker_redis
+    from app.storage import collect_workspace_garbage
+
+    interval = settings.s3_blob_gc_interval_seconds
+    logger.info("workspace_gc_task_started", interval=interval)
+
+    while True:
+        try:
+            await asyncio.sleep(interval)
+
+            # Every replica runs this loop; one pass per interval is enough
+            acquired = await get_worker_redis().set(WORKSPACE_GC_LOCK, "1", nx=True, ex=interval)
+            if not acquired:
+                continue
+
+            result = await collect_workspace_garbage()
+            logger.info("workspace_gc_completed", **result)
+
+        except asyncio.CancelledError:
+            logger.info("workspace_gc_task_cancelled")
+            break
+        except Exception as e:
+            logger.error("workspace_gc_error", error=str(e))
+            # Continue running despite errors
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global cleanup_task
+    global cleanup_task, workspace_gc_task
 
     logger.info("agent_api_starting", version=settings.version)
 
@@ -209,6 +241,14 @@ async def startup_event():
     cleanup_task = asyncio.create_task(cleanup_expired_sandboxes_task())
     logger.info("sandbox_cleanup_task_created")
 
+    # Start workspace blob garbage collection
+    workspace_gc_task = asyncio.create_task(collect_workspace_garbage_task())
+
+    # Start cgroup sampling and tier limit enforcement of sandboxes
+    from app.sandbox.resource_sampler import get_resource_sampler
+    get_resource_sampler().start()
+    logger.info("resource_sampler_started", interval=settings.sandbox_sample_interval_seconds)
+
     logger.info("agent_api_started")
 
 
@@ -216,7 +256,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global cleanup_task
+    global cleanup_task, workspace_gc_task
 
     logger.info("agent_api_shutting_down")
 
@@ -229,6 +269,19 @@ async def shutdown_event():
             pass
         logger.info("sandbox_cleanup_task_stopped")
 
+    if workspace_gc_task:
+        workspace_gc_task.cancel()
+        try:
+            await workspace_gc_task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        from app.sandbox.resource_sampler import get_resource_sampler
+        await get_resource_sampler().stop()
+    except Exception as e:
+        logger.error("resource_sampler_stop_failed", error=str(e))
+
     # Cleanup all active sandboxes
     try:
         from app.sandbox import get_sandbox_manager, get_enhanced_sandbox_manager
@@ -254,10 +307,20 @@ async def shutdown_event():
     except Exception as e:
         logger.error("sandbox_cleanup_failed", error=str(e))
 
+    # Delete pooled executor pods
+    try:
+        from app.k8s.pod_pool import close_executor_pod_pool
+        await close_executor_pod_pool()
+    except Exception as e:
+        logger.error("executor_pod_pool_close_failed", error=str(e))
+
     # Close Redis connections
     try:
-        from app.redis.clients import close_worker_redis
+        from app.redis.clients import close_worker_redis, close_stream_redis
+        from app.redis.subscriber import close_log_multiplexer
+        await close_log_multiplexer()
         await close_worker_redis()
+        await close_stream_redis()
         logger.info("redis_closed")
     except Exception as e:
         logger.error("redis_close_failed", error=str(e))
@@ -60,6 +60,7 @@ class AgentLogsResponse(BaseModel):
     logs: List[Dict[str, Any]]
     has_more: bool
     next_cursor: Optional[str] = None
+    poll_interval: Optional[float] = None  # Suggested seconds before the next poll
 
 
 class ErrorResponse(BaseModel):
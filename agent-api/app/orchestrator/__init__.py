@@ -20,12 +20,16 @@ from app.orchestrator.types import (
     SubtaskDefinition,
     DecompositionResult,
     SchedulingDecision,
+    SubtaskTransition,
     RunProgress,
     OrchestratorConfig,
 )
+from app.orchestrator.dag import SubtaskDAG
+from app.orchestrator.events import SubtaskEvent, SubtaskEventStream
 from app.orchestrator.state_machine import StateMachine
 from app.orchestrator.orchestrator import Orchestrator
 from app.orchestrator.decomposer import TaskDecomposer
+from app.orchestrator.decomposition_cache import DecompositionCache
 from app.orchestrator.scheduler import SubtaskScheduler
 
 __all__ = [
@@ -40,6 +44,7 @@ __all__ = [
     "SubtaskDefinition",
     "DecompositionResult",
     "SchedulingDecision",
+    "SubtaskTransition",
     "RunProgress",
     "OrchestratorConfig",
     # Classes
@@ -47,4 +52,8 @@ __all__ = [
     "Orchestrator",
     "TaskDecomposer",
     "SubtaskScheduler",
+    "SubtaskDAG",
+    "SubtaskEvent",
+    "SubtaskEventStream",
+    "DecompositionCache",
 ]
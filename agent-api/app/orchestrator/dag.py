@@ -0,0 +1,194 @@
+"""
+In-memory Subtask Dependency Graph
+
+Keeps the dependency structure of a run's subtasks so that scheduling does
+not re-check every dependency of every pending subtask on each pass:
+- Each subtask has an in-degree counter of unfinished dependencies
+- Completing a subtask decrements its dependents' counters, O(out-degree)
+- Subtasks whose counter reaches zero move onto the ready queue, which is
+  ordered by critical-path rank (see SubtaskScheduler.critical_path) and
+  then by subtask_index
+- Dependencies outside the run (or already completed at load time) do not
+  count towards the in-degree
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.orchestrator.types import Subtask, SubtaskState
+
+
+class SubtaskDAG:
+    """
+    Dependency graph for the subtasks of a single run.
+
+    A subtask is in exactly one of three places: waiting (in-degree > 0),
+    ready (queued for dispatch) or dispatched. Completion is tracked
+    separately so duplicate completion notices are ignored; subtasks that
+    end without completing (failed, skipped, cancelled) leave the dispatched
+    set but never unblock their dependents.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.subtasks: Dict[str, Subtask] = {}
+        self.dependents: Dict[str, List[str]] = {}
+        self.in_degree: Dict[str, int] = {}
+        self.completed: Set[str] = set()
+        self.finished: Set[str] = set()
+        self.dispatched: Set[str] = set()
+        # Remaining critical-path length per subtask; higher dispatches first
+        self.rank: Dict[str, float] = {}
+        self.longest_path = 0.0
+        self._ready: List[Tuple[float, int, str]] = []
+        self._ready_set: Set[str] = set()
+
+    @classmethod
+    def from_subtasks(cls, run_id: str, subtasks: Iterable[Subtask]) -> "SubtaskDAG":
+        """
+        Build the graph from a run's subtasks.
+
+        Completed subtasks satisfy their dependents' edges; subtasks that are
+        neither pending nor completed are treated as already dispatched.
+
+        Args:
+            run_id: Run the subtasks belong to
+            subtasks: All subtasks of the run
+
+        Returns:
+            The graph with every dispatchable subtask on the ready queue
+        """
+        dag = cls(run_id)
+        subtasks = list(subtasks)
+        for subtask in subtasks:
+            dag.subtasks[subtask.id] = subtask
+            dag.dependents.setdefault(subtask.id, [])
+            if subtask.state == SubtaskState.COMPLETED:
+                dag.completed.add(subtask.id)
+            elif subtask.is_terminal:
+                dag.finished.add(subtask.id)
+            elif subtask.state != SubtaskState.PENDING:
+                dag.dispatched.add(subtask.id)
+
+        for subtask in subtasks:
+            degree = 0
+            for dep in subtask.depends_on:
+                if dep not in dag.subtasks:
+                    continue
+                dag.dependents[dep].append(subtask.id)
+                if dep not in dag.completed:
+                    degree += 1
+            dag.in_degree[subtask.id] = degree
+
+        for subtask in subtasks:
+            if dag.in_degree[subtask.id] == 0:
+                dag._push_ready(subtask.id)
+        return dag
+
+    def topological_order(self) -> List[str]:
+        """Subtask IDs ordered so every dependency precedes its dependents."""
+        remaining = {sid: 0 for sid in self.subtasks}
+        for dependents in self.dependents.values():
+            for dependent in dependents:
+                remaining[dependent] += 1
+        order = [sid for sid, degree in remaining.items() if degree == 0]
+        for subtask_id in order:
+            for dependent in self.dependents[subtask_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    order.append(dependent)
+        return order
+
+    def set_ranks(self, rank: Dict[str, float]) -> None:
+        """Replace dispatch ranks and reorder the ready queue."""
+        self.rank = dict(rank)
+        self.longest_path = max(self.rank.values(), default=0.0)
+        ready = list(self._ready_set)
+        self._ready = []
+        self._ready_set = set()
+        for subtask_id in ready:
+            self._push_ready(subtask_id)
+
+    def _push_ready(self, subtask_id: str) -> None:
+        if (subtask_id in self.completed or subtask_id in self.finished
+                or subtask_id in self.dispatched or subtask_id in self._ready_set):
+            return
+        key = (-self.rank.get(subtask_id, 0.0), self.subtasks[subtask_id].index, subtask_id)
+        heapq.heappush(self._ready, key)
+        self._ready_set.add(subtask_id)
+
+    def mark_completed(self, subtask_id: str) -> List[str]:
+        """
+        Record that a subtask completed.
+
+        Args:
+            subtask_id: The completed subtask
+
+        Returns:
+            IDs of subtasks that became ready because of it
+        """
+        if subtask_id in self.completed or subtask_id not in self.subtasks:
+            return []
+        self.completed.add(subtask_id)
+        self.finished.discard(subtask_id)
+        self.dispatched.discard(subtask_id)
+        # Any entry left on the heap is skipped by pop_ready
+        self._ready_set.discard(subtask_id)
+
+        unblocked = []
+        for dependent in self.dependents[subtask_id]:
+            self.in_degree[dependent] -= 1
+            if self.in_degree[dependent] == 0:
+                self._push_ready(dependent)
+                if dependent in self._ready_set:
+                    unblocked.append(dependent)
+        return unblocked
+
+    def mark_finished(self, subtask_id: str) -> None:
+        """Record that a subtask ended without completing (failed, skipped, cancelled)."""
+        if subtask_id in self.completed or subtask_id not in self.subtasks:
+            return
+        self.finished.add(subtask_id)
+        self.dispatched.discard(subtask_id)
+        self._ready_set.discard(subtask_id)
+
+    def pop_ready(self) -> Optional[Subtask]:
+        """Take the highest-ranked ready subtask and mark it dispatched."""
+        while self._ready:
+            _, _, subtask_id = heapq.heappop(self._ready)
+            if subtask_id not in self._ready_set:
+                continue
+            self._ready_set.discard(subtask_id)
+            self.dispatched.add(subtask_id)
+            return self.subtasks[subtask_id]
+        return None
+
+    def drain_ready(self, limit: Optional[int] = None) -> List[Subtask]:
+        """Take ready subtasks in rank order, at most limit of them."""
+        drained = []
+        while self._ready_set and (limit is None or len(drained) < limit):
+            drained.append(self.pop_ready())
+        return drained
+
+    def requeue(self, subtask_id: str) -> None:
+        """Put a dispatched or failed subtask back on the ready queue (e.g. a retry)."""
+        if subtask_id in self.completed or subtask_id not in self.subtasks:
+            return
+        self.dispatched.discard(subtask_id)
+        self.finished.discard(subtask_id)
+        if self.in_degree[subtask_id] == 0:
+            self._push_ready(subtask_id)
+
+    @property
+    def ready_count(self) -> int:
+        return len(self._ready_set)
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self.dispatched)
+
+    @property
+    def is_complete(self) -> bool:
+        return len(self.completed) == len(self.subtasks)
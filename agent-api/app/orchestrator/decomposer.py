@@ -6,16 +6,21 @@ Implements 4 decomposition strategies:
 - dimension_based: Split by analytical dimensions
 - source_based: Split by data source types
 - temporal_based: Split by time periods
+
+Validated plans are cached per normalized task (see decomposition_cache).
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from anthropic import Anthropic
 
+from app.orchestrator.decomposition_cache import DecompositionCache, task_signature
 from app.orchestrator.types import (
     RunConfig,
     SubtaskDefinition,
@@ -92,19 +97,19 @@ For each subtask, specify:
 Create a final "synthesis" subtask that depends on all entity research subtasks.
 
 Respond with JSON:
-{
+{{
     "subtasks": [
-        {
+        {{
             "task_type": "entity_research",
             "entity_id": "Entity Name",
-            "input_data": {"instructions": "...", "focus_areas": [".."]},
+            "input_data": {{"instructions": "...", "focus_areas": [".."]}},
             "priority": 5,
             "estimated_duration_seconds": 60,
             "depends_on_indices": []
-        }
+        }}
     ],
     "reasoning": "explanation of decomposition"
-}"""
+}}"""
 
 DIMENSION_DECOMPOSITION_PROMPT = """You are a task decomposer for research operations.
 
@@ -117,19 +122,30 @@ Max Subtasks: {max_subtasks}
 For each dimension, create a subtask. Include a synthesis subtask at the end.
 
 Respond with JSON:
-{
+{{
     "subtasks": [
-        {
+        {{
             "task_type": "dimension_analysis",
             "entity_id": null,
-            "input_data": {"dimension": "...", "analysis_focus": "...", "metrics": [".."]},
+            "input_data": {{"dimension": "...", "analysis_focus": "...", "metrics": [".."]}},
             "priority": 5,
             "estimated_duration_seconds": 60,
             "depends_on_indices": []
-        }
+        }}
     ],
     "reasoning": "explanation of decomposition"
-}"""
+}}"""
+
+DECOMPOSER_MODEL = "claude-sonnet-4-20250514"
+
+# Changes whenever a decomposition prompt or the model changes, which
+# invalidates cached plans
+PROMPT_VERSION = hashlib.sha256("\x1f".join([
+    DECOMPOSER_MODEL,
+    QUERY_ANALYSIS_PROMPT,
+    ENTITY_DECOMPOSITION_PROMPT,
+    DIMENSION_DECOMPOSITION_PROMPT,
+]).encode("utf-8")).hexdigest()[:12]
 
 
 class TaskDecomposer:
@@ -143,8 +159,21 @@ class TaskDecomposer:
     - temporal_based: Split by time periods
     """
 
-    def __init__(self, anthropic: Anthropic):
+    def __init__(
+        self,
+        anthropic: Anthropic,
+        cache: Optional[DecompositionCache] = None,
+        prompt_version: str = PROMPT_VERSION,
+    ):
         self.anthropic = anthropic
+        self.cache = cache if cache is not None else DecompositionCache()
+        self.prompt_version = prompt_version
+        self._refreshing: Set[str] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    async def _create_message(self, **kwargs):
+        # The client is synchronous; keep it off the event loop
+        return await asyncio.to_thread(self.anthropic.messages.create, **kwargs)
 
     async def validate_query(self, query: str) -> dict:
         """
@@ -168,8 +197,8 @@ class TaskDecomposer:
             }
 
         try:
-            response = self.anthropic.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self._create_message(
+                model=DECOMPOSER_MODEL,
                 max_tokens=1024,
                 temperature=0.3,
                 system=QUERY_VALIDATION_PROMPT,
@@ -212,9 +241,66 @@ class TaskDecomposer:
         3. Generate subtask definitions
         4. Build dependency graph
         5. Estimate resources
+
+        A cached plan for the same normalized task is returned without
+        calling the model; a stale one is returned while it is refreshed
+        in the background.
         """
         max_subtasks = max_subtasks or config.max_subtasks
+        key = task_signature(query, config, max_subtasks, self.prompt_version)
+
+        cached, needs_refresh = self.cache.get(key)
+        if cached is not None:
+            if needs_refresh:
+                self._refresh_in_background(key, query, config, max_subtasks)
+            logger.info(f"Using cached decomposition ({len(cached.subtasks)} subtasks)")
+            return cached
 
+        result, cacheable = await self._decompose_uncached(query, config, max_subtasks)
+        if cacheable:
+            self.cache.put(key, result)
+        return result
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        query: str,
+        config: RunConfig,
+        max_subtasks: int,
+    ) -> None:
+        """Re-decompose a stale plan, at most one refresh per key at a time."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                result, cacheable = await self._decompose_uncached(query, config, max_subtasks)
+                if cacheable:
+                    self.cache.put(key, result)
+            except Exception as e:
+                logger.warning(f"Background decomposition refresh failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _decompose_uncached(
+        self,
+        query: str,
+        config: RunConfig,
+        max_subtasks: int,
+    ) -> tuple[DecompositionResult, bool]:
+        """
+        Decompose with the model.
+
+        Returns:
+            (result, cacheable); plans built on a fallback analysis, or that
+            fell back to the generic plan because the model failed, are not
+            cached so a model outage is not remembered
+        """
         # Step 1: Analyze query
         analysis = await self._analyze_query(query)
 
@@ -223,14 +309,17 @@ class TaskDecomposer:
         logger.info(f"Selected decomposition strategy: {strategy}")
 
         # Step 3: Generate subtasks based on strategy
+        fell_back = analysis.get("fallback", False)
         if strategy == "entity_based":
-            subtasks, reasoning = await self._decompose_by_entity(
+            subtasks, reasoning, model_failed = await self._decompose_by_entity(
                 query, analysis, max_subtasks
             )
+            fell_back = fell_back or model_failed
         elif strategy == "dimension_based":
-            subtasks, reasoning = await self._decompose_by_dimension(
+            subtasks, reasoning, model_failed = await self._decompose_by_dimension(
                 query, analysis, max_subtasks
             )
+            fell_back = fell_back or model_failed
         elif strategy == "source_based":
             subtasks, reasoning = await self._decompose_by_source(
                 query, analysis, max_subtasks
@@ -249,19 +338,20 @@ class TaskDecomposer:
         # Step 5: Estimate resources
         estimates = self._estimate_resources(subtasks)
 
-        return DecompositionResult(
+        result = DecompositionResult(
             subtasks=subtasks,
             dependency_graph=dependencies,
             estimated_duration_minutes=estimates["duration_minutes"],
             estimated_cost_usd=estimates["cost_usd"],
             decomposition_reasoning=reasoning,
         )
+        return result, not fell_back
 
     async def _analyze_query(self, query: str) -> Dict[str, Any]:
         """Analyze query to understand structure and intent."""
         try:
-            response = self.anthropic.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self._create_message(
+                model=DECOMPOSER_MODEL,
                 max_tokens=2048,
                 temperature=0.3,
                 system=QUERY_ANALYSIS_PROMPT,
@@ -281,6 +371,7 @@ class TaskDecomposer:
                     "reasoning": "Fallback analysis",
                     "requires_multiple_sources": False,
                     "complexity": "moderate",
+                    "fallback": True,
                 }
 
             return result
@@ -295,6 +386,7 @@ class TaskDecomposer:
                 "reasoning": f"Analysis failed: {e}",
                 "requires_multiple_sources": False,
                 "complexity": "moderate",
+                "fallback": True,
             }
 
     def _select_strategy(
@@ -328,12 +420,18 @@ class TaskDecomposer:
         query: str,
         analysis: Dict[str, Any],
         max_subtasks: int
-    ) -> tuple[List[SubtaskDefinition], str]:
-        """Decompose query by entities."""
+    ) -> tuple[List[SubtaskDefinition], str, bool]:
+        """
+        Decompose query by entities.
+
+        Returns:
+            (subtasks, reasoning, fell_back); fell_back is True when the
+            model call failed and the generic plan was used instead
+        """
         entities = analysis.get("entities", [])[:max_subtasks - 1]  # Leave room for synthesis
 
         if not entities:
-            return await self._decompose_generic(query, analysis, max_subtasks)
+            return await self._generic_plan(query, analysis, max_subtasks, fell_back=False)
 
         prompt = ENTITY_DECOMPOSITION_PROMPT.format(
             query=query,
@@ -342,8 +440,8 @@ class TaskDecomposer:
         )
 
         try:
-            response = self.anthropic.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self._create_message(
+                model=DECOMPOSER_MODEL,
                 max_tokens=4096,
                 temperature=0.3,
                 messages=[{"role": "user", "content": prompt}],
@@ -353,7 +451,7 @@ class TaskDecomposer:
             result = self._extract_json(content)
 
             if result is None or "subtasks" not in result:
-                return await self._decompose_generic(query, analysis, max_subtasks)
+                return await self._generic_plan(query, analysis, max_subtasks, fell_back=True)
 
             subtasks = [
                 SubtaskDefinition(
@@ -367,23 +465,28 @@ class TaskDecomposer:
                 for s in result["subtasks"]
             ]
 
-            return subtasks, result.get("reasoning", "Entity-based decomposition")
+            return subtasks, result.get("reasoning", "Entity-based decomposition"), False
 
         except Exception as e:
             logger.error(f"Entity decomposition error: {e}")
-            return await self._decompose_generic(query, analysis, max_subtasks)
+            return await self._generic_plan(query, analysis, max_subtasks, fell_back=True)
 
     async def _decompose_by_dimension(
         self,
         query: str,
         analysis: Dict[str, Any],
         max_subtasks: int
-    ) -> tuple[List[SubtaskDefinition], str]:
-        """Decompose query by analytical dimensions."""
+    ) -> tuple[List[SubtaskDefinition], str, bool]:
+        """
+        Decompose query by analytical dimensions.
+
+        Returns:
+            (subtasks, reasoning, fell_back) as for _decompose_by_entity
+        """
         dimensions = analysis.get("dimensions", [])[:max_subtasks - 1]
 
         if not dimensions:
-            return await self._decompose_generic(query, analysis, max_subtasks)
+            return await self._generic_plan(query, analysis, max_subtasks, fell_back=False)
 
         prompt = DIMENSION_DECOMPOSITION_PROMPT.format(
             query=query,
@@ -392,8 +495,8 @@ class TaskDecomposer:
         )
 
         try:
-            response = self.anthropic.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self._create_message(
+                model=DECOMPOSER_MODEL,
                 max_tokens=4096,
                 temperature=0.3,
                 messages=[{"role": "user", "content": prompt}],
@@ -403,7 +506,7 @@ class TaskDecomposer:
             result = self._extract_json(content)
 
             if result is None or "subtasks" not in result:
-                return await self._decompose_generic(query, analysis, max_subtasks)
+                return await self._generic_plan(query, analysis, max_subtasks, fell_back=True)
 
             subtasks = [
                 SubtaskDefinition(
@@ -417,11 +520,22 @@ class TaskDecomposer:
                 for s in result["subtasks"]
             ]
 
-            return subtasks, result.get("reasoning", "Dimension-based decomposition")
+            return subtasks, result.get("reasoning", "Dimension-based decomposition"), False
 
         except Exception as e:
             logger.error(f"Dimension decomposition error: {e}")
-            return await self._decompose_generic(query, analysis, max_subtasks)
+            return await self._generic_plan(query, analysis, max_subtasks, fell_back=True)
+
+    async def _generic_plan(
+        self,
+        query: str,
+        analysis: Dict[str, Any],
+        max_subtasks: int,
+        fell_back: bool,
+    ) -> tuple[List[SubtaskDefinition], str, bool]:
+        """The generic plan, tagged with whether it replaces a failed model call."""
+        subtasks, reasoning = await self._decompose_generic(query, analysis, max_subtasks)
+        return subtasks, reasoning, fell_back
 
     async def _decompose_by_source(
         self,
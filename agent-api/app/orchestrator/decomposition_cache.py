@@ -0,0 +1,156 @@
+"""
+Decomposition Cache
+
+Recurring and retried research queries decompose into the same plan, so
+TaskDecomposer keeps validated plans keyed by a normalized task signature:
+- The signature covers the normalized query, the strategy and subtask
+  limits from the run config, and the decomposer's prompt version, so
+  changing a prompt (or the model) invalidates every cached plan
+- Plans are fresh for ttl_seconds; for a further stale_seconds they are
+  still served immediately while the decomposer refreshes them in the
+  background
+- Only plans whose dependency indices form a valid DAG are stored
+- Bounded LRU; entries are deep-copied in and out so callers can mutate
+  the plans they get
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.orchestrator.types import DecompositionResult, RunConfig
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_task(query: str) -> str:
+    """Fold case, Unicode forms, whitespace and trailing punctuation."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip(" .?!;:")
+
+
+def task_signature(
+    query: str,
+    config: RunConfig,
+    max_subtasks: int,
+    prompt_version: str,
+) -> str:
+    """Cache key for decomposing query under config."""
+    parts = [
+        prompt_version,
+        config.decomposition_strategy,
+        str(max_subtasks),
+        ",".join(sorted(config.entity_types)),
+        normalize_task(query),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def is_valid_plan(result: DecompositionResult) -> bool:
+    """Plan is non-empty and every dependency points at an earlier subtask."""
+    if not result.subtasks:
+        return False
+    for index, subtask in enumerate(result.subtasks):
+        for dep in subtask.depends_on_indices:
+            if not isinstance(dep, int) or not 0 <= dep < index:
+                return False
+    return True
+
+
+class DecompositionCache:
+    """Bounded LRU of decomposition plans with stale-while-revalidate expiry."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600.0,
+        stale_seconds: float = 86400.0,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum cached plans
+            ttl_seconds: Age up to which a plan is served as fresh
+            stale_seconds: Further age during which a plan is served while
+                being refreshed
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, DecompositionResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[DecompositionResult], bool]:
+        """
+        Look up a plan.
+
+        Returns:
+            (plan, needs_refresh); plan is None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            stored_at, result = entry
+            age = now - stored_at
+            if age >= self.ttl_seconds + self.stale_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            stale = age >= self.ttl_seconds
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return copy.deepcopy(result), stale
+
+    def put(self, key: str, result: DecompositionResult) -> bool:
+        """
+        Store a plan if it is a valid DAG.
+
+        Returns:
+            True if the plan was stored
+        """
+        if not is_valid_plan(result):
+            return False
+        entry = (time.time(), copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
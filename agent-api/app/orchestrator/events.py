@@ -0,0 +1,240 @@
+"""
+Subtask Completion Events
+
+A StateMachine constructed with a SubtaskEventStream appends each
+successful transition into a terminal state to a Redis Stream that
+orchestrator instances consume to advance run DAGs immediately instead of
+waiting for a monitor pass. In this service only the Orchestrator's state
+machine publishes (including the cancellations it writes when a run ends);
+the workers that run subtasks live outside it and must build their
+StateMachine with a SubtaskEventStream, otherwise their completions are
+only picked up by the reconciliation poll:
+- One stream for all runs, read through a consumer group so every event is
+  handled by exactly one orchestrator instance
+- Events are acknowledged after they are handled; entries left pending by a
+  crashed instance are reclaimed after an idle timeout
+- A batch of transitions is published as one combined entry, which
+  consumers expand back into per-subtask events
+- Publishing never raises; a Redis outage degrades scheduling to the
+  orchestrator's reconciliation poll
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from redis.exceptions import ResponseError
+
+from app.orchestrator.types import SubtaskState
+from app.redis.clients import get_worker_redis
+
+logger = logging.getLogger(__name__)
+
+SUBTASK_EVENTS_KEY = "orchestrator:subtask-events"
+SUBTASK_EVENTS_GROUP = "orchestrators"
+SUBTASK_EVENTS_MAXLEN = 10000
+
+# Subtask states that are announced on the stream
+EVENT_STATES = (
+    SubtaskState.COMPLETED,
+    SubtaskState.FAILED,
+    SubtaskState.SKIPPED,
+    SubtaskState.CANCELLED,
+)
+
+
+@dataclass
+class SubtaskEvent:
+    """A subtask reached a terminal state."""
+    run_id: str
+    subtask_id: str
+    state: SubtaskState
+    entry_id: Optional[str] = None
+
+    @classmethod
+    def from_fields(cls, entry_id: str, fields: dict) -> Optional["SubtaskEvent"]:
+        """Parse a stream entry; None for malformed entries."""
+        try:
+            return cls(
+                run_id=fields["run_id"],
+                subtask_id=fields["subtask_id"],
+                state=SubtaskState(fields["state"]),
+                entry_id=entry_id,
+            )
+        except (KeyError, ValueError):
+            return None
+
+    @classmethod
+    def from_entry(cls, entry_id: str, fields: dict) -> Optional[List["SubtaskEvent"]]:
+        """Parse a single or combined (batch) entry; None if malformed."""
+        if "batch" not in fields:
+            event = cls.from_fields(entry_id, fields)
+            return [event] if event else None
+        try:
+            items = json.loads(fields["batch"])
+        except (TypeError, ValueError):
+            return None
+        events = []
+        for item in items if isinstance(items, list) else [None]:
+            event = cls.from_fields(entry_id, item) if isinstance(item, dict) else None
+            if event is None:
+                return None
+            events.append(event)
+        return events
+
+
+class SubtaskEventStream:
+    """Publishes and consumes subtask completion events"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        consumer: Optional[str] = None,
+        maxlen: int = SUBTASK_EVENTS_MAXLEN,
+        claim_idle_ms: int = 60000,
+    ):
+        """
+        Initialize subtask event stream.
+
+        Args:
+            redis_client: Async Redis client (defaults to the worker client)
+            consumer: Consumer name within the group (unique per instance)
+            maxlen: Approximate cap on retained events
+            claim_idle_ms: Reclaim entries another consumer left pending this long
+        """
+        self.redis = redis_client or get_worker_redis()
+        self.consumer = consumer or f"orchestrator-{uuid4().hex[:12]}"
+        self.maxlen = maxlen
+        self.claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+
+    async def publish(
+        self,
+        run_id: str,
+        subtask_id: str,
+        state: SubtaskState,
+    ) -> Optional[str]:
+        """
+        Announce that a subtask reached a terminal state.
+
+        Returns:
+            Stream entry id, or None if the append failed
+        """
+        try:
+            return await self.redis.xadd(
+                SUBTASK_EVENTS_KEY,
+                {"run_id": run_id, "subtask_id": subtask_id, "state": state.value},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish {state.value} event for subtask {subtask_id}: {e}")
+            return None
+
+    async def publish_batch(
+        self,
+        events: Iterable[Tuple[str, str, SubtaskState]],
+    ) -> Optional[str]:
+        """
+        Announce many terminal transitions as one combined entry.
+
+        Args:
+            events: (run_id, subtask_id, state) tuples
+
+        Returns:
+            Stream entry id, or None if nothing was published
+        """
+        items = [
+            {"run_id": run_id, "subtask_id": subtask_id, "state": state.value}
+            for run_id, subtask_id, state in events
+        ]
+        if not items:
+            return None
+        try:
+            return await self.redis.xadd(
+                SUBTASK_EVENTS_KEY,
+                {"batch": json.dumps(items)},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish batch of {len(items)} subtask events: {e}")
+            return None
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group (and stream) if missing."""
+        if self._group_ready:
+            return
+        try:
+            # "$": a new group only sees events published from now on;
+            # anything older is picked up by reconciliation
+            await self.redis.xgroup_create(
+                SUBTASK_EVENTS_KEY, SUBTASK_EVENTS_GROUP, id="$", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def read(self, block_ms: Optional[int] = None, count: int = 100) -> List[SubtaskEvent]:
+        """
+        Read events not yet delivered to any consumer of the group.
+
+        Args:
+            block_ms: Milliseconds to block when no events are available
+            count: Maximum events to return
+
+        Returns:
+            Events in stream order; empty on timeout
+        """
+        await self.ensure_group()
+        response = await self.redis.xreadgroup(
+            SUBTASK_EVENTS_GROUP,
+            self.consumer,
+            {SUBTASK_EVENTS_KEY: ">"},
+            count=count,
+            block=block_ms,
+        )
+        return await self._parse([
+            entry for _, entries in (response or []) for entry in entries
+        ])
+
+    async def claim_stale(self, count: int = 100) -> List[SubtaskEvent]:
+        """
+        Take over events another consumer received but never acknowledged.
+
+        Returns:
+            The reclaimed events
+        """
+        await self.ensure_group()
+        response = await self.redis.xautoclaim(
+            SUBTASK_EVENTS_KEY,
+            SUBTASK_EVENTS_GROUP,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id="0-0",
+            count=count,
+        )
+        # [next_start_id, entries, (deleted ids on Redis 7)]
+        return await self._parse(response[1] if response else [])
+
+    async def ack(self, entry_ids: List[str]) -> None:
+        if entry_ids:
+            await self.redis.xack(SUBTASK_EVENTS_KEY, SUBTASK_EVENTS_GROUP, *entry_ids)
+
+    async def _parse(self, entries) -> List[SubtaskEvent]:
+        events, malformed = [], []
+        for entry_id, fields in entries:
+            parsed = SubtaskEvent.from_entry(entry_id, fields or {})
+            if parsed is None:
+                logger.warning(f"Dropping malformed subtask event {entry_id}: {fields}")
+                malformed.append(entry_id)
+                continue
+            events.extend(parsed)
+        # Nothing will ever handle these; don't leave them pending
+        await self.ack(malformed)
+        return events
@@ -5,6 +5,7 @@ The Orchestrator is the central coordinator for research runs. It manages:
 - Run lifecycle and state transitions
 - Query decomposition into subtasks
 - Subtask scheduling and prioritization
+- Advancing run DAGs on subtask completion events
 - Progress tracking and aggregation
 - Failure handling and recovery coordination
 """
@@ -16,7 +17,7 @@ import json
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import AsyncIterator, Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from uuid import uuid4
 
 from supabase import Client
@@ -31,6 +32,7 @@ from app.orchestrator.types import (
     SubtaskDefinition,
     DecompositionResult,
     SchedulingDecision,
+    SubtaskTransition,
     RunProgress,
     OrchestratorConfig,
     ValidationError,
@@ -38,8 +40,11 @@ from app.orchestrator.types import (
     DecompositionError,
     ConcurrencyError,
 )
+from app.orchestrator.dag import SubtaskDAG
+from app.orchestrator.events import EVENT_STATES, SubtaskEvent, SubtaskEventStream
 from app.orchestrator.state_machine import StateMachine
 from app.orchestrator.decomposer import TaskDecomposer
+from app.orchestrator.decomposition_cache import DecompositionCache
 from app.orchestrator.scheduler import SubtaskScheduler
 from app.worker.job_queue import JobQueue
 
@@ -67,21 +72,31 @@ class Orchestrator:
         self,
         supabase: Client,
         anthropic: Anthropic,
-        config: Optional[OrchestratorConfig] = None
+        config: Optional[OrchestratorConfig] = None,
+        events: Optional[SubtaskEventStream] = None,
     ):
         self.supabase = supabase
         self.anthropic = anthropic
         self.config = config or OrchestratorConfig()
 
         # Initialize components
-        self.state_machine = StateMachine(supabase)
-        self.decomposer = TaskDecomposer(anthropic)
+        self.events = events or SubtaskEventStream()
+        self.state_machine = StateMachine(supabase, events=self.events)
+        self.decomposer = TaskDecomposer(
+            anthropic,
+            cache=DecompositionCache(
+                ttl_seconds=self.config.decomposition_cache_ttl_seconds,
+                stale_seconds=self.config.decomposition_cache_stale_seconds,
+            ),
+        )
         self.scheduler = SubtaskScheduler()
         self.job_queue = JobQueue()
 
         # Internal state
         self._running = False
         self._background_tasks: List[asyncio.Task] = []
+        # Dependency graphs of runs this instance is scheduling (run_id -> DAG)
+        self._dags: Dict[str, SubtaskDAG] = {}
 
     # =========================================================================
     # LIFECYCLE MANAGEMENT
@@ -91,11 +106,16 @@ class Orchestrator:
         """Start the orchestrator and background tasks."""
         self._running = True
 
+        # Seed duration estimates used for critical-path ordering
+        await self._load_duration_history()
+
         # Start background monitors
         self._background_tasks = [
             asyncio.create_task(self._progress_monitor_loop()),
             asyncio.create_task(self._deadline_monitor_loop()),
             asyncio.create_task(self._stalled_run_detector_loop()),
+            asyncio.create_task(self._subtask_event_loop()),
+            asyncio.create_task(self._reconcile_loop()),
         ]
 
         logger.info("Orchestrator started with background monitors")
@@ -227,6 +247,7 @@ class Orchestrator:
 
             if run.is_terminal:
                 logger.info(f"Run {run_id} is already terminal ({run.state.value})")
+                self._dags.pop(run_id, None)
                 return
 
             try:
@@ -386,56 +407,64 @@ class Orchestrator:
 
     async def _phase_schedule(self, run: ResearchRun) -> RunState:
         """Schedule subtasks for execution."""
-        # Get all pending subtasks
-        subtasks = await self.state_machine.get_subtasks_by_run(
-            run_id=run.id,
-            states=[SubtaskState.PENDING]
-        )
-
-        # Filter to ready subtasks (dependencies met)
-        completed_ids = await self._get_completed_subtask_ids(run.id)
-        ready_subtasks = [
-            s for s in subtasks
-            if all(dep in completed_ids for dep in s.depends_on)
-        ]
-
-        # Schedule each ready subtask
-        for subtask in ready_subtasks:
-            decision = await self.scheduler.schedule(subtask, run)
-            await self._enqueue_subtask(subtask, decision)
+        # Build the dependency graph once; its ready queue holds the roots
+        dag = await self._load_dag(run.id)
+        await self._dispatch_ready(run, dag)
 
         return RunState.SCHEDULING
 
-    async def _enqueue_subtask(
+    async def _enqueue_subtasks(
         self,
-        subtask: Subtask,
-        decision: SchedulingDecision
-    ) -> None:
-        """Enqueue a subtask for execution."""
+        scheduled: List[Tuple[Subtask, SchedulingDecision]],
+    ) -> int:
+        """
+        Enqueue subtasks for execution.
+
+        All QUEUED transitions are written in one batch; only subtasks whose
+        transition applied are pushed to the job queue.
+
+        Returns:
+            Number of subtasks enqueued
+        """
+        if not scheduled:
+            return 0
+
         # Update state to QUEUED
-        await self.state_machine.transition_subtask_state(
-            subtask.id,
-            subtask.state,
-            SubtaskState.QUEUED,
-            subtask.state_version,
-        )
+        queued = await self.state_machine.transition_subtask_states([
+            SubtaskTransition(
+                subtask_id=subtask.id,
+                from_state=subtask.state,
+                to_state=SubtaskState.QUEUED,
+                state_version=subtask.state_version,
+                run_id=subtask.run_id,
+            )
+            for subtask, _ in scheduled
+        ])
+
+        for subtask, decision in scheduled:
+            if subtask.id not in queued:
+                # Already queued by another instance (or no longer pending)
+                logger.info(f"Subtask {subtask.id} was not pending, skipping enqueue")
+                continue
+
+            # Enqueue to job queue
+            # Note: This integrates with the existing job queue
+            job_data = {
+                "type": "subtask",
+                "subtask_id": subtask.id,
+                "run_id": subtask.run_id,
+                "task_type": subtask.task_type,
+                "input_data": subtask.input_data,
+            }
 
-        # Enqueue to job queue
-        # Note: This integrates with the existing job queue
-        job_data = {
-            "type": "subtask",
-            "subtask_id": subtask.id,
-            "run_id": subtask.run_id,
-            "task_type": subtask.task_type,
-            "input_data": subtask.input_data,
-        }
+            self.job_queue.enqueue(
+                run_id=subtask.run_id,
+                priority=decision.priority,
+            )
 
-        self.job_queue.enqueue(
-            run_id=subtask.run_id,
-            priority=decision.priority,
-        )
+            logger.info(f"Enqueued subtask {subtask.id} to {decision.queue_name}")
 
-        logger.info(f"Enqueued subtask {subtask.id} to {decision.queue_name}")
+        return len(queued)
 
     # =========================================================================
     # PHASE: EXECUTION
@@ -457,11 +486,13 @@ class Orchestrator:
 
         # Check if all subtasks are done
         if progress.is_complete:
+            self._dags.pop(run.id, None)
             return RunState.AGGREGATING
 
         # Check for deadline
         if run.deadline_at and datetime.utcnow() > run.deadline_at:
             await self._cancel_pending_subtasks(run.id)
+            self._dags.pop(run.id, None)
             return RunState.AGGREGATING
 
         # Schedule newly ready subtasks
@@ -493,21 +524,118 @@ class Orchestrator:
         )
 
     async def _schedule_ready_subtasks(self, run: ResearchRun) -> None:
-        """Schedule any newly ready subtasks."""
-        pending = await self.state_machine.get_subtasks_by_run(
-            run_id=run.id,
-            states=[SubtaskState.PENDING]
-        )
+        """
+        Schedule any newly ready subtasks.
 
-        if not pending:
+        Completions not yet seen by the run's DAG are applied to it, which
+        costs O(out-degree) per completed subtask rather than a dependency
+        check of every pending subtask. Subtasks that went back to PENDING
+        (a retry of a failed subtask, or an assignment that was given up)
+        but are still tracked as dispatched or finished are requeued.
+        """
+        dag = self._dags.get(run.id)
+        if dag is None:
+            # Another instance scheduled the run, or this one restarted
+            dag = await self._load_dag(run.id)
+        else:
+            subtasks = await self.state_machine.get_subtasks_by_run(
+                run_id=run.id,
+                states=[*EVENT_STATES, SubtaskState.PENDING],
+            )
+            for subtask in subtasks:
+                if subtask.state == SubtaskState.PENDING:
+                    if subtask.id in dag.dispatched or subtask.id in dag.finished:
+                        dag.requeue(subtask.id)
+                else:
+                    self._apply_subtask_outcome(dag, subtask.id, subtask.state, subtask)
+
+        await self._dispatch_ready(run, dag)
+
+    def _apply_subtask_outcome(
+        self,
+        dag: SubtaskDAG,
+        subtask_id: str,
+        state: SubtaskState,
+        subtask: Optional[Subtask] = None,
+    ) -> None:
+        """Record a terminal subtask in the DAG (and its duration, when known)."""
+        if subtask_id in dag.completed or subtask_id in dag.finished:
             return
+        if state == SubtaskState.COMPLETED:
+            dag.mark_completed(subtask_id)
+            if subtask is not None:
+                self.scheduler.learn_durations([subtask])
+        else:
+            dag.mark_finished(subtask_id)
+
+    async def handle_subtask_event(self, event: SubtaskEvent) -> None:
+        """Advance a run's DAG when one of its subtasks finishes."""
+        await self.handle_subtask_events(event.run_id, [event])
 
-        completed_ids = await self._get_completed_subtask_ids(run.id)
+    async def handle_subtask_events(self, run_id: str, events: List[SubtaskEvent]) -> None:
+        """
+        Advance a run's DAG for a group of finished subtasks.
 
-        for subtask in pending:
-            if all(dep in completed_ids for dep in subtask.depends_on):
-                decision = await self.scheduler.schedule(subtask, run)
-                await self._enqueue_subtask(subtask, decision)
+        The run lock is taken once and every newly unblocked subtask is
+        enqueued in a single batch; the run is re-enqueued for aggregation
+        once every subtask is terminal.
+        """
+        async with self._acquire_run_lock(run_id) as run:
+            if run is None:
+                # Another instance holds the run; let it pick this up
+                self.job_queue.enqueue(run_id, priority=0)
+                return
+
+            if run.state not in (RunState.SCHEDULING, RunState.EXECUTING):
+                return
+
+            dag = self._dags.get(run.id)
+            if dag is None:
+                dag = await self._load_dag(run.id)
+            else:
+                for event in events:
+                    self._apply_subtask_outcome(dag, event.subtask_id, event.state)
+
+            await self._dispatch_ready(run, dag)
+
+            if run.state == RunState.EXECUTING:
+                progress = await self._calculate_progress(run.id)
+                if progress.is_complete:
+                    self.job_queue.enqueue(run.id, priority=0)
+
+    async def _load_dag(self, run_id: str) -> SubtaskDAG:
+        """Build and cache the dependency graph of a run's subtasks."""
+        subtasks = await self.state_machine.get_subtasks_by_run(run_id=run_id)
+        self.scheduler.learn_durations(subtasks)
+        dag = SubtaskDAG.from_subtasks(run_id, subtasks)
+        dag.set_ranks(self.scheduler.critical_path(dag))
+        self._dags[run_id] = dag
+        return dag
+
+    async def _dispatch_ready(self, run: ResearchRun, dag: SubtaskDAG) -> int:
+        """
+        Enqueue ready subtasks, longest remaining critical path first.
+
+        With max_parallel_subtasks set, only as many as there is free
+        capacity for are enqueued; the rest wait for completions. If the
+        QUEUED batch cannot be written, the drained subtasks go back on the
+        ready queue before the error propagates, so a retry dispatches them.
+        """
+        limit = None
+        if self.config.max_parallel_subtasks > 0:
+            limit = max(0, self.config.max_parallel_subtasks - dag.in_flight_count)
+
+        scheduled = []
+        for subtask in dag.drain_ready(limit):
+            share = dag.rank.get(subtask.id, 0.0) / dag.longest_path if dag.longest_path else 0.0
+            decision = await self.scheduler.schedule(subtask, run, critical_path_share=share)
+            scheduled.append((subtask, decision))
+        try:
+            return await self._enqueue_subtasks(scheduled)
+        except ConcurrencyError:
+            for subtask, _ in scheduled:
+                dag.requeue(subtask.id)
+            raise
 
     # =========================================================================
     # PHASE: AGGREGATION
@@ -581,6 +709,7 @@ class Orchestrator:
 
     async def _fail_run(self, run: ResearchRun, reason: str) -> None:
         """Mark a run as failed."""
+        self._dags.pop(run.id, None)
         self.supabase.table("agent_runs").update({
             "status": RunState.FAILED.value,
             "completed_at": datetime.utcnow().isoformat(),
@@ -594,20 +723,39 @@ class Orchestrator:
     # HELPER METHODS
     # =========================================================================
 
-    async def _get_completed_subtask_ids(self, run_id: str) -> set[str]:
-        """Get IDs of completed subtasks for a run."""
-        subtasks = await self.state_machine.get_subtasks_by_run(
-            run_id=run_id,
-            states=[SubtaskState.COMPLETED]
-        )
-        return {s.id for s in subtasks}
+    async def _load_duration_history(self) -> None:
+        """Learn subtask durations from recently completed subtasks."""
+        try:
+            result = self.supabase.table("subtasks").select("*").eq(
+                "state", SubtaskState.COMPLETED.value
+            ).order("completed_at", desc=True).limit(self.config.duration_history_limit).execute()
+            subtasks = [Subtask.from_db_row(row) for row in (result.data or [])]
+            learned = self.scheduler.learn_durations(subtasks)
+            logger.info(f"Loaded {learned} subtask durations for critical-path scheduling")
+        except Exception as e:
+            logger.warning(f"Could not load subtask duration history: {e}")
 
     async def _cancel_pending_subtasks(self, run_id: str) -> None:
-        """Cancel all pending subtasks for a run."""
-        self.supabase.table("subtasks").update({
-            "state": SubtaskState.CANCELLED.value,
-            "completed_at": datetime.utcnow().isoformat(),
-        }).eq("run_id", run_id).in_("state", ["pending", "queued"]).execute()
+        """
+        Cancel all pending and queued subtasks for a run.
+
+        Goes through the state machine, so each row keeps its optimistic
+        lock and the cancellations are published as subtask events.
+        """
+        result = self.supabase.table("subtasks").select(
+            "id, state, state_version"
+        ).eq("run_id", run_id).in_("state", ["pending", "queued"]).execute()
+
+        await self.state_machine.transition_subtask_states([
+            SubtaskTransition(
+                subtask_id=row["id"],
+                from_state=SubtaskState(row["state"]),
+                to_state=SubtaskState.CANCELLED,
+                state_version=row["state_version"],
+                run_id=run_id,
+            )
+            for row in (result.data or [])
+        ], reason="Run finished before the subtask ran")
 
     # =========================================================================
     # BACKGROUND MONITORS
@@ -646,6 +794,57 @@ class Orchestrator:
             except Exception as e:
                 logger.error(f"Stall detector error: {e}")
 
+    async def _subtask_event_loop(self) -> None:
+        """Background loop consuming subtask completion events."""
+        while self._running:
+            try:
+                events = await self.events.read(block_ms=self.config.event_block_ms)
+                await self._handle_subtask_events(events)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Subtask event loop error: {e}")
+                await asyncio.sleep(1)
+
+    async def _reconcile_loop(self) -> None:
+        """
+        Slow safety net for missed completion events.
+
+        Reclaims events a crashed instance never acknowledged and re-checks
+        the runs this instance is scheduling against the database.
+        """
+        while self._running:
+            try:
+                await asyncio.sleep(self.config.reconcile_interval)
+                await self._handle_subtask_events(await self.events.claim_stale())
+                for run_id in list(self._dags):
+                    self.job_queue.enqueue(run_id, priority=0)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Reconcile loop error: {e}")
+
+    async def _handle_subtask_events(self, events: List[SubtaskEvent]) -> None:
+        # Fan-in: one lock and one dispatch per run, not per event
+        by_run: Dict[str, List[SubtaskEvent]] = {}
+        for event in events:
+            by_run.setdefault(event.run_id, []).append(event)
+
+        failed_entries = set()
+        for run_id, run_events in by_run.items():
+            try:
+                await self.handle_subtask_events(run_id, run_events)
+            except Exception as e:
+                # Left pending; reclaimed after the idle timeout
+                logger.error(f"Failed to handle {len(run_events)} subtask events for run {run_id}: {e}")
+                failed_entries.update(event.entry_id for event in run_events)
+
+        # A combined entry is acked only once all of its events were handled
+        handled = list(dict.fromkeys(
+            event.entry_id for event in events if event.entry_id not in failed_entries
+        ))
+        await self.events.ack(handled)
+
     async def _check_deadlines(self) -> None:
         """Check for runs past deadline."""
         now = datetime.utcnow()
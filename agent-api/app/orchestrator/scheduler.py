@@ -4,6 +4,7 @@ Subtask Scheduler for Fair Scheduling and Priority Management
 Implements:
 - Fair scheduling with tenant quotas
 - Priority calculation (deadline, retry, dependencies)
+- Critical-path ranking from per-task-type duration estimates
 - Queue mapping by task type
 - Worker affinity for checkpointing
 """
@@ -11,15 +12,20 @@ Implements:
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
 
 from app.orchestrator.types import (
     Subtask,
+    SubtaskState,
     ResearchRun,
     SchedulingDecision,
 )
 
+if TYPE_CHECKING:
+    from app.orchestrator.dag import SubtaskDAG
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +42,99 @@ TASK_TYPE_QUEUES = {
     "default": "workers.subtask",
 }
 
+# Prior duration estimates (seconds) before any history is observed
+DEFAULT_TASK_DURATIONS = {
+    "entity_research": 60,
+    "dimension_analysis": 60,
+    "source_research": 90,
+    "research": 60,
+    "synthesis": 120,
+    "web_search": 30,
+    "code_execution": 60,
+    "browser": 90,
+    "default": 60,
+}
+
+
+class DurationEstimator:
+    """
+    Estimates subtask durations per task type.
+
+    Observed run times are folded into an exponentially weighted moving
+    average, so estimates follow recent behaviour without storing history.
+    The IDs of the last max_tracked observed subtasks are remembered, so a
+    subtask seen again (history load, DAG rebuilds, completion events) is
+    only counted once.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        defaults: Optional[Dict[str, float]] = None,
+        max_tracked: int = 10000,
+    ):
+        self.alpha = alpha
+        self.defaults = defaults or DEFAULT_TASK_DURATIONS
+        self.max_tracked = max_tracked
+        self._averages: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._observed: "OrderedDict[str, None]" = OrderedDict()
+
+    def observe(self, task_type: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        previous = self._averages.get(task_type)
+        if previous is None:
+            self._averages[task_type] = seconds
+        else:
+            self._averages[task_type] = previous + self.alpha * (seconds - previous)
+        self._samples[task_type] = self._samples.get(task_type, 0) + 1
+
+    def observe_subtask(self, subtask: Subtask) -> bool:
+        """
+        Learn from a completed subtask's start and completion times.
+
+        Returns:
+            True if the subtask contributed a sample (False for repeats)
+        """
+        if subtask.state != SubtaskState.COMPLETED or subtask.id in self._observed:
+            return False
+        started = _as_datetime(subtask.started_at)
+        completed = _as_datetime(subtask.completed_at)
+        if started is None or completed is None:
+            return False
+        try:
+            seconds = (completed - started).total_seconds()
+        except TypeError:
+            # One timestamp is timezone-aware and the other is not
+            return False
+        self._observed[subtask.id] = None
+        if len(self._observed) > self.max_tracked:
+            self._observed.popitem(last=False)
+        self.observe(subtask.task_type, seconds)
+        return True
+
+    def estimate(self, task_type: str) -> float:
+        if task_type in self._averages:
+            return self._averages[task_type]
+        return self.defaults.get(task_type, self.defaults["default"])
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            task_type: {"estimate_seconds": round(avg, 1), "samples": self._samples[task_type]}
+            for task_type, avg in self._averages.items()
+        }
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    # Rows from the database carry ISO strings rather than datetimes
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
 
 class SubtaskScheduler:
     """
@@ -44,6 +143,8 @@ class SubtaskScheduler:
     Features:
     - Queue mapping by task type
     - Priority calculation based on multiple factors
+    - Critical-path ranks: estimated work remaining on the longest chain
+      through each subtask, used to order ready work under limited capacity
     - Delay calculation for retries (exponential backoff)
     - Worker affinity for checkpoint recovery
     """
@@ -54,16 +155,51 @@ class SubtaskScheduler:
         max_priority: int = 10,
         base_retry_delay: int = 30,
         max_retry_delay: int = 300,
+        durations: Optional[DurationEstimator] = None,
     ):
         self.default_priority = default_priority
         self.max_priority = max_priority
         self.base_retry_delay = base_retry_delay
         self.max_retry_delay = max_retry_delay
+        self.durations = durations or DurationEstimator()
+
+    def learn_durations(self, subtasks: Iterable[Subtask]) -> int:
+        """
+        Feed completed subtasks into the duration estimates.
+
+        Returns:
+            Number of subtasks that contributed a sample
+        """
+        return sum(1 for subtask in subtasks if self.durations.observe_subtask(subtask))
+
+    def critical_path(self, dag: "SubtaskDAG") -> Dict[str, float]:
+        """
+        Compute longest-remaining-path ranks for a run's subtasks.
+
+        A subtask's rank is its own estimated duration plus the largest rank
+        among its dependents, i.e. the shortest time in which the run can
+        still finish once the subtask starts. Completed subtasks contribute
+        no remaining work. O(V + E).
+
+        Args:
+            dag: The run's dependency graph
+
+        Returns:
+            Subtask ID -> remaining critical-path seconds
+        """
+        rank: Dict[str, float] = {}
+        for subtask_id in reversed(dag.topological_order()):
+            subtask = dag.subtasks[subtask_id]
+            own = 0.0 if subtask_id in dag.completed else self.durations.estimate(subtask.task_type)
+            downstream = max((rank[d] for d in dag.dependents[subtask_id]), default=0.0)
+            rank[subtask_id] = own + downstream
+        return rank
 
     async def schedule(
         self,
         subtask: Subtask,
-        run: ResearchRun
+        run: ResearchRun,
+        critical_path_share: float = 0.0,
     ) -> SchedulingDecision:
         """
         Create scheduling decision for a subtask.
@@ -71,6 +207,8 @@ class SubtaskScheduler:
         Args:
             subtask: The subtask to schedule
             run: The parent run
+            critical_path_share: Subtask's critical-path rank relative to the
+                run's longest path (1.0 = on the critical path)
 
         Returns:
             SchedulingDecision with queue, priority, delay, affinity
@@ -79,7 +217,7 @@ class SubtaskScheduler:
         queue_name = self._get_queue_name(subtask.task_type)
 
         # Calculate priority
-        priority = self._calculate_priority(subtask, run)
+        priority = self._calculate_priority(subtask, run, critical_path_share)
 
         # Calculate delay (for retries)
         delay_seconds = self._calculate_delay(subtask)
@@ -109,7 +247,8 @@ class SubtaskScheduler:
     def _calculate_priority(
         self,
         subtask: Subtask,
-        run: ResearchRun
+        run: ResearchRun,
+        critical_path_share: float = 0.0,
     ) -> int:
         """
         Calculate scheduling priority.
@@ -119,6 +258,7 @@ class SubtaskScheduler:
         2. Deadline proximity (higher priority as deadline approaches)
         3. Retry status (slightly lower priority for retries)
         4. Synthesis tasks get higher priority (to complete run faster)
+        5. Subtasks on (or near) the critical path get higher priority
         """
         priority = self.default_priority
 
@@ -145,6 +285,10 @@ class SubtaskScheduler:
         if subtask.task_type == "synthesis":
             priority = min(priority + 2, self.max_priority)
 
+        # Factor 5: Critical path boost
+        if critical_path_share >= 0.9:
+            priority = min(priority + 1, self.max_priority)
+
         return priority
 
     def _calculate_delay(self, subtask: Subtask) -> int:
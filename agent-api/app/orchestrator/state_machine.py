@@ -5,17 +5,20 @@ Implements:
 - Valid state transition validation
 - Fencing token acquisition/release
 - Optimistic locking with state_version
+- Completion events for subtasks reaching a terminal state
+- Batched subtask transitions (one round trip, one combined event)
 """
 
 from __future__ import annotations
 
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Iterable, List, Optional, Set, Tuple
 from uuid import uuid4
 
 from supabase import Client
 
+from app.orchestrator.events import EVENT_STATES, SubtaskEventStream
 from app.orchestrator.types import (
     RunState,
     SubtaskState,
@@ -23,6 +26,7 @@ from app.orchestrator.types import (
     SUBTASK_TRANSITIONS,
     ResearchRun,
     Subtask,
+    SubtaskTransition,
     InvalidTransitionError,
     ConcurrencyError,
     FencingError,
@@ -41,8 +45,9 @@ class StateMachine:
     - Database-level atomic operations
     """
 
-    def __init__(self, supabase: Client):
+    def __init__(self, supabase: Client, events: Optional[SubtaskEventStream] = None):
         self.supabase = supabase
+        self.events = events
 
     # =========================================================================
     # FENCING TOKEN MANAGEMENT
@@ -223,7 +228,8 @@ class StateMachine:
         transitioned_by: str = "worker",
         reason: Optional[str] = None,
         result_data: Optional[dict] = None,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        run_id: Optional[str] = None,
     ) -> bool:
         """
         Transition subtask to new state with optimistic locking.
@@ -237,6 +243,7 @@ class StateMachine:
             reason: Transition reason
             result_data: Result data (for completed)
             error: Error message (for failed)
+            run_id: Parent run ID (looked up when a completion event needs it)
 
         Returns:
             True if transition succeeded
@@ -268,6 +275,7 @@ class StateMachine:
                 logger.info(
                     f"Subtask {subtask_id} transitioned: {from_state.value} -> {to_state.value}"
                 )
+                await self._publish_subtask_event(subtask_id, to_state, run_id)
 
             return success
 
@@ -275,6 +283,109 @@ class StateMachine:
             logger.error(f"Error transitioning subtask state: {e}")
             return False
 
+    def validate_subtask_transitions(self, transitions: Iterable[SubtaskTransition]) -> None:
+        """
+        Check a batch against the transition table.
+
+        Each distinct (from, to) pair is looked up once.
+
+        Raises:
+            InvalidTransitionError: naming every invalid pair in the batch
+        """
+        pairs = {(t.from_state, t.to_state) for t in transitions}
+        invalid = sorted(
+            f"{from_state.value} -> {to_state.value}"
+            for from_state, to_state in pairs
+            if not self.validate_subtask_transition(from_state, to_state)
+        )
+        if invalid:
+            raise InvalidTransitionError(
+                f"Cannot transition subtasks: {', '.join(invalid)}"
+            )
+
+    async def transition_subtask_states(
+        self,
+        transitions: List[SubtaskTransition],
+        transitioned_by: str = "orchestrator",
+        reason: Optional[str] = None,
+    ) -> Set[str]:
+        """
+        Apply many subtask transitions in one database round trip.
+
+        The whole batch is validated before anything is written. Each row
+        keeps its own optimistic lock, so rows whose state or version moved
+        on are skipped rather than failing the batch. Terminal transitions
+        are announced as a single combined event.
+
+        Args:
+            transitions: Requested transitions
+            transitioned_by: Who initiated
+            reason: Transition reason recorded for every row
+
+        Returns:
+            IDs of the subtasks that were transitioned
+
+        Raises:
+            InvalidTransitionError: If any transition is not allowed
+            ConcurrencyError: If the batch could not be written
+        """
+        if not transitions:
+            return set()
+        self.validate_subtask_transitions(transitions)
+
+        payload = [
+            {
+                "subtask_id": t.subtask_id,
+                "from_state": t.from_state.value,
+                "to_state": t.to_state.value,
+                "state_version": t.state_version,
+                "result_data": t.result_data,
+                "error": t.error,
+            }
+            for t in transitions
+        ]
+
+        try:
+            result = self.supabase.rpc(
+                "transition_subtask_states_batch",
+                {
+                    "p_transitions": payload,
+                    "p_transitioned_by": transitioned_by,
+                    "p_reason": reason,
+                }
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error transitioning {len(transitions)} subtasks: {e}")
+            raise ConcurrencyError(f"Subtask batch transition failed: {e}")
+
+        applied = {row["subtask_id"]: row for row in (result.data or [])}
+        logger.info(f"Batch transitioned {len(applied)}/{len(transitions)} subtasks")
+
+        if self.events is not None:
+            await self.events.publish_batch(
+                (row["run_id"], subtask_id, SubtaskState(row["to_state"]))
+                for subtask_id, row in applied.items()
+                if SubtaskState(row["to_state"]) in EVENT_STATES
+            )
+
+        return set(applied)
+
+    async def _publish_subtask_event(
+        self,
+        subtask_id: str,
+        to_state: SubtaskState,
+        run_id: Optional[str],
+    ) -> None:
+        """Announce a terminal subtask transition to the orchestrators."""
+        if self.events is None or to_state not in EVENT_STATES:
+            return
+        if run_id is None:
+            subtask = await self.get_subtask(subtask_id)
+            if subtask is None:
+                return
+            run_id = subtask.run_id
+        await self.events.publish(run_id, subtask_id, to_state)
+
     # =========================================================================
     # HELPER METHODS
     # =========================================================================
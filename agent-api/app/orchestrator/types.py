@@ -286,6 +286,18 @@ class SchedulingDecision:
     worker_affinity: Optional[str]
 
 
+@dataclass
+class SubtaskTransition:
+    """One requested subtask state change in a batch."""
+    subtask_id: str
+    from_state: SubtaskState
+    to_state: SubtaskState
+    state_version: int
+    run_id: Optional[str] = None
+    result_data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
 @dataclass
 class RunProgress:
     """Progress information for a run."""
@@ -314,6 +326,19 @@ class OrchestratorConfig:
     stall_detection_interval: int = 60
     stall_threshold_minutes: int = 10
     fencing_timeout_minutes: int = 5
+    # Subtask completion events drive scheduling; the reconciliation poll
+    # only catches events lost to a Redis outage or a crashed instance
+    event_block_ms: int = 5000
+    reconcile_interval: int = 120
+    # Per-run cap on queued/running subtasks (0 = unlimited); ready work
+    # beyond it waits in critical-path order
+    max_parallel_subtasks: int = 0
+    # Completed subtasks loaded at startup to seed duration estimates
+    duration_history_limit: int = 500
+    # Decomposition plans are reused for repeat queries; stale ones are
+    # served while refreshed in the background
+    decomposition_cache_ttl_seconds: int = 3600
+    decomposition_cache_stale_seconds: int = 86400
 
 
 # =============================================================================
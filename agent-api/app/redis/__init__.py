@@ -1,7 +1,13 @@
 """Redis infrastructure for job queue and pub/sub"""
 
 from app.redis.clients import get_worker_redis, get_api_redis
+from app.redis.pools import RedisRole, get_sync_client, get_async_client, get_pool_metrics
 from app.redis.publisher import LogPublisher
-from app.redis.subscriber import LogSubscriber
+from app.redis.subscriber import LogSubscriber, LogMultiplexer
+from app.redis.event_stream import RunEventStream
 
-__all__ = ["get_worker_redis", "get_api_redis", "LogPublisher", "LogSubscriber"]
+__all__ = [
+    "get_worker_redis", "get_api_redis",
+    "RedisRole", "get_sync_client", "get_async_client", "get_pool_metrics",
+    "LogPublisher", "LogSubscriber", "LogMultiplexer", "RunEventStream",
+]
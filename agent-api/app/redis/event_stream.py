@@ -0,0 +1,189 @@
+"""
+Per-run event log backed by Redis Streams.
+
+The worker appends every user-visible run event (status, tool_call,
+tool_result, message, thinking, complete) to agent:events:{run_id}. SSE
+clients XREAD BLOCK on the stream instead of polling the database, and the
+stream entry id doubles as the SSE event id so a reconnecting client can
+resume from its Last-Event-ID.
+
+- Streams are capped (approximate MAXLEN) and expire after the run goes idle
+- Appends never raise; a Redis outage degrades SSE to database polling
+- SSE clients only read agent_messages during their initial backfill, so
+  every writer of that table goes through insert_run_message
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.redis.clients import get_worker_redis
+
+logger = logging.getLogger(__name__)
+
+RUN_EVENTS_MAXLEN = 1000
+RUN_EVENTS_TTL_SECONDS = 86400
+TERMINAL_RUN_STATUSES = ("completed", "failed", "cancelled", "timeout")
+
+# Stream id that sorts before every entry (read from the beginning)
+STREAM_START_ID = "0-0"
+
+
+def run_events_key(run_id: str) -> str:
+    """Redis Stream key for a run's events."""
+    return f"agent:events:{run_id}"
+
+
+def message_event_data(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload of the message event for an agent_messages row."""
+    return {
+        "message_id": message.get("id"),
+        "role": message["role"],
+        "content": message["content"],
+    }
+
+
+class RunEventStream:
+    """Appends to and reads from a run's Redis Stream event log"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        maxlen: int = RUN_EVENTS_MAXLEN,
+        ttl_seconds: int = RUN_EVENTS_TTL_SECONDS,
+    ):
+        """
+        Initialize run event stream.
+
+        Args:
+            redis_client: Async Redis client (defaults to the worker client)
+            maxlen: Approximate cap on retained events per run
+            ttl_seconds: Expiry refreshed on every append
+        """
+        self.redis = redis_client or get_worker_redis()
+        self.maxlen = maxlen
+        self.ttl_seconds = ttl_seconds
+
+    async def append(
+        self,
+        run_id: str,
+        event_type: str,
+        data: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Append an event to the run's stream.
+
+        Args:
+            run_id: Agent run ID
+            event_type: SSE event type
+            data: JSON-serializable event payload
+
+        Returns:
+            Stream entry id, or None if the append failed
+        """
+        key = run_events_key(run_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(
+                    key,
+                    {"event": event_type, "data": json.dumps(data, default=str)},
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+                pipe.expire(key, self.ttl_seconds)
+                entry_id, _ = await pipe.execute()
+            return entry_id
+        except Exception as e:
+            logger.error(f"Failed to append {event_type} event for run {run_id}: {e}")
+            return None
+
+    async def append_status(self, run_id: str, status: str, **extra: Any) -> Optional[str]:
+        """
+        Append a status event, followed by a complete event for terminal statuses.
+
+        Args:
+            run_id: Agent run ID
+            status: New run status
+            **extra: Additional payload fields (current_phase, error_message, ...)
+
+        Returns:
+            Stream entry id of the last appended event
+        """
+        entry_id = await self.append(run_id, "status", {"status": status, **extra})
+        if status in TERMINAL_RUN_STATUSES:
+            entry_id = await self.append(run_id, "complete", {
+                "status": status,
+                "message": extra.get("error_message") or "Execution finished",
+            })
+        return entry_id
+
+    async def last_id(self, run_id: str) -> str:
+        """
+        Get the id of the newest entry.
+
+        Returns:
+            Entry id, or STREAM_START_ID if the stream is empty
+        """
+        entries = await self.redis.xrevrange(run_events_key(run_id), count=1)
+        return entries[0][0] if entries else STREAM_START_ID
+
+    async def read(
+        self,
+        run_id: str,
+        after_id: str,
+        block_ms: Optional[int] = None,
+        count: int = 100,
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Read events after an entry id, optionally blocking for new ones.
+
+        Args:
+            run_id: Agent run ID
+            after_id: Exclusive lower bound entry id
+            block_ms: Milliseconds to block when no events are available
+            count: Maximum events to return
+
+        Returns:
+            List of (entry_id, event_type, data); empty on timeout
+        """
+        response = await self.redis.xread(
+            {run_events_key(run_id): after_id},
+            count=count,
+            block=block_ms,
+        )
+        events = []
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                try:
+                    data = json.loads(fields.get("data") or "{}")
+                except (TypeError, ValueError):
+                    data = {}
+                events.append((entry_id, fields.get("event", "message"), data))
+        return events
+
+
+async def insert_run_message(
+    supabase: Any,
+    run_id: str,
+    role: str,
+    content: str,
+    events: Optional[RunEventStream] = None,
+) -> Dict[str, Any]:
+    """
+    Store an agent_messages row and append its message event.
+
+    Args:
+        supabase: Supabase client
+        run_id: Agent run ID
+        role: Message role (user, assistant)
+        content: Message text
+        events: Event stream to append to (defaults to the worker client)
+
+    Returns:
+        The inserted row
+    """
+    row = {"run_id": run_id, "role": role, "content": content}
+    result = supabase.table("agent_messages").insert(row).execute()
+    if result.data:
+        row = result.data[0]
+    await (events or RunEventStream()).append(run_id, "message", message_event_data(row))
+    return row
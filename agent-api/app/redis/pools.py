@@ -0,0 +1,345 @@
+"""
+Redis connection pool registry
+
+One shared connection pool per (role, sync/async) per process, so every
+caller of a role reuses the same sockets instead of building its own client:
+- api:    sync, request handlers
+- queue:  sync, job queue (BRPOP), worker heartbeat and DB sync
+- worker: async, log publishing, pub/sub and run event streams
+- stream: async, SSE readers blocked in XREAD (one connection per viewer,
+          so this pool is not capped)
+
+All pools share the same connection settings: Upstash URLs are upgraded to
+TLS, sockets use TCP keepalive and health checks, and commands retry on
+connection errors with exponential backoff. Bounded pools block (up to
+pool_timeout) instead of failing when exhausted, and record utilization and
+wait-time metrics (see get_pool_metrics).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisRole(str, Enum):
+    """Connection pool roles."""
+    API = "api"
+    QUEUE = "queue"
+    WORKER = "worker"
+    STREAM = "stream"
+
+
+@dataclass(frozen=True)
+class PoolSpec:
+    """Sizing for one role's pool."""
+    max_connections: Optional[int]  # None = unbounded
+    pool_timeout: float = 5.0       # Seconds to wait for a free connection
+
+
+POOL_SPECS: Dict[RedisRole, PoolSpec] = {
+    RedisRole.API: PoolSpec(max_connections=20),
+    RedisRole.QUEUE: PoolSpec(max_connections=8),
+    RedisRole.WORKER: PoolSpec(max_connections=10),
+    RedisRole.STREAM: PoolSpec(max_connections=None),
+}
+
+
+def normalize_redis_url(redis_url: str) -> str:
+    """Upgrade plain Upstash URLs to TLS (Upstash only accepts rediss://)."""
+    if redis_url.startswith("redis://") and "upstash.io" in redis_url:
+        return "rediss://" + redis_url[len("redis://"):]
+    return redis_url
+
+
+def connection_kwargs(redis_url: str) -> Dict[str, Any]:
+    """Connection settings shared by every pool."""
+    kwargs: Dict[str, Any] = {
+        "decode_responses": True,
+        "socket_connect_timeout": 10,
+        "socket_keepalive": True,
+        "health_check_interval": 30,
+        "retry_on_error": [ConnectionError, TimeoutError],
+        "retry": Retry(ExponentialBackoff(cap=8, base=0.5), 3),
+    }
+    if redis_url.startswith("rediss://"):
+        kwargs["ssl_cert_reqs"] = "none"
+    return kwargs
+
+
+class PoolMetrics:
+    """Utilization and wait-time counters for one pool."""
+
+    def __init__(self, role: RedisRole, mode: str, max_connections: Optional[int]):
+        self.role = role
+        self.mode = mode
+        self.max_connections = max_connections
+        self.peak_in_use = 0
+        self.acquired = 0
+        self.exhausted = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._active: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        return len(self._active)
+
+    def record_acquire(self, connection: Any, wait_seconds: float):
+        with self._lock:
+            self._active.add(id(connection))
+            self.peak_in_use = max(self.peak_in_use, len(self._active))
+            self.acquired += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def record_release(self, connection: Any):
+        # Pools also release connections that failed to connect before they
+        # were handed out, so only count connections seen in record_acquire
+        with self._lock:
+            self._active.discard(id(connection))
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Point-in-time metrics."""
+        with self._lock:
+            utilization = (
+                len(self._active) / self.max_connections if self.max_connections else None
+            )
+            return {
+                "role": self.role.value,
+                "mode": self.mode,
+                "max_connections": self.max_connections,
+                "in_use": len(self._active),
+                "peak_in_use": self.peak_in_use,
+                "utilization": utilization,
+                "acquired": self.acquired,
+                "exhausted": self.exhausted,
+                "wait_ms_avg": (
+                    self.wait_seconds_total / self.acquired * 1000 if self.acquired else 0.0
+                ),
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+
+class InstrumentedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """Sync blocking pool that records metrics."""
+
+    def __init__(self, *args, metrics: PoolMetrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except ConnectionError as e:
+            if "No connection available" in str(e):
+                self.metrics.record_exhausted()
+            raise
+        self.metrics.record_acquire(connection, time.perf_counter() - start)
+        return connection
+
+    def release(self, connection):
+        super().release(connection)
+        self.metrics.record_release(connection)
+
+
+class InstrumentedConnectionPool(redis.ConnectionPool):
+    """Sync unbounded pool that records metrics."""
+
+    def __init__(self, *args, metrics: PoolMetrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        connection = super().get_connection(command_name, *keys, **options)
+        self.metrics.record_acquire(connection, time.perf_counter() - start)
+        return connection
+
+    def release(self, connection):
+        super().release(connection)
+        self.metrics.record_release(connection)
+
+
+class InstrumentedAsyncBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """Async blocking pool that records metrics."""
+
+    def __init__(self, *args, metrics: PoolMetrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    async def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+        except ConnectionError as e:
+            if "No connection available" in str(e):
+                self.metrics.record_exhausted()
+            raise
+        self.metrics.record_acquire(connection, time.perf_counter() - start)
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.metrics.record_release(connection)
+
+
+class InstrumentedAsyncConnectionPool(aioredis.ConnectionPool):
+    """Async unbounded pool that records metrics."""
+
+    def __init__(self, *args, metrics: PoolMetrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    async def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        connection = await super().get_connection(command_name, *keys, **options)
+        self.metrics.record_acquire(connection, time.perf_counter() - start)
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.metrics.record_release(connection)
+
+
+class RedisPoolRegistry:
+    """Creates and caches one client per (role, mode)."""
+
+    def __init__(self, redis_url: Optional[str] = None, specs: Optional[Dict[RedisRole, PoolSpec]] = None):
+        """
+        Initialize registry.
+
+        Args:
+            redis_url: Redis URL (defaults to settings.redis_url)
+            specs: Per-role pool sizing (defaults to POOL_SPECS)
+        """
+        self._redis_url = redis_url
+        self.specs = specs or POOL_SPECS
+        self._clients: Dict[Tuple[RedisRole, str], Any] = {}
+        self._metrics: Dict[Tuple[RedisRole, str], PoolMetrics] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def redis_url(self) -> str:
+        if self._redis_url is None:
+            self._redis_url = normalize_redis_url(get_settings().redis_url)
+        return self._redis_url
+
+    def get_sync(self, role: RedisRole) -> redis.Redis:
+        """Get the shared sync client for a role."""
+        key = (role, "sync")
+        with self._lock:
+            if key not in self._clients:
+                spec = self.specs[role]
+                metrics = PoolMetrics(role, "sync", spec.max_connections)
+                if spec.max_connections is None:
+                    # A blocking pool pre-fills a slot per connection on reset
+                    pool = InstrumentedConnectionPool.from_url(
+                        self.redis_url,
+                        metrics=metrics,
+                        **connection_kwargs(self.redis_url),
+                    )
+                else:
+                    pool = InstrumentedBlockingConnectionPool.from_url(
+                        self.redis_url,
+                        max_connections=spec.max_connections,
+                        timeout=spec.pool_timeout,
+                        metrics=metrics,
+                        **connection_kwargs(self.redis_url),
+                    )
+                self._clients[key] = redis.Redis(connection_pool=pool)
+                self._metrics[key] = metrics
+                logger.info(f"Initialized {role.value} Redis pool (sync, max={spec.max_connections})")
+            return self._clients[key]
+
+    def get_async(self, role: RedisRole) -> aioredis.Redis:
+        """Get the shared async client for a role."""
+        key = (role, "async")
+        with self._lock:
+            if key not in self._clients:
+                spec = self.specs[role]
+                metrics = PoolMetrics(role, "async", spec.max_connections)
+                if spec.max_connections is None:
+                    pool = InstrumentedAsyncConnectionPool.from_url(
+                        self.redis_url,
+                        metrics=metrics,
+                        **connection_kwargs(self.redis_url),
+                    )
+                else:
+                    pool = InstrumentedAsyncBlockingConnectionPool.from_url(
+                        self.redis_url,
+                        max_connections=spec.max_connections,
+                        timeout=spec.pool_timeout,
+                        metrics=metrics,
+                        **connection_kwargs(self.redis_url),
+                    )
+                self._clients[key] = aioredis.Redis(connection_pool=pool)
+                self._metrics[key] = metrics
+                logger.info(f"Initialized {role.value} Redis pool (async, max={spec.max_connections})")
+            return self._clients[key]
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics for every pool created so far, keyed by role:mode."""
+        return {
+            f"{role.value}:{mode}": metrics.snapshot()
+            for (role, mode), metrics in list(self._metrics.items())
+        }
+
+    async def close_async(self, role: Optional[RedisRole] = None):
+        """Disconnect async pools (all roles if role is None)."""
+        for key in [k for k in self._clients if k[1] == "async" and role in (None, k[0])]:
+            client = self._clients.pop(key)
+            self._metrics.pop(key, None)
+            await client.connection_pool.disconnect()
+            logger.info(f"Closed {key[0].value} Redis pool (async)")
+
+    def close_sync(self, role: Optional[RedisRole] = None):
+        """Disconnect sync pools (all roles if role is None)."""
+        for key in [k for k in self._clients if k[1] == "sync" and role in (None, k[0])]:
+            client = self._clients.pop(key)
+            self._metrics.pop(key, None)
+            client.connection_pool.disconnect()
+            logger.info(f"Closed {key[0].value} Redis pool (sync)")
+
+
+_registry: Optional[RedisPoolRegistry] = None
+
+
+def get_pool_registry() -> RedisPoolRegistry:
+    """Get the per-process pool registry."""
+    global _registry
+    if _registry is None:
+        _registry = RedisPoolRegistry()
+    return _registry
+
+
+def get_sync_client(role: RedisRole) -> redis.Redis:
+    """Shared sync Redis client for a role."""
+    return get_pool_registry().get_sync(role)
+
+
+def get_async_client(role: RedisRole) -> aioredis.Redis:
+    """Shared async Redis client for a role."""
+    return get_pool_registry().get_async(role)
+
+
+def get_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Utilization and wait-time metrics for every pool in this process."""
+    return get_pool_registry().metrics()
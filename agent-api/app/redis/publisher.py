@@ -1,18 +1,56 @@
-"""Redis pub/sub log publisher for real-time streaming"""
+"""
+Redis pub/sub log publisher for real-time streaming
+
+Logs are coalesced before they reach Redis:
+- Messages are buffered and flushed every flush_interval_ms or max_batch
+  messages, whichever comes first, in one pipelined round trip
+- Each flush sends one PUBLISH per run (a "batch" message when several
+  logs are pending) regardless of how many channels are involved
+- Pub/sub only wakes live readers; late joiners catch up from
+  agent_task_logs with a keyset cursor (see app.routes.logs)
+- Completion events flush immediately, after any pending logs
+"""
+import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
 from app.redis.clients import get_worker_redis
 
 logger = logging.getLogger(__name__)
 
+_log_publisher = None  # Per-process coalescing publisher
+
+
+def log_channel(run_id: str) -> str:
+    """Pub/sub channel for a run's logs."""
+    return f"agent:logs:{run_id}"
+
 
 class LogPublisher:
     """Publishes agent logs to Redis pub/sub channels"""
 
-    def __init__(self):
-        self.redis = get_worker_redis()
+    def __init__(
+        self,
+        redis_client: Any = None,
+        flush_interval_ms: int = 50,
+        max_batch: int = 100,
+    ):
+        """
+        Initialize log publisher.
+
+        Args:
+            redis_client: Async Redis client (defaults to the worker client)
+            flush_interval_ms: Maximum time a log waits in the buffer
+            max_batch: Buffered logs that trigger an immediate flush
+        """
+        self.redis = redis_client or get_worker_redis()
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch = max_batch
+        self._buffer: List[Tuple[str, Dict[str, Any]]] = []
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
 
     async def publish_log(
         self,
@@ -30,22 +68,38 @@ class LogPublisher:
             message: Log message
             metadata: Optional metadata dictionary
         """
-        channel = f"agent:logs:{run_id}"
-
         log_data = {
             "type": "log",
+            "id": uuid4().hex,
             "run_id": run_id,
             "log_type": log_type,
             "message": message,
             "metadata": metadata or {},
             "timestamp": datetime.utcnow().isoformat()
         }
+        await self._enqueue(run_id, log_data)
 
-        try:
-            await self.redis.publish(channel, json.dumps(log_data))
-            logger.debug(f"Published log to {channel}: {log_type}")
-        except Exception as e:
-            logger.error(f"Failed to publish log to Redis: {e}")
+    async def publish_logs(
+        self,
+        logs: List[Tuple[str, str, str, Optional[Dict[str, Any]]]],
+    ):
+        """
+        Publish several logs, possibly for different runs, in one batch.
+
+        Args:
+            logs: (run_id, log_type, message, metadata) tuples
+        """
+        for run_id, log_type, message, metadata in logs:
+            self._buffer.append((run_id, {
+                "type": "log",
+                "id": uuid4().hex,
+                "run_id": run_id,
+                "log_type": log_type,
+                "message": message,
+                "metadata": metadata or {},
+                "timestamp": datetime.utcnow().isoformat()
+            }))
+        await self.flush()
 
     async def publish_completion(self, run_id: str, status: str):
         """
@@ -55,17 +109,80 @@ class LogPublisher:
             run_id: Agent run ID
             status: Final status (completed, failed, etc.)
         """
-        channel = f"agent:logs:{run_id}"
-
         completion_data = {
             "type": "complete",
+            "id": uuid4().hex,
             "run_id": run_id,
             "status": status,
             "timestamp": datetime.utcnow().isoformat()
         }
+        self._buffer.append((run_id, completion_data))
+        await self.flush()
+        logger.info(f"Published completion to {log_channel(run_id)}: {status}")
+
+    async def _enqueue(self, run_id: str, data: Dict[str, Any]):
+        """Buffer a message and flush now or schedule a timed flush"""
+        self._buffer.append((run_id, data))
+        if len(self._buffer) >= self.max_batch:
+            await self.flush()
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Loop so logs buffered while a flush is in flight are not stranded
+        while self._buffer:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+            await self.flush()
+
+    async def flush(self):
+        """Send all buffered messages in a single pipeline"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+
+            by_run: Dict[str, List[Dict[str, Any]]] = {}
+            for run_id, data in batch:
+                by_run.setdefault(run_id, []).append(data)
+
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for run_id, messages in by_run.items():
+                        if len(messages) == 1:
+                            payload = messages[0]
+                        else:
+                            payload = {"type": "batch", "run_id": run_id, "logs": messages}
+                        pipe.publish(log_channel(run_id), json.dumps(payload))
+                    await pipe.execute()
+                logger.debug(f"Flushed {len(batch)} logs for {len(by_run)} runs")
+            except Exception as e:
+                logger.error(f"Failed to publish logs to Redis: {e}")
+
+    async def close(self):
+        """Flush pending logs and stop the flush timer"""
+        # Flush first: cancelling a timer mid-flush would drop its batch
+        await self.flush()
+        if self._flush_timer and not self._flush_timer.done():
+            self._flush_timer.cancel()
+            try:
+                await self._flush_timer
+            except asyncio.CancelledError:
+                pass
+        self._flush_timer = None
+
+
+def get_log_publisher() -> LogPublisher:
+    """Get the per-process log publisher"""
+    global _log_publisher
+    if _log_publisher is None:
+        _log_publisher = LogPublisher()
+    return _log_publisher
+
 
-        try:
-            await self.redis.publish(channel, json.dumps(completion_data))
-            logger.info(f"Published completion to {channel}: {status}")
-        except Exception as e:
-            logger.error(f"Failed to publish completion to Redis: {e}")
+async def close_log_publisher():
+    """Flush and close the per-process log publisher"""
+    global _log_publisher
+    if _log_publisher:
+        await _log_publisher.close()
+        _log_publisher = None
+        logger.info("Closed log publisher")
@@ -1,26 +1,179 @@
-"""Redis pub/sub log subscriber for SSE streaming"""
+"""
+Redis pub/sub log subscriber for SSE streaming
+
+All subscribers in a process share one pub/sub connection through
+LogMultiplexer:
+- Channels are subscribed on first listener and unsubscribed on last
+- One reader task parses each message once and fans it out
+- Each listener gets a bounded queue; a slow viewer drops its oldest
+  messages instead of stalling the reader or growing without bound
+"""
+import asyncio
 import json
 import logging
-from typing import AsyncIterator, Dict, Any
+from typing import Any, AsyncIterator, Dict, Optional, Set
 from app.redis.clients import get_worker_redis
 
 logger = logging.getLogger(__name__)
 
+_log_multiplexer = None  # Per-process pub/sub multiplexer
+
+
+class LogMultiplexer:
+    """Shares a single Redis pub/sub connection across all log listeners"""
+
+    def __init__(self, redis_client: Any = None, queue_size: int = 256):
+        """
+        Initialize multiplexer.
+
+        Args:
+            redis_client: Async Redis client (defaults to the worker client)
+            queue_size: Maximum buffered messages per listener
+        """
+        self.redis = redis_client or get_worker_redis()
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._closed = False
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """
+        Register a listener on a channel.
+
+        Returns:
+            Queue receiving parsed messages published to the channel
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            self._closed = False
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+
+            listeners = self._listeners.setdefault(channel, set())
+            listeners.add(queue)
+            if len(listeners) == 1:
+                await self._pubsub.subscribe(channel)
+                logger.info(f"Subscribed to {channel}")
+
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        """Remove a listener; the channel is unsubscribed when none remain"""
+        async with self._lock:
+            listeners = self._listeners.get(channel)
+            if not listeners or queue not in listeners:
+                return
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[channel]
+                try:
+                    await self._pubsub.unsubscribe(channel)
+                    logger.info(f"Unsubscribed from {channel}")
+                except Exception as e:
+                    logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Channel, listener and dropped-message counts"""
+        return {
+            "channels": len(self._listeners),
+            "listeners": sum(len(listeners) for listeners in self._listeners.values()),
+            "dropped": self.dropped,
+        }
+
+    async def _read_loop(self):
+        """Read from the shared connection and fan messages out"""
+        backoff = 1.0
+        while not self._closed:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The connection re-subscribes all channels when it reconnects
+                logger.error(f"Log pub/sub read failed, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            if not message or message.get("type") != "message":
+                continue
+
+            listeners = self._listeners.get(message["channel"])
+            if not listeners:
+                continue
+
+            try:
+                data = json.loads(message["data"])
+            except (TypeError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to parse log message: {e}")
+                continue
+
+            for queue in list(listeners):
+                self._deliver(queue, data)
+
+    def _deliver(self, queue: asyncio.Queue, data: Dict[str, Any]):
+        """Enqueue without blocking, dropping the oldest message when full"""
+        if queue.full():
+            try:
+                queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(data)
+
+    async def close(self):
+        """Stop the reader and close the shared connection"""
+        self._closed = True
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._listeners.clear()
+
+
+def get_log_multiplexer() -> LogMultiplexer:
+    """Get the per-process log multiplexer"""
+    global _log_multiplexer
+    if _log_multiplexer is None:
+        _log_multiplexer = LogMultiplexer()
+    return _log_multiplexer
+
+
+async def close_log_multiplexer():
+    """Close the per-process log multiplexer"""
+    global _log_multiplexer
+    if _log_multiplexer:
+        await _log_multiplexer.close()
+        _log_multiplexer = None
+        logger.info("Closed log multiplexer")
+
 
 class LogSubscriber:
     """Subscribes to agent logs via Redis pub/sub for real-time streaming"""
 
-    def __init__(self, run_id: str):
+    def __init__(self, run_id: str, multiplexer: Optional[LogMultiplexer] = None):
         self.run_id = run_id
         self.channel = f"agent:logs:{run_id}"
-        self.redis = get_worker_redis()
-        self.pubsub = None
+        self.multiplexer = multiplexer or get_log_multiplexer()
+        self.queue: Optional[asyncio.Queue] = None
 
     async def subscribe(self):
         """Subscribe to the log channel"""
-        self.pubsub = self.redis.pubsub()
-        await self.pubsub.subscribe(self.channel)
-        logger.info(f"Subscribed to {self.channel}")
+        self.queue = await self.multiplexer.subscribe(self.channel)
 
     async def listen(self) -> AsyncIterator[Dict[str, Any]]:
         """
@@ -29,30 +182,25 @@ class LogSubscriber:
         Yields:
             Parsed log data dictionaries
         """
-        if not self.pubsub:
+        if self.queue is None:
             await self.subscribe()
 
         try:
-            async for message in self.pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        yield data
-
-                        # Stop listening after completion event
-                        if data.get("type") == "complete":
-                            logger.info(f"Received completion event for {self.run_id}")
-                            break
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse log message: {e}")
-                        continue
+            while True:
+                message = await self.queue.get()
+                batch = message.get("logs", []) if message.get("type") == "batch" else [message]
+                for data in batch:
+                    yield data
+
+                    # Stop listening after completion event
+                    if data.get("type") == "complete":
+                        logger.info(f"Received completion event for {self.run_id}")
+                        return
         finally:
             await self.cleanup()
 
     async def cleanup(self):
         """Unsubscribe and cleanup resources"""
-        if self.pubsub:
-            await self.pubsub.unsubscribe(self.channel)
-            await self.pubsub.close()
-            logger.info(f"Unsubscribed from {self.channel}")
-            self.pubsub = None
+        if self.queue is not None:
+            queue, self.queue = self.queue, None
+            await self.multiplexer.unsubscribe(self.channel, queue)
@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Depends
 import json
 from app.redis.clients import get_api_redis
+from app.redis.pools import get_pool_metrics
 from app.config import get_settings
 
 router = APIRouter(prefix="/debug", tags=["debug"])
@@ -59,3 +60,14 @@ async def worker_status():
             "error": str(e),
             "redis_connected": False
         }
+
+
+@router.get("/redis-pools")
+async def redis_pools():
+    """
+    Redis connection pool metrics for this API process.
+
+    Reports per-pool connections in use, peak usage, utilization, how often
+    the pool was exhausted and how long callers waited for a connection.
+    """
+    return {"pools": get_pool_metrics()}
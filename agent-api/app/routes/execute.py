@@ -13,6 +13,8 @@ from app.models import AgentExecuteRequest, AgentExecuteResponse, ErrorResponse
 from app.agent.planner import AgentPlanner
 from app.agent.supervisor import AgentSupervisor
 from app.agent.models.types import ExecutionPlan
+from app.redis.clients import get_stream_redis
+from app.redis.event_stream import RunEventStream, insert_run_message
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -37,6 +39,11 @@ def get_anthropic_client() -> Anthropic:
     return _anthropic_client
 
 
+def get_run_events() -> RunEventStream:
+    """Run event stream for writes made from the API process"""
+    return RunEventStream(get_stream_redis())
+
+
 @router.post("/execute", response_model=AgentExecuteResponse)
 async def agent_execute(
     request: AgentExecuteRequest,
@@ -185,11 +192,8 @@ async def handle_create(
     run_id = run["id"]
 
     # Store initial user message
-    supabase.table("agent_messages").insert({
-        "run_id": run_id,
-        "role": "user",
-        "content": prompt,
-    }).execute()
+    events = get_run_events()
+    await insert_run_message(supabase, run_id, "user", prompt, events=events)
 
     # Link connectors if provided
     if connector_ids:
@@ -204,6 +208,7 @@ async def handle_create(
     supabase.table("agent_runs").update({
         "status": "queued"
     }).eq("id", run_id).execute()
+    await events.append_status(run_id, "queued")
 
     # Then try to enqueue to Redis (best effort)
     from app.redis.clients import get_api_redis
@@ -278,6 +283,7 @@ async def handle_start(
         "status": "queued",
         "started_at": "now()"
     }).eq("id", run_id).execute()
+    await get_run_events().append_status(run_id, "queued")
 
     # Enqueue to Redis for worker processing
     from app.redis.clients import get_api_redis
@@ -345,6 +351,7 @@ async def handle_stop(
         "status": "cancelled",
         "completed_at": "now()"
     }).eq("id", run_id).execute()
+    await get_run_events().append_status(run_id, "cancelled")
 
     logger.info(
         "agent_execution_stopped",
@@ -419,17 +426,15 @@ async def handle_resume(
         )
 
     # If user input provided, store it
+    events = get_run_events()
     if user_input:
-        supabase.table("agent_messages").insert({
-            "run_id": run_id,
-            "role": "user",
-            "content": user_input,
-        }).execute()
+        await insert_run_message(supabase, run_id, "user", user_input, events=events)
 
     # Resume execution
     supabase.table("agent_runs").update({
         "status": "executing"
     }).eq("id", run_id).execute()
+    await events.append_status(run_id, "executing")
 
     # Continue execution in background
     if background_tasks:
@@ -455,6 +460,7 @@ async def execute_agent_in_background(
     prompt: str,
 ):
     """Background task for agent execution with planning and supervision"""
+    events = get_run_events()
     try:
         logger.info(
             "background_execution_started",
@@ -466,6 +472,7 @@ async def execute_agent_in_background(
         supabase.table("agent_runs").update({
             "status": "planning"
         }).eq("id", run_id).execute()
+        await events.append_status(run_id, "planning")
 
         planner = AgentPlanner(supabase, user_id, get_anthropic_client())
         plan, error = await planner.create_plan(prompt)
@@ -481,6 +488,7 @@ async def execute_agent_in_background(
                 "error_message": f"Planning failed: {error}",
                 "completed_at": "now()"
             }).eq("id", run_id).execute()
+            await events.append_status(run_id, "failed", error_message=f"Planning failed: {error}")
             return
 
         # Save plan to run
@@ -557,3 +565,4 @@ async def execute_agent_in_background(
             "error_message": str(e),
             "completed_at": "now()"
         }).eq("id", run_id).execute()
+        await events.append_status(run_id, "failed", error_message=str(e))
@@ -1,14 +1,20 @@
 """
 Agent Logs API Route
 Get execution logs with polling or SSE streaming
+
+Both modes read agent_task_logs incrementally with a keyset cursor on
+(created_at, id), so each query only touches logs newer than the last one
+seen. Redis log notifications wake waiting readers early; otherwise the poll
+interval backs off while a run is idle.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from supabase import Client
+from typing import Optional
 import structlog
 import json
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.auth import get_current_user, get_supabase_for_user
 from app.models import AgentLogsRequest, AgentLogsResponse
@@ -16,6 +22,192 @@ from app.models import AgentLogsRequest, AgentLogsResponse
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Only the columns clients render
+LOG_COLUMNS = "id, log_type, message, metadata, created_at"
+
+# Separates created_at and id in an opaque log cursor
+CURSOR_SEPARATOR = "|"
+
+TERMINAL_RUN_STATUSES = ("completed", "failed", "cancelled", "timeout")
+
+# Long-poll wait cap for polling mode (seconds)
+MAX_POLL_WAIT = 25.0
+
+
+class AdaptivePollInterval:
+    """
+    Poll interval that tightens while logs are arriving and backs off while idle.
+
+    Resets to the minimum whenever a poll returns logs and grows
+    geometrically up to the maximum on every empty poll.
+    """
+
+    def __init__(self, minimum: float = 0.25, maximum: float = 5.0, factor: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def record(self, new_logs: int) -> float:
+        """Update with the number of logs the last poll returned; returns next interval"""
+        if new_logs:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+        return self.current
+
+
+def encode_cursor(log: dict) -> str:
+    """Opaque keyset cursor for the position after a log row"""
+    return f"{log['created_at']}{CURSOR_SEPARATOR}{log['id']}"
+
+
+def parse_cursor(since: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """
+    Split a cursor into (created_at, id).
+
+    A plain timestamp (legacy `since`) yields (created_at, None).
+    """
+    if not since:
+        return None, None
+    created_at, _, log_id = since.partition(CURSOR_SEPARATOR)
+    return created_at, log_id or None
+
+
+def fetch_logs_after(
+    supabase: Client,
+    run_id: str,
+    since: Optional[str],
+    limit: int,
+) -> list[dict]:
+    """
+    Fetch logs strictly after a cursor, oldest first.
+
+    Uses (created_at, id) > (cursor_created_at, cursor_id) so rows sharing a
+    timestamp are neither skipped nor repeated across pages.
+    """
+    query = supabase.table("agent_task_logs")\
+        .select(LOG_COLUMNS)\
+        .eq("run_id", run_id)
+
+    created_at, log_id = parse_cursor(since)
+    if created_at and log_id:
+        query = query.or_(
+            f'created_at.gt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.gt.{log_id})'
+        )
+    elif created_at:
+        query = query.gt("created_at", created_at)
+
+    response = query\
+        .order("created_at", desc=False)\
+        .order("id", desc=False)\
+        .limit(limit)\
+        .execute()
+    return response.data or []
+
+
+def latest_log_cursor(supabase: Client, run_id: str) -> Optional[str]:
+    """Cursor positioned after the newest existing log (None if no logs)"""
+    response = supabase.table("agent_task_logs")\
+        .select("id, created_at")\
+        .eq("run_id", run_id)\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(1)\
+        .execute()
+    return encode_cursor(response.data[0]) if response.data else None
+
+
+def suggest_poll_interval(logs: list[dict], since: Optional[str]) -> float:
+    """
+    Seconds a polling client should wait before its next request.
+
+    Active runs (logs just returned) are polled quickly; the interval grows
+    with the time since the last log was seen.
+    """
+    if logs:
+        return 0.5
+    created_at, _ = parse_cursor(since)
+    if not created_at:
+        return 2.0
+    try:
+        last_seen = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        if last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        idle = (datetime.now(timezone.utc) - last_seen).total_seconds()
+    except ValueError:
+        return 2.0
+    return max(1.0, min(10.0, idle / 4))
+
+
+class LogWakeup:
+    """
+    Wakes log readers early when the worker publishes to the run's log channel.
+
+    Notifications only signal that new rows exist; the rows themselves are
+    always read from agent_task_logs.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.event = asyncio.Event()
+        self.completed = False
+        self._task: Optional[asyncio.Task] = None
+        self._subscriber = None
+
+    async def start(self):
+        """
+        Subscribe, then listen in the background (no-op if Redis is unavailable).
+
+        Readers must start before they fetch from the database so a log
+        published in between still wakes them.
+        """
+        try:
+            from app.redis.subscriber import LogSubscriber
+
+            self._subscriber = LogSubscriber(self.run_id)
+            await self._subscriber.subscribe()
+        except Exception as e:
+            logger.warning("agent_logs_wakeup_unavailable", run_id=self.run_id, error=str(e))
+            self._subscriber = None
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        try:
+            async for log_data in self._subscriber.listen():
+                if log_data.get("type") == "complete":
+                    self.completed = True
+                self.event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("agent_logs_wakeup_unavailable", run_id=self.run_id, error=str(e))
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a notification or timeout; returns True if woken"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+
+    async def stop(self):
+        """Stop listening and release the subscription"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._subscriber:
+            await self._subscriber.cleanup()
+            self._subscriber = None
+
 
 @router.get("/logs")
 async def agent_logs(
@@ -23,6 +215,7 @@ async def agent_logs(
     mode: str = "polling",
     since: str = None,
     limit: int = 100,
+    wait: float = 0,
     user_id: str = Depends(get_current_user),
     supabase: Client = Depends(get_supabase_for_user),
 ):
@@ -30,8 +223,11 @@ async def agent_logs(
     Get agent execution logs
 
     Modes:
-    - **polling**: Get logs since timestamp (cursor-based pagination)
+    - **polling**: Get logs after a cursor (keyset pagination). With `wait`,
+      an empty poll blocks up to that many seconds for new logs.
     - **stream**: Server-Sent Events stream for real-time logs
+
+    `since` is a cursor returned as `next_cursor`, or a plain ISO timestamp.
     """
 
     logger.info(
@@ -51,7 +247,7 @@ async def agent_logs(
         )
 
     if mode == "polling":
-        return await handle_polling(supabase, run_id, since, limit)
+        return await handle_polling(supabase, run_id, since, limit, wait)
     elif mode == "stream":
         return await handle_streaming(supabase, run_id, since)
     else:
@@ -66,30 +262,31 @@ async def handle_polling(
     run_id: str,
     since: str = None,
     limit: int = 100,
+    wait: float = 0,
 ) -> AgentLogsResponse:
-    """Handle polling mode - return logs since timestamp"""
-
-    query = supabase.table("agent_task_logs")\
-        .select("*")\
-        .eq("run_id", run_id)\
-        .order("created_at", desc=False)\
-        .limit(limit)
-
-    if since:
-        query = query.gt("created_at", since)
+    """Handle polling mode - return logs after the cursor"""
 
-    logs_response = query.execute()
-    logs = logs_response.data or []
+    # Long poll: subscribe before the first read so a log published between
+    # the read and the wait still wakes us, instead of an empty poll
+    wait = min(max(wait, 0), MAX_POLL_WAIT)
+    wakeup = LogWakeup(run_id) if wait else None
+    try:
+        if wakeup:
+            await wakeup.start()
+        logs = fetch_logs_after(supabase, run_id, since, limit)
+        if not logs and wakeup and await wakeup.wait(wait):
+            logs = fetch_logs_after(supabase, run_id, since, limit)
+    finally:
+        if wakeup:
+            await wakeup.stop()
 
     # Check if there are more logs
     has_more = len(logs) == limit
 
-    # Get cursor for next page (timestamp of last log)
-    next_cursor = None
-    if logs and has_more:
-        next_cursor = logs[-1]["created_at"]
+    # Cursor for the next poll (position after the last log returned)
+    next_cursor = encode_cursor(logs[-1]) if logs else since
 
-    logger.info(
+    logger.debug(
         "agent_logs_polling",
         run_id=run_id,
         log_count=len(logs),
@@ -100,6 +297,7 @@ async def handle_polling(
         "logs": logs,
         "has_more": has_more,
         "next_cursor": next_cursor,
+        "poll_interval": 0 if has_more else suggest_poll_interval(logs, since),
     }
 
 
@@ -108,44 +306,40 @@ async def handle_streaming(
     run_id: str,
     since: str = None,
 ):
-    """Handle streaming mode - SSE stream via Redis pub/sub"""
+    """Handle streaming mode - SSE stream of new logs, woken by Redis pub/sub"""
 
     async def event_stream():
-        """Generate SSE events from Redis pub/sub"""
-        from app.redis.subscriber import LogSubscriber
-
-        subscriber = LogSubscriber(run_id)
+        """Generate SSE events from incremental log reads"""
+        wakeup = LogWakeup(run_id)
+        await wakeup.start()
+        interval = AdaptivePollInterval()
 
         try:
             # Send initial connection event
             yield f"data: {json.dumps({'type': 'connected', 'run_id': run_id})}\n\n"
 
-            # Send historical logs from DB if `since` provided
-            if since:
-                logs_response = supabase.table("agent_task_logs")\
-                    .select("*")\
-                    .eq("run_id", run_id)\
-                    .gt("created_at", since)\
-                    .order("created_at", desc=False)\
-                    .limit(100)\
-                    .execute()
-
-                for log in (logs_response.data or []):
-                    event_data = {
-                        "type": "log",
-                        "data": log
-                    }
-                    yield f"data: {json.dumps(event_data)}\n\n"
-
-            # Stream real-time logs from Redis pub/sub
-            async for log_data in subscriber.listen():
-                yield f"data: {json.dumps(log_data)}\n\n"
-
-                # Stop listening after completion event
-                if log_data.get("type") == "complete":
+            # Without a cursor only logs written after connecting are streamed
+            cursor = since or latest_log_cursor(supabase, run_id)
+
+            while True:
+                logs = fetch_logs_after(supabase, run_id, cursor, 100)
+                for log in logs:
+                    yield f"data: {json.dumps({'type': 'log', 'data': log})}\n\n"
+                if logs:
+                    cursor = encode_cursor(logs[-1])
+                    if len(logs) == 100:
+                        continue
+
+                if wakeup.completed or (not logs and _run_finished(supabase, run_id, interval)):
+                    # Drain anything written alongside the completion
+                    for log in fetch_logs_after(supabase, run_id, cursor, 100):
+                        yield f"data: {json.dumps({'type': 'log', 'data': log})}\n\n"
                     logger.info("agent_logs_stream_complete", run_id=run_id)
+                    yield f"data: {json.dumps({'type': 'complete', 'run_id': run_id})}\n\n"
                     break
 
+                await wakeup.wait(interval.record(len(logs)))
+
         except asyncio.CancelledError:
             logger.info("agent_logs_stream_cancelled", run_id=run_id)
             yield f"data: {json.dumps({'type': 'disconnected'})}\n\n"
@@ -153,7 +347,7 @@ async def handle_streaming(
             logger.error("agent_logs_stream_error", run_id=run_id, error=str(e))
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
         finally:
-            await subscriber.cleanup()
+            await wakeup.stop()
 
     logger.info("agent_logs_streaming_started", run_id=run_id)
 
@@ -166,3 +360,16 @@ async def handle_streaming(
             "X-Accel-Buffering": "no",  # Disable nginx buffering
         }
     )
+
+
+def _run_finished(supabase: Client, run_id: str, interval: AdaptivePollInterval) -> bool:
+    """
+    Check run status as a fallback for a missed completion notification.
+
+    Only checked once the reader has backed off to its maximum interval, so
+    an active run costs no extra queries.
+    """
+    if interval.current < interval.maximum:
+        return False
+    response = supabase.table("agent_runs").select("status").eq("id", run_id).execute()
+    return bool(response.data) and response.data[0]["status"] in TERMINAL_RUN_STATUSES
@@ -7,12 +7,13 @@ import json
 import logging
 from datetime import datetime
 from typing import AsyncGenerator, Optional
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 from supabase import Client
 
 from app.auth import get_current_user, get_supabase_for_user
-from app.redis.clients import get_api_redis
+from app.redis.clients import get_api_redis, get_stream_redis
+from app.redis.event_stream import RunEventStream, TERMINAL_RUN_STATUSES, message_event_data
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -21,6 +22,14 @@ router = APIRouter()
 class AgentEventStream:
     """
     Streams agent execution events via Server-Sent Events (SSE).
+
+    The worker appends events to a per-run Redis Stream (see
+    app.redis.event_stream) and this class blocks on XREAD, so connected
+    clients cost no database queries while a run is idle. On first connect
+    the current run state is backfilled from the database once; every
+    streamed event carries the stream entry id, so a reconnecting client
+    resumes from its Last-Event-ID without another backfill. If Redis is
+    unavailable the stream falls back to polling the database.
     
     Event Types:
     - status: Run status changes (queued, planning, executing, completed, failed)
@@ -33,11 +42,22 @@ class AgentEventStream:
     - error: Error occurred
     - heartbeat: Keep-alive ping
     """
-    
-    def __init__(self, supabase: Client, run_id: str, user_id: str):
+
+    # XREAD block timeout; also the heartbeat interval
+    BLOCK_MS = 15000
+
+    def __init__(
+        self,
+        supabase: Client,
+        run_id: str,
+        user_id: str,
+        last_event_id: Optional[str] = None,
+    ):
         self.supabase = supabase
         self.run_id = run_id
         self.user_id = user_id
+        self.last_event_id = last_event_id
+        self.events = RunEventStream(get_stream_redis())
         self.redis = get_api_redis()
         self.last_step_id = None
         self.last_message_id = None
@@ -53,44 +73,93 @@ class AgentEventStream:
             return
             
         logger.info(f"Starting SSE stream for run {self.run_id}")
-        
-        # Send initial state
-        yield self._format_event("status", {
-            "status": run["status"],
-            "current_phase": run.get("current_phase", 0),
-            "total_phases": len(run.get("plan", {}).get("phases", [])) if run.get("plan") else 0,
-        })
-        
-        # Stream events until completion or disconnect
+
+        try:
+            if self.last_event_id:
+                # Reconnect: everything after Last-Event-ID is still in the stream
+                cursor = self.last_event_id
+                backfill = []
+            else:
+                # Capture the tail before reading the database so events
+                # appended during the backfill are streamed, not lost
+                cursor = await self.events.last_id(self.run_id)
+                backfill = self._backfill_events(run)
+        except Exception as e:
+            logger.warning(f"Redis event stream unavailable for run {self.run_id}, polling instead: {e}")
+            async for event in self._poll_stream(request, run):
+                yield event
+            return
+
+        for index, (event_type, data) in enumerate(backfill):
+            event_id = cursor if index == len(backfill) - 1 else None
+            yield self._format_event(event_type, data, event_id=event_id)
+
+        run_finished = run["status"] in TERMINAL_RUN_STATUSES
+
+        while True:
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from stream {self.run_id}")
+                break
+
+            try:
+                events = await self.events.read(
+                    self.run_id,
+                    cursor,
+                    block_ms=None if run_finished else self.BLOCK_MS,
+                )
+            except Exception as e:
+                logger.warning(f"Redis stream read failed for run {self.run_id}, polling instead: {e}")
+                async for event in self._poll_stream(request, run):
+                    yield event
+                return
+
+            for entry_id, event_type, data in events:
+                cursor = entry_id
+                yield self._format_event(event_type, data, event_id=entry_id)
+                if event_type == "complete":
+                    return
+
+            if events:
+                continue
+
+            if run_finished:
+                # Stream drained (or expired) without a complete event
+                yield self._format_event("complete", self._complete_data(run), event_id=cursor)
+                return
+
+            # Idle: keep the connection alive and make sure the run has not
+            # finished without writing to the stream (e.g. a worker crash)
+            yield self._format_event("heartbeat", {"timestamp": datetime.utcnow().isoformat()})
+            run = await self._get_run() or run
+            run_finished = run["status"] in TERMINAL_RUN_STATUSES
+
+    async def _poll_stream(self, request: Request, run: dict) -> AsyncGenerator[str, None]:
+        """Fallback: poll the database once per second when Redis is unavailable"""
+        self.last_status = run["status"]
+        if not self.last_event_id and self.last_step_id is None and self.last_message_id is None:
+            for event_type, data in self._backfill_events(run):
+                yield self._format_event(event_type, data)
+
         heartbeat_counter = 0
         while True:
-            # Check if client disconnected
             if await request.is_disconnected():
                 logger.info(f"Client disconnected from stream {self.run_id}")
                 break
-                
-            # Check for new events
-            events = await self._poll_events()
-            
-            for event in events:
-                yield event
-                
-            # Check if run is complete
+
             run = await self._get_run()
-            if run and run["status"] in ["completed", "failed", "cancelled", "timeout"]:
-                yield self._format_event("complete", {
-                    "status": run["status"],
-                    "message": run.get("error_message") or "Execution finished",
-                })
+            for event in await self._poll_events(run):
+                yield event
+
+            if run and run["status"] in TERMINAL_RUN_STATUSES:
+                yield self._format_event("complete", self._complete_data(run))
                 break
-                
+
             # Send heartbeat every 15 seconds
             heartbeat_counter += 1
             if heartbeat_counter >= 15:
                 yield self._format_event("heartbeat", {"timestamp": datetime.utcnow().isoformat()})
                 heartbeat_counter = 0
-                
-            # Poll interval
+
             await asyncio.sleep(1)
             
     async def _get_run(self) -> Optional[dict]:
@@ -101,13 +170,39 @@ class AgentEventStream:
         except Exception as e:
             logger.error(f"Failed to fetch run {self.run_id}: {e}")
             return None
+
+    def _backfill_events(self, run: dict) -> list[tuple[str, dict]]:
+        """Build the current run state from the database (first connect only)"""
+        events = [("status", {
+            "status": run["status"],
+            "current_phase": run.get("current_phase", 0),
+            "total_phases": len(run.get("plan", {}).get("phases", [])) if run.get("plan") else 0,
+        })]
+        self.last_status = run["status"]
+
+        try:
+            steps_response = self.supabase.table("agent_steps").select("*").eq("run_id", self.run_id).order("created_at", desc=False).execute()
+            for step in steps_response.data or []:
+                self.last_step_id = step["id"]
+                events.extend(self._step_events(step))
+        except Exception as e:
+            logger.error(f"Failed to backfill steps for run {self.run_id}: {e}")
+
+        try:
+            messages_response = self.supabase.table("agent_messages").select("*").eq("run_id", self.run_id).order("created_at", desc=False).execute()
+            for msg in messages_response.data or []:
+                self.last_message_id = msg["id"]
+                events.append(self._message_event(msg))
+        except Exception as e:
+            logger.error(f"Failed to backfill messages for run {self.run_id}: {e}")
+
+        return events
             
-    async def _poll_events(self) -> list[str]:
+    async def _poll_events(self, run: Optional[dict]) -> list[str]:
         """Poll for new events from database and Redis"""
         events = []
         
         # Check for status changes
-        run = await self._get_run()
         if run and run["status"] != self.last_status:
             self.last_status = run["status"]
             events.append(self._format_event("status", {
@@ -124,25 +219,8 @@ class AgentEventStream:
                     continue
                     
                 self.last_step_id = step["id"]
-                
-                # Emit tool_call event
-                events.append(self._format_event("tool_call", {
-                    "step_id": step["id"],
-                    "tool_name": step["tool_name"],
-                    "tool_input": step.get("tool_input", {}),
-                    "status": step["status"],
-                }))
-                
-                # If step completed, emit tool_result
-                if step["status"] in ["completed", "failed"]:
-                    events.append(self._format_event("tool_result", {
-                        "step_id": step["id"],
-                        "tool_name": step["tool_name"],
-                        "success": step["status"] == "completed",
-                        "output": step.get("tool_output"),
-                        "error": step.get("error_message"),
-                        "duration_ms": step.get("duration_ms"),
-                    }))
+                for event_type, data in self._step_events(step):
+                    events.append(self._format_event(event_type, data))
                     
         except Exception as e:
             logger.error(f"Failed to poll steps for run {self.run_id}: {e}")
@@ -156,12 +234,7 @@ class AgentEventStream:
                     continue
                     
                 self.last_message_id = msg["id"]
-                
-                events.append(self._format_event("message", {
-                    "message_id": msg["id"],
-                    "role": msg["role"],
-                    "content": msg["content"],
-                }))
+                events.append(self._format_event(*self._message_event(msg)))
                 
         except Exception as e:
             logger.error(f"Failed to poll messages for run {self.run_id}: {e}")
@@ -179,16 +252,57 @@ class AgentEventStream:
             logger.debug(f"Redis thinking poll failed: {e}")
             
         return events
+
+    def _step_events(self, step: dict) -> list[tuple[str, dict]]:
+        """tool_call (and tool_result once finished) events for a step row"""
+        events = [("tool_call", {
+            "step_id": step["id"],
+            "tool_name": step["tool_name"],
+            "tool_input": step.get("tool_input", {}),
+            "status": step["status"],
+        })]
+        if step["status"] in ["completed", "failed"]:
+            events.append(("tool_result", {
+                "step_id": step["id"],
+                "tool_name": step["tool_name"],
+                "success": step["status"] == "completed",
+                "output": step.get("tool_output"),
+                "error": step.get("error_message"),
+                "duration_ms": self._step_duration_ms(step),
+            }))
+        return events
+
+    def _step_duration_ms(self, step: dict) -> Optional[int]:
+        """Tool run time from the step's started_at/completed_at timestamps"""
+        try:
+            started = datetime.fromisoformat(step["started_at"])
+            completed = datetime.fromisoformat(step["completed_at"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return int((completed - started).total_seconds() * 1000)
+
+    def _message_event(self, msg: dict) -> tuple[str, dict]:
+        """message event for an agent_messages row"""
+        return ("message", message_event_data(msg))
+
+    def _complete_data(self, run: dict) -> dict:
+        """Payload of the final complete event"""
+        return {
+            "status": run["status"],
+            "message": run.get("error_message") or "Execution finished",
+        }
         
-    def _format_event(self, event_type: str, data: dict) -> str:
-        """Format SSE event"""
-        return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+    def _format_event(self, event_type: str, data: dict, event_id: Optional[str] = None) -> str:
+        """Format SSE event (with an id line for resumable events)"""
+        prefix = f"id: {event_id}\n" if event_id else ""
+        return f"{prefix}event: {event_type}\ndata: {json.dumps(data)}\n\n"
 
 
 @router.get("/run/{run_id}/stream")
 async def stream_agent_execution(
     run_id: str,
     request: Request,
+    last_event_id: Optional[str] = Header(None),
     user_id: str = Depends(get_current_user),
     supabase: Client = Depends(get_supabase_for_user),
 ):
@@ -201,6 +315,9 @@ async def stream_agent_execution(
     - Agent messages
     - Progress updates
 
+    Events carry an id; browsers send it back as Last-Event-ID when they
+    reconnect and the stream resumes after that event.
+
     Example usage (JavaScript):
     ```javascript
     const eventSource = new EventSource('/agent/run/{run_id}/stream');
@@ -212,7 +329,7 @@ async def stream_agent_execution(
     
     logger.info(f"SSE stream requested for run {run_id} by user {user_id}")
     
-    stream = AgentEventStream(supabase, run_id, user_id)
+    stream = AgentEventStream(supabase, run_id, user_id, last_event_id=last_event_id)
     
     return StreamingResponse(
         stream.stream(request),
@@ -294,7 +411,8 @@ async def publish_thinking(
     """
     try:
         redis = get_api_redis()
-        redis.set(f"run:{run_id}:thinking", content, ex=30)  # Expire after 30s
+        redis.set(f"run:{run_id}:thinking", content, ex=30)  # Expire after 30s (polling fallback)
+        await RunEventStream(get_stream_redis()).append(run_id, "thinking", {"content": content})
         return {"success": True}
     except Exception as e:
         logger.error(f"Failed to publish thinking for run {run_id}: {e}")
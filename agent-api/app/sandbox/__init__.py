@@ -21,6 +21,7 @@ from app.sandbox.resource_limits import (
     generate_kubernetes_resource_quota,
     TIER_LIMITS,
 )
+from app.sandbox.resource_sampler import ResourceSampler, get_resource_sampler
 from app.sandbox.dependency_merger import (
     DependencyMerger,
     TemplateMerger,
@@ -48,6 +49,7 @@ from app.sandbox.pool_manager import (
     init_sandbox_pool_manager,
     shutdown_sandbox_pool_manager,
 )
+from app.sandbox.pool_forecaster import PoolDemandForecaster
 
 __all__ = [
     # Original manager (backward compatibility)
@@ -74,6 +76,8 @@ __all__ = [
     "generate_kubernetes_limit_range",
     "generate_kubernetes_resource_quota",
     "TIER_LIMITS",
+    "ResourceSampler",
+    "get_resource_sampler",
     # Dependency merging
     "DependencyMerger",
     "TemplateMerger",
@@ -97,4 +101,5 @@ __all__ = [
     "get_sandbox_pool_manager",
     "init_sandbox_pool_manager",
     "shutdown_sandbox_pool_manager",
+    "PoolDemandForecaster",
 ]
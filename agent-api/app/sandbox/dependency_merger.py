@@ -7,11 +7,21 @@ version conflicts using semver. Supports:
 - Python (requirements.txt, pyproject.toml)
 - Go (go.mod)
 
+Repeated merges are cheap:
+- Version strings are parsed once (SemVer.parse is memoized) and compared
+  through a precomputed sort key
+- Merge results are memoized per merger, keyed by a hash of the input
+  manifests and the resolution settings, so re-merging the same
+  templates returns the cached result
+
 Based on the DEPENDENCY_CONFLICT_RESOLUTION.md specification.
 """
+import hashlib
 import json
 import re
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Any, Set
 from enum import Enum
 import logging
@@ -35,9 +45,14 @@ class ConflictResolution(str, Enum):
     FAIL = "fail"               # Fail on conflict
 
 
-@dataclass
+SEMVER_PATTERN = re.compile(
+    r"^(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([a-zA-Z0-9.-]+))?(?:\+([a-zA-Z0-9.-]+))?$"
+)
+
+
+@dataclass(frozen=True)
 class SemVer:
-    """Semantic version representation."""
+    """Semantic version representation (immutable, so parses can be shared)."""
     major: int
     minor: int
     patch: int
@@ -45,9 +60,22 @@ class SemVer:
     build: Optional[str] = None
     original: str = ""
 
+    def __post_init__(self):
+        # Release versions sort after their prereleases
+        object.__setattr__(self, "_sort_key", (
+            self.major, self.minor, self.patch,
+            self.prerelease is None, self.prerelease or "",
+        ))
+
     @classmethod
     def parse(cls, version_str: str) -> "SemVer":
-        """Parse a semver string into components."""
+        """Parse a semver string into components (memoized)."""
+        if cls is SemVer:
+            return _parse_semver(version_str)
+        return cls._parse(version_str)
+
+    @classmethod
+    def _parse(cls, version_str: str) -> "SemVer":
         original = version_str
         # Remove leading ^ or ~
         version_str = version_str.lstrip("^~>=<")
@@ -57,8 +85,7 @@ class SemVer:
             return cls(major=999, minor=999, patch=999, original=original)
 
         # Parse version with prerelease
-        pattern = r"^(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([a-zA-Z0-9.-]+))?(?:\+([a-zA-Z0-9.-]+))?$"
-        match = re.match(pattern, version_str)
+        match = SEMVER_PATTERN.match(version_str)
 
         if not match:
             # Default to 0.0.0 for unparseable versions
@@ -75,18 +102,10 @@ class SemVer:
 
     def __lt__(self, other: "SemVer") -> bool:
         """Compare versions for sorting."""
-        if self.major != other.major:
-            return self.major < other.major
-        if self.minor != other.minor:
-            return self.minor < other.minor
-        if self.patch != other.patch:
-            return self.patch < other.patch
-        # Prerelease versions are lower than release versions
-        if self.prerelease and not other.prerelease:
-            return True
-        if not self.prerelease and other.prerelease:
-            return False
-        return (self.prerelease or "") < (other.prerelease or "")
+        return self._sort_key < other._sort_key
+
+    def __gt__(self, other: "SemVer") -> bool:
+        return self._sort_key > other._sort_key
 
     def __str__(self) -> str:
         return self.original or f"{self.major}.{self.minor}.{self.patch}"
@@ -104,6 +123,21 @@ class SemVer:
         return True
 
 
+@lru_cache(maxsize=8192)
+def _parse_semver(version_str: str) -> SemVer:
+    return SemVer._parse(version_str)
+
+
+REQUIREMENT_LINE = re.compile(r"^([a-zA-Z0-9_-]+)(.*)$")
+PYTHON_CONSTRAINT = re.compile(r"^([<>=!~]+)?(.+)$")
+
+
+def manifest_hash(*manifests: Any) -> str:
+    """Stable hash of manifest contents (key order included)"""
+    payload = json.dumps(manifests, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 @dataclass
 class DependencyConflict:
     """Represents a dependency version conflict."""
@@ -132,6 +166,7 @@ class DependencyMerger:
         self,
         resolution_strategy: ConflictResolution = ConflictResolution.NEWEST,
         allow_major_upgrade: bool = False,
+        cache_size: int = 512,
     ):
         """
         Initialize the dependency merger.
@@ -139,9 +174,37 @@ class DependencyMerger:
         Args:
             resolution_strategy: How to resolve version conflicts
             allow_major_upgrade: Allow major version upgrades when resolving
+            cache_size: Merge results kept for reuse (0 disables memoization)
         """
         self.resolution_strategy = resolution_strategy
         self.allow_major_upgrade = allow_major_upgrade
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _memoized(self, kind: str, inputs: Tuple, compute):
+        """Return the cached result for (kind, inputs), computing it once"""
+        if self.cache_size <= 0:
+            return compute()
+        key = (kind, self.resolution_strategy, self.allow_major_upgrade, manifest_hash(*inputs))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        self.cache_misses += 1
+        value = compute()
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def cache_info(self) -> Dict[str, int]:
+        """Memoization hits, misses and current size"""
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self._cache)}
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
 
     def merge_package_json(
         self,
@@ -158,6 +221,16 @@ class DependencyMerger:
         Returns:
             Merged package.json content
         """
+        merged = self._memoized(
+            "package_json", (base, overlays), lambda: self._merge_package_json(base, overlays)
+        )
+        return json.loads(json.dumps(merged))  # Callers may mutate the result
+
+    def _merge_package_json(
+        self,
+        base: Dict[str, Any],
+        overlays: Tuple[Dict[str, Any], ...],
+    ) -> Dict[str, Any]:
         result = json.loads(json.dumps(base))  # Deep copy
 
         for overlay in overlays:
@@ -199,6 +272,24 @@ class DependencyMerger:
         Returns:
             MergeResult with merged dependencies and any conflicts
         """
+        merge_result = self._memoized(
+            "dependencies", (base, overlay, sources),
+            lambda: self._merge_dependencies(base, overlay, sources),
+        )
+        # Callers may mutate the result
+        return replace(
+            merge_result,
+            merged=dict(merge_result.merged),
+            conflicts=[replace(c) for c in merge_result.conflicts],
+            warnings=list(merge_result.warnings),
+        )
+
+    def _merge_dependencies(
+        self,
+        base: Dict[str, str],
+        overlay: Dict[str, str],
+        sources: Tuple[str, str],
+    ) -> MergeResult:
         result = dict(base)
         conflicts: List[DependencyConflict] = []
         warnings: List[str] = []
@@ -292,6 +383,11 @@ class DependencyMerger:
         Returns:
             Merged requirements.txt content
         """
+        return self._memoized(
+            "requirements", requirements, lambda: self._merge_requirements_txt(requirements)
+        )
+
+    def _merge_requirements_txt(self, requirements: Tuple[str, ...]) -> str:
         deps: Dict[str, List[str]] = {}
 
         for req_content in requirements:
@@ -301,7 +397,7 @@ class DependencyMerger:
                     continue
 
                 # Parse package name and version
-                match = re.match(r"^([a-zA-Z0-9_-]+)(.*)$", line)
+                match = REQUIREMENT_LINE.match(line)
                 if match:
                     name = match.group(1).lower()
                     version = match.group(2).strip()
@@ -327,7 +423,7 @@ class DependencyMerger:
         parsed = []
         for v in versions:
             # Handle various formats: ==1.0.0, >=1.0.0, ~=1.0, etc.
-            match = re.match(r"^([<>=!~]+)?(.+)$", v.strip())
+            match = PYTHON_CONSTRAINT.match(v.strip())
             if match:
                 op = match.group(1) or "=="
                 ver = match.group(2)
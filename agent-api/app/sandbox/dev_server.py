@@ -10,7 +10,9 @@ Manages development servers for various frameworks:
 
 Features:
 - Automatic framework detection
-- Port management
+- Readiness from framework "ready" markers in the server output, with a
+  TCP probe of the port as fallback
+- Port management (bitmap persisted for all workers on the host)
 - HMR/WebSocket support
 - Process lifecycle management
 - Health monitoring
@@ -18,17 +20,26 @@ Features:
 Based on DEV_SERVER_ARCHITECTURE.md specification.
 """
 import asyncio
+import fcntl
 import os
 import signal
+import socket
 import re
+import shlex
+import threading
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Any, Callable, Set
 from enum import Enum
 from datetime import datetime
 import logging
 import json
 
+from app.sandbox.resource_limits import ResourceTier
+from app.sandbox.resource_sampler import ResourceSampler, get_resource_sampler
+
 logger = logging.getLogger(__name__)
 
 
@@ -193,6 +204,79 @@ FRAMEWORK_CONFIGS: Dict[Framework, FrameworkConfig] = {
 }
 
 
+# Colour codes break patterns such as r"Local:\s+https?://" in Vite output
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# Default markers when the framework is unknown
+# (\b keeps "ready" from matching "already in use")
+CUSTOM_READY_PATTERNS = [r"Listening", r"\bready\b", r"started"]
+
+
+def strip_ansi(text: str) -> str:
+    return ANSI_ESCAPE.sub("", text)
+
+
+def is_ready_line(line: str, patterns: List[str]) -> bool:
+    """Whether an output line carries one of the framework's ready markers"""
+    line = strip_ansi(line)
+    return any(re.search(pattern, line, re.IGNORECASE) for pattern in patterns)
+
+
+async def probe_port(port: int, host: str = "127.0.0.1", timeout: float = 0.5) -> bool:
+    """Whether something accepts TCP connections on the port"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+# Runs inside a sandbox as: python3 - <log> <port> <timeout> <patterns.json> <<'EOF'
+# Follows the dev server log for ready markers, probing the port as a
+# fallback; prints the reason and exits 0 once ready, 1 on timeout.
+READY_WAIT_SCRIPT = r'''
+import json, os, re, socket, sys, time
+
+log_path, port, timeout = sys.argv[1], int(sys.argv[2]), float(sys.argv[3])
+patterns = [re.compile(p, re.IGNORECASE) for p in json.loads(sys.argv[4])]
+ansi = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+deadline = time.monotonic() + timeout
+position, pending, next_probe = 0, "", 0.0
+
+while time.monotonic() < deadline:
+    try:
+        with open(log_path, "r", errors="replace") as f:
+            f.seek(position)
+            chunk = f.read()
+            position = f.tell()
+    except OSError:
+        chunk = ""
+    lines = (pending + chunk).split("\n")
+    pending = lines.pop()
+    for line in lines:
+        if any(p.search(ansi.sub("", line)) for p in patterns):
+            print("marker: " + ansi.sub("", line).strip())
+            sys.exit(0)
+    if time.monotonic() >= next_probe:
+        next_probe = time.monotonic() + 1.0
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            print("probe")
+            sys.exit(0)
+        except OSError:
+            pass
+    time.sleep(0.1)
+sys.exit(1)
+'''
+
+
+def ready_wait_command(log_path: str, port: int, patterns: List[str], timeout: float = 60.0) -> str:
+    """Shell command that blocks until a sandboxed dev server is ready"""
+    args = " ".join(shlex.quote(arg) for arg in (log_path, str(port), str(timeout), json.dumps(patterns)))
+    return f"python3 - {args} <<'EOF'\n{READY_WAIT_SCRIPT}\nEOF"
+
+
 @dataclass
 class DevServerInstance:
     """Represents a running dev server instance."""
@@ -206,6 +290,7 @@ class DevServerInstance:
     started_at: Optional[datetime] = None
     logs: List[str] = field(default_factory=list)
     error: Optional[str] = None
+    monitor_task: Optional[asyncio.Task] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
@@ -315,18 +400,47 @@ class FrameworkDetector:
 
 
 class PortManager:
-    """Manages port allocation for dev servers."""
+    """
+    Manages port allocation for dev servers.
+
+    Allocations are a bitmap (bit i = base_port + i). With a state_path the
+    bitmap and per-port leases are kept in a file shared by every worker
+    on the host (under an flock), so allocations survive worker restarts.
+    A port whose owning process is gone (its PID is free, or was reused by
+    a process with a different start time) and that nothing listens on is
+    reclaimed the next time the allocator runs out of free bits or is
+    loaded, so leaked ports do not pile up.
+
+    Methods block (flock, state file IO, bind probes); async callers run
+    them via asyncio.to_thread.
+    """
 
     def __init__(
         self,
         base_port: int = 3000,
         max_port: int = 9999,
         reserved_ports: Optional[Set[int]] = None,
+        state_path: Optional[str] = None,
     ):
         self.base_port = base_port
         self.max_port = max_port
         self.reserved_ports = reserved_ports or {22, 80, 443, 5432, 6379, 8080}
-        self.allocated_ports: Set[int] = set()
+        self.state_path = state_path
+        self.bitmap = bytearray((max_port - base_port + 7) // 8)
+        # port -> {"pid": allocating process, "start": its start time, "at": unix time}
+        self.leases: Dict[int, Dict[str, Any]] = {}
+        self._thread_lock = threading.Lock()
+        if self.state_path:
+            with self._locked_state():
+                self._reclaim_leaked()
+
+    @property
+    def allocated_ports(self) -> Set[int]:
+        return {
+            self.base_port + i
+            for i in range(self.max_port - self.base_port)
+            if self.bitmap[i // 8] & (1 << (i % 8))
+        }
 
     def allocate(self, preferred_port: Optional[int] = None) -> int:
         """
@@ -338,31 +452,167 @@ class PortManager:
         Returns:
             Allocated port number
         """
-        if preferred_port:
-            if self._is_available(preferred_port):
-                self.allocated_ports.add(preferred_port)
-                return preferred_port
-
-        # Find next available port
-        for port in range(self.base_port, self.max_port):
-            if self._is_available(port):
-                self.allocated_ports.add(port)
-                return port
-
-        raise RuntimeError("No available ports")
+        with self._locked_state():
+            port = self._find_free(preferred_port)
+            if port is None and self._reclaim_leaked():
+                port = self._find_free(preferred_port)
+            if port is None:
+                raise RuntimeError("No available ports")
+            self._set(port, True)
+            pid = os.getpid()
+            self.leases[port] = {"pid": pid, "start": _process_start(pid), "at": time.time()}
+            return port
 
     def release(self, port: int) -> None:
         """Release an allocated port."""
-        self.allocated_ports.discard(port)
+        if not self.base_port <= port < self.max_port:
+            return
+        with self._locked_state():
+            self._set(port, False)
+            self.leases.pop(port, None)
+
+    def _find_free(self, preferred_port: Optional[int]) -> Optional[int]:
+        if preferred_port and self._is_available(preferred_port):
+            return preferred_port
+
+        # Find next available port, skipping fully allocated bytes
+        for byte_index, byte in enumerate(self.bitmap):
+            if byte == 0xFF:
+                continue
+            for bit in range(8):
+                port = self.base_port + byte_index * 8 + bit
+                if port >= self.max_port:
+                    return None
+                if not byte & (1 << bit) and self._is_available(port):
+                    return port
+        return None
+
+    def _is_allocated(self, port: int) -> bool:
+        i = port - self.base_port
+        return bool(self.bitmap[i // 8] & (1 << (i % 8)))
+
+    def _set(self, port: int, allocated: bool):
+        i = port - self.base_port
+        if allocated:
+            self.bitmap[i // 8] |= 1 << (i % 8)
+        else:
+            self.bitmap[i // 8] &= ~(1 << (i % 8)) & 0xFF
 
     def _is_available(self, port: int) -> bool:
         """Check if a port is available."""
+        if not self.base_port <= port < self.max_port:
+            return False
         if port in self.reserved_ports:
             return False
-        if port in self.allocated_ports:
+        if self._is_allocated(port):
             return False
-        # TODO: Check if port is actually in use via socket
+        return not _port_in_use(port)
+
+    def _reclaim_leaked(self) -> int:
+        """Free ports whose owner process is gone and that nothing listens on"""
+        leaked = [
+            port for port in self.allocated_ports
+            if not _lease_owner_alive(self.leases.get(port, {})) and not _port_in_use(port)
+        ]
+        for port in leaked:
+            self._set(port, False)
+            self.leases.pop(port, None)
+        if leaked:
+            logger.info(f"Reclaimed {len(leaked)} leaked dev server ports")
+        return len(leaked)
+
+    @contextmanager
+    def _locked_state(self):
+        """Load the shared state under an exclusive lock and save it on exit"""
+        with self._thread_lock:
+            if not self.state_path:
+                yield
+                return
+
+            with self._file_lock():
+                self._load()
+                yield
+                self._save()
+
+    @contextmanager
+    def _file_lock(self):
+        with open(f"{self.state_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("base_port") != self.base_port or state.get("max_port") != self.max_port:
+            logger.warning(f"Ignoring port state for a different range in {self.state_path}")
+            return
+        bitmap = bytes.fromhex(state.get("bitmap", ""))
+        if len(bitmap) == len(self.bitmap):
+            self.bitmap = bytearray(bitmap)
+        self.leases = {int(port): lease for port, lease in state.get("leases", {}).items()}
+
+    def _save(self):
+        state = {
+            "base_port": self.base_port,
+            "max_port": self.max_port,
+            "bitmap": self.bitmap.hex(),
+            "leases": self.leases,
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def _port_in_use(port: int) -> bool:
+    """Whether something is already bound to the port on this host"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("0.0.0.0", port))
+        except OSError:
+            return True
+    return False
+
+
+def _process_start(pid: int) -> Optional[int]:
+    """Start time of a process in clock ticks since boot (None if unknown)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name start at field 3 (state);
+    # starttime is field 22
+    fields = stat.rsplit(")", 1)[-1].split()
+    return int(fields[19]) if len(fields) > 19 and fields[19].isdigit() else None
+
+
+def _lease_owner_alive(lease: Dict[str, Any]) -> bool:
+    """Whether the process that took a lease still runs (not a reused PID)"""
+    pid = lease.get("pid")
+    if not _pid_alive(pid):
+        return False
+    start = lease.get("start")
+    return start is None or _process_start(pid) in (None, start)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
         return True
+    return True
 
 
 class DevServerOrchestrator:
@@ -380,9 +630,15 @@ class DevServerOrchestrator:
         self,
         port_manager: Optional[PortManager] = None,
         max_servers: int = 5,
+        startup_timeout: float = 60.0,
+        probe_interval: float = 0.5,
+        sampler: Optional[ResourceSampler] = None,
     ):
         self.port_manager = port_manager or PortManager()
+        self.sampler = sampler
         self.max_servers = max_servers
+        self.startup_timeout = startup_timeout
+        self.probe_interval = probe_interval
         self.servers: Dict[str, DevServerInstance] = {}
         self._health_check_task: Optional[asyncio.Task] = None
 
@@ -396,6 +652,7 @@ class DevServerOrchestrator:
         env: Optional[Dict[str, str]] = None,
         on_ready: Optional[Callable[[str], None]] = None,
         on_log: Optional[Callable[[str], None]] = None,
+        tier: str = ResourceTier.STANDARD.value,
     ) -> DevServerInstance:
         """
         Start a development server.
@@ -409,6 +666,7 @@ class DevServerOrchestrator:
             env: Additional environment variables
             on_ready: Callback when server is ready
             on_log: Callback for log output
+            tier: Resource tier the sampler enforces on the server's cgroup
 
         Returns:
             DevServerInstance with server details
@@ -429,13 +687,13 @@ class DevServerOrchestrator:
                 start_command=custom_command or "npm run dev",
                 default_port=3000,
                 port_env_var="PORT",
-                ready_patterns=[r"Listening", r"ready", r"started"],
+                ready_patterns=CUSTOM_READY_PATTERNS,
             )
         else:
             config = FRAMEWORK_CONFIGS.get(framework, FRAMEWORK_CONFIGS[Framework.VITE])
 
         # Allocate port
-        allocated_port = self.port_manager.allocate(port or config.default_port)
+        allocated_port = await asyncio.to_thread(self.port_manager.allocate, port or config.default_port)
 
         # Create server instance
         server = DevServerInstance(
@@ -479,48 +737,77 @@ class DevServerOrchestrator:
                 env=server_env,
                 preexec_fn=os.setsid,  # Create new process group
             )
+            if self.sampler:
+                self.sampler.register_process(server_id, tier, server.process.pid)
 
-            # Monitor output for ready signal
+            # Ready on the first output marker; the port probe covers
+            # servers whose output does not match any marker
             ready_event = asyncio.Event()
 
+            def mark_ready(source: str):
+                if ready_event.is_set():
+                    return
+                ready_event.set()
+                server.status = ServerStatus.RUNNING
+                server.started_at = datetime.utcnow()
+                server.url = f"http://localhost:{allocated_port}"
+                logger.info(f"Server {server_id} ready ({source}) at {server.url}")
+                if on_ready:
+                    on_ready(server.url)
+
             async def monitor_output():
                 while server.process and server.process.stdout:
                     line = await server.process.stdout.readline()
                     if not line:
                         break
 
-                    line_str = line.decode().strip()
+                    line_str = line.decode(errors="replace").strip()
                     server.logs.append(line_str)
 
                     if on_log:
                         on_log(line_str)
 
-                    # Check for ready patterns
-                    for pattern in config.ready_patterns:
-                        if re.search(pattern, line_str, re.IGNORECASE):
-                            ready_event.set()
-                            server.status = ServerStatus.RUNNING
-                            server.started_at = datetime.utcnow()
-                            server.url = f"http://localhost:{allocated_port}"
-                            if on_ready:
-                                on_ready(server.url)
-                            break
+                    if not ready_event.is_set() and is_ready_line(line_str, config.ready_patterns):
+                        mark_ready("output")
+
+            async def probe_until_ready():
+                while not ready_event.is_set():
+                    if await probe_port(allocated_port):
+                        mark_ready("probe")
+                        return
+                    await asyncio.sleep(self.probe_interval)
 
             # Start monitoring task
-            asyncio.create_task(monitor_output())
+            server.monitor_task = asyncio.create_task(monitor_output())
+            probe_task = asyncio.create_task(probe_until_ready())
+            exit_task = asyncio.create_task(server.process.wait())
+            ready_task = asyncio.create_task(ready_event.wait())
 
-            # Wait for ready signal with timeout
+            # Wait for ready signal, process exit or timeout
             try:
-                await asyncio.wait_for(ready_event.wait(), timeout=60.0)
-            except asyncio.TimeoutError:
+                await asyncio.wait(
+                    {ready_task, exit_task},
+                    timeout=self.startup_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for task in (probe_task, ready_task, exit_task):
+                    if not task.done():
+                        task.cancel()
+
+            if not ready_event.is_set():
                 server.status = ServerStatus.ERROR
-                server.error = "Server startup timeout"
-                logger.error(f"Server {server_id} failed to start within timeout")
+                if server.process.returncode is not None:
+                    server.error = f"Process exited with code {server.process.returncode}"
+                else:
+                    server.error = "Server startup timeout"
+                logger.error(f"Server {server_id} failed to start: {server.error}")
+                await self._discard_failed(server)
 
         except Exception as e:
             server.status = ServerStatus.ERROR
             server.error = str(e)
-            self.port_manager.release(allocated_port)
+            await self._discard_failed(server)
             logger.exception(f"Failed to start server {server_id}")
 
         return server
@@ -543,25 +830,10 @@ class DevServerOrchestrator:
         server.status = ServerStatus.STOPPING
 
         try:
-            if server.process:
-                # Send SIGTERM to process group
-                try:
-                    os.killpg(os.getpgid(server.process.pid), signal.SIGTERM)
-                except ProcessLookupError:
-                    pass
-
-                # Wait for graceful shutdown
-                try:
-                    await asyncio.wait_for(server.process.wait(), timeout=timeout)
-                except asyncio.TimeoutError:
-                    # Force kill
-                    try:
-                        os.killpg(os.getpgid(server.process.pid), signal.SIGKILL)
-                    except ProcessLookupError:
-                        pass
+            await self._terminate(server, timeout)
 
             # Release port
-            self.port_manager.release(server.port)
+            await asyncio.to_thread(self.port_manager.release, server.port)
 
             server.status = ServerStatus.STOPPED
             del self.servers[server_id]
@@ -572,6 +844,42 @@ class DevServerOrchestrator:
             server.error = str(e)
             return False
 
+    async def _discard_failed(self, server: DevServerInstance) -> None:
+        """
+        Stop a server that failed to start and forget it.
+
+        The port is released here, so the entry must go too: a later
+        stop_server would otherwise release the port again after it was
+        handed to another server.
+        """
+        await self._terminate(server)
+        await asyncio.to_thread(self.port_manager.release, server.port)
+        if self.servers.get(server.server_id) is server:
+            del self.servers[server.server_id]
+
+    async def _terminate(self, server: DevServerInstance, timeout: float = 10.0) -> None:
+        """Stop a server's process group, escalating to SIGKILL"""
+        if server.process and server.process.returncode is None:
+            # Send SIGTERM to process group
+            try:
+                os.killpg(os.getpgid(server.process.pid), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+            # Wait for graceful shutdown
+            try:
+                await asyncio.wait_for(server.process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                # Force kill
+                try:
+                    os.killpg(os.getpgid(server.process.pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        if server.monitor_task and not server.monitor_task.done():
+            server.monitor_task.cancel()
+        if self.sampler:
+            self.sampler.unregister(server.server_id)
+
     async def stop_all(self) -> None:
         """Stop all running servers."""
         tasks = [
@@ -626,7 +934,11 @@ def get_orchestrator() -> DevServerOrchestrator:
     """Get the global orchestrator instance."""
     global _orchestrator
     if _orchestrator is None:
-        _orchestrator = DevServerOrchestrator()
+        from app.config import get_settings
+        port_manager = PortManager(state_path=get_settings().dev_server_port_state_path)
+        _orchestrator = DevServerOrchestrator(
+            port_manager=port_manager, sampler=get_resource_sampler()
+        )
     return _orchestrator
 
 
@@ -4,11 +4,22 @@ Enterprise-grade sandbox management for code execution
 """
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+import shlex
+import uuid
+from typing import Optional, Dict, Any, Iterable, List, Union
 from datetime import datetime, timedelta
 from e2b_code_interpreter import Sandbox
 
 from app.config import get_settings
+from app.sandbox.file_sync import (
+    TREE_SCRIPT,
+    Manifest,
+    build_manifest,
+    diff_manifests,
+    pack_tar,
+    split_tree_archive,
+    tree_job,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +33,7 @@ class E2BSandboxManager:
     - Automatic cleanup and timeout handling
     - File persistence across operations
     - Code/shell execution
+    - Bulk tree transfer as a single tar (write_files/read_tree)
     """
 
     def __init__(self):
@@ -256,6 +268,136 @@ class E2BSandboxManager:
             logger.error(f"Failed to list files in {path}: {e}")
             return []
 
+    async def write_files(
+        self,
+        run_id: str,
+        files: Dict[str, Union[str, bytes]],
+        base_dir: str = "/home/user",
+        known_manifest: Optional[Manifest] = None
+    ) -> Dict[str, Any]:
+        """
+        Write many files to the sandbox as one compressed tar.
+
+        Args:
+            run_id: Agent run ID
+            files: Relative path -> content
+            base_dir: Directory the paths are relative to
+            known_manifest: Manifest of what the sandbox already has (e.g.
+                from read_tree); files with matching hashes are skipped
+
+        Returns:
+            Dict with success, written paths, skipped count and the manifest
+            of the written tree
+        """
+        contents = {
+            path: data.encode("utf-8") if isinstance(data, str) else data
+            for path, data in files.items()
+        }
+        manifest = build_manifest(contents)
+        diff = diff_manifests(known_manifest, manifest)
+        result = {
+            "success": True,
+            "written": diff.changed,
+            "skipped": diff.unchanged,
+            "manifest": manifest,
+        }
+        if not diff.changed:
+            return result
+
+        sandbox = await self.get_or_create_sandbox(run_id)
+        archive = pack_tar({path: contents[path] for path in diff.changed})
+        archive_path = f"/tmp/write-{uuid.uuid4().hex}.tar.gz"
+
+        try:
+            sandbox.filesystem.write(archive_path, archive)
+            process = sandbox.process.start(
+                f"mkdir -p {shlex.quote(base_dir)} && "
+                f"tar -xzf {archive_path} -C {shlex.quote(base_dir)}; "
+                f"status=$?; rm -f {archive_path}; exit $status"
+            )
+            process.wait()
+            if process.exit_code != 0:
+                raise RuntimeError(process.stderr)
+
+            logger.debug(
+                f"Wrote {len(diff.changed)} files ({len(archive)} bytes compressed, "
+                f"{diff.unchanged} unchanged) to {base_dir} for run {run_id}"
+            )
+            return result
+        except Exception as e:
+            logger.error(f"Failed to write files to {base_dir}: {e}")
+            return {**result, "success": False, "written": [], "error": str(e)}
+
+    async def read_tree(
+        self,
+        run_id: str,
+        root: str,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        known_manifest: Optional[Manifest] = None,
+        max_file_bytes: int = 10 * 1024 * 1024
+    ) -> Dict[str, Any]:
+        """
+        Read a directory tree from the sandbox as one compressed tar.
+
+        Args:
+            run_id: Agent run ID
+            root: Directory to read
+            include: Globs a relative path must match (all files if empty)
+            exclude: Globs to skip (defaults to node_modules and .git)
+            known_manifest: Manifest from a previous read_tree; only files
+                whose hash changed are transferred
+            max_file_bytes: Files larger than this are listed in too_large
+
+        Returns:
+            Dict with success, files (changed path -> bytes), manifest,
+            deleted paths (in known_manifest but gone) and too_large paths
+        """
+        sandbox = await self.get_or_create_sandbox(run_id)
+        token = uuid.uuid4().hex
+        job_path = f"/tmp/tree-{token}.json"
+        archive_path = f"/tmp/tree-{token}.tar.gz"
+
+        try:
+            sandbox.filesystem.write(job_path, tree_job(
+                root, archive_path, include, exclude, known_manifest, max_file_bytes
+            ))
+            process = sandbox.process.start(
+                f"python3 - {job_path} <<'EOF'\n{TREE_SCRIPT}\nEOF"
+            )
+            process.wait()
+            if process.exit_code != 0:
+                raise RuntimeError(process.stderr)
+
+            archive = sandbox.filesystem.read(archive_path, format="bytes")
+            sandbox.process.start(f"rm -f {job_path} {archive_path}")
+
+            files, manifest, too_large = split_tree_archive(archive)
+            diff = diff_manifests(known_manifest, manifest)
+            logger.debug(
+                f"Read {len(files)} changed files of {len(manifest)} "
+                f"({len(archive)} bytes compressed) from {root} for run {run_id}"
+            )
+            return {
+                "success": True,
+                "files": files,
+                "manifest": manifest,
+                "unchanged": diff.unchanged,
+                "deleted": diff.deleted,
+                "too_large": too_large,
+            }
+        except Exception as e:
+            logger.error(f"Failed to read tree {root}: {e}")
+            return {
+                "success": False,
+                "files": {},
+                "manifest": {},
+                "unchanged": 0,
+                "deleted": [],
+                "too_large": [],
+                "error": str(e),
+            }
+
     async def download_file(
         self,
         run_id: str,
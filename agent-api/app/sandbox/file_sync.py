@@ -0,0 +1,202 @@
+"""
+Bulk sandbox file transfer
+Moves whole file trees in and out of a sandbox as one compressed tar
+
+Helpers shared by E2BSandboxManager.write_files/read_tree:
+- Manifests map relative path -> {sha256, size}; diffing two manifests
+  yields the changed and deleted paths, so only changed files move
+- Include/exclude globs (fnmatch, matched against the relative path)
+  select files; excluded directories are pruned while walking
+- TREE_SCRIPT runs inside the sandbox, hashes the tree and packs the
+  changed files plus the new manifest into a single tar.gz
+"""
+import hashlib
+import io
+import json
+import posixpath
+import tarfile
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Tar member carrying the manifest in read_tree archives
+MANIFEST_MEMBER = ".sandbox-tree-manifest.json"
+
+# Applied by read_tree when no exclude list is given
+DEFAULT_TREE_EXCLUDE = ("node_modules/*", "*/node_modules/*", ".git/*", "*/.git/*")
+
+Manifest = Dict[str, Dict[str, Union[str, int]]]
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_manifest(files: Dict[str, bytes]) -> Manifest:
+    """Manifest of in-memory file contents"""
+    return {
+        path: {"sha256": file_digest(data), "size": len(data)}
+        for path, data in files.items()
+    }
+
+
+@dataclass
+class ManifestDiff:
+    """Paths that differ between two manifests"""
+    changed: List[str] = field(default_factory=list)  # New or modified
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def diff_manifests(old: Optional[Manifest], new: Manifest) -> ManifestDiff:
+    """Compare a previously synced manifest with the current one"""
+    old = old or {}
+    diff = ManifestDiff()
+    for path, entry in new.items():
+        previous = old.get(path)
+        if previous and previous.get("sha256") == entry.get("sha256"):
+            diff.unchanged += 1
+        else:
+            diff.changed.append(path)
+    diff.deleted = [path for path in old if path not in new]
+    return diff
+
+
+def matches_globs(
+    path: str,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+) -> bool:
+    """Whether a relative path is selected by include/exclude globs"""
+    if include and not any(fnmatch(path, pattern) for pattern in include):
+        return False
+    if exclude and any(fnmatch(path, pattern) for pattern in exclude):
+        return False
+    return True
+
+
+def normalize_path(path: str) -> str:
+    """
+    Normalize a relative path for a tree.
+
+    Raises:
+        ValueError: If the path is absolute or escapes the tree root
+    """
+    normalized = posixpath.normpath(path.replace("\\", "/"))
+    if normalized.startswith("/") or normalized == ".." or normalized.startswith("../"):
+        raise ValueError(f"Path escapes the tree root: {path}")
+    return normalized
+
+
+def pack_tar(files: Dict[str, bytes]) -> bytes:
+    """gzip-compressed tar of in-memory files (paths relative to the root)"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=6) as tar:
+        for path, data in files.items():
+            info = tarfile.TarInfo(name=normalize_path(path))
+            info.size = len(data)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def unpack_tar(archive: bytes) -> Dict[str, bytes]:
+    """Regular files in a tar.gz, skipping anything outside the root"""
+    files = {}
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            try:
+                path = normalize_path(member.name)
+            except ValueError:
+                continue
+            extracted = tar.extractfile(member)
+            if extracted is not None:
+                files[path] = extracted.read()
+    return files
+
+
+# Runs in the sandbox as: python3 - /path/to/job.json <<'EOF' ... EOF
+TREE_SCRIPT = r'''
+import fnmatch, hashlib, json, os, sys, tarfile
+
+job = json.load(open(sys.argv[1]))
+root = job["root"]
+include = job.get("include") or []
+exclude = job.get("exclude") or []
+known = job.get("known") or {}
+max_file_bytes = job["max_file_bytes"]
+
+def selected(rel):
+    if include and not any(fnmatch.fnmatch(rel, p) for p in include):
+        return False
+    return not any(fnmatch.fnmatch(rel, p) for p in exclude)
+
+manifest, changed, too_large = {}, [], []
+for dirpath, dirnames, filenames in os.walk(root):
+    rel_dir = os.path.relpath(dirpath, root)
+    rel_dir = "" if rel_dir == "." else rel_dir + "/"
+    dirnames[:] = [
+        d for d in dirnames
+        if not any(fnmatch.fnmatch(rel_dir + d + "/", p) for p in exclude)
+    ]
+    for name in filenames:
+        rel = rel_dir + name
+        full = os.path.join(dirpath, name)
+        if not os.path.isfile(full) or not selected(rel):
+            continue
+        size = os.path.getsize(full)
+        if size > max_file_bytes:
+            too_large.append(rel)
+            continue
+        digest = hashlib.sha256()
+        with open(full, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        manifest[rel] = {"sha256": digest.hexdigest(), "size": size}
+        if known.get(rel, {}).get("sha256") != manifest[rel]["sha256"]:
+            changed.append(rel)
+
+meta = job["archive"] + ".json"
+with open(meta, "w") as f:
+    json.dump({"manifest": manifest, "too_large": too_large}, f)
+with tarfile.open(job["archive"], "w:gz", compresslevel=6) as tar:
+    tar.add(meta, arcname=job["manifest_member"])
+    for rel in changed:
+        tar.add(os.path.join(root, rel), arcname=rel)
+os.remove(meta)
+print(json.dumps({"files": len(manifest), "changed": len(changed)}))
+'''
+
+
+def tree_job(
+    root: str,
+    archive_path: str,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    known_manifest: Optional[Manifest] = None,
+    max_file_bytes: int = 10 * 1024 * 1024,
+) -> str:
+    """JSON job description for TREE_SCRIPT"""
+    return json.dumps({
+        "root": root,
+        "archive": archive_path,
+        "include": list(include or []),
+        "exclude": list(DEFAULT_TREE_EXCLUDE if exclude is None else exclude),
+        "known": known_manifest or {},
+        "max_file_bytes": max_file_bytes,
+        "manifest_member": MANIFEST_MEMBER,
+    })
+
+
+def split_tree_archive(archive: bytes) -> Tuple[Dict[str, bytes], Manifest, List[str]]:
+    """
+    Unpack a TREE_SCRIPT archive.
+
+    Returns:
+        (files, manifest, too_large)
+    """
+    files = unpack_tar(archive)
+    meta = json.loads(files.pop(MANIFEST_MEMBER, b"{}") or b"{}")
+    return files, meta.get("manifest", {}), meta.get("too_large", [])
@@ -0,0 +1,380 @@
+"""
+Sandbox Package Layer Cache
+Restores prebuilt dependency layers instead of installing from scratch
+
+A layer is the set of files one package manager writes for a dependency
+set (pip site-packages, npm global node_modules, Playwright browsers):
+- Keyed by a SHA-256 of the normalized dependency set, the layer kind, a
+  format version and the sandbox environment (base template, interpreter
+  ABI, platform and OS release, probed before each use), so only sandboxes
+  that could have built the same files share a tarball
+- Built once inside a sandbox under a staging root that mirrors the real
+  install paths, packed as a tar.gz and uploaded to object storage
+- Restored with a single `curl | tar -xzf - -C /` in the sandbox; the
+  tarball moves directly between the sandbox and S3 via presigned URLs
+- pip installs with --target, which puts console scripts (pytest, black)
+  in <site-packages>/bin; restoring or building a pip layer adds that
+  directory to PATH in ~/.bashrc
+- Layers older than max_age_days are rebuilt so unpinned specs pick up
+  new releases
+- If a pre-baked E2B template already contains every requested package,
+  the sandbox is created from it and nothing is installed at all
+"""
+import asyncio
+import hashlib
+import logging
+import shlex
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when build scripts change so old tarballs are not restored
+LAYER_FORMAT_VERSION = "1"
+
+# E2B template sandboxes are created from unless one is given
+DEFAULT_TEMPLATE = "base"
+
+# Identify what a layer's files were built against: interpreter ABI and
+# platform per kind, plus the OS release for native libraries
+PYTHON_PROBE = "python3 -c 'import sys, sysconfig; print(sys.implementation.cache_tag, sysconfig.get_platform())'"
+NODE_PROBE = "node -p 'process.version + \" \" + process.platform + \"-\" + process.arch'"
+ENVIRONMENT_PROBES = {"pip": PYTHON_PROBE, "npm": NODE_PROBE, "playwright": PYTHON_PROBE}
+OS_PROBE = '. /etc/os-release && echo "$ID-$VERSION_ID"'
+
+STAGE_DIR = "/tmp/layer-stage"
+PURELIB = "$(python3 -c 'import sysconfig; print(sysconfig.get_paths()[\"purelib\"])')"
+
+# Idempotently put pip --target console scripts on PATH for later shells
+SCRIPTS_ON_PATH = (
+    f'LINE="export PATH=\\"{PURELIB}/bin:\\$PATH\\""; '
+    'grep -qxF "$LINE" ~/.bashrc 2>/dev/null || echo "$LINE" >> ~/.bashrc'
+)
+
+ShellRunner = Callable[[str, int], Awaitable[Dict[str, Any]]]
+
+
+def normalize_packages(packages: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Group package specs by manager ("pip:pandas", "npm:lodash", "pandas").
+
+    Returns:
+        Manager -> sorted, de-duplicated specs (pip names are lowercased)
+    """
+    groups: Dict[str, Set[str]] = {}
+    for package in packages:
+        package = package.strip()
+        if not package:
+            continue
+        if ":" in package:
+            manager, spec = package.split(":", 1)
+        else:
+            manager, spec = "pip", package
+        if manager == "pip":
+            spec = spec.lower().replace("_", "-").replace(" ", "")
+        groups.setdefault(manager, set()).add(spec)
+    return {manager: sorted(specs) for manager, specs in groups.items()}
+
+
+@dataclass(frozen=True)
+class LayerSpec:
+    """A cacheable dependency layer"""
+    kind: str  # pip, npm or playwright
+    packages: Tuple[str, ...]
+    environment: str = ""  # see LayerCache.probe_environment
+
+    @property
+    def key(self) -> str:
+        payload = "\n".join([LAYER_FORMAT_VERSION, self.kind, self.environment, *self.packages])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def with_environment(self, environment: str) -> "LayerSpec":
+        return replace(self, environment=environment)
+
+    def build_script(self) -> str:
+        """Shell that installs the layer under $STAGE, mirroring real paths"""
+        packages = " ".join(shlex.quote(p) for p in self.packages)
+        pip_target = f'"$STAGE{PURELIB}"'
+        if self.kind == "pip":
+            return f"mkdir -p {pip_target} && pip install --quiet --target {pip_target} {packages}"
+        if self.kind == "npm":
+            return f'npm install -g --silent --prefix "$STAGE$(npm prefix -g)" {packages}'
+        if self.kind == "playwright":
+            return (
+                f"mkdir -p {pip_target} && pip install --quiet --target {pip_target} {packages} && "
+                f'PYTHONPATH={pip_target} PLAYWRIGHT_BROWSERS_PATH="$STAGE$HOME/.cache/ms-playwright" '
+                f"python3 -m playwright install chromium"
+            )
+        raise ValueError(f"Unsupported layer kind: {self.kind}")
+
+    def activate_script(self) -> Optional[str]:
+        """Shell that makes the layer's executables reachable once extracted"""
+        if self.kind in ("pip", "playwright"):
+            return SCRIPTS_ON_PATH
+        # npm -g installs into the real global prefix, whose bin is on PATH
+        return None
+
+
+PLAYWRIGHT_LAYER = LayerSpec(kind="playwright", packages=("playwright",))
+
+
+def layer_specs(packages: Iterable[str]) -> Tuple[List[LayerSpec], List[str]]:
+    """
+    Split package specs into cacheable layers and the rest.
+
+    Returns:
+        (layers, uncached) where uncached keeps the original "manager:pkg"
+        form (e.g. apt packages, which install outside any layer path)
+    """
+    layers = []
+    uncached = []
+    for manager, specs in normalize_packages(packages).items():
+        if manager in ("pip", "npm"):
+            layers.append(LayerSpec(kind=manager, packages=tuple(specs)))
+        else:
+            uncached.extend(f"{manager}:{spec}" for spec in specs)
+    return layers, uncached
+
+
+class LayerCache:
+    """
+    Object-storage cache of prebuilt dependency layers.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any = None,
+        bucket: Optional[str] = None,
+        prefix: str = "layer-cache/",
+        max_age_days: int = 7,
+        prebaked_templates: Optional[Dict[str, Iterable[str]]] = None,
+        url_ttl_seconds: int = 900,
+    ):
+        """
+        Initialize layer cache.
+
+        Args:
+            s3_client: boto3 S3 client (defaults to one built from settings;
+                the cache is disabled when S3 credentials are missing)
+            bucket: Bucket holding layers (defaults to the workspace bucket)
+            prefix: Key prefix for layer tarballs
+            max_age_days: Rebuild layers older than this
+            prebaked_templates: E2B template ID -> packages baked into it
+            url_ttl_seconds: Lifetime of presigned transfer URLs
+        """
+        settings = get_settings()
+        self.bucket = bucket or settings.s3_workspace_bucket
+        self.prefix = prefix
+        self.max_age_days = max_age_days
+        self.url_ttl_seconds = url_ttl_seconds
+        self.prebaked_templates = {
+            template: self._flatten(packages)
+            for template, packages in (prebaked_templates or {}).items()
+        }
+        self.s3 = s3_client
+        if self.s3 is None and settings.s3_access_key and settings.s3_secret_key:
+            import boto3
+            self.s3 = boto3.client(
+                's3',
+                endpoint_url=settings.s3_endpoint,
+                region_name=settings.s3_region,
+                aws_access_key_id=settings.s3_access_key,
+                aws_secret_access_key=settings.s3_secret_key
+            )
+
+        self.metrics = {"restored": 0, "built": 0, "failed": 0, "template_hits": 0}
+        self._build_locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.s3 is not None
+
+    def object_key(self, spec: LayerSpec) -> str:
+        return f"{self.prefix}{spec.kind}/{spec.key}.tar.gz"
+
+    @staticmethod
+    def _flatten(packages: Iterable[str]) -> Set[str]:
+        return {
+            f"{manager}:{spec}"
+            for manager, specs in normalize_packages(packages).items()
+            for spec in specs
+        }
+
+    def match_template(self, packages: Iterable[str]) -> Optional[str]:
+        """
+        Find a pre-baked template containing every requested package.
+
+        Returns:
+            Template ID with the fewest extra packages, or None
+        """
+        wanted = self._flatten(packages)
+        if not wanted:
+            return None
+        matches = [
+            (len(baked), template)
+            for template, baked in self.prebaked_templates.items()
+            if wanted <= baked
+        ]
+        if not matches:
+            return None
+        self.metrics["template_hits"] += 1
+        return min(matches)[1]
+
+    async def probe_environment(
+        self,
+        run_shell: ShellRunner,
+        kind: str,
+        template: str = DEFAULT_TEMPLATE,
+    ) -> Optional[str]:
+        """
+        Describe the sandbox environment a layer of this kind depends on.
+
+        Returns:
+            e.g. "base|cpython-311 linux-x86_64|debian-12", or None if the
+            sandbox could not be probed
+        """
+        command = f"{ENVIRONMENT_PROBES[kind]} && {OS_PROBE}"
+        result = await run_shell(f"bash -c {shlex.quote(command)}", 30)
+        lines = [line.strip() for line in (result.get("stdout") or "").splitlines() if line.strip()]
+        if not result.get("success") or len(lines) < 2:
+            logger.warning(f"Could not probe sandbox environment for {kind} layer: {result.get('stderr')}")
+            return None
+        return "|".join([template, *lines])
+
+    async def ensure_layer(
+        self,
+        run_shell: ShellRunner,
+        spec: LayerSpec,
+        template: str = DEFAULT_TEMPLATE,
+    ) -> bool:
+        """
+        Make a layer's files present in a sandbox.
+
+        Restores the cached tarball when there is a fresh one for the
+        sandbox's environment, otherwise builds the layer in the sandbox and
+        uploads it for next time.
+
+        Args:
+            run_shell: Coroutine (command, timeout) -> execute_shell result
+            spec: Layer to install
+            template: E2B template the sandbox was created from
+
+        Returns:
+            True if the layer is installed (restored or built)
+        """
+        if not self.enabled:
+            return False
+
+        environment = await self.probe_environment(run_shell, spec.kind, template)
+        if environment is None:
+            # Never restore files built for an environment we can't identify
+            self.metrics["failed"] += 1
+            return False
+        spec = spec.with_environment(environment)
+
+        if await self._is_fresh(spec) and await self._restore(run_shell, spec):
+            self.metrics["restored"] += 1
+            return True
+
+        # Concurrent sandboxes needing the same new layer build it once;
+        # the others restore what the first one uploaded
+        lock = self._build_locks.setdefault(spec.key, asyncio.Lock())
+        async with lock:
+            if await self._is_fresh(spec) and await self._restore(run_shell, spec):
+                self.metrics["restored"] += 1
+                return True
+            if await self._build(run_shell, spec):
+                self.metrics["built"] += 1
+                return True
+
+        self.metrics["failed"] += 1
+        return False
+
+    async def _is_fresh(self, spec: LayerSpec) -> bool:
+        """Whether a layer tarball exists and is younger than max_age_days"""
+        try:
+            head = await asyncio.to_thread(
+                self.s3.head_object, Bucket=self.bucket, Key=self.object_key(spec)
+            )
+        except Exception:
+            return False
+        last_modified = head.get("LastModified")
+        if last_modified is None:
+            return True
+        age = datetime.now(timezone.utc) - last_modified
+        return age.days < self.max_age_days
+
+    async def _presign(self, method: str, spec: LayerSpec) -> str:
+        return await asyncio.to_thread(
+            self.s3.generate_presigned_url,
+            method,
+            Params={"Bucket": self.bucket, "Key": self.object_key(spec)},
+            ExpiresIn=self.url_ttl_seconds,
+        )
+
+    async def _restore(self, run_shell: ShellRunner, spec: LayerSpec) -> bool:
+        """Download and extract a layer in one pass"""
+        url = await self._presign("get_object", spec)
+        command = f"curl -fsSL {shlex.quote(url)} | tar -xzf - -C /"
+        activate = spec.activate_script()
+        if activate:
+            command += f" && bash -c {shlex.quote(activate)}"
+        result = await run_shell(command, 300)
+        if not result.get("success"):
+            logger.warning(f"Failed to restore {spec.kind} layer {spec.key[:12]}: {result.get('stderr')}")
+            return False
+        logger.info(f"Restored {spec.kind} layer {spec.key[:12]} ({len(spec.packages)} packages)")
+        return True
+
+    async def _build(self, run_shell: ShellRunner, spec: LayerSpec) -> bool:
+        """Install into a staging root, apply it, and upload the tarball"""
+        stage = f"{STAGE_DIR}/{spec.key[:16]}"
+        archive = f"{stage}.tar.gz"
+        script = (
+            f"set -e; STAGE={stage}; rm -rf $STAGE; mkdir -p $STAGE; "
+            f"{spec.build_script()}; "
+            f"tar -czf {archive} -C $STAGE . && tar -xzf {archive} -C /"
+        )
+        activate = spec.activate_script()
+        if activate:
+            script += f"; {activate}"
+        result = await run_shell(f"bash -c {shlex.quote(script)}", 600)
+        if not result.get("success"):
+            logger.error(f"Failed to build {spec.kind} layer {spec.key[:12]}: {result.get('stderr')}")
+            return False
+
+        url = await self._presign("put_object", spec)
+        upload = await run_shell(
+            f"curl -fsS -X PUT --upload-file {archive} {shlex.quote(url)} && rm -rf {stage} {archive}",
+            300,
+        )
+        if not upload.get("success"):
+            # The layer is installed; only the cache entry is missing
+            logger.warning(f"Failed to upload {spec.kind} layer {spec.key[:12]}: {upload.get('stderr')}")
+        else:
+            logger.info(f"Built and cached {spec.kind} layer {spec.key[:12]}")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Restore/build counts"""
+        return {"enabled": self.enabled, **self.metrics}
+
+
+# Singleton instance
+_layer_cache: Optional[LayerCache] = None
+
+
+def get_layer_cache() -> LayerCache:
+    """Get singleton layer cache instance."""
+    global _layer_cache
+    if _layer_cache is None:
+        settings = get_settings()
+        _layer_cache = LayerCache(
+            prefix=settings.sandbox_layer_cache_prefix,
+            max_age_days=settings.sandbox_layer_max_age_days,
+            prebaked_templates=settings.sandbox_prebaked_templates,
+        )
+    return _layer_cache
@@ -7,6 +7,7 @@ Provides advanced features:
 - Health monitoring with automatic recovery
 - Custom environment setup
 - Resource quota enforcement
+- Cached dependency layers and pre-baked templates (see layer_cache)
 """
 import asyncio
 import logging
@@ -24,6 +25,7 @@ from app.sandbox.config import (
     HEAVY_COMPUTE_CONFIG,
     BROWSER_CONFIG
 )
+from app.sandbox.layer_cache import DEFAULT_TEMPLATE, get_layer_cache, layer_specs
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +48,9 @@ class EnhancedE2BSandboxManager:
         self.active_sandboxes: Dict[str, Sandbox] = {}
         self.sandbox_configs: Dict[str, SandboxConfig] = {}
         self.sandbox_metrics: Dict[str, SandboxMetrics] = {}
+        # E2B template each sandbox was created from (keys its layers)
+        self.sandbox_templates: Dict[str, str] = {}
+        self.layer_cache = get_layer_cache()
 
     async def create_sandbox(
         self,
@@ -80,6 +85,18 @@ class EnhancedE2BSandboxManager:
             if environment_vars:
                 env_vars.update(environment_vars)
 
+            # A pre-baked template with every package skips installation
+            pre_install_packages = config.pre_install_packages
+            template = self.layer_cache.match_template(
+                (custom_packages or []) + pre_install_packages
+            )
+            template_kwargs = {}
+            if template:
+                logger.info(f"Using pre-baked template {template} for run {run_id}")
+                template_kwargs["template"] = template
+                custom_packages = None
+                pre_install_packages = []
+
             # Create E2B sandbox
             sandbox = Sandbox(
                 api_key=self.settings.e2b_api_key,
@@ -89,7 +106,8 @@ class EnhancedE2BSandboxManager:
                     "cpu_count": config.cpu_count,
                     "memory_mb": config.memory_mb,
                     "disk_gb": config.disk_gb
-                }
+                },
+                **template_kwargs
             )
 
             sandbox_id = sandbox.id
@@ -97,6 +115,7 @@ class EnhancedE2BSandboxManager:
             # Store sandbox and config
             self.active_sandboxes[run_id] = sandbox
             self.sandbox_configs[run_id] = config
+            self.sandbox_templates[run_id] = template or DEFAULT_TEMPLATE
 
             # Initialize metrics
             self.sandbox_metrics[run_id] = SandboxMetrics(
@@ -118,8 +137,8 @@ class EnhancedE2BSandboxManager:
                 )
 
             # Install pre-configured packages
-            if config.pre_install_packages:
-                await self._install_packages(run_id, config.pre_install_packages)
+            if pre_install_packages:
+                await self._install_packages(run_id, pre_install_packages)
 
             return sandbox_id
 
@@ -338,6 +357,10 @@ class EnhancedE2BSandboxManager:
         """
         Install packages in sandbox.
 
+        pip and npm packages are restored from the layer cache (or built
+        into it on first use); anything else, or a layer that cannot be
+        cached, is installed package by package.
+
         Args:
             run_id: Agent run ID
             packages: List of packages to install
@@ -347,6 +370,23 @@ class EnhancedE2BSandboxManager:
         """
         logger.info(f"Installing packages for run {run_id}: {packages}")
 
+        async def run_shell(command: str, timeout: int) -> Dict[str, Any]:
+            return await self.execute_shell(run_id=run_id, command=command, timeout=timeout)
+
+        template = self.sandbox_templates.get(run_id, DEFAULT_TEMPLATE)
+        layers, remaining = layer_specs(packages)
+        for spec in layers:
+            if not await self.layer_cache.ensure_layer(run_shell, spec, template):
+                remaining.extend(f"{spec.kind}:{pkg}" for pkg in spec.packages)
+
+        return await self._install_packages_individually(run_id, remaining)
+
+    async def _install_packages_individually(
+        self,
+        run_id: str,
+        packages: List[str]
+    ) -> bool:
+        """Install packages one command at a time"""
         for package in packages:
             # Detect package manager based on package format
             if ":" in package:
@@ -530,6 +570,8 @@ class EnhancedE2BSandboxManager:
                 if run_id in self.sandbox_configs:
                     del self.sandbox_configs[run_id]
 
+                self.sandbox_templates.pop(run_id, None)
+
                 if run_id in self.sandbox_metrics:
                     # Mark completed
                     self.sandbox_metrics[run_id].completed_at = datetime.utcnow()
@@ -0,0 +1,295 @@
+"""
+Warm Pool Demand Forecaster
+Sizes the warm sandbox pool per template from predicted demand
+
+Each warmup tick the pool manager feeds the forecaster the job queue depth
+(JobQueue.get_queue_stats) and the forecaster combines it with recent
+per-template arrival rates:
+- Arrival rate is a time-decayed EWMA pair (fast and slow half-lives); the
+  forecast uses the larger so bursts are picked up within a tick and quiet
+  periods (e.g. overnight) decay the pool back to its floors
+- Queued jobs (pending, high priority, retry) are spread across templates
+  by their share of recent arrivals
+- Demand over the replenish horizon is treated as Poisson; each template
+  gets the smallest pool that serves target_hit_rate of it
+- The total is held within the cost caps by handing out sandboxes to the
+  templates with the highest marginal hit gain first
+- Predicted and actual cache-hit rates are exported per template
+"""
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Queues whose jobs have not started yet and will need a sandbox
+BACKLOG_QUEUES = ("pending", "high_priority", "retry")
+
+
+def poisson_pmf(mean: float, limit: int) -> List[float]:
+    """P(N = k) for k in 0..limit"""
+    if mean <= 0:
+        return [1.0] + [0.0] * limit
+    pmf = [math.exp(-mean)]
+    for k in range(1, limit + 1):
+        pmf.append(pmf[-1] * mean / k)
+    return pmf
+
+
+def expected_served(mean: float, size: int) -> float:
+    """E[min(N, size)] for N ~ Poisson(mean): arrivals a pool of `size` serves"""
+    if size <= 0 or mean <= 0:
+        return 0.0
+    pmf = poisson_pmf(mean, size)
+    # E[min(N, size)] = sum of P(N > j) for j < size
+    served = 0.0
+    tail = 1.0
+    for j in range(size):
+        tail -= pmf[j]
+        served += max(tail, 0.0)
+    return served
+
+
+def predicted_hit_rate(mean: float, size: int) -> float:
+    """Fraction of arrivals expected to find a warm sandbox"""
+    if mean <= 0:
+        return 1.0
+    return expected_served(mean, size) / mean
+
+
+@dataclass
+class TemplateDemand:
+    """Arrival and hit/miss tracking for one template"""
+    template: str
+    fast_rate: float = 0.0  # arrivals/second
+    slow_rate: float = 0.0
+    pending_arrivals: int = 0  # Since the last observe()
+    hits: int = 0
+    misses: int = 0
+    target: int = 0
+    expected_demand: float = 0.0
+    predicted_hit_rate: float = 1.0
+    # (timestamp, hit) for the actual hit rate over the recent window
+    recent: Deque = field(default_factory=deque)
+
+    @property
+    def rate(self) -> float:
+        return max(self.fast_rate, self.slow_rate)
+
+
+class PoolDemandForecaster:
+    """
+    Predicts per-template warm pool sizes from queue depth and arrival rates.
+    """
+
+    def __init__(
+        self,
+        horizon_seconds: float = 90.0,
+        target_hit_rate: float = 0.95,
+        fast_half_life_seconds: float = 60.0,
+        slow_half_life_seconds: float = 900.0,
+        min_warm: Optional[Dict[str, int]] = None,
+        max_warm_per_template: int = 10,
+        max_warm_total: Optional[int] = None,
+        sandbox_hourly_cost: float = 0.0,
+        max_hourly_cost: Optional[float] = None,
+        hit_rate_window_seconds: float = 900.0,
+    ):
+        """
+        Initialize forecaster.
+
+        Args:
+            horizon_seconds: Time to replenish the pool (warmup interval plus
+                sandbox creation), i.e. how far ahead demand is covered
+            target_hit_rate: Fraction of arrivals a template's pool should serve
+            fast_half_life_seconds: Half-life of the burst-tracking rate
+            slow_half_life_seconds: Half-life of the baseline rate
+            min_warm: Floor per template (templates not listed floor at 0)
+            max_warm_per_template: Ceiling per template
+            max_warm_total: Cap on warm sandboxes across all templates
+            sandbox_hourly_cost: Cost of keeping one sandbox warm for an hour
+            max_hourly_cost: Cap on the hourly cost of the warm pool
+            hit_rate_window_seconds: Window for the actual hit rate
+        """
+        self.horizon_seconds = horizon_seconds
+        self.target_hit_rate = target_hit_rate
+        self.fast_half_life_seconds = fast_half_life_seconds
+        self.slow_half_life_seconds = slow_half_life_seconds
+        self.min_warm = dict(min_warm or {})
+        self.max_warm_per_template = max_warm_per_template
+        self.max_warm_total = max_warm_total
+        self.sandbox_hourly_cost = sandbox_hourly_cost
+        self.max_hourly_cost = max_hourly_cost
+        self.hit_rate_window_seconds = hit_rate_window_seconds
+
+        self.templates: Dict[str, TemplateDemand] = {
+            template: TemplateDemand(template) for template in self.min_warm
+        }
+        self.backlog = 0
+        self._last_observed: Optional[float] = None
+
+    def record_acquire(self, template: str, hit: bool, now: Optional[float] = None):
+        """Record a sandbox request and whether the warm pool served it"""
+        now = time.time() if now is None else now
+        demand = self._demand(template)
+        demand.pending_arrivals += 1
+        if hit:
+            demand.hits += 1
+        else:
+            demand.misses += 1
+        demand.recent.append((now, hit))
+        self._trim(demand, now)
+
+    @property
+    def budget(self) -> Optional[int]:
+        """Most warm sandboxes the cost caps allow (None if uncapped)"""
+        caps = []
+        if self.max_warm_total is not None:
+            caps.append(self.max_warm_total)
+        if self.max_hourly_cost is not None and self.sandbox_hourly_cost > 0:
+            caps.append(int(self.max_hourly_cost // self.sandbox_hourly_cost))
+        return min(caps) if caps else None
+
+    def observe(
+        self,
+        queue_stats: Optional[Dict[str, int]] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Update rates from arrivals since the last call and plan pool sizes.
+
+        Args:
+            queue_stats: Output of JobQueue.get_queue_stats (empty if unavailable)
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Target warm sandboxes per template
+        """
+        now = time.time() if now is None else now
+        elapsed = None if self._last_observed is None else now - self._last_observed
+        self._last_observed = now
+
+        for demand in self.templates.values():
+            if elapsed and elapsed > 0:
+                instant = demand.pending_arrivals / elapsed
+                fast = 1 - 0.5 ** (elapsed / self.fast_half_life_seconds)
+                slow = 1 - 0.5 ** (elapsed / self.slow_half_life_seconds)
+                demand.fast_rate += fast * (instant - demand.fast_rate)
+                demand.slow_rate += slow * (instant - demand.slow_rate)
+            demand.pending_arrivals = 0
+            self._trim(demand, now)
+
+        queue_stats = queue_stats or {}
+        self.backlog = sum(int(queue_stats.get(name, 0) or 0) for name in BACKLOG_QUEUES)
+
+        for template, share in self._backlog_shares().items():
+            demand = self.templates[template]
+            demand.expected_demand = demand.rate * self.horizon_seconds + self.backlog * share
+
+        self._allocate()
+        for demand in self.templates.values():
+            demand.predicted_hit_rate = predicted_hit_rate(demand.expected_demand, demand.target)
+
+        return self.targets()
+
+    def targets(self) -> Dict[str, int]:
+        """Most recently planned pool size per template"""
+        return {template: demand.target for template, demand in self.templates.items()}
+
+    def stats(self) -> Dict:
+        """Per-template forecast, predicted vs actual hit rate, and totals"""
+        templates = {}
+        weighted_predicted = 0.0
+        total_demand = 0.0
+        recent_hits = 0
+        recent_total = 0
+        for template, demand in self.templates.items():
+            hits = sum(1 for _, hit in demand.recent if hit)
+            total = len(demand.recent)
+            templates[template] = {
+                "arrivals_per_minute": round(demand.rate * 60, 3),
+                "expected_demand": round(demand.expected_demand, 3),
+                "target": demand.target,
+                "predicted_hit_rate": round(demand.predicted_hit_rate, 4),
+                "actual_hit_rate": round(hits / total, 4) if total else None,
+                "hits": demand.hits,
+                "misses": demand.misses,
+            }
+            weighted_predicted += demand.predicted_hit_rate * demand.expected_demand
+            total_demand += demand.expected_demand
+            recent_hits += hits
+            recent_total += total
+
+        return {
+            "backlog": self.backlog,
+            "budget": self.budget,
+            "warm_target_total": sum(d.target for d in self.templates.values()),
+            "predicted_hit_rate": (
+                round(weighted_predicted / total_demand, 4) if total_demand else None
+            ),
+            "actual_hit_rate": round(recent_hits / recent_total, 4) if recent_total else None,
+            "templates": templates,
+        }
+
+    def _demand(self, template: str) -> TemplateDemand:
+        if template not in self.templates:
+            self.templates[template] = TemplateDemand(template)
+        return self.templates[template]
+
+    def _trim(self, demand: TemplateDemand, now: float):
+        cutoff = now - self.hit_rate_window_seconds
+        while demand.recent and demand.recent[0][0] < cutoff:
+            demand.recent.popleft()
+
+    def _backlog_shares(self) -> Dict[str, float]:
+        """Split of queued jobs across templates, by recent arrival rate"""
+        total_rate = sum(d.rate for d in self.templates.values())
+        if total_rate > 0:
+            return {t: d.rate / total_rate for t, d in self.templates.items()}
+        # No recent traffic: attribute the backlog to the default template
+        self._demand("base")
+        return {t: (1.0 if t == "base" else 0.0) for t in self.templates}
+
+    def _desired_size(self, demand: TemplateDemand) -> int:
+        """Smallest pool serving target_hit_rate of the expected demand"""
+        size = 0
+        while (
+            size < self.max_warm_per_template
+            and predicted_hit_rate(demand.expected_demand, size) < self.target_hit_rate
+        ):
+            size += 1
+        return size
+
+    def _allocate(self):
+        """Set targets within the floors, ceilings and cost budget"""
+        desired = {}
+        for template, demand in self.templates.items():
+            floor = min(self.min_warm.get(template, 0), self.max_warm_per_template)
+            desired[template] = max(self._desired_size(demand), floor)
+            demand.target = floor
+
+        budget = self.budget
+        allocated = sum(d.target for d in self.templates.values())
+        if budget is not None and allocated > budget:
+            logger.warning(f"Warm pool floors ({allocated}) exceed cost budget ({budget})")
+
+        # Greedy by marginal gain: the next sandbox for a template serves
+        # P(N > target) extra arrivals in expectation
+        while budget is None or allocated < budget:
+            best = None
+            best_gain = 0.0
+            for template, demand in self.templates.items():
+                if demand.target >= desired[template]:
+                    continue
+                gain = expected_served(demand.expected_demand, demand.target + 1) - expected_served(
+                    demand.expected_demand, demand.target
+                )
+                if best is None or gain > best_gain:
+                    best, best_gain = demand, gain
+            if best is None:
+                break
+            best.target += 1
+            allocated += 1
@@ -4,12 +4,14 @@ Maintains a pool of pre-warmed E2B sandboxes for instant availability
 """
 import asyncio
 import logging
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import uuid
 
+from app.sandbox.pool_forecaster import PoolDemandForecaster
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,6 +53,8 @@ class SandboxPoolManager:
     Features:
     - Pre-warms sandboxes to eliminate cold start latency
     - Maintains minimum pool size for each template
+    - Optionally resizes each template's warm pool from a demand forecast
+      (queue depth, arrival rate, hit/miss history) within cost caps
     - Recycles sandboxes after max lifetime
     - Cleans up idle sandboxes
     - Tracks sandbox health and metrics
@@ -64,13 +68,29 @@ class SandboxPoolManager:
         max_sandbox_age_seconds: int = 3600,  # 1 hour
         max_idle_seconds: int = 300,  # 5 minutes
         warmup_interval_seconds: int = 30,
+        forecaster: Optional[PoolDemandForecaster] = None,
+        queue_stats: Optional[Callable[[], Dict[str, int]]] = None,
     ):
+        """
+        Initialize pool manager.
+
+        Args:
+            forecaster: Demand forecaster; without one the pool keeps
+                min_pool_size "base" sandboxes warm
+            queue_stats: Returns job queue depths (defaults to
+                JobQueue.get_queue_stats when a forecaster is set)
+        """
         self.e2b_api_key = e2b_api_key
         self.min_pool_size = min_pool_size
         self.max_pool_size = max_pool_size
         self.max_sandbox_age_seconds = max_sandbox_age_seconds
         self.max_idle_seconds = max_idle_seconds
         self.warmup_interval_seconds = warmup_interval_seconds
+        self.forecaster = forecaster
+        self.queue_stats = queue_stats
+        
+        # Warm sandboxes to keep per template
+        self.targets: Dict[str, int] = {"base": min_pool_size}
         
         # Pool storage
         self.sandboxes: Dict[str, PooledSandbox] = {}
@@ -140,12 +160,16 @@ class SandboxPoolManager:
                 
                 self.metrics["total_assigned"] += 1
                 self.metrics["cache_hits"] += 1
+                if self.forecaster:
+                    self.forecaster.record_acquire(template, hit=True)
                 
                 logger.info(f"Acquired sandbox {sandbox.id} for run {run_id} (cache hit)")
                 return sandbox
                 
         # No ready sandbox, create new one
         self.metrics["cache_misses"] += 1
+        if self.forecaster:
+            self.forecaster.record_acquire(template, hit=False)
         
         if len(self.sandboxes) >= self.max_pool_size:
             logger.warning(f"Pool at max capacity ({self.max_pool_size}), cannot create new sandbox")
@@ -214,6 +238,8 @@ class SandboxPoolManager:
             "max_pool_size": self.max_pool_size,
             "states": states,
             "metrics": self.metrics,
+            "targets": dict(self.targets),
+            "forecast": self.forecaster.stats() if self.forecaster else None,
         }
         
     async def _create_sandbox(self, template: str = "base") -> Optional[PooledSandbox]:
@@ -294,17 +320,63 @@ class SandboxPoolManager:
             if sandbox.id in self.sandboxes:
                 del self.sandboxes[sandbox.id]
                 
-    async def _ensure_min_pool_size(self):
-        """Ensure minimum number of ready sandboxes"""
-        ready_count = sum(1 for s in self.sandboxes.values() if s.state == SandboxState.READY)
+    def _ready_sandboxes(self, template: str) -> List[PooledSandbox]:
+        return [
+            s for s in self.sandboxes.values()
+            if s.state == SandboxState.READY and s.template == template
+        ]
         
-        needed = self.min_pool_size - ready_count
-        if needed > 0:
-            logger.info(f"Pool needs {needed} more sandboxes (current ready: {ready_count})")
+    async def _read_queue_stats(self) -> Dict[str, int]:
+        """Job queue depths for the forecaster (empty if unavailable)"""
+        if self.queue_stats is None:
+            try:
+                from app.worker.job_queue import JobQueue
+                self.queue_stats = JobQueue().get_queue_stats
+            except Exception as e:
+                logger.warning(f"Job queue unavailable for pool forecast: {e}")
+                return {}
+        try:
+            return await asyncio.to_thread(self.queue_stats)
+        except Exception as e:
+            logger.warning(f"Failed to read queue stats for pool forecast: {e}")
+            return {}
             
-            for _ in range(needed):
-                if len(self.sandboxes) < self.max_pool_size:
-                    await self._create_sandbox()
+    async def _update_targets(self):
+        """Re-plan per-template warm pool sizes from the forecast"""
+        if not self.forecaster:
+            return
+        queue_stats = await self._read_queue_stats()
+        targets = self.forecaster.observe(queue_stats)
+        if targets != self.targets:
+            logger.info(f"Warm pool targets: {targets}")
+        self.targets = targets
+        
+    async def _ensure_min_pool_size(self):
+        """Bring each template's ready sandboxes to its target"""
+        await self._update_targets()
+        
+        for template, target in self.targets.items():
+            ready = self._ready_sandboxes(template)
+            needed = target - len(ready)
+            if needed > 0:
+                logger.info(f"Pool needs {needed} more {template} sandboxes (current ready: {len(ready)})")
+                
+                for _ in range(needed):
+                    if len(self.sandboxes) < self.max_pool_size:
+                        await self._create_sandbox(template)
+            elif needed < 0 and self.forecaster:
+                # Forecast dropped: release the longest-idle surplus now
+                # rather than waiting for max_idle_seconds
+                ready.sort(key=lambda s: s.idle_seconds, reverse=True)
+                for sandbox in ready[:-needed]:
+                    logger.info(f"Shrinking {template} pool: terminating sandbox {sandbox.id}")
+                    await self._terminate_sandbox(sandbox)
+                    
+        if self.forecaster:
+            # Templates the forecast no longer covers
+            for sandbox in list(self.sandboxes.values()):
+                if sandbox.state == SandboxState.READY and sandbox.template not in self.targets:
+                    await self._terminate_sandbox(sandbox)
                     
     async def _warmup_loop(self):
         """Background task to maintain minimum pool size"""
@@ -320,31 +392,38 @@ class SandboxPoolManager:
         """Background task to cleanup old/idle sandboxes"""
         while self._running:
             try:
-                now = datetime.utcnow()
-                
-                for sandbox in list(self.sandboxes.values()):
-                    # Skip busy sandboxes
-                    if sandbox.state in [SandboxState.BUSY, SandboxState.WARMING]:
-                        continue
-                        
-                    # Terminate old sandboxes
-                    if sandbox.age_seconds > self.max_sandbox_age_seconds:
-                        logger.info(f"Terminating old sandbox {sandbox.id} (age: {sandbox.age_seconds}s)")
-                        await self._terminate_sandbox(sandbox)
-                        continue
-                        
-                    # Terminate idle sandboxes (beyond min pool size)
-                    ready_count = sum(1 for s in self.sandboxes.values() if s.state == SandboxState.READY)
-                    if (sandbox.state == SandboxState.READY and 
-                        sandbox.idle_seconds > self.max_idle_seconds and
-                        ready_count > self.min_pool_size):
-                        logger.info(f"Terminating idle sandbox {sandbox.id} (idle: {sandbox.idle_seconds}s)")
-                        await self._terminate_sandbox(sandbox)
-                        
+                await self._cleanup_sandboxes()
             except Exception as e:
                 logger.error(f"Cleanup loop error: {e}")
                 
             await asyncio.sleep(60)  # Run every minute
+            
+    async def _cleanup_sandboxes(self):
+        """Terminate sandboxes past their max age or idle beyond the pool's needs"""
+        for sandbox in list(self.sandboxes.values()):
+            # Skip busy sandboxes
+            if sandbox.state in [SandboxState.BUSY, SandboxState.WARMING]:
+                continue
+                
+            # Terminate old sandboxes
+            if sandbox.age_seconds > self.max_sandbox_age_seconds:
+                logger.info(f"Terminating old sandbox {sandbox.id} (age: {sandbox.age_seconds}s)")
+                await self._terminate_sandbox(sandbox)
+                continue
+                
+            # Terminate idle sandboxes beyond the template's forecast
+            # target, or beyond min pool size without a forecaster
+            if self.forecaster:
+                ready_count = len(self._ready_sandboxes(sandbox.template))
+                keep = self.targets.get(sandbox.template, 0)
+            else:
+                ready_count = sum(1 for s in self.sandboxes.values() if s.state == SandboxState.READY)
+                keep = self.min_pool_size
+            if (sandbox.state == SandboxState.READY and 
+                sandbox.idle_seconds > self.max_idle_seconds and
+                ready_count > keep):
+                logger.info(f"Terminating idle sandbox {sandbox.id} (idle: {sandbox.idle_seconds}s)")
+                await self._terminate_sandbox(sandbox)
 
 
 # Singleton instance
@@ -0,0 +1,516 @@
+"""
+Live cgroup v2 resource sampling for sandboxes.
+
+The limits in resource_limits.py are applied once when a sandbox starts;
+this sampler watches what sandboxes actually use and acts on it:
+- Every interval it reads cpu.stat, memory.current, memory.stat,
+  memory.events, io.stat and pids.current from each registered sandbox's
+  cgroup (local processes via
+  /proc/<pid>/cgroup, Kubernetes pods via their pod UID on the node)
+- Rates (CPU millicores, IO bytes/ops per second) come from the delta
+  between consecutive reads; samples go into a fixed-size ring buffer per
+  sandbox
+- A limit counts as exceeded only when it is exceeded for sustain_samples
+  samples in a row: sustained CPU or IO overuse is throttled (cpu.max
+  down to the tier's request, io.max to the tier's rates), sustained
+  memory at the hard limit kills the cgroup
+- Memory is judged by anonymous memory (memory.stat) and new OOM events
+  (memory.events), not memory.current: page cache counts towards
+  memory.current but the kernel reclaims it before anything is killed
+- A throttle is lifted (the previous cpu.max/io.max restored) once usage
+  stays below release_ratio of the throttled rate for release_samples
+  samples in a row; release_samples is longer than sustain_samples so a
+  sandbox does not flap between the two
+- Per-tier utilization (mean and p95 as a fraction of the tier's limits)
+  shows how much headroom there is to pack sandboxes more densely
+
+The API starts the sampler at startup; dev servers register their process
+and executor pool pods their pod UID, and unregister when they stop.
+"""
+import asyncio
+import glob
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from app.sandbox.resource_limits import ResourceTier, TierResourceLimits, get_tier_limits
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+@dataclass
+class CgroupStats:
+    """Raw counters read from a cgroup v2 directory."""
+    timestamp: float
+    cpu_usage_usec: int = 0
+    cpu_throttled_usec: int = 0
+    memory_bytes: int = 0
+    memory_anon_bytes: int = 0
+    memory_oom_events: int = 0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+    io_read_ops: int = 0
+    io_write_ops: int = 0
+    pids: int = 0
+    io_devices: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ResourceSample:
+    """Usage over one sampling interval."""
+    timestamp: float
+    cpu_millicores: float
+    memory_bytes: int
+    io_read_bps: float
+    io_write_bps: float
+    io_read_iops: float
+    io_write_iops: float
+    pids: int
+    memory_anon_bytes: int = 0
+    oom_events: int = 0
+
+
+def _read_keyed(path: str) -> Dict[str, int]:
+    """Parse a flat-keyed cgroup file ("key value" per line)"""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1].isdigit():
+                    values[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return values
+
+
+def _read_int(path: str) -> int:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return 0
+    return int(value) if value.isdigit() else 0
+
+
+def read_cgroup_stats(cgroup_path: str, now: Optional[float] = None) -> CgroupStats:
+    """
+    Read the counters of a cgroup v2 directory.
+
+    Missing files (controllers not enabled) read as zero.
+    """
+    cpu = _read_keyed(os.path.join(cgroup_path, "cpu.stat"))
+    memory_events = _read_keyed(os.path.join(cgroup_path, "memory.events"))
+    stats = CgroupStats(
+        timestamp=time.monotonic() if now is None else now,
+        cpu_usage_usec=cpu.get("usage_usec", 0),
+        cpu_throttled_usec=cpu.get("throttled_usec", 0),
+        memory_bytes=_read_int(os.path.join(cgroup_path, "memory.current")),
+        memory_anon_bytes=_read_keyed(os.path.join(cgroup_path, "memory.stat")).get("anon", 0),
+        memory_oom_events=memory_events.get("oom", 0) + memory_events.get("oom_kill", 0),
+        pids=_read_int(os.path.join(cgroup_path, "pids.current")),
+    )
+    try:
+        with open(os.path.join(cgroup_path, "io.stat")) as f:
+            for line in f:
+                # "8:0 rbytes=1 wbytes=2 rios=3 wios=4 dbytes=0 dios=0"
+                device, *fields = line.split()
+                stats.io_devices.append(device)
+                values = dict(item.split("=", 1) for item in fields if "=" in item)
+                stats.io_read_bytes += int(values.get("rbytes", 0))
+                stats.io_write_bytes += int(values.get("wbytes", 0))
+                stats.io_read_ops += int(values.get("rios", 0))
+                stats.io_write_ops += int(values.get("wios", 0))
+    except OSError:
+        pass
+    return stats
+
+
+def cgroup_of_pid(pid: int, root: str = CGROUP_ROOT) -> Optional[str]:
+    """cgroup v2 directory of a local process (None if not on the unified hierarchy)"""
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return os.path.join(root, line.strip()[3:].lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+def cgroup_of_pod(pod_uid: str, root: str = CGROUP_ROOT) -> Optional[str]:
+    """
+    cgroup v2 directory of a Kubernetes pod on this node.
+
+    Handles both the systemd (kubepods-burstable-pod<uid>.slice) and the
+    cgroupfs (kubepods/burstable/pod<uid>) drivers.
+    """
+    underscored = pod_uid.replace("-", "_")
+    patterns = [
+        f"{root}/kubepods.slice/**/kubepods*-pod{underscored}.slice",
+        f"{root}/kubepods/**/pod{pod_uid}",
+    ]
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if matches:
+            return matches[0]
+    return None
+
+
+def _read_cgroup(cgroup_path: str, filename: str) -> Optional[str]:
+    try:
+        with open(os.path.join(cgroup_path, filename)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_cgroup(cgroup_path: str, filename: str, value: str) -> bool:
+    try:
+        with open(os.path.join(cgroup_path, filename), "w") as f:
+            f.write(value)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to write {filename} in {cgroup_path}: {e}")
+        return False
+
+
+@dataclass
+class SandboxSeries:
+    """Sampling state and history for one sandbox."""
+    sandbox_id: str
+    tier: ResourceTier
+    cgroup_path: str
+    samples: Deque[ResourceSample]
+    last_stats: Optional[CgroupStats] = None
+    # Consecutive over-limit samples per resource
+    strikes: Dict[str, int] = field(default_factory=lambda: {"cpu": 0, "memory": 0, "io": 0})
+    throttled: Dict[str, bool] = field(default_factory=lambda: {"cpu": False, "io": False})
+    # Consecutive samples below the release threshold while throttled
+    calm: Dict[str, int] = field(default_factory=lambda: {"cpu": 0, "io": 0})
+    # cpu.max / io.max lines (io: device -> line) to restore on release
+    saved: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+    killed: bool = False
+
+    @property
+    def limits(self) -> TierResourceLimits:
+        return get_tier_limits(self.tier)
+
+
+class ResourceSampler:
+    """
+    Samples registered sandbox cgroups and enforces tier limits.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 5.0,
+        history_size: int = 120,
+        sustain_samples: int = 3,
+        cpu_tolerance: float = 1.0,
+        memory_kill_ratio: float = 0.98,
+        release_ratio: float = 0.5,
+        release_samples: int = 12,
+        enforce: bool = True,
+        on_action: Optional[Callable[[str, str, str], None]] = None,
+    ):
+        """
+        Initialize sampler.
+
+        Args:
+            interval_seconds: Time between samples
+            history_size: Samples kept per sandbox (ring buffer)
+            sustain_samples: Consecutive over-limit samples before acting
+            cpu_tolerance: CPU counts as over limit above limit * tolerance
+            memory_kill_ratio: Anonymous memory at or above limit * ratio
+                counts as at the hard limit
+            release_ratio: A throttle is lifted when usage stays below the
+                throttled rate * ratio
+            release_samples: Consecutive calm samples before lifting a
+                throttle (keep above sustain_samples)
+            enforce: Throttle/kill (False only records violations)
+            on_action: Called with (sandbox_id, resource, action) after an
+                enforcement action
+        """
+        self.interval_seconds = interval_seconds
+        self.history_size = history_size
+        self.sustain_samples = sustain_samples
+        self.cpu_tolerance = cpu_tolerance
+        self.memory_kill_ratio = memory_kill_ratio
+        self.release_ratio = release_ratio
+        self.release_samples = release_samples
+        self.enforce = enforce
+        self.on_action = on_action
+
+        self.sandboxes: Dict[str, SandboxSeries] = {}
+        self.metrics = {"samples": 0, "throttled": 0, "released": 0, "killed": 0, "violations": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, sandbox_id: str, tier: str | ResourceTier, cgroup_path: str) -> None:
+        """Start sampling a sandbox's cgroup"""
+        self.sandboxes[sandbox_id] = SandboxSeries(
+            sandbox_id=sandbox_id,
+            tier=get_tier_limits(tier).tier,
+            cgroup_path=cgroup_path,
+            samples=deque(maxlen=self.history_size),
+        )
+
+    def register_process(self, sandbox_id: str, tier: str | ResourceTier, pid: int) -> bool:
+        """
+        Sample the cgroup a local process runs in.
+
+        A process still in this worker's own cgroup is not registered:
+        enforcing on that cgroup would throttle or kill the worker itself.
+        """
+        path = cgroup_of_pid(pid)
+        if path is None:
+            return False
+        if path == cgroup_of_pid(os.getpid()):
+            logger.info(f"Not sampling {sandbox_id}: pid {pid} shares this worker's cgroup")
+            return False
+        self.register(sandbox_id, tier, path)
+        return True
+
+    def register_pod(self, sandbox_id: str, tier: str | ResourceTier, pod_uid: str) -> bool:
+        """Sample a Kubernetes pod's cgroup (sampler must run on the pod's node)"""
+        path = cgroup_of_pod(pod_uid)
+        if path is None:
+            return False
+        self.register(sandbox_id, tier, path)
+        return True
+
+    def unregister(self, sandbox_id: str) -> None:
+        self.sandboxes.pop(sandbox_id, None)
+
+    def sample_once(self, now: Optional[float] = None) -> Dict[str, ResourceSample]:
+        """
+        Read every registered cgroup once and apply enforcement.
+
+        Returns:
+            Sandbox ID -> new sample (sandboxes on their first read have none)
+        """
+        samples = {}
+        for series in list(self.sandboxes.values()):
+            if not os.path.isdir(series.cgroup_path):
+                # Sandbox is gone
+                self.unregister(series.sandbox_id)
+                continue
+            stats = read_cgroup_stats(series.cgroup_path, now)
+            previous, series.last_stats = series.last_stats, stats
+            if previous is None or stats.timestamp <= previous.timestamp:
+                continue
+
+            elapsed = stats.timestamp - previous.timestamp
+            sample = ResourceSample(
+                timestamp=stats.timestamp,
+                cpu_millicores=(stats.cpu_usage_usec - previous.cpu_usage_usec) / elapsed / 1000,
+                memory_bytes=stats.memory_bytes,
+                io_read_bps=(stats.io_read_bytes - previous.io_read_bytes) / elapsed,
+                io_write_bps=(stats.io_write_bytes - previous.io_write_bytes) / elapsed,
+                io_read_iops=(stats.io_read_ops - previous.io_read_ops) / elapsed,
+                io_write_iops=(stats.io_write_ops - previous.io_write_ops) / elapsed,
+                pids=stats.pids,
+                memory_anon_bytes=stats.memory_anon_bytes,
+                oom_events=max(stats.memory_oom_events - previous.memory_oom_events, 0),
+            )
+            series.samples.append(sample)
+            samples[series.sandbox_id] = sample
+            self.metrics["samples"] += 1
+            self._check_limits(series, sample, stats)
+        return samples
+
+    def _check_limits(self, series: SandboxSeries, sample: ResourceSample, stats: CgroupStats):
+        limits = series.limits
+        over = {
+            "cpu": sample.cpu_millicores > limits.cpu.limit_millicores * self.cpu_tolerance,
+            "memory": (
+                sample.memory_anon_bytes >= limits.memory.limit_bytes * self.memory_kill_ratio
+                or sample.oom_events > 0
+            ),
+            "io": (
+                sample.io_read_bps > limits.io.read_bytes_per_second
+                or sample.io_write_bps > limits.io.write_bytes_per_second
+                or sample.io_read_iops > limits.io.read_iops_per_second
+                or sample.io_write_iops > limits.io.write_iops_per_second
+            ),
+        }
+        for resource, exceeded in over.items():
+            series.strikes[resource] = series.strikes[resource] + 1 if exceeded else 0
+            if series.strikes[resource] == self.sustain_samples:
+                self.metrics["violations"] += 1
+                logger.warning(
+                    f"Sandbox {series.sandbox_id} ({series.tier.value}) over its {resource} limit "
+                    f"for {self.sustain_samples} samples"
+                )
+                if self.enforce:
+                    self._enforce(series, resource, stats)
+
+        # Throttled rates are the tier's request (cpu) and rates (io)
+        release = self.release_ratio
+        calm = {
+            "cpu": sample.cpu_millicores < limits.cpu.request_millicores * release,
+            "io": (
+                sample.io_read_bps < limits.io.read_bytes_per_second * release
+                and sample.io_write_bps < limits.io.write_bytes_per_second * release
+                and sample.io_read_iops < limits.io.read_iops_per_second * release
+                and sample.io_write_iops < limits.io.write_iops_per_second * release
+            ),
+        }
+        for resource, below in calm.items():
+            if not series.throttled[resource]:
+                continue
+            series.calm[resource] = series.calm[resource] + 1 if below else 0
+            if series.calm[resource] >= self.release_samples:
+                self._release(series, resource)
+
+    def _enforce(self, series: SandboxSeries, resource: str, stats: CgroupStats):
+        limits = series.limits
+        if resource == "memory":
+            if not series.killed and _write_cgroup(series.cgroup_path, "cgroup.kill", "1"):
+                series.killed = True
+                self.metrics["killed"] += 1
+                self._notify(series.sandbox_id, resource, "kill")
+            return
+
+        if series.throttled[resource]:
+            return
+        if resource == "cpu":
+            series.saved["cpu"] = {"": _read_cgroup(series.cgroup_path, "cpu.max")}
+            # Hold the sandbox to its guaranteed share
+            quota = limits.cpu.request_millicores * limits.cpu.period_microseconds // 1000
+            done = _write_cgroup(
+                series.cgroup_path, "cpu.max", f"{quota} {limits.cpu.period_microseconds}"
+            )
+        else:
+            current = {
+                line.split()[0]: line
+                for line in (_read_cgroup(series.cgroup_path, "io.max") or "").splitlines()
+                if line.strip()
+            }
+            series.saved["io"] = {device: current.get(device) for device in stats.io_devices}
+            done = bool(stats.io_devices) and all(
+                _write_cgroup(series.cgroup_path, "io.max", limits.io.to_cgroup_config(device)["io.max"])
+                for device in stats.io_devices
+            )
+        if done:
+            series.throttled[resource] = True
+            series.calm[resource] = 0
+            self.metrics["throttled"] += 1
+            self._notify(series.sandbox_id, resource, "throttle")
+
+    def _release(self, series: SandboxSeries, resource: str):
+        """Restore the cpu.max / io.max that was in place before throttling"""
+        saved = series.saved.get(resource, {})
+        if resource == "cpu":
+            previous = saved.get("") or f"max {series.limits.cpu.period_microseconds}"
+            done = _write_cgroup(series.cgroup_path, "cpu.max", previous)
+        else:
+            done = all(
+                _write_cgroup(
+                    series.cgroup_path, "io.max",
+                    line or f"{device} rbps=max wbps=max riops=max wiops=max",
+                )
+                for device, line in saved.items()
+            )
+        if done:
+            series.throttled[resource] = False
+            series.calm[resource] = 0
+            series.strikes[resource] = 0
+            self.metrics["released"] += 1
+            self._notify(series.sandbox_id, resource, "release")
+
+    def _notify(self, sandbox_id: str, resource: str, action: str):
+        logger.warning(f"Sandbox {sandbox_id}: {action} ({resource})")
+        if self.on_action:
+            self.on_action(sandbox_id, resource, action)
+
+    def series(self, sandbox_id: str) -> List[ResourceSample]:
+        """Recorded samples for a sandbox, oldest first"""
+        series = self.sandboxes.get(sandbox_id)
+        return list(series.samples) if series else []
+
+    def tier_utilization(self) -> Dict[str, Dict[str, float]]:
+        """
+        Utilization per tier as a fraction of the tier's limits.
+
+        Returns:
+            Tier -> sandboxes, cpu_mean, cpu_p95, memory_mean, memory_p95
+        """
+        per_tier: Dict[ResourceTier, Dict[str, List[float]]] = {}
+        for series in self.sandboxes.values():
+            if not series.samples:
+                continue
+            limits = series.limits
+            bucket = per_tier.setdefault(series.tier, {"cpu": [], "memory": [], "sandboxes": []})
+            bucket["sandboxes"].append(1)
+            for sample in series.samples:
+                bucket["cpu"].append(sample.cpu_millicores / limits.cpu.limit_millicores)
+                bucket["memory"].append(sample.memory_bytes / limits.memory.limit_bytes)
+
+        return {
+            tier.value: {
+                "sandboxes": len(bucket["sandboxes"]),
+                "cpu_mean": round(sum(bucket["cpu"]) / len(bucket["cpu"]), 4),
+                "cpu_p95": round(_percentile(bucket["cpu"], 0.95), 4),
+                "memory_mean": round(sum(bucket["memory"]) / len(bucket["memory"]), 4),
+                "memory_p95": round(_percentile(bucket["memory"], 0.95), 4),
+            }
+            for tier, bucket in per_tier.items()
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sample_once)
+            except Exception as e:
+                logger.error(f"Resource sampler error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start sampling in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        """Counters and per-tier utilization"""
+        return {
+            "sandboxes": len(self.sandboxes),
+            **self.metrics,
+            "tiers": self.tier_utilization(),
+        }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Singleton instance
+_sampler: Optional[ResourceSampler] = None
+
+
+def get_resource_sampler() -> ResourceSampler:
+    """Get singleton resource sampler instance."""
+    global _sampler
+    if _sampler is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _sampler = ResourceSampler(
+            interval_seconds=settings.sandbox_sample_interval_seconds,
+            enforce=settings.sandbox_enforce_limits,
+        )
+    return _sampler
@@ -1,5 +1,6 @@
 """S3 workspace storage for agent files"""
 
-from app.storage.s3_workspace import S3Workspace
+from app.storage.blob_store import BlobStore
+from app.storage.s3_workspace import S3Workspace, collect_workspace_garbage
 
-__all__ = ["S3Workspace"]
+__all__ = ["BlobStore", "S3Workspace", "collect_workspace_garbage"]
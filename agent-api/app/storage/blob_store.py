@@ -0,0 +1,271 @@
+"""
+Content-addressed blob store for workspace files
+
+Workspace files and generated documents are stored once per content:
+- A blob's key is its SHA-256 (blobs/ab/abcd...), so identical files from
+  different runs (dependency files, templates, regenerated artifacts)
+  share one object
+- Storing known content is a HEAD request; nothing is uploaded. A blob
+  older than half the GC grace period is copied onto itself to refresh
+  its LastModified, so content a new manifest is about to reference
+  cannot be collected in the meantime
+- Workspaces point at blobs through their manifests (see S3Workspace)
+- Garbage collection counts references across all workspace manifests
+  and deletes unreferenced blobs older than a grace period, so blobs
+  uploaded for a manifest that is not written yet survive; each
+  candidate's age is checked again right before the delete
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+# delete_objects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_missing(error: ClientError) -> bool:
+    return error.response['Error']['Code'] in ('NoSuchKey', '404', 'NotFound')
+
+
+class BlobStore:
+    """
+    Deduplicated object storage keyed by content hash.
+
+    Methods are blocking; async callers run them via asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        prefix: str = "blobs/",
+        refresh_after_seconds: int = 12 * 3600,
+    ):
+        """
+        Initialize blob store.
+
+        Args:
+            s3_client: boto3 S3 client
+            bucket: Bucket holding the blobs
+            prefix: Key prefix for blobs
+            refresh_after_seconds: Deduplicated blobs older than this get a
+                fresh LastModified (keep below half the GC grace period)
+        """
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.refresh_after_seconds = refresh_after_seconds
+        self.metrics = {
+            "uploaded": 0, "deduplicated": 0, "refreshed": 0, "bytes_uploaded": 0, "bytes_saved": 0,
+        }
+
+    def blob_key(self, digest: str) -> str:
+        return f"{self.prefix}{digest[:2]}/{digest}"
+
+    def exists(self, digest: str) -> bool:
+        return self._last_modified(self.blob_key(digest)) is not None
+
+    def _last_modified(self, key: str) -> Optional[datetime]:
+        """LastModified of an object, or None when it does not exist"""
+        try:
+            return self.s3.head_object(Bucket=self.bucket, Key=key)['LastModified']
+        except ClientError as e:
+            if _is_missing(e):
+                return None
+            raise
+
+    def put_bytes(self, data: bytes, digest: Optional[str] = None) -> str:
+        """
+        Store content unless a blob with its hash exists.
+
+        Returns:
+            The content's SHA-256
+        """
+        digest = digest or content_digest(data)
+        if self._dedupe(digest, len(data)):
+            return digest
+        self.s3.put_object(Bucket=self.bucket, Key=self.blob_key(digest), Body=data)
+        self._count_upload(len(data))
+        return digest
+
+    def put_file(self, path: Path, digest: Optional[str] = None) -> str:
+        """
+        Store a local file unless a blob with its hash exists.
+
+        Returns:
+            The file's SHA-256
+        """
+        digest = digest or file_digest(path)
+        size = path.stat().st_size
+        if self._dedupe(digest, size):
+            return digest
+        self.s3.upload_file(str(path), self.bucket, self.blob_key(digest), Config=TRANSFER_CONFIG)
+        self._count_upload(size)
+        return digest
+
+    def get_bytes(self, digest: str) -> bytes:
+        response = self.s3.get_object(Bucket=self.bucket, Key=self.blob_key(digest))
+        return response['Body'].read()
+
+    def download(self, digest: str, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.s3.download_file(self.bucket, self.blob_key(digest), str(path), Config=TRANSFER_CONFIG)
+
+    def _dedupe(self, digest: str, size: int) -> bool:
+        key = self.blob_key(digest)
+        last_modified = self._last_modified(key)
+        if last_modified is None:
+            return False
+        age = datetime.now(timezone.utc) - last_modified
+        if age > timedelta(seconds=self.refresh_after_seconds) and not self._refresh(key):
+            return False
+        self.metrics["deduplicated"] += 1
+        self.metrics["bytes_saved"] += size
+        return True
+
+    def _refresh(self, key: str) -> bool:
+        """
+        Reset a blob's LastModified so GC treats it as new.
+
+        Returns:
+            False if the blob was deleted in the meantime
+        """
+        try:
+            self.s3.copy_object(
+                Bucket=self.bucket,
+                Key=key,
+                CopySource={'Bucket': self.bucket, 'Key': key},
+                MetadataDirective='REPLACE',
+                Metadata={'refreshed-at': datetime.now(timezone.utc).isoformat()},
+            )
+        except ClientError as e:
+            if _is_missing(e):
+                return False
+            raise
+        self.metrics["refreshed"] += 1
+        return True
+
+    def _count_upload(self, size: int):
+        self.metrics["uploaded"] += 1
+        self.metrics["bytes_uploaded"] += size
+
+    def reference_counts(self, manifest_prefix: str, manifest_name: str) -> Counter:
+        """
+        Count references to each blob across workspace manifests.
+
+        Args:
+            manifest_prefix: Prefix under which workspaces live (e.g. "users/")
+            manifest_name: Object name of a workspace manifest
+
+        Returns:
+            Digest -> number of manifest entries pointing at it
+        """
+        counts: Counter = Counter()
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=manifest_prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith("/" + manifest_name):
+                    continue
+                try:
+                    response = self.s3.get_object(Bucket=self.bucket, Key=obj['Key'])
+                    manifest = json.loads(response['Body'].read())
+                except ClientError as e:
+                    if _is_missing(e):
+                        continue  # Deleted since the listing
+                    raise
+                for entry in manifest.values():
+                    if entry.get("sha256"):
+                        counts[entry["sha256"]] += 1
+        return counts
+
+    def collect_garbage(
+        self,
+        manifest_prefix: str,
+        manifest_name: str,
+        grace_seconds: int = 24 * 3600,
+    ) -> Dict[str, int]:
+        """
+        Delete blobs no manifest references.
+
+        Args:
+            manifest_prefix: Prefix under which workspaces live
+            manifest_name: Object name of a workspace manifest
+            grace_seconds: Keep unreferenced blobs younger than this
+
+        Returns:
+            Counts of referenced, deleted and retained (too young) blobs
+        """
+        counts = self.reference_counts(manifest_prefix, manifest_name)
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+
+        unreferenced = []
+        referenced = retained = 0
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                digest = obj['Key'].rsplit("/", 1)[-1]
+                if counts.get(digest):
+                    referenced += 1
+                elif obj['LastModified'] > cutoff:
+                    retained += 1
+                else:
+                    unreferenced.append(obj['Key'])
+
+        # A blob deduplicated since the listing has been refreshed and is
+        # about to be referenced; it is only deleted if still old
+        candidates, unreferenced = unreferenced, []
+        for key in candidates:
+            last_modified = self._last_modified(key)
+            if last_modified is None:
+                continue
+            if last_modified > cutoff:
+                retained += 1
+            else:
+                unreferenced.append(key)
+
+        for i in range(0, len(unreferenced), DELETE_BATCH_SIZE):
+            batch = unreferenced[i:i + DELETE_BATCH_SIZE]
+            self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+
+        logger.info(
+            f"Blob GC: {referenced} referenced, {len(unreferenced)} deleted, {retained} within grace period"
+        )
+        return {"referenced": referenced, "deleted": len(unreferenced), "retained": retained}
+
+    async def collect_garbage_async(self, *args, **kwargs) -> Dict[str, int]:
+        return await asyncio.to_thread(self.collect_garbage, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Upload and deduplication counters"""
+        return dict(self.metrics)
@@ -1,13 +1,139 @@
-"""S3-based workspace storage for agent file operations"""
+"""
+S3-based workspace storage for agent file operations
+
+File contents live in the content-addressed BlobStore; a workspace is a
+manifest object mapping path -> {sha256, size, modified}:
+- Writing content that any workspace already stored is a HEAD request, so
+  forks of common templates and regenerated artifacts cost no uploads
+- Pod restore/persist (download_to_pod/upload_from_pod) diffs the manifest
+  against the local tree and moves only the changed files, so sync time
+  scales with the change, not the workspace
+- Transfers run in worker threads with bounded concurrency; large objects
+  use multipart transfers
+- A local manifest cache (keyed by size and mtime) avoids rehashing
+  unchanged files on every upload; it lives in s3_workspace_state_dir,
+  one file per workspace and local directory, never in the synced tree
+- Workspaces written before blobs existed have no manifest; one is rebuilt
+  from a listing, with entries pointing at the per-run objects (empty
+  sha256) until the next upload moves them into blobs
+- Manifest updates are conditional PUTs (If-Match on the ETag that was
+  read), retried against the fresh manifest when another worker wrote it
+  in between; a per-process lock keeps writers in one process from
+  conflicting with each other
+- Unreferenced blobs are removed by collect_workspace_garbage
+"""
+import asyncio
+import hashlib
+import json
 import logging
+import weakref
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import boto3
 from botocore.exceptions import ClientError
 from app.config import get_settings
+from app.sandbox.file_sync import Manifest, diff_manifests
+from app.storage.blob_store import TRANSFER_CONFIG, BlobStore, file_digest
 
 logger = logging.getLogger(__name__)
 
+# Manifest object, stored under the workspace prefix
+MANIFEST_NAME = ".workspace-manifest.json"
+
+# Hash cache that older versions kept inside the synced directory
+LEGACY_LOCAL_MANIFEST_NAME = ".workspace-manifest.local.json"
+
+# delete_objects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Read-modify-write attempts before a manifest update gives up
+MANIFEST_WRITE_ATTEMPTS = 5
+
+# Serializes manifest read-modify-write per workspace within the process
+_manifest_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _is_missing(error: ClientError) -> bool:
+    return error.response['Error']['Code'] in ('NoSuchKey', '404', 'NotFound')
+
+
+def _is_write_conflict(error: ClientError) -> bool:
+    return error.response['Error']['Code'] in ('PreconditionFailed', '412', 'ConditionalRequestConflict')
+
+
+def _blob_store(s3_client: Any) -> BlobStore:
+    settings = get_settings()
+    return BlobStore(
+        s3_client,
+        settings.s3_workspace_bucket,
+        prefix=settings.s3_blob_prefix,
+        refresh_after_seconds=settings.s3_blob_gc_grace_seconds // 2,
+    )
+
+
+def _create_s3_client():
+    settings = get_settings()
+    # Initialize S3 client with Exoscale endpoint
+    return boto3.client(
+        's3',
+        endpoint_url=settings.s3_endpoint,  # Exoscale Geneva
+        region_name=settings.s3_region,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key
+    )
+
+
+def scan_local_tree(local_path: Path, cache_file: Optional[Path] = None) -> Manifest:
+    """
+    Manifest of a local directory, rehashing only files whose size or
+    mtime changed since the last scan.
+
+    Args:
+        local_path: Directory to scan
+        cache_file: Hash cache from the previous scan (must be outside
+            local_path); None hashes every file
+
+    Returns:
+        Relative path -> {sha256, size}
+    """
+    cache = {}
+    if cache_file is not None:
+        try:
+            cache = json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            pass
+
+    manifest: Manifest = {}
+    fresh_cache = {}
+    for file_path in local_path.rglob('*'):
+        if not file_path.is_file():
+            continue
+        relative = file_path.relative_to(local_path).as_posix()
+        if relative == LEGACY_LOCAL_MANIFEST_NAME:
+            file_path.unlink(missing_ok=True)
+            continue
+        stat = file_path.stat()
+        cached = cache.get(relative)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            digest = cached["sha256"]
+        else:
+            digest = file_digest(file_path)
+        manifest[relative] = {"sha256": digest, "size": stat.st_size}
+        fresh_cache[relative] = {**manifest[relative], "mtime_ns": stat.st_mtime_ns}
+
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps(fresh_cache))
+        except OSError as e:
+            logger.warning(f"Failed to write local manifest cache {cache_file}: {e}")
+    return manifest
+
 
 class S3Workspace:
     """
@@ -16,29 +142,26 @@ class S3Workspace:
     Each run has its own workspace: users/{user_id}/runs/{run_id}/
     """
 
-    def __init__(self, user_id: str, run_id: str):
+    def __init__(self, user_id: str, run_id: str, max_concurrency: int = 16):
         """
         Initialize workspace for a specific user and run.
 
         Args:
             user_id: User ID
             run_id: Agent run ID
+            max_concurrency: Parallel file transfers during a sync
         """
         self.user_id = user_id
         self.run_id = run_id
         self.prefix = f"users/{user_id}/runs/{run_id}/"
+        self.manifest_key = self.prefix + MANIFEST_NAME
+        self.max_concurrency = max_concurrency
 
         settings = get_settings()
         self.bucket = settings.s3_workspace_bucket
-
-        # Initialize S3 client with Exoscale endpoint
-        self.s3 = boto3.client(
-            's3',
-            endpoint_url=settings.s3_endpoint,  # Exoscale Geneva
-            region_name=settings.s3_region,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key
-        )
+        self.state_dir = Path(settings.s3_workspace_state_dir)
+        self.s3 = _create_s3_client()
+        self.blobs = _blob_store(self.s3)
 
         logger.info(f"Initialized S3 workspace: {self.prefix}")
 
@@ -56,12 +179,15 @@ class S3Workspace:
         key = self.prefix + filepath
 
         try:
-            self.s3.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=content
-            )
-            logger.info(f"Wrote file: {key} ({len(content)} bytes)")
+            digest = await asyncio.to_thread(self.blobs.put_bytes, content)
+
+            async def update(manifest: Manifest) -> Manifest:
+                return {**manifest, filepath: {"sha256": digest, "size": len(content), "modified": _now()}}
+
+            previous = (await self._update_manifest(update)).get(filepath)
+            if previous and not previous.get("sha256"):
+                await self._delete_keys([key])
+            logger.info(f"Wrote file: {key} ({len(content)} bytes, blob {digest[:12]})")
             return True
         except ClientError as e:
             logger.error(f"Failed to write file {key}: {e}")
@@ -83,12 +209,14 @@ class S3Workspace:
         key = self.prefix + filepath
 
         try:
-            response = self.s3.get_object(Bucket=self.bucket, Key=key)
-            content = response['Body'].read()
+            entry = (await self._load_remote_manifest()).get(filepath)
+            if entry is None:
+                raise FileNotFoundError(f"File not found: {filepath}")
+            content = await asyncio.to_thread(self._get_bytes, self._object_key(filepath, entry))
             logger.info(f"Read file: {key} ({len(content)} bytes)")
             return content
         except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
+            if _is_missing(e):
                 raise FileNotFoundError(f"File not found: {filepath}")
             logger.error(f"Failed to read file {key}: {e}")
             raise
@@ -106,21 +234,16 @@ class S3Workspace:
         prefix = self.prefix + dirpath
 
         try:
-            response = self.s3.list_objects_v2(
-                Bucket=self.bucket,
-                Prefix=prefix
-            )
-
-            files = []
-            for obj in response.get('Contents', []):
-                # Remove workspace prefix to get relative path
-                relative_path = obj['Key'].replace(self.prefix, '')
-                if relative_path:  # Skip empty paths
-                    files.append({
-                        'filepath': relative_path,
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat()
-                    })
+            manifest = await self._load_remote_manifest()
+            files = [
+                {
+                    'filepath': relative_path,
+                    'size': entry['size'],
+                    'last_modified': entry.get('modified')
+                }
+                for relative_path, entry in sorted(manifest.items())
+                if relative_path.startswith(dirpath)
+            ]
 
             logger.info(f"Listed {len(files)} files in {prefix}")
             return files
@@ -132,6 +255,8 @@ class S3Workspace:
         """
         Delete file from workspace.
 
+        The blob stays until garbage collection finds it unreferenced.
+
         Args:
             filepath: Relative path within workspace
 
@@ -141,7 +266,14 @@ class S3Workspace:
         key = self.prefix + filepath
 
         try:
-            self.s3.delete_object(Bucket=self.bucket, Key=key)
+            async def update(manifest: Manifest) -> Optional[Manifest]:
+                if filepath not in manifest:
+                    return None
+                return {path: entry for path, entry in manifest.items() if path != filepath}
+
+            entry = (await self._update_manifest(update)).get(filepath)
+            if entry is not None and not entry.get("sha256"):
+                await self._delete_keys([key])
             logger.info(f"Deleted file: {key}")
             return True
         except ClientError as e:
@@ -158,77 +290,234 @@ class S3Workspace:
         Returns:
             True if file exists
         """
-        key = self.prefix + filepath
-
         try:
-            self.s3.head_object(Bucket=self.bucket, Key=key)
-            return True
+            return filepath in await self._load_remote_manifest()
         except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                return False
-            logger.error(f"Error checking file existence {key}: {e}")
+            logger.error(f"Error checking file existence {self.prefix + filepath}: {e}")
             return False
 
-    async def download_to_pod(self, local_path: Path):
+    async def download_to_pod(self, local_path: Path) -> Dict[str, int]:
         """
-        Download entire workspace to local directory.
+        Sync the workspace into a local directory.
 
-        Used by K8s jobs to sync workspace to pod.
+        Used by K8s jobs to sync workspace to pod. Only files whose content
+        differs from the local copy are downloaded, and local files that
+        are no longer in the workspace are removed.
 
         Args:
             local_path: Local directory path to download to
+
+        Returns:
+            Counts of downloaded, deleted and unchanged files
         """
+        local_path = Path(local_path)
+        local_path.mkdir(parents=True, exist_ok=True)
         try:
-            paginator = self.s3.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(Bucket=self.bucket, Prefix=self.prefix)
-
-            file_count = 0
-            for page in page_iterator:
-                for obj in page.get('Contents', []):
-                    key = obj['Key']
-                    # Calculate local file path
-                    relative = key.replace(self.prefix, '')
-                    if not relative:
-                        continue
-
-                    local_file = local_path / relative
-                    local_file.parent.mkdir(parents=True, exist_ok=True)
-
-                    # Download file
-                    self.s3.download_file(self.bucket, key, str(local_file))
-                    file_count += 1
-
-            logger.info(f"Downloaded {file_count} files to {local_path}")
+            remote = await self._load_remote_manifest()
+            local = await asyncio.to_thread(scan_local_tree, local_path, self._local_cache_file(local_path))
+            diff = diff_manifests(local, remote)
+
+            await self._run_bounded(
+                asyncio.to_thread(self._download, relative, remote[relative], local_path / relative)
+                for relative in diff.changed
+            )
+            for relative in diff.deleted:
+                (local_path / relative).unlink(missing_ok=True)
+
+            # Record the downloaded files so the next upload skips them
+            await asyncio.to_thread(scan_local_tree, local_path, self._local_cache_file(local_path))
+
+            logger.info(
+                f"Downloaded {len(diff.changed)} files to {local_path} "
+                f"({diff.unchanged} unchanged, {len(diff.deleted)} removed)"
+            )
+            return {"downloaded": len(diff.changed), "deleted": len(diff.deleted), "unchanged": diff.unchanged}
         except ClientError as e:
             logger.error(f"Failed to download workspace to pod: {e}")
             raise
 
-    async def upload_from_pod(self, local_path: Path):
+    async def upload_from_pod(self, local_path: Path) -> Dict[str, int]:
         """
-        Upload files from local directory to workspace.
+        Sync changes in a local directory back to the workspace.
 
-        Used by K8s jobs to sync changes back to S3.
+        Used by K8s jobs to sync changes back to S3. Only new or modified
+        files are stored, and content already in the blob store is only
+        checked with a HEAD request. Files removed locally are dropped
+        from the manifest.
 
         Args:
             local_path: Local directory path to upload from
+
+        Returns:
+            Counts of uploaded (new or modified), deleted and unchanged files
         """
+        local_path = Path(local_path)
         try:
-            file_count = 0
-            for file_path in local_path.rglob('*'):
-                if file_path.is_file():
-                    # Calculate S3 key
-                    relative = file_path.relative_to(local_path)
-                    key = self.prefix + str(relative)
-
-                    # Upload file
-                    self.s3.upload_file(str(file_path), self.bucket, key)
-                    file_count += 1
-
-            logger.info(f"Uploaded {file_count} files from {local_path}")
+            local = await asyncio.to_thread(scan_local_tree, local_path, self._local_cache_file(local_path))
+
+            async def update(remote: Manifest) -> Optional[Manifest]:
+                diff = diff_manifests(remote, local)
+                await self._run_bounded(
+                    asyncio.to_thread(self.blobs.put_file, local_path / relative, local[relative]["sha256"])
+                    for relative in diff.changed
+                )
+                if not (diff.changed or diff.deleted):
+                    return None
+                modified = _now()
+                return {
+                    relative: {
+                        **entry,
+                        "modified": remote.get(relative, {}).get("modified")
+                        if relative not in diff.changed else modified,
+                    }
+                    for relative, entry in local.items()
+                }
+
+            remote = await self._update_manifest(update)
+            diff = diff_manifests(remote, local)
+
+            # Per-run objects of pre-blob workspaces are now superseded
+            await self._delete_keys([
+                self.prefix + relative
+                for relative, entry in remote.items()
+                if not entry.get("sha256")
+            ])
+
+            logger.info(
+                f"Uploaded {len(diff.changed)} files from {local_path} "
+                f"({diff.unchanged} unchanged, {len(diff.deleted)} deleted)"
+            )
+            return {"uploaded": len(diff.changed), "deleted": len(diff.deleted), "unchanged": diff.unchanged}
         except ClientError as e:
             logger.error(f"Failed to upload workspace from pod: {e}")
             raise
 
+    def _local_cache_file(self, local_path: Path) -> Path:
+        """Hash cache of a local copy of this workspace, outside the copy"""
+        key = hashlib.sha256(f"{self.prefix}\0{local_path.resolve()}".encode("utf-8")).hexdigest()
+        return self.state_dir / f"{key}.json"
+
+    async def _update_manifest(self, update: Callable[[Manifest], Awaitable[Optional[Manifest]]]) -> Manifest:
+        """
+        Read-modify-write the manifest with a conditional PUT.
+
+        Args:
+            update: Given the current manifest, returns the new one (or None
+                to leave it unchanged); rerun if the PUT loses a race
+
+        Returns:
+            The manifest the successful update was applied to
+
+        Raises:
+            ClientError: If the manifest kept changing for
+                MANIFEST_WRITE_ATTEMPTS attempts
+        """
+        async with self._manifest_lock():
+            for attempt in range(MANIFEST_WRITE_ATTEMPTS):
+                remote, etag = await self._load_remote_manifest_versioned()
+                updated = await update(remote)
+                if updated is None:
+                    return remote
+                try:
+                    await self._save_manifest(updated, etag)
+                    return remote
+                except ClientError as e:
+                    if not _is_write_conflict(e) or attempt == MANIFEST_WRITE_ATTEMPTS - 1:
+                        raise
+                    logger.info(f"Manifest {self.manifest_key} changed concurrently, retrying update")
+
+    def _manifest_lock(self) -> asyncio.Lock:
+        lock = _manifest_locks.get(self.prefix)
+        if lock is None:
+            lock = asyncio.Lock()
+            _manifest_locks[self.prefix] = lock
+        return lock
+
+    def _object_key(self, relative: str, entry: Dict[str, Any]) -> str:
+        """Blob key, or the per-run key for files from before blobs"""
+        if entry.get("sha256"):
+            return self.blobs.blob_key(entry["sha256"])
+        return self.prefix + relative
+
+    def _get_bytes(self, key: str) -> bytes:
+        response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        return response['Body'].read()
+
+    def _download(self, relative: str, entry: Dict[str, Any], local_file: Path):
+        local_file.parent.mkdir(parents=True, exist_ok=True)
+        self.s3.download_file(
+            self.bucket, self._object_key(relative, entry), str(local_file), Config=TRANSFER_CONFIG
+        )
+
+    async def _run_bounded(self, coros):
+        """Await transfers with at most max_concurrency in flight"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        await asyncio.gather(*(bounded(coro) for coro in coros))
+
+    async def _load_remote_manifest(self) -> Manifest:
+        """
+        The workspace manifest, rebuilt from a listing when it is missing.
+
+        Listed objects have no content hash, so every file in a rebuilt
+        manifest counts as changed for one sync.
+        """
+        return (await self._load_remote_manifest_versioned())[0]
+
+    async def _load_remote_manifest_versioned(self) -> Tuple[Manifest, Optional[str]]:
+        """The workspace manifest and its ETag (None when rebuilt from a listing)"""
+        try:
+            return await asyncio.to_thread(self._get_manifest)
+        except ClientError as e:
+            if not _is_missing(e):
+                raise
+        return await asyncio.to_thread(self._list_manifest), None
+
+    def _get_manifest(self) -> Tuple[Manifest, str]:
+        response = self.s3.get_object(Bucket=self.bucket, Key=self.manifest_key)
+        return json.loads(response['Body'].read()), response['ETag']
+
+    def _list_manifest(self) -> Manifest:
+        manifest: Manifest = {}
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                relative = obj['Key'][len(self.prefix):]
+                if relative and relative != MANIFEST_NAME:
+                    manifest[relative] = {
+                        "sha256": "",
+                        "size": obj['Size'],
+                        "modified": obj['LastModified'].isoformat(),
+                    }
+        return manifest
+
+    async def _save_manifest(self, manifest: Manifest, etag: Optional[str]):
+        """Write the manifest if it is still the version read (etag), or still absent"""
+        condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+        await asyncio.to_thread(
+            self.s3.put_object,
+            Bucket=self.bucket,
+            Key=self.manifest_key,
+            Body=json.dumps(manifest).encode("utf-8"),
+            ContentType="application/json",
+            **condition
+        )
+
+    async def _delete_keys(self, keys: List[str]) -> int:
+        """Delete keys in batches of DELETE_BATCH_SIZE"""
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[i:i + DELETE_BATCH_SIZE]
+            await asyncio.to_thread(
+                self.s3.delete_objects,
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        return len(keys)
+
     async def clear_workspace(self) -> int:
         """
         Delete all files in workspace.
@@ -237,22 +526,35 @@ class S3Workspace:
             Number of files deleted
         """
         try:
-            response = self.s3.list_objects_v2(Bucket=self.bucket, Prefix=self.prefix)
-            objects = response.get('Contents', [])
-
-            if not objects:
+            count = len(await self._load_remote_manifest())
+            if not count:
                 return 0
 
-            # Batch delete
-            delete_keys = [{'Key': obj['Key']} for obj in objects]
-            self.s3.delete_objects(
-                Bucket=self.bucket,
-                Delete={'Objects': delete_keys}
-            )
-
-            count = len(delete_keys)
+            # The manifest and any per-run objects; blobs are left to GC
+            keys = [self.prefix + key for key in await asyncio.to_thread(self._list_manifest)]
+            await self._delete_keys(keys + [self.manifest_key])
             logger.info(f"Cleared workspace: deleted {count} files")
             return count
         except ClientError as e:
             logger.error(f"Failed to clear workspace: {e}")
             return 0
+
+
+async def collect_workspace_garbage(grace_seconds: int | None = None) -> Dict[str, int]:
+    """
+    Delete blobs that no workspace manifest references.
+
+    Args:
+        grace_seconds: Keep unreferenced blobs younger than this (defaults
+            to settings.s3_blob_gc_grace_seconds)
+
+    Returns:
+        Counts of referenced, deleted and retained blobs
+    """
+    settings = get_settings()
+    blobs = _blob_store(_create_s3_client())
+    return await blobs.collect_garbage_async(
+        "users/",
+        MANIFEST_NAME,
+        grace_seconds=settings.s3_blob_gc_grace_seconds if grace_seconds is None else grace_seconds,
+    )
@@ -7,6 +7,7 @@ from app.config import get_settings
 from app.agent.planner import AgentPlanner
 from app.agent.supervisor import AgentSupervisor
 from app.agent.models.types import ExecutionResult
+from app.redis.event_stream import RunEventStream
 from app.worker.e2b_agent_executor import E2BAgentExecutor
 
 logger = logging.getLogger(__name__)
@@ -126,6 +127,7 @@ class JobProcessor:
             self.supabase.table("agent_runs").update({
                 "status": "planning"
             }).eq("id", run_id).execute()
+            await RunEventStream().append_status(run_id, "planning")
 
             planner = AgentPlanner(self.supabase, user_id, self.anthropic)
             plan, plan_error = await planner.create_plan(prompt)
@@ -138,6 +140,7 @@ class JobProcessor:
                     "error_message": error,
                     "completed_at": "now()"
                 }).eq("id", run_id).execute()
+                await RunEventStream().append_status(run_id, "failed", error_message=error)
                 return False, error
 
             # Save plan
@@ -201,6 +204,7 @@ class JobProcessor:
                     "error_message": str(e),
                     "completed_at": "now()"
                 }).eq("id", run_id).execute()
+                await RunEventStream().append_status(run_id, "failed", error_message=str(e))
             except Exception as update_error:
                 logger.error(f"Failed to update run status: {update_error}")
 
@@ -1,13 +1,10 @@
 """Redis-based job queue with retry and dead letter queue logic"""
 import json
 import logging
-import time
 from datetime import datetime
 from typing import Optional, Dict, Any
-from redis import Redis, ConnectionError, TimeoutError
-from redis.retry import Retry
-from redis.backoff import NoBackoff
 from app.config import get_settings
+from app.redis.clients import get_queue_redis
 
 logger = logging.getLogger(__name__)
 
@@ -31,54 +28,17 @@ class JobQueue:
     """
 
     def __init__(self):
-        # Use synchronous Redis for worker (BRPOP is blocking)
+        # Use synchronous Redis for worker (BRPOP is blocking); the shared
+        # queue pool handles TLS, keepalive and retry with backoff
         settings = get_settings()
+        self.redis = get_queue_redis()
 
-        # Convert redis:// to rediss:// for Upstash TLS
-        redis_url = settings.redis_url
-        if redis_url.startswith('redis://') and 'upstash.io' in redis_url:
-            redis_url = redis_url.replace('redis://', 'rediss://')
-            logger.info(f"Converted to TLS: {redis_url[:30]}...")
-        else:
-            logger.info(f"Initializing Redis connection to: {redis_url[:30]}...")
-
-        # Retry connection with backoff (for DNS resolution issues)
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            try:
-                # Create synchronous Redis client for blocking operations
-                import ssl
-
-                # Build connection kwargs
-                connection_kwargs = {
-                    'decode_responses': True,
-                    'socket_connect_timeout': 10,
-                    'socket_keepalive': True,
-                    'socket_keepalive_options': {},
-                    'retry_on_timeout': True,
-                    'retry_on_error': [ConnectionError, TimeoutError],
-                    'retry': Retry(NoBackoff(), 3)
-                }
-
-                # Add SSL config for TLS connections
-                if redis_url.startswith('rediss://'):
-                    connection_kwargs['ssl_cert_reqs'] = 'none'  # String value, not ssl.CERT_NONE
-
-                self.redis = Redis.from_url(redis_url, **connection_kwargs)
-
-                # Test connection
-                self.redis.ping()
-                logger.info(f"Redis connection established successfully (attempt {attempt + 1})")
-                break
-            except Exception as e:
-                if attempt < max_attempts - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s, 8s
-                    logger.warning(f"Redis connection failed (attempt {attempt + 1}/{max_attempts}): {e}")
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    logger.exception(f"Failed to connect to Redis after {max_attempts} attempts: {e}")
-                    raise
+        try:
+            self.redis.ping()
+            logger.info("Redis connection established successfully")
+        except Exception as e:
+            logger.exception(f"Failed to connect to Redis: {e}")
+            raise
 
         self.max_retries = settings.worker_max_retries
 
@@ -7,6 +7,7 @@ import logging
 import sys
 from app.worker.job_queue import JobQueue
 from app.worker.job_processor import JobProcessor
+from app.redis.publisher import get_log_publisher, close_log_publisher
 
 print("=== main.py IMPORTS COMPLETE ===", flush=True)
 
@@ -31,19 +32,8 @@ class AgentWorker:
         # Write immediate heartbeat BEFORE any initialization
         try:
             from datetime import datetime
-            from redis import Redis
-            from app.config import get_settings
-            settings = get_settings()
-            # Convert redis:// to rediss:// for Upstash TLS
-            redis_url = settings.redis_url
-            if redis_url.startswith('redis://') and 'upstash.io' in redis_url:
-                redis_url = redis_url.replace('redis://', 'rediss://')
-
-            # Connect (ssl_cert_reqs='none' for TLS if needed)
-            conn_kwargs = {'decode_responses': True}
-            if redis_url.startswith('rediss://'):
-                conn_kwargs['ssl_cert_reqs'] = 'none'
-            r = Redis.from_url(redis_url, **conn_kwargs)
+            from app.redis.clients import get_queue_redis
+            r = get_queue_redis()
             r.set("worker:heartbeat", datetime.utcnow().isoformat())
             r.lpush("worker:debug", f"Worker __init__ started at {datetime.utcnow().isoformat()}")
             logger.info("Initial heartbeat written before initialization")
@@ -62,6 +52,7 @@ class AgentWorker:
         logger.info("Initializing DB sync service...")
         from app.worker.db_sync import DBToRedisSync
         from supabase import create_client
+        from app.config import get_settings
         settings = get_settings()
         supabase = create_client(settings.supabase_url, settings.supabase_service_role_key)
         self.db_sync = DBToRedisSync(supabase, self.queue.redis)
@@ -113,6 +104,7 @@ class AgentWorker:
             raise
         finally:
             self.db_sync.stop()
+            await close_log_publisher()
             logger.info("Agent Worker shutting down")
 
     async def _sandbox_cleanup_task(self):
@@ -207,6 +199,9 @@ class AgentWorker:
                     try:
                         success, error = await self.processor.process(job)
 
+                        # Deliver buffered logs before the blocking dequeue stalls the loop
+                        await get_log_publisher().flush()
+
                         # Update queue based on result
                         try:
                             if success:
@@ -0,0 +1,17 @@
+"""Shared hooks for billing tests."""
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the ops/sec and p99 line each benchmark recorded, pass or fail"""
+    lines = [
+        value
+        for outcome in ("passed", "failed")
+        for report in terminalreporter.stats.get(outcome, [])
+        if report.when == "call"
+        for name, value in report.user_properties
+        if name == "benchmark"
+    ]
+    if lines:
+        terminalreporter.section("billing benchmarks")
+        for line in lines:
+            terminalreporter.write_line(line)
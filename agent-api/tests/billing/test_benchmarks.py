@@ -0,0 +1,230 @@
+"""
+Billing hot-path microbenchmarks.
+
+Measures per-call overhead of the billing path and reports ops/sec and
+latency percentiles; each result is recorded as the "benchmark" property
+and printed in the terminal summary, pass or fail. Each benchmark asserts
+its p99 stays under a fixed budget so regressions in per-call billing
+overhead fail the benchmark run.
+
+Benchmarks are deselected by default (see pytest.ini); run them with:
+
+    pytest tests/billing/test_benchmarks.py -m benchmark
+"""
+
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+
+from app.billing.billing import BillingService, BillingConfig
+from app.billing.token_counter import TokenCounter
+from app.billing.tokenizer import MultiProviderTokenizer
+from app.billing.types import Provider
+
+
+pytestmark = pytest.mark.benchmark
+
+
+# p99 budgets in microseconds (generous enough for shared CI runners)
+P99_BUDGET_US = {
+    "count_messages[10]": 5_000,
+    "count_messages[50]": 20_000,
+    "count_messages[200]": 80_000,
+    "count_and_cost": 10_000,
+    "bill_token_call": 5_000,
+    "rate_limit[concurrent]": 2_000,
+}
+
+
+@dataclass
+class BenchResult:
+    """Latency statistics for one benchmark."""
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+
+    def report(self) -> str:
+        return (
+            f"BENCH {self.name:<24} {self.ops_per_sec:>12,.0f} ops/s  "
+            f"p50 {self.p50_us:>9.1f}us  p99 {self.p99_us:>9.1f}us"
+        )
+
+
+def _summarize(name: str, samples_ns: list[int], wall_ns: int) -> BenchResult:
+    samples_us = sorted(s / 1000 for s in samples_ns)
+    p99_index = min(len(samples_us) - 1, int(len(samples_us) * 0.99))
+    result = BenchResult(
+        name=name,
+        iterations=len(samples_us),
+        ops_per_sec=len(samples_us) / (wall_ns / 1e9),
+        p50_us=statistics.median(samples_us),
+        p99_us=samples_us[p99_index],
+    )
+    return result
+
+
+def bench_sync(name: str, fn: Callable[[], object], iterations: int = 500, warmup: int = 20) -> BenchResult:
+    """Time a synchronous callable."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    wall_start = time.perf_counter_ns()
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    return _summarize(name, samples, time.perf_counter_ns() - wall_start)
+
+
+async def bench_async(
+    name: str,
+    fn: Callable[[], Awaitable[object]],
+    iterations: int = 500,
+    warmup: int = 20,
+    concurrency: int = 1,
+) -> BenchResult:
+    """Time an async callable, optionally from concurrent tasks."""
+    for _ in range(warmup):
+        await fn()
+
+    samples: list[int] = []
+
+    async def worker(count: int):
+        for _ in range(count):
+            start = time.perf_counter_ns()
+            await fn()
+            samples.append(time.perf_counter_ns() - start)
+
+    wall_start = time.perf_counter_ns()
+    await asyncio.gather(*(worker(iterations // concurrency) for _ in range(concurrency)))
+    return _summarize(name, samples, time.perf_counter_ns() - wall_start)
+
+
+def _conversation(size: int) -> list[dict]:
+    """Realistic alternating chat of `size` messages with a system prompt."""
+    messages = [{"role": "system", "content": "You are a helpful assistant. " * 20}]
+    for i in range(size // 2 + 1):
+        messages.append({"role": "user", "content": f"Question {i}: " + "please explain the tradeoffs " * 8})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "there are several factors to weigh " * 15})
+    return messages[:size]
+
+
+def _stub_supabase() -> Mock:
+    """Supabase stub that answers pricing and billing RPCs instantly."""
+    supabase = Mock()
+    supabase.table.return_value.select.return_value.execute.return_value = Mock(
+        data=[{
+            "model": "gpt-4o",
+            "provider": "openai",
+            "input_price_per_million": "2.50",
+            "output_price_per_million": "10.00",
+            "effective_from": "2024-01-01T00:00:00+00:00",
+        }]
+    )
+    supabase.rpc.return_value.execute.return_value = Mock(
+        data=[{
+            "success": True,
+            "token_record_id": str(uuid4()),
+            "cost_usd": "0.00075",
+            "new_balance_usd": "99.99925",
+        }]
+    )
+    return supabase
+
+
+def _within_budget(result: BenchResult):
+    budget = P99_BUDGET_US[result.name]
+    assert result.p99_us < budget, f"{result.report()} exceeds p99 budget {budget}us"
+
+
+class TestTokenizerBenchmarks:
+    """Tokenizer throughput at realistic conversation sizes."""
+
+    @pytest.mark.parametrize("size", [10, 50, 200])
+    def test_count_messages(self, size, record_property):
+        tokenizer = MultiProviderTokenizer()
+        messages = _conversation(size)
+
+        result = bench_sync(
+            f"count_messages[{size}]",
+            lambda: tokenizer.count_messages(messages, "gpt-4o", Provider.OPENAI),
+            iterations=200,
+        )
+
+        record_property("benchmark", result.report())
+        _within_budget(result)
+
+
+class TestBillingPathBenchmarks:
+    """End-to-end per-call billing overhead with stubbed I/O."""
+
+    @pytest.mark.asyncio
+    async def test_count_and_cost(self, record_property):
+        counter = TokenCounter(_stub_supabase())
+        await counter.load_pricing_snapshot()
+        messages = _conversation(10)
+
+        result = await bench_async(
+            "count_and_cost",
+            lambda: counter.count_and_cost(messages, "Sure, here is the answer.", "gpt-4o"),
+        )
+
+        record_property("benchmark", result.report())
+        _within_budget(result)
+
+    @pytest.mark.asyncio
+    async def test_bill_token_call(self, record_property):
+        service = BillingService(
+            _stub_supabase(),
+            config=BillingConfig(rate_limit_requests_per_minute=10**9),
+        )
+        org_id = uuid4()
+
+        result = await bench_async(
+            "bill_token_call",
+            lambda: service.bill_token_call(
+                org_id=org_id,
+                input_tokens=1200,
+                output_tokens=300,
+                model="gpt-4o",
+            ),
+            iterations=1000,
+        )
+
+        record_property("benchmark", result.report())
+        _within_budget(result)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_concurrent(self, record_property):
+        service = BillingService(
+            _stub_supabase(),
+            config=BillingConfig(
+                rate_limit_requests_per_minute=10**9,
+                rate_limit_tokens_per_minute=10**12,
+            ),
+        )
+        org_ids = [uuid4() for _ in range(20)]
+        counter = iter(range(10**9))
+
+        async def check():
+            org_id = org_ids[next(counter) % len(org_ids)]
+            await service.check_rate_limit(org_id)
+            await service._increment_rate_limit(org_id, 1500)
+
+        result = await bench_async(
+            "rate_limit[concurrent]",
+            check,
+            iterations=2000,
+            concurrency=50,
+        )
+
+        record_property("benchmark", result.report())
+        _within_budget(result)
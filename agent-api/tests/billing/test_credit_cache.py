@@ -0,0 +1,360 @@
+"""Tests for Redis credit cache integration."""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock, AsyncMock
+from uuid import uuid4
+
+from app.billing.billing import BillingService
+from app.billing.credit_cache import RedisCreditCache, ReservationOutcome
+from app.billing.ledger import BillingLedger
+from app.billing.types import BillingResult, CreditBalance, InsufficientCreditsError
+
+
+class TestRedisCreditCache:
+    """Tests for RedisCreditCache wrappers."""
+
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock async Redis client with one script mock per register."""
+        mock = Mock()
+        mock.register_script.side_effect = lambda _: AsyncMock()
+        mock.hmget = AsyncMock()
+        return mock
+
+    @pytest.fixture
+    def cache(self, mock_redis):
+        """Create credit cache with mock."""
+        return RedisCreditCache(mock_redis)
+
+    @pytest.mark.asyncio
+    async def test_reserve_converts_units(self, cache):
+        """reserve passes integer 1e-8 units and converts the result back."""
+        org_id = uuid4()
+        cache._reserve.return_value = [1, 150_000_000]
+
+        outcome, available = await cache.reserve(org_id, "run:call", Decimal("0.5"))
+
+        assert outcome == ReservationOutcome.RESERVED
+        assert available == Decimal("1.5")
+        args = cache._reserve.call_args.kwargs["args"]
+        assert args[:2] == ["run:call", 50_000_000]
+
+    @pytest.mark.asyncio
+    async def test_reserve_rounds_up(self, cache):
+        """Sub-unit amounts are rounded up so holds never under-reserve."""
+        cache._reserve.return_value = [1, 0]
+
+        await cache.reserve(uuid4(), "r", Decimal("0.000000001"))
+
+        assert cache._reserve.call_args.kwargs["args"][1] == 1
+
+    @pytest.mark.asyncio
+    async def test_reserve_not_loaded(self, cache):
+        """Missing state is reported as NOT_LOADED."""
+        cache._reserve.return_value = [-1, 0]
+
+        outcome, _ = await cache.reserve(uuid4(), "r", Decimal("1"))
+
+        assert outcome == ReservationOutcome.NOT_LOADED
+
+    @pytest.mark.asyncio
+    async def test_get_balance_miss(self, cache, mock_redis):
+        """get_balance returns None when org is not cached."""
+        mock_redis.hmget.return_value = [None, None]
+
+        assert await cache.get_balance(uuid4()) is None
+
+    @pytest.mark.asyncio
+    async def test_get_balance_hit(self, cache, mock_redis):
+        """get_balance builds CreditBalance from cached units."""
+        mock_redis.hmget.return_value = ["1000000000", "250000000"]
+
+        balance = await cache.get_balance(uuid4())
+
+        assert balance.balance_usd == Decimal("10")
+        assert balance.available_usd == Decimal("7.5")
+
+    @pytest.mark.asyncio
+    async def test_resync_without_seq_is_skipped(self, cache):
+        """resync does nothing when seq could not be read."""
+        assert await cache.resync(uuid4(), Decimal("1"), None) is False
+        cache._resync.assert_not_called()
+
+
+class TestBillingLedgerCreditCache:
+    """Tests for ledger hot-path behavior with a credit cache."""
+
+    @pytest.fixture
+    def mock_cache(self):
+        """Create mock credit cache."""
+        cache = Mock(spec=RedisCreditCache)
+        for name in (
+            "get_balance", "get_seq", "prime", "reserve", "release",
+            "release_prefix", "apply_charge", "resync", "pop_dirty", "mark_dirty",
+        ):
+            setattr(cache, name, AsyncMock())
+        return cache
+
+    @pytest.fixture
+    def mock_supabase(self):
+        """Create mock Supabase client."""
+        return Mock()
+
+    @pytest.fixture
+    def ledger(self, mock_supabase, mock_cache):
+        """Create billing ledger with mocks."""
+        return BillingLedger(mock_supabase, credit_cache=mock_cache)
+
+    @pytest.mark.asyncio
+    async def test_check_balance_uses_cache(self, ledger, mock_supabase, mock_cache):
+        """Cached balance avoids the database entirely."""
+        org_id = uuid4()
+        mock_cache.get_balance.return_value = CreditBalance(
+            org_id=org_id,
+            balance_usd=Decimal("100"),
+            reserved_usd=Decimal("0"),
+        )
+
+        has_sufficient, _ = await ledger.check_sufficient_balance(org_id, Decimal("5"))
+
+        assert has_sufficient is True
+        mock_supabase.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_check_balance_primes_on_miss(self, ledger, mock_supabase, mock_cache):
+        """A cache miss loads the ledger balance into Redis."""
+        org_id = uuid4()
+        cached = CreditBalance(org_id=org_id, balance_usd=Decimal("20"), reserved_usd=Decimal("0"))
+        mock_cache.get_balance.side_effect = [None, cached]
+        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = Mock(
+            data={"org_id": str(org_id), "balance_usd": "20", "reserved_usd": "0"}
+        )
+
+        _, balance = await ledger.check_sufficient_balance(org_id, Decimal("5"))
+
+        assert balance is cached
+        mock_cache.prime.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_check_balance_falls_back_on_redis_error(self, ledger, mock_supabase, mock_cache):
+        """Redis failures fall back to the database."""
+        org_id = uuid4()
+        mock_cache.get_balance.side_effect = ConnectionError("redis down")
+        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = Mock(
+            data={"org_id": str(org_id), "balance_usd": "3", "reserved_usd": "0"}
+        )
+
+        has_sufficient, balance = await ledger.check_sufficient_balance(org_id, Decimal("5"))
+
+        assert has_sufficient is False
+        assert balance.balance_usd == Decimal("3")
+
+    @pytest.mark.asyncio
+    async def test_reserve_credits_retries_after_prime(self, ledger, mock_supabase, mock_cache):
+        """reserve_credits primes and retries when state was lost."""
+        org_id = uuid4()
+        mock_cache.reserve.side_effect = [
+            (ReservationOutcome.NOT_LOADED, Decimal("0")),
+            (ReservationOutcome.RESERVED, Decimal("9")),
+        ]
+        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = Mock(
+            data={"org_id": str(org_id), "balance_usd": "10", "reserved_usd": "0"}
+        )
+
+        reserved = await ledger.reserve_credits(org_id, Decimal("1"), uuid4(), reservation_id="r1")
+
+        assert reserved is True
+        assert mock_cache.reserve.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_settle_writes_reserved_and_resyncs(self, ledger, mock_supabase, mock_cache):
+        """Settlement writes reserved totals and re-syncs balances."""
+        org_id = uuid4()
+        mock_cache.pop_dirty.return_value = [org_id]
+        mock_cache.get_seq.return_value = "4"
+        mock_cache.get_balance.return_value = CreditBalance(
+            org_id=org_id, balance_usd=Decimal("10"), reserved_usd=Decimal("2")
+        )
+        mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = Mock(
+            data=[{"org_id": str(org_id), "balance_usd": "12", "reserved_usd": "2"}]
+        )
+
+        settled = await ledger.settle_credit_cache()
+
+        assert settled == 1
+        mock_supabase.table.return_value.update.assert_called_with({"reserved_usd": "2"})
+        mock_cache.resync.assert_awaited_once_with(org_id, Decimal("12"), "4")
+
+    @pytest.mark.asyncio
+    async def test_settle_requeues_on_failure(self, ledger, mock_supabase, mock_cache):
+        """Failed settlements are re-queued."""
+        org_id = uuid4()
+        mock_cache.pop_dirty.return_value = [org_id]
+        mock_cache.get_balance.return_value = CreditBalance(
+            org_id=org_id, balance_usd=Decimal("10"), reserved_usd=Decimal("2")
+        )
+        mock_supabase.table.return_value.update.return_value.eq.return_value.execute.side_effect = Exception("DB error")
+
+        assert await ledger.settle_credit_cache() == 0
+        mock_cache.mark_dirty.assert_awaited_once_with(org_id)
+
+
+class TestBillingServiceCreditCache:
+    """Tests for BillingService hot path with Redis reservations."""
+
+    @pytest.fixture
+    def billing_service(self):
+        """Create billing service with a mock Redis client."""
+        redis = Mock()
+        redis.register_script.side_effect = lambda _: AsyncMock()
+        service = BillingService(Mock(), redis_client=redis)
+        service.ledger.reserve_credits = AsyncMock()
+        service.ledger.check_sufficient_balance = AsyncMock()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_check_budget_reserves(self, billing_service):
+        """check_budget holds the estimate in Redis."""
+        org_id = uuid4()
+        billing_service.ledger.reserve_credits.return_value = True
+        billing_service.ledger.check_sufficient_balance.return_value = (
+            False,
+            CreditBalance(org_id=org_id, balance_usd=Decimal("1"), reserved_usd=Decimal("1")),
+        )
+
+        has_budget, _ = await billing_service.check_budget(
+            org_id, Decimal("1"), reservation_id="call:1"
+        )
+
+        assert has_budget is True
+        billing_service.ledger.reserve_credits.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_check_budget_insufficient(self, billing_service):
+        """Failed holds with insufficient balance raise."""
+        org_id = uuid4()
+        billing_service.ledger.reserve_credits.return_value = False
+        billing_service.ledger.check_sufficient_balance.return_value = (
+            False,
+            CreditBalance(org_id=org_id, balance_usd=Decimal("0.5"), reserved_usd=Decimal("0")),
+        )
+
+        with pytest.raises(InsufficientCreditsError):
+            await billing_service.check_budget(
+                org_id, Decimal("1"), reservation_id="call:1"
+            )
+
+    @pytest.mark.asyncio
+    async def test_bill_token_call_replay_skips_cached_charge(self, billing_service):
+        """An idempotent replay releases its hold without charging the cache again."""
+        org_id = uuid4()
+        billing_service.ledger.record_token_call = AsyncMock(
+            return_value=BillingResult(
+                success=True, cost_usd=Decimal("0.01"), is_idempotent_replay=True
+            )
+        )
+        billing_service.ledger.apply_cached_charge = AsyncMock()
+        billing_service.ledger.release_reserved_credits = AsyncMock()
+
+        result = await billing_service.bill_token_call(
+            org_id=org_id,
+            input_tokens=100,
+            output_tokens=50,
+            model="gpt-4o",
+            idempotency_key="call:1",
+            reservation_id="call:1",
+        )
+
+        assert result.success is True
+        billing_service.ledger.apply_cached_charge.assert_not_awaited()
+        billing_service.ledger.release_reserved_credits.assert_awaited_once_with(
+            org_id, Decimal("0"), None, reservation_id="call:1"
+        )
+
+    @pytest.mark.asyncio
+    async def test_bill_token_call_mirrors_first_charge(self, billing_service):
+        """A fresh charge is mirrored into the cache against its hold."""
+        org_id = uuid4()
+        billing_service.ledger.record_token_call = AsyncMock(
+            return_value=BillingResult(success=True, cost_usd=Decimal("0.01"))
+        )
+        billing_service.ledger.apply_cached_charge = AsyncMock()
+
+        await billing_service.bill_token_call(
+            org_id=org_id,
+            input_tokens=100,
+            output_tokens=50,
+            model="gpt-4o",
+            reservation_id="call:1",
+        )
+
+        billing_service.ledger.apply_cached_charge.assert_awaited_once_with(
+            org_id, Decimal("0.01"), "call:1"
+        )
+
+
+class TestCreditCacheHoldExpiry:
+    """Runs the Lua scripts against fakeredis to check hold deadlines."""
+
+    @pytest.fixture
+    def cache(self):
+        """Create a credit cache on an in-memory Redis with Lua support."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        return RedisCreditCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+    @pytest.fixture
+    async def org_id(self, cache):
+        """Org primed with a $10 balance."""
+        org_id = uuid4()
+        await cache.prime(
+            CreditBalance(org_id=org_id, balance_usd=Decimal("10"), reserved_usd=Decimal("0"))
+        )
+        return org_id
+
+    @pytest.mark.asyncio
+    async def test_expired_hold_is_dropped(self, cache, org_id):
+        """A hold past its deadline no longer blocks new reservations."""
+        await cache.reserve(org_id, "leaked", Decimal("6"), ttl_seconds=0)
+
+        outcome, available = await cache.reserve(org_id, "next", Decimal("8"))
+
+        assert outcome == ReservationOutcome.RESERVED
+        assert available == Decimal("2")
+        balance = await cache.get_balance(org_id)
+        assert balance.reserved_usd == Decimal("8")
+        assert await cache.redis.hexists(cache._keys(org_id)[1], "leaked") == 0
+
+    @pytest.mark.asyncio
+    async def test_live_hold_is_kept(self, cache, org_id):
+        """Holds within their deadline still count against the balance."""
+        await cache.reserve(org_id, "live", Decimal("6"))
+
+        outcome, available = await cache.reserve(org_id, "next", Decimal("8"))
+
+        assert outcome == ReservationOutcome.INSUFFICIENT
+        assert available == Decimal("4")
+
+    @pytest.mark.asyncio
+    async def test_busy_org_does_not_keep_leaked_holds(self, cache, org_id):
+        """Later reservations refresh key expiry but not an old hold's deadline."""
+        await cache.reserve(org_id, "leaked", Decimal("6"), ttl_seconds=0)
+        await cache.reserve(org_id, "a", Decimal("1"))
+        await cache.release(org_id, "a")
+
+        balance = await cache.get_balance(org_id)
+        assert balance.reserved_usd == Decimal("0")
+
+    @pytest.mark.asyncio
+    async def test_release_and_charge_read_hold_amounts(self, cache, org_id):
+        """release and apply_charge free the amount stored with the deadline."""
+        await cache.reserve(org_id, "run:1", Decimal("2"))
+        await cache.reserve(org_id, "run:2", Decimal("3"))
+
+        assert await cache.release(org_id, "run:1") == Decimal("2")
+        await cache.apply_charge(org_id, Decimal("1"), "run:2")
+
+        balance = await cache.get_balance(org_id)
+        assert balance.balance_usd == Decimal("9")
+        assert balance.reserved_usd == Decimal("0")
@@ -337,3 +337,100 @@ class TestBillingLedgerReconciliation:
         assert reconciliation is not None
         assert reconciliation.run_id == run_id
         assert reconciliation.status.value == "RECONCILED"
+
+
+class TestBillingLedgerUsageSummary:
+    """Tests for rollup-backed usage summaries."""
+
+    @pytest.fixture
+    def mock_supabase(self):
+        """Create mock Supabase client with chainable queries per table."""
+        mock = Mock()
+        queries = {}
+
+        def table(name):
+            if name not in queries:
+                query = Mock()
+                for method in ("select", "eq", "gte", "lt"):
+                    getattr(query, method).return_value = query
+                queries[name] = query
+            return queries[name]
+
+        mock.table.side_effect = table
+        mock.queries = queries
+        return mock
+
+    @pytest.fixture
+    def ledger(self, mock_supabase):
+        """Create billing ledger with mock."""
+        return BillingLedger(mock_supabase)
+
+    @pytest.mark.asyncio
+    async def test_summary_reads_rollups(self, ledger, mock_supabase):
+        """Unbounded summary aggregates daily rollup rows."""
+        mock_supabase.table("token_usage_rollups").execute.return_value = Mock(
+            data=[
+                {"model": "gpt-4o", "input_tokens": 1000, "output_tokens": 500, "cost_usd": "0.0075", "call_count": 10},
+                {"model": "gpt-4o", "input_tokens": 2000, "output_tokens": 100, "cost_usd": "0.006", "call_count": 5},
+                {"model": "gpt-4o-mini", "input_tokens": 300, "output_tokens": 30, "cost_usd": "0.0001", "call_count": 3},
+            ]
+        )
+
+        summary = await ledger.get_org_usage_summary(uuid4())
+
+        assert summary["total_input_tokens"] == 3300
+        assert summary["total_output_tokens"] == 630
+        assert summary["total_tokens"] == 3930
+        assert summary["total_cost_usd"] == Decimal("0.0136")
+        assert summary["call_count"] == 18
+        assert summary["by_model"]["gpt-4o"]["call_count"] == 15
+        mock_supabase.queries["token_usage_rollups"].eq.assert_any_call("granularity", "day")
+        assert "token_records" not in mock_supabase.queries
+
+    @pytest.mark.asyncio
+    async def test_summary_counts_raw_edge_records(self, ledger, mock_supabase):
+        """Partial-hour edges are read from token_records, one call per row."""
+        mock_supabase.table("token_usage_rollups").execute.return_value = Mock(data=[])
+        mock_supabase.table("token_records").execute.return_value = Mock(
+            data=[
+                {"model": "gpt-4o", "input_tokens": 10, "output_tokens": 5, "cost_usd": "0.0001"},
+            ]
+        )
+
+        summary = await ledger.get_org_usage_summary(
+            uuid4(),
+            start_date=datetime(2026, 1, 1, 10, 30),
+            end_date=datetime(2026, 1, 3, 14, 15),
+        )
+
+        # Two raw edges, each returning the single mocked record
+        assert summary["call_count"] == 2
+        assert summary["total_tokens"] == 30
+        mock_supabase.queries["token_records"].eq.assert_any_call("is_estimated", False)
+
+    @pytest.mark.asyncio
+    async def test_summary_error_returns_empty(self, ledger, mock_supabase):
+        """Query failures return an empty summary."""
+        mock_supabase.table("token_usage_rollups").execute.side_effect = Exception("DB error")
+
+        summary = await ledger.get_org_usage_summary(uuid4())
+
+        assert summary["call_count"] == 0
+        assert summary["by_model"] == {}
+
+    @pytest.mark.asyncio
+    async def test_rebuild_usage_rollups(self, ledger, mock_supabase):
+        """rebuild_usage_rollups calls the rebuild function."""
+        org_id = uuid4()
+        mock_supabase.rpc.return_value.execute.return_value = Mock(data=42)
+
+        rows = await ledger.rebuild_usage_rollups(
+            org_id=org_id,
+            start_date=datetime(2026, 1, 1),
+        )
+
+        assert rows == 42
+        name, params = mock_supabase.rpc.call_args[0]
+        assert name == "rebuild_token_usage_rollups"
+        assert params["p_org_id"] == str(org_id)
+        assert params["p_end"] is None
@@ -0,0 +1,167 @@
+"""Tests for pricing snapshot and TokenCounter pricing lookups."""
+
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import Mock
+
+from app.billing.pricing import PricingSnapshot
+from app.billing.token_counter import TokenCounter, FALLBACK_PRICING
+from app.billing.types import ModelPricing, Provider, PricingNotFoundError
+
+
+def _pricing(input_price: str, effective_from: datetime, effective_until=None) -> ModelPricing:
+    return ModelPricing(
+        model="gpt-4o",
+        provider=Provider.OPENAI,
+        input_price_per_million=Decimal(input_price),
+        output_price_per_million=Decimal("10.00"),
+        effective_from=effective_from,
+        effective_until=effective_until,
+    )
+
+
+class TestPricingSnapshot:
+    """Tests for PricingSnapshot."""
+
+    @pytest.fixture
+    def snapshot(self):
+        """Snapshot with a price change on 2025-01-01."""
+        return PricingSnapshot.build(
+            [
+                _pricing("5.00", datetime(2024, 1, 1), "2025-01-01T00:00:00+00:00"),
+                _pricing("2.50", datetime(2025, 1, 1, tzinfo=timezone.utc)),
+            ],
+            version=3,
+        )
+
+    def test_current_lookup(self, snapshot):
+        """Lookup without a time returns the active row."""
+        pricing = snapshot.lookup("gpt-4o", "openai")
+        assert pricing.input_price_per_million == Decimal("2.50")
+
+    def test_time_travel_lookup(self, snapshot):
+        """Lookup at a past time returns the row effective then."""
+        pricing = snapshot.lookup("gpt-4o", "openai", at=datetime(2024, 6, 1))
+        assert pricing.input_price_per_million == Decimal("5.00")
+
+    def test_before_first_effective(self, snapshot):
+        """Lookup before any row is effective returns None."""
+        assert snapshot.lookup("gpt-4o", "openai", at=datetime(2023, 1, 1)) is None
+
+    def test_expired_row(self):
+        """Rows past effective_until are not returned."""
+        snapshot = PricingSnapshot.build(
+            [_pricing("5.00", datetime(2024, 1, 1), datetime(2024, 2, 1))],
+            version=1,
+        )
+        assert snapshot.lookup("gpt-4o", "openai", at=datetime(2024, 3, 1)) is None
+
+    def test_unknown_model(self, snapshot):
+        """Unknown models return None."""
+        assert snapshot.lookup("unknown", "openai") is None
+        assert len(snapshot) == 1
+        assert snapshot.version == 3
+
+
+class TestTokenCounterPricing:
+    """Tests for snapshot-backed TokenCounter.get_pricing."""
+
+    @pytest.fixture
+    def mock_supabase(self):
+        """Supabase mock returning two pricing rows."""
+        mock = Mock()
+        mock.table.return_value.select.return_value.execute.return_value = Mock(
+            data=[
+                {
+                    "model": "gpt-4o",
+                    "provider": "openai",
+                    "input_price_per_million": "2.50",
+                    "output_price_per_million": "10.00",
+                    "effective_from": "2024-05-13T00:00:00+00:00",
+                },
+                {
+                    "model": "custom-model",
+                    "provider": "local",
+                    "input_price_per_million": "0.10",
+                    "output_price_per_million": "0.20",
+                    "effective_from": "2024-01-01T00:00:00+00:00",
+                },
+            ]
+        )
+        return mock
+
+    @pytest.mark.asyncio
+    async def test_lazy_load_then_no_network(self, mock_supabase):
+        """First lookup loads the snapshot; later lookups stay in memory."""
+        counter = TokenCounter(mock_supabase)
+
+        pricing = await counter.get_pricing("custom-model", Provider.LOCAL)
+        await counter.get_pricing("gpt-4o", Provider.OPENAI)
+        await counter.get_pricing("custom-model", Provider.LOCAL)
+
+        assert pricing.input_price_per_million == Decimal("0.10")
+        assert mock_supabase.table.call_count == 1
+        assert counter.pricing_snapshot.version == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_lookups_load_once(self, mock_supabase):
+        """Callers racing on an empty snapshot share a single load."""
+        counter = TokenCounter(mock_supabase)
+
+        async with counter._snapshot_lock:
+            lookups = [
+                asyncio.create_task(counter.get_pricing("gpt-4o", Provider.OPENAI))
+                for _ in range(10)
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*lookups)
+
+        assert mock_supabase.table.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_swaps_version(self, mock_supabase):
+        """Refreshing installs a new snapshot version."""
+        counter = TokenCounter(mock_supabase)
+
+        await counter.load_pricing_snapshot()
+        first = counter.pricing_snapshot
+        await counter.refresh_pricing_cache()
+
+        assert counter.pricing_snapshot is not first
+        assert counter.pricing_snapshot.version == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_snapshot(self, mock_supabase):
+        """A failed refresh keeps serving the previous snapshot."""
+        counter = TokenCounter(mock_supabase)
+        await counter.load_pricing_snapshot()
+        first = counter.pricing_snapshot
+
+        mock_supabase.table.return_value.select.return_value.execute.side_effect = Exception("DB down")
+        await counter.load_pricing_snapshot()
+
+        assert counter.pricing_snapshot is first
+
+    @pytest.mark.asyncio
+    async def test_failed_initial_load_uses_defaults(self):
+        """Initial load failure installs default pricing."""
+        mock_supabase = Mock()
+        mock_supabase.table.return_value.select.return_value.execute.side_effect = Exception("DB down")
+        counter = TokenCounter(mock_supabase)
+
+        pricing = await counter.get_pricing("gpt-4o-mini", Provider.OPENAI)
+        unknown = await counter.get_pricing("mystery", Provider.OPENAI)
+
+        assert pricing.input_price_per_million == Decimal("0.15")
+        assert unknown is FALLBACK_PRICING
+        assert counter.pricing_snapshot.version == 0
+
+    @pytest.mark.asyncio
+    async def test_not_found_without_fallback(self, mock_supabase):
+        """Unknown model raises when fallback is disabled."""
+        counter = TokenCounter(mock_supabase)
+
+        with pytest.raises(PricingNotFoundError):
+            await counter.get_pricing("mystery", Provider.OPENAI, use_fallback=False)
@@ -0,0 +1,99 @@
+"""Tests for usage rollup range planning."""
+
+from datetime import datetime, timezone
+
+from app.billing.rollups import UsageRange, plan_usage_ranges
+from app.billing.types import RollupGranularity
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestPlanUsageRanges:
+    """Tests for plan_usage_ranges."""
+
+    def test_unbounded_reads_daily_rollups(self):
+        """No period reads every daily bucket."""
+        assert plan_usage_ranges() == [
+            UsageRange(start=None, end=None, granularity=RollupGranularity.DAY),
+        ]
+
+    def test_multi_day_period_uses_all_granularities(self):
+        """Unaligned multi-day period splits into raw/hour/day/hour/raw."""
+        ranges = plan_usage_ranges(
+            datetime(2026, 1, 1, 10, 30),
+            datetime(2026, 1, 5, 14, 15),
+        )
+
+        assert [r.granularity for r in ranges] == [
+            None,
+            RollupGranularity.HOUR,
+            RollupGranularity.DAY,
+            RollupGranularity.HOUR,
+            None,
+        ]
+        assert ranges[0].start == _utc(2026, 1, 1, 10, 30)
+        assert ranges[1].start == _utc(2026, 1, 1, 11)
+        assert ranges[2].start == _utc(2026, 1, 2)
+        assert ranges[2].end == _utc(2026, 1, 5)
+        assert ranges[4].start == _utc(2026, 1, 5, 14)
+
+    def test_ranges_are_contiguous(self):
+        """Ranges cover the period without gaps or overlap."""
+        ranges = plan_usage_ranges(
+            datetime(2026, 3, 1, 0, 0, 1),
+            datetime(2026, 3, 9, 23, 59, 59),
+        )
+
+        for previous, current in zip(ranges, ranges[1:]):
+            assert previous.end == current.start
+
+    def test_aligned_period_has_no_raw_edges(self):
+        """Day-aligned start only reads rollups plus the inclusive end instant."""
+        ranges = plan_usage_ranges(_utc(2026, 2, 1), _utc(2026, 3, 1))
+
+        assert ranges[0] == UsageRange(
+            start=_utc(2026, 2, 1),
+            end=_utc(2026, 3, 1),
+            granularity=RollupGranularity.DAY,
+        )
+        # Inclusive end leaves only a one-microsecond raw tail
+        assert ranges[-1].granularity is None
+        assert ranges[-1].start == _utc(2026, 3, 1)
+
+    def test_same_day_period_uses_hourly_rollups(self):
+        """Period within a single day never reads daily buckets."""
+        ranges = plan_usage_ranges(
+            datetime(2026, 1, 1, 9, 15),
+            datetime(2026, 1, 1, 17, 45),
+        )
+
+        assert [r.granularity for r in ranges] == [None, RollupGranularity.HOUR, None]
+
+    def test_sub_hour_period_reads_raw_records(self):
+        """Period inside one hour reads raw records only."""
+        ranges = plan_usage_ranges(
+            datetime(2026, 1, 1, 9, 15),
+            datetime(2026, 1, 1, 9, 45),
+        )
+
+        assert len(ranges) == 1
+        assert ranges[0].granularity is None
+
+    def test_open_start(self):
+        """Missing start reads daily buckets up to the end day."""
+        ranges = plan_usage_ranges(end_date=datetime(2026, 1, 5, 14, 15))
+
+        assert ranges[0] == UsageRange(
+            start=None,
+            end=_utc(2026, 1, 5),
+            granularity=RollupGranularity.DAY,
+        )
+
+    def test_empty_period(self):
+        """End before start yields no ranges."""
+        assert plan_usage_ranges(
+            datetime(2026, 1, 5),
+            datetime(2026, 1, 1),
+        ) == []
@@ -0,0 +1 @@
+"""Tests for k8s module."""
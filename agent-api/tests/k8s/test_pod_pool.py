@@ -0,0 +1,257 @@
+"""Tests for the pre-warmed executor pod pool."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.k8s.executor import K8sExecutor
+from app.k8s.pod_pool import CLEANUP_COMMAND, ExecutorPodPool, tenant_label
+from app.sandbox.resource_limits import get_tier_limits
+
+
+def _running(*args, **kwargs):
+    return SimpleNamespace(status=SimpleNamespace(phase="Running"), metadata=SimpleNamespace(uid="uid-1"))
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutorPodPool(
+        core_client=Mock(), namespace="agents", max_uses=3, max_pods_per_tenant=2, startup_timeout=1
+    )
+    pool.core_client.list_namespaced_pod.return_value = SimpleNamespace(items=[])
+    pool.exec_calls = []
+
+    def fake_exec(pod_name, command, deadline_seconds, on_chunk=None):
+        pool.exec_calls.append((pod_name, command))
+        if on_chunk:
+            on_chunk("ok")
+        return {"stdout": "ok", "stderr": "", "exit_code": 0}
+
+    with patch("app.k8s.pod_pool.wait_for_pod", side_effect=_running), \
+            patch.object(pool, "_exec_blocking", side_effect=fake_exec):
+        yield pool
+
+
+async def _settle(pool):
+    # Let fire-and-forget pod deletions and the reaper run, then stop them
+    await asyncio.sleep(0)
+    await pool.close()
+
+
+class TestExecutorPodPool:
+    """Tests for ExecutorPodPool."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_pod_for_same_tenant(self, pool):
+        first = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(first)
+        second = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(second)
+
+        assert first is second
+        assert pool.core_client.create_namespaced_pod.call_count == 1
+        assert pool.metrics["reused"] == 1
+        # Wiped between uses
+        assert pool.exec_calls[-1][1][-1] == CLEANUP_COMMAND
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_tenants_never_share_pods(self, pool):
+        first = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(first)
+        other = await pool.acquire("user-2", "standard", "alpine:latest")
+
+        assert other is not first
+        assert other.key[0] == tenant_label("user-2")
+        await pool.release(other)
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_recycles_after_max_uses(self, pool):
+        names = set()
+        for _ in range(4):
+            async with pool.lease("user-1", "standard", "alpine:latest") as pod:
+                names.add(pod.name)
+
+        assert len(names) == 2
+        assert pool.metrics["recycled"] == 1
+        await _settle(pool)
+        assert pool.core_client.delete_namespaced_pod.called
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_pod_is_recycled(self, pool):
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(pod, healthy=False)
+
+        assert pod.name not in pool.pods
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_tenant_cap_waits_for_release(self, pool):
+        a = await pool.acquire("user-1", "standard", "alpine:latest")
+        b = await pool.acquire("user-1", "standard", "python:3.11-slim")
+
+        waiter = asyncio.create_task(pool.acquire("user-1", "standard", "alpine:latest"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await pool.release(a)
+        c = await asyncio.wait_for(waiter, 1)
+        assert c is a
+        await pool.release(b)
+        await pool.release(c)
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_tenant_cap_evicts_idle_pod_of_other_image(self, pool):
+        a = await pool.acquire("user-1", "standard", "alpine:latest")
+        b = await pool.acquire("user-1", "standard", "python:3.11-slim")
+        await pool.release(a)
+
+        c = await pool.acquire("user-1", "standard", "node:20-slim")
+        assert a.name not in pool.pods
+        assert len(pool._tenant_pods(tenant_label("user-1"))) == 2
+        await pool.release(b)
+        await pool.release(c)
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_reaps_idle_pods(self, pool):
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(pod)
+        pod.last_used -= pool.max_idle_seconds + 1
+
+        assert await pool.reap_idle() == 1
+        assert not pool.pods
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_expired_pod_is_recycled(self, pool):
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+        pod.created_at -= pool.max_lifetime_seconds / 2 + 1
+        await pool.release(pod)
+
+        assert pod.name not in pool.pods
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_deletes_orphans_of_earlier_process_on_startup(self, pool):
+        orphan = SimpleNamespace(metadata=SimpleNamespace(name="agent-exec-old"))
+        pool.core_client.list_namespaced_pod.return_value = SimpleNamespace(items=[orphan])
+
+        assert await pool.reap_orphans() == 1
+
+        selector = pool.core_client.list_namespaced_pod.call_args.kwargs["label_selector"]
+        assert f"worker={pool.worker}" in selector
+        assert f"pool-instance!={pool.instance_id}" in selector
+        pool.core_client.delete_namespaced_pod.assert_called_once_with(
+            name="agent-exec-old", namespace="agents", grace_period_seconds=0
+        )
+        assert pool.metrics["orphans"] == 1
+
+    @pytest.mark.asyncio
+    async def test_first_acquire_starts_orphan_cleanup(self, pool):
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+        await asyncio.sleep(0.01)
+
+        pool.core_client.list_namespaced_pod.assert_called_once()
+        await pool.release(pod)
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_pods_are_registered_with_sampler(self, pool):
+        pool.sampler = Mock()
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+
+        pool.sampler.register_pod.assert_called_once_with(pod.name, "standard", "uid-1")
+
+        await pool.release(pod, healthy=False)
+        pool.sampler.unregister.assert_called_once_with(pod.name)
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_pod_is_deleted_when_startup_watch_fails(self, pool):
+        with patch("app.k8s.pod_pool.wait_for_pod", side_effect=RuntimeError("watch closed")):
+            with pytest.raises(RuntimeError):
+                await pool.acquire("user-1", "standard", "alpine:latest")
+
+        pool.core_client.delete_namespaced_pod.assert_called_once()
+        assert pool.pods == {}
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_deletions_are_tracked_until_done(self, pool):
+        pod = await pool.acquire("user-1", "standard", "alpine:latest")
+        await pool.release(pod, healthy=False)
+
+        assert len(pool._deletions) == 1
+        await asyncio.gather(*pool._deletions)
+        assert pool._deletions == set()
+        pool.core_client.delete_namespaced_pod.assert_called_once()
+        await _settle(pool)
+
+    def test_exec_streams_stdout_chunks(self, pool):
+        response = Mock()
+        response.is_open.side_effect = [True, True, False, False]
+        response.peek_stdout.return_value = True
+        response.read_stdout.side_effect = ["first ", "second"]
+        response.peek_stderr.return_value = False
+        response.returncode = 0
+        chunks = []
+
+        with patch("app.k8s.pod_pool.client"), \
+                patch("app.k8s.pod_pool.stream", return_value=response):
+            result = ExecutorPodPool._exec_blocking(pool, "pod-1", ["true"], 5, chunks.append)
+
+        assert chunks == ["first ", "second"]
+        assert result["stdout"] == "first second"
+        assert result["exit_code"] == 0
+
+    def test_manifest_uses_tier_limits(self, pool):
+        key = (tenant_label("user-1"), "premium", "alpine:latest")
+        manifest = pool.pod_manifest("agent-exec-1", key)
+        container = manifest["spec"]["containers"][0]
+
+        assert container["resources"] == get_tier_limits("premium").to_kubernetes_pod_spec()
+        assert manifest["metadata"]["labels"]["tenant"] == key[0]
+        assert manifest["metadata"]["labels"]["pool-instance"] == pool.instance_id
+        assert manifest["spec"]["activeDeadlineSeconds"] == pool.max_lifetime_seconds
+        assert manifest["spec"]["automountServiceAccountToken"] is False
+        assert container["securityContext"]["allowPrivilegeEscalation"] is False
+
+
+class TestExecutorUsesPool:
+    """Tests for K8sExecutor running steps in pooled pods."""
+
+    @pytest.mark.asyncio
+    async def test_shell_runs_over_exec(self, pool):
+        with patch("app.k8s.executor.get_k8s_clients", return_value=(Mock(), Mock())), \
+                patch("app.k8s.executor.S3Workspace"):
+            executor = K8sExecutor("run-1", "user-1", "step-1", pod_pool=pool)
+        output = []
+
+        result = await executor.execute_shell("echo ok", timeout=10, on_output=output.append)
+
+        assert result == {"stdout": "ok", "stderr": "", "exit_code": 0}
+        assert output == ["ok"]
+        assert pool.exec_calls[0][1][-3:] == ["/bin/sh", "-c", "echo ok"]
+        executor.batch_client.create_namespaced_job.assert_not_called()
+        await _settle(pool)
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_job_when_pool_unavailable(self, pool):
+        with patch("app.k8s.executor.get_k8s_clients", return_value=(Mock(), Mock())), \
+                patch("app.k8s.executor.S3Workspace"):
+            executor = K8sExecutor("run-1", "user-1", "step-1", pod_pool=pool)
+        pool.core_client.create_namespaced_pod.side_effect = RuntimeError("quota exceeded")
+
+        with patch.object(executor, "_wait_for_job_pod", return_value="pod-1"), \
+                patch.object(executor, "_wait_for_pod_completion", return_value=(0, "done", "")), \
+                patch.object(executor, "_cleanup_job"):
+            result = await executor.execute_shell("echo ok", timeout=10)
+
+        assert result["stdout"] == "done"
+        executor.batch_client.create_namespaced_job.assert_called_once()
+        await _settle(pool)
@@ -0,0 +1,173 @@
+"""Tests for watch-based pod waiting and log streaming."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from app.k8s.executor import K8sExecutor
+from app.k8s.watch import follow_pod_logs, pod_exit_code, pod_finished, wait_for_pod
+
+
+def _pod(name="pod-1", phase="Pending", version="1", exit_code=None):
+    terminated = SimpleNamespace(exit_code=exit_code) if exit_code is not None else None
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, resource_version=version),
+        status=SimpleNamespace(
+            phase=phase,
+            container_statuses=[SimpleNamespace(state=SimpleNamespace(terminated=terminated))],
+        ),
+    )
+
+
+def _listing(pods, version="10"):
+    return SimpleNamespace(items=pods, metadata=SimpleNamespace(resource_version=version))
+
+
+class FakeWatch:
+    """Replays scripted watch streams, one per stream() call."""
+
+    streams = []
+    calls = []
+
+    def stream(self, func, **kwargs):
+        FakeWatch.calls.append(kwargs)
+        events = FakeWatch.streams.pop(0)
+        if isinstance(events, Exception):
+            raise events
+        for event in events:
+            yield event
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_watch():
+    FakeWatch.streams = []
+    FakeWatch.calls = []
+    with patch("app.k8s.watch.watch.Watch", FakeWatch):
+        yield FakeWatch
+
+
+class TestWaitForPod:
+    """Tests for wait_for_pod."""
+
+    def test_returns_from_initial_list_without_watching(self, fake_watch):
+        core = Mock()
+        core.list_namespaced_pod.return_value = _listing([_pod(phase="Succeeded")])
+
+        pod = wait_for_pod(core, "agents", pod_finished, 30, field_selector="metadata.name=pod-1")
+
+        assert pod.status.phase == "Succeeded"
+        assert fake_watch.calls == []
+
+    def test_watches_from_list_resource_version(self, fake_watch):
+        core = Mock()
+        core.list_namespaced_pod.return_value = _listing([_pod()], version="10")
+        fake_watch.streams = [[
+            {"type": "MODIFIED", "object": _pod(phase="Running", version="11")},
+            {"type": "MODIFIED", "object": _pod(phase="Succeeded", version="12")},
+        ]]
+
+        pod = wait_for_pod(core, "agents", pod_finished, 30)
+
+        assert pod.metadata.resource_version == "12"
+        assert fake_watch.calls[0]["resource_version"] == "10"
+
+    def test_resumes_after_stream_ends(self, fake_watch):
+        core = Mock()
+        core.list_namespaced_pod.return_value = _listing([], version="10")
+        fake_watch.streams = [
+            [{"type": "ADDED", "object": _pod(version="11")}],
+            [{"type": "MODIFIED", "object": _pod(phase="Failed", version="12")}],
+        ]
+
+        pod = wait_for_pod(core, "agents", pod_finished, 30)
+
+        assert pod.status.phase == "Failed"
+        assert fake_watch.calls[1]["resource_version"] == "11"
+        assert core.list_namespaced_pod.call_count == 1
+
+    def test_relists_on_gone(self, fake_watch):
+        core = Mock()
+        core.list_namespaced_pod.side_effect = [
+            _listing([], version="10"),
+            _listing([_pod(phase="Succeeded")], version="20"),
+        ]
+        fake_watch.streams = [ApiException(status=410)]
+
+        pod = wait_for_pod(core, "agents", pod_finished, 30)
+
+        assert pod.status.phase == "Succeeded"
+        assert core.list_namespaced_pod.call_count == 2
+
+    def test_times_out(self, fake_watch):
+        core = Mock()
+        core.list_namespaced_pod.return_value = _listing([])
+        assert wait_for_pod(core, "agents", pod_finished, 0) is None
+
+
+class TestFollowPodLogs:
+    """Tests for follow_pod_logs."""
+
+    def test_streams_chunks_and_joins_split_characters(self):
+        data = "héllo\nwörld\n".encode("utf-8")
+        response = Mock()
+        response.stream.return_value = [data[:2], data[2:7], data[7:]]
+        core = Mock()
+        core.read_namespaced_pod_log.return_value = response
+        chunks = []
+
+        logs = follow_pod_logs(core, "agents", "pod-1", on_chunk=chunks.append)
+
+        assert logs == "héllo\nwörld\n"
+        assert "".join(chunks) == logs
+        assert core.read_namespaced_pod_log.call_args.kwargs["follow"] is True
+        response.release_conn.assert_called_once()
+
+
+class TestExecutorCompletion:
+    """Tests for K8sExecutor._wait_for_pod_completion."""
+
+    def _executor(self):
+        executor = K8sExecutor.__new__(K8sExecutor)
+        executor.core_client = Mock()
+        executor.namespace = "agents"
+        return executor
+
+    @pytest.mark.asyncio
+    async def test_streams_output_and_reports_exit_code(self):
+        executor = self._executor()
+        pods = [_pod(phase="Running"), _pod(phase="Failed", exit_code=3)]
+        output = []
+
+        def fake_follow(core, namespace, pod_name, on_chunk, timeout):
+            on_chunk("partial ")
+            on_chunk("output")
+            return "partial output"
+
+        with patch("app.k8s.executor.wait_for_pod", side_effect=lambda *a, **k: pods.pop(0)), \
+                patch("app.k8s.executor.follow_pod_logs", side_effect=fake_follow):
+            exit_code, stdout, stderr = await executor._wait_for_pod_completion(
+                "pod-1", 30, output.append
+            )
+            await asyncio.sleep(0)
+
+        assert (exit_code, stdout, stderr) == (3, "", "partial output")
+        assert output == ["partial ", "output"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises(self):
+        executor = self._executor()
+        with patch("app.k8s.executor.wait_for_pod", return_value=None):
+            with pytest.raises(TimeoutError):
+                await executor._wait_for_pod_completion("pod-1", 1)
+
+
+def test_exit_code_falls_back_to_phase():
+    assert pod_exit_code(_pod(phase="Succeeded")) == 0
+    assert pod_exit_code(_pod(phase="Failed")) == 1
+    assert pod_exit_code(_pod(phase="Failed", exit_code=137)) == 137
@@ -0,0 +1,38 @@
+"""Shared helpers for orchestrator tests."""
+
+from app.orchestrator.types import Subtask, SubtaskState
+
+
+def make_subtask(subtask_id, index, depends_on=(), state=SubtaskState.PENDING):
+    return Subtask.from_db_row({
+        "id": subtask_id,
+        "run_id": "run-1",
+        "subtask_index": index,
+        "idempotency_key": f"run-1:{index}",
+        "task_type": "research",
+        "state": state.value,
+        "depends_on": list(depends_on),
+    })
+
+
+async def apply_all(transitions, **kwargs):
+    """Batch transition stub under which every transition applies."""
+    return {t.subtask_id for t in transitions}
+
+
+def enqueued_ids(state_machine):
+    """Subtask IDs moved to QUEUED, in dispatch order."""
+    return [
+        t.subtask_id
+        for c in state_machine.transition_subtask_states.call_args_list
+        for t in c.args[0]
+    ]
+
+
+def diamond(**states):
+    """a -> (b, c) -> d"""
+    specs = [("a", 0, []), ("b", 1, ["a"]), ("c", 2, ["a"]), ("d", 3, ["b", "c"])]
+    return [
+        make_subtask(sid, idx, deps, states.get(sid, SubtaskState.PENDING))
+        for sid, idx, deps in specs
+    ]
@@ -0,0 +1,193 @@
+"""Tests for the in-memory subtask dependency graph."""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.orchestrator.dag import SubtaskDAG
+from app.orchestrator.orchestrator import Orchestrator
+from app.orchestrator.types import ConcurrencyError, ResearchRun, SubtaskState
+from tests.orchestrator.conftest import apply_all, diamond, enqueued_ids, make_subtask
+
+
+class TestSubtaskDAG:
+    """Tests for SubtaskDAG."""
+
+    def test_roots_are_ready(self):
+        """Only subtasks without dependencies start on the ready queue."""
+        dag = SubtaskDAG.from_subtasks("run-1", diamond())
+
+        assert [s.id for s in dag.drain_ready()] == ["a"]
+        assert dag.in_degree == {"a": 0, "b": 1, "c": 1, "d": 2}
+
+    def test_completion_unblocks_dependents(self):
+        """Completing a subtask readies dependents whose in-degree hits zero."""
+        dag = SubtaskDAG.from_subtasks("run-1", diamond())
+        dag.drain_ready()
+
+        assert dag.mark_completed("a") == ["b", "c"]
+        assert [s.id for s in dag.drain_ready()] == ["b", "c"]
+        assert dag.mark_completed("b") == []
+        assert dag.mark_completed("c") == ["d"]
+        assert [s.id for s in dag.drain_ready()] == ["d"]
+
+    def test_duplicate_completion_is_ignored(self):
+        """A completion seen twice does not decrement dependents twice."""
+        dag = SubtaskDAG.from_subtasks("run-1", diamond())
+
+        dag.mark_completed("a")
+        dag.mark_completed("b")
+        dag.mark_completed("b")
+
+        assert dag.in_degree["d"] == 1
+
+    def test_load_respects_existing_state(self):
+        """Completed dependencies are satisfied; dispatched subtasks are not re-queued."""
+        dag = SubtaskDAG.from_subtasks(
+            "run-1",
+            diamond(a=SubtaskState.COMPLETED, b=SubtaskState.RUNNING),
+        )
+
+        assert [s.id for s in dag.drain_ready()] == ["c"]
+        assert dag.in_degree["d"] == 2
+
+    def test_unknown_dependency_is_ignored(self):
+        """Dependencies outside the run do not block a subtask."""
+        dag = SubtaskDAG.from_subtasks("run-1", [make_subtask("x", 0, ["elsewhere"])])
+
+        assert dag.pop_ready().id == "x"
+        assert dag.pop_ready() is None
+
+    def test_requeue(self):
+        """A dispatched subtask can be put back for a retry."""
+        dag = SubtaskDAG.from_subtasks("run-1", diamond())
+        dag.drain_ready()
+
+        dag.requeue("a")
+
+        assert dag.pop_ready().id == "a"
+
+    def test_wide_graph_completion_is_out_degree_bound(self):
+        """Completing a leaf of a wide graph touches only its own edges."""
+        subtasks = [make_subtask("root", 0)]
+        subtasks += [make_subtask(f"t{i}", i + 1, ["root"]) for i in range(2000)]
+        subtasks.append(make_subtask("sink", 2001, [f"t{i}" for i in range(2000)]))
+        dag = SubtaskDAG.from_subtasks("run-1", subtasks)
+        dag.drain_ready()
+
+        assert len(dag.mark_completed("root")) == 2000
+        for i in range(1999):
+            assert dag.mark_completed(f"t{i}") == []
+        assert dag.mark_completed("t1999") == ["sink"]
+
+
+class TestOrchestratorScheduling:
+    """Tests for Orchestrator scheduling through the DAG."""
+
+    @pytest.fixture
+    def orchestrator(self):
+        with patch("app.orchestrator.orchestrator.JobQueue"):
+            orchestrator = Orchestrator(Mock(), Mock())
+        orchestrator.state_machine = Mock()
+        orchestrator.state_machine.transition_subtask_states = AsyncMock(side_effect=apply_all)
+        return orchestrator
+
+    @pytest.fixture
+    def run(self):
+        return ResearchRun.from_db_row({
+            "id": "run-1",
+            "user_id": "user-1",
+            "status": "executing",
+            "deadline_at": datetime.utcnow() + timedelta(hours=1),
+        })
+
+    def enqueued(self, orchestrator):
+        return enqueued_ids(orchestrator.state_machine)
+
+    @pytest.mark.asyncio
+    async def test_schedule_phase_enqueues_roots(self, orchestrator, run):
+        """The scheduling phase loads the graph once and enqueues its roots."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+
+        await orchestrator._phase_schedule(run)
+
+        assert self.enqueued(orchestrator) == ["a"]
+        assert "run-1" in orchestrator._dags
+
+    @pytest.mark.asyncio
+    async def test_monitor_applies_new_completions(self, orchestrator, run):
+        """Each pass only feeds newly finished subtasks into the graph."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+        await orchestrator._phase_schedule(run)
+
+        completed = [make_subtask("a", 0, state=SubtaskState.COMPLETED)]
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=completed)
+        await orchestrator._schedule_ready_subtasks(run)
+        await orchestrator._schedule_ready_subtasks(run)
+
+        assert self.enqueued(orchestrator) == ["a", "b", "c"]
+        assert orchestrator.state_machine.get_subtasks_by_run.call_args.kwargs["states"] == [
+            SubtaskState.COMPLETED, SubtaskState.FAILED, SubtaskState.SKIPPED, SubtaskState.CANCELLED,
+            SubtaskState.PENDING,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_monitor_redispatches_retried_subtask(self, orchestrator, run):
+        """A failed subtask put back to PENDING is enqueued again."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+        await orchestrator._phase_schedule(run)
+
+        failed = [make_subtask("a", 0, state=SubtaskState.FAILED)]
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=failed)
+        await orchestrator._schedule_ready_subtasks(run)
+        assert "a" in orchestrator._dags["run-1"].finished
+
+        retried = [make_subtask("a", 0, state=SubtaskState.PENDING)]
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=retried)
+        await orchestrator._schedule_ready_subtasks(run)
+
+        assert self.enqueued(orchestrator) == ["a", "a"]
+
+    @pytest.mark.asyncio
+    async def test_monitor_redispatches_unassigned_subtask(self, orchestrator, run):
+        """A dispatched subtask that is PENDING again in the database is enqueued again."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+        await orchestrator._phase_schedule(run)
+
+        pending = [make_subtask("a", 0, state=SubtaskState.PENDING)]
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=pending)
+        await orchestrator._schedule_ready_subtasks(run)
+
+        assert self.enqueued(orchestrator) == ["a", "a"]
+        assert orchestrator._dags["run-1"].dispatched == {"a"}
+
+    @pytest.mark.asyncio
+    async def test_monitor_rebuilds_missing_graph(self, orchestrator, run):
+        """A run scheduled elsewhere gets its graph loaded from the database."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(
+            return_value=diamond(a=SubtaskState.COMPLETED, b=SubtaskState.QUEUED)
+        )
+
+        await orchestrator._schedule_ready_subtasks(run)
+
+        assert self.enqueued(orchestrator) == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_failed_enqueue_returns_subtasks_to_ready(self, orchestrator, run):
+        """A failed QUEUED write leaves the roots ready for the retry."""
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+        orchestrator.state_machine.transition_subtask_states.side_effect = ConcurrencyError("timeout")
+
+        with pytest.raises(ConcurrencyError):
+            await orchestrator._phase_schedule(run)
+
+        dag = orchestrator._dags["run-1"]
+        assert dag.in_flight_count == 0
+        assert dag.ready_count == 1
+        orchestrator.job_queue.enqueue.assert_not_called()
+
+        orchestrator.state_machine.transition_subtask_states.side_effect = apply_all
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=[])
+        await orchestrator._schedule_ready_subtasks(run)
+        assert self.enqueued(orchestrator) == ["a", "a"]
+        orchestrator.job_queue.enqueue.assert_called_once()
@@ -0,0 +1,203 @@
+"""Tests for the decomposition plan cache."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from app.orchestrator.decomposer import TaskDecomposer
+from app.orchestrator.decomposition_cache import (
+    DecompositionCache,
+    is_valid_plan,
+    normalize_task,
+    task_signature,
+)
+from app.orchestrator.types import DecompositionResult, RunConfig, SubtaskDefinition
+
+QUERY = "Compare the cloud revenue of Microsoft, Amazon and Google in 2025"
+
+
+def make_plan(deps=((), (0,))):
+    return DecompositionResult(
+        subtasks=[
+            SubtaskDefinition("research", None, {"n": i}, 5, 60, list(d))
+            for i, d in enumerate(deps)
+        ],
+        dependency_graph={},
+        estimated_duration_minutes=2,
+        estimated_cost_usd=0.02,
+        decomposition_reasoning="test",
+    )
+
+
+def message(payload):
+    return Mock(content=[Mock(text=json.dumps(payload))])
+
+
+def make_anthropic():
+    """Client whose analysis asks for two sources, yielding a source-based plan."""
+    anthropic = Mock()
+    anthropic.messages.create.return_value = message({
+        "sources": ["web", "news"],
+        "requires_multiple_sources": True,
+    })
+    return anthropic
+
+
+class TestSignature:
+    """Tests for task signatures."""
+
+    def test_normalization_ignores_case_whitespace_and_punctuation(self):
+        """Near-identical phrasings share a signature."""
+        config = RunConfig()
+        a = task_signature(QUERY, config, 10, "v1")
+        b = task_signature(f"  {QUERY.upper()}?\n", config, 10, "v1")
+
+        assert normalize_task("  Hello\tWorld!? ") == "hello world"
+        assert a == b
+
+    def test_prompt_version_and_config_change_signature(self):
+        """A new prompt version or different limits never reuse a plan."""
+        config = RunConfig()
+        base = task_signature(QUERY, config, 10, "v1")
+
+        assert task_signature(QUERY, config, 10, "v2") != base
+        assert task_signature(QUERY, config, 5, "v1") != base
+        assert task_signature(QUERY, RunConfig(decomposition_strategy="source_based"), 10, "v1") != base
+
+
+class TestDecompositionCache:
+    """Tests for DecompositionCache."""
+
+    def test_rejects_invalid_dag(self):
+        """Plans with forward or out-of-range dependencies are not cached."""
+        cache = DecompositionCache()
+
+        assert not is_valid_plan(make_plan(deps=((1,), ())))
+        assert cache.put("k", make_plan(deps=((1,), ()))) is False
+        assert cache.put("k", make_plan()) is True
+
+    def test_entries_are_copies(self):
+        """Mutating a returned plan does not change the cached one."""
+        cache = DecompositionCache()
+        cache.put("k", make_plan())
+
+        plan, _ = cache.get("k")
+        plan.subtasks[0].input_data["n"] = 99
+
+        assert cache.get("k")[0].subtasks[0].input_data["n"] == 0
+
+    def test_fresh_stale_and_expired(self):
+        """Plans are fresh, then stale (needs refresh), then gone."""
+        cache = DecompositionCache(ttl_seconds=10, stale_seconds=10)
+        with patch("app.orchestrator.decomposition_cache.time.time", return_value=1000):
+            cache.put("k", make_plan())
+
+        with patch("app.orchestrator.decomposition_cache.time.time", return_value=1005):
+            assert cache.get("k")[1] is False
+        with patch("app.orchestrator.decomposition_cache.time.time", return_value=1015):
+            assert cache.get("k")[1] is True
+        with patch("app.orchestrator.decomposition_cache.time.time", return_value=1025):
+            assert cache.get("k") == (None, False)
+
+        assert cache.get_stats() == {"entries": 0, "hits": 1, "stale_hits": 1, "misses": 1}
+
+    def test_lru_bound(self):
+        """The least recently used plan is evicted when full."""
+        cache = DecompositionCache(max_entries=2)
+        cache.put("a", make_plan())
+        cache.put("b", make_plan())
+        cache.get("a")
+        cache.put("c", make_plan())
+
+        assert cache.get("b") == (None, False)
+        assert cache.get("a")[0] is not None
+
+
+class TestDecomposerCaching:
+    """Tests for TaskDecomposer using the cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_task_skips_model(self):
+        """The second decomposition of the same task makes no model calls."""
+        anthropic = make_anthropic()
+        decomposer = TaskDecomposer(anthropic)
+
+        first = await decomposer.decompose(QUERY, RunConfig())
+        calls = anthropic.messages.create.call_count
+        second = await decomposer.decompose(QUERY.lower() + ".", RunConfig())
+
+        assert anthropic.messages.create.call_count == calls
+        assert [s.task_type for s in second.subtasks] == [s.task_type for s in first.subtasks]
+
+    @pytest.mark.asyncio
+    async def test_prompt_version_invalidates(self):
+        """A decomposer with a new prompt version does not see old plans."""
+        anthropic = make_anthropic()
+        cache = DecompositionCache()
+        await TaskDecomposer(anthropic, cache=cache, prompt_version="v1").decompose(QUERY, RunConfig())
+        calls = anthropic.messages.create.call_count
+
+        await TaskDecomposer(anthropic, cache=cache, prompt_version="v2").decompose(QUERY, RunConfig())
+
+        assert anthropic.messages.create.call_count == 2 * calls
+
+    @pytest.mark.asyncio
+    async def test_stale_plan_served_and_refreshed(self):
+        """A stale plan is returned immediately and replaced in the background."""
+        anthropic = make_anthropic()
+        cache = DecompositionCache(ttl_seconds=0)
+        decomposer = TaskDecomposer(anthropic, cache=cache, prompt_version="v1")
+        key = task_signature(QUERY, RunConfig(), RunConfig().max_subtasks, "v1")
+        cache.put(key, make_plan())
+
+        plan = await decomposer.decompose(QUERY, RunConfig())
+
+        assert plan.decomposition_reasoning == "test"
+        await asyncio.gather(*decomposer._refresh_tasks)
+        assert cache.get(key)[0].subtasks[0].task_type == "source_research"
+
+    @pytest.mark.asyncio
+    async def test_fallback_plans_are_not_cached(self):
+        """A plan built while the model is failing is not remembered."""
+        anthropic = Mock()
+        anthropic.messages.create.side_effect = RuntimeError("overloaded")
+        decomposer = TaskDecomposer(anthropic)
+
+        await decomposer.decompose(QUERY, RunConfig())
+
+        assert len(decomposer.cache) == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("analysis", [
+        {"entities": ["Microsoft", "Amazon", "Google"]},
+        {"dimensions": ["revenue", "growth"]},
+    ])
+    async def test_strategy_fallback_plans_are_not_cached(self, analysis):
+        """A generic plan used because the strategy's model call failed is not remembered."""
+        anthropic = Mock()
+        anthropic.messages.create.side_effect = [message(analysis), RuntimeError("overloaded")]
+        decomposer = TaskDecomposer(anthropic)
+
+        plan = await decomposer.decompose(QUERY, RunConfig())
+
+        assert plan.subtasks
+        assert len(decomposer.cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_entity_plan_is_cached(self):
+        anthropic = Mock()
+        anthropic.messages.create.side_effect = [
+            message({"entities": ["Microsoft", "Amazon"]}),
+            message({"subtasks": [
+                {"task_type": "entity_research", "entity_id": "Microsoft"},
+                {"task_type": "entity_research", "entity_id": "Amazon"},
+                {"task_type": "synthesis", "depends_on_indices": [0, 1]},
+            ]}),
+        ]
+        decomposer = TaskDecomposer(anthropic)
+
+        plan = await decomposer.decompose(QUERY, RunConfig())
+
+        assert [s.task_type for s in plan.subtasks][-1] == "synthesis"
+        assert len(decomposer.cache) == 1
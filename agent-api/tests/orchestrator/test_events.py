@@ -0,0 +1,258 @@
+"""Tests for event-driven subtask completion handling."""
+
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, call, patch
+
+from app.orchestrator.events import (
+    SUBTASK_EVENTS_GROUP,
+    SUBTASK_EVENTS_KEY,
+    SubtaskEvent,
+    SubtaskEventStream,
+)
+from app.orchestrator.orchestrator import Orchestrator
+from app.orchestrator.state_machine import StateMachine
+from app.orchestrator.types import ResearchRun, SubtaskState
+from tests.orchestrator.conftest import apply_all, diamond, enqueued_ids
+
+
+def make_events(**overrides):
+    redis = Mock()
+    redis.xadd = AsyncMock(return_value="1-0")
+    redis.xgroup_create = AsyncMock()
+    redis.xreadgroup = AsyncMock(return_value=[])
+    redis.xautoclaim = AsyncMock(return_value=["0-0", []])
+    redis.xack = AsyncMock()
+    for name, value in overrides.items():
+        setattr(redis, name, value)
+    return SubtaskEventStream(redis_client=redis, consumer="test")
+
+
+class TestSubtaskEventStream:
+    """Tests for SubtaskEventStream."""
+
+    @pytest.mark.asyncio
+    async def test_publish(self):
+        """Events carry run, subtask and state."""
+        events = make_events()
+
+        assert await events.publish("run-1", "a", SubtaskState.COMPLETED) == "1-0"
+        fields = events.redis.xadd.call_args.args[1]
+        assert fields == {"run_id": "run-1", "subtask_id": "a", "state": "completed"}
+
+    @pytest.mark.asyncio
+    async def test_publish_never_raises(self):
+        """A Redis outage does not fail the transition that published."""
+        events = make_events(xadd=AsyncMock(side_effect=ConnectionError("down")))
+
+        assert await events.publish("run-1", "a", SubtaskState.COMPLETED) is None
+
+    @pytest.mark.asyncio
+    async def test_read_parses_entries_and_acks_malformed(self):
+        """Malformed entries are acknowledged so they are not redelivered."""
+        response = [[SUBTASK_EVENTS_KEY, [
+            ("1-0", {"run_id": "run-1", "subtask_id": "a", "state": "completed"}),
+            ("2-0", {"run_id": "run-1"}),
+        ]]]
+        events = make_events(xreadgroup=AsyncMock(return_value=response))
+
+        parsed = await events.read(block_ms=10)
+
+        assert parsed == [SubtaskEvent("run-1", "a", SubtaskState.COMPLETED, "1-0")]
+        events.redis.xack.assert_awaited_once_with(SUBTASK_EVENTS_KEY, SUBTASK_EVENTS_GROUP, "2-0")
+        events.redis.xgroup_create.assert_awaited_once()
+
+
+class TestStateMachinePublishes:
+    """Tests for completion events emitted by subtask transitions."""
+
+    @pytest.fixture
+    def state_machine(self):
+        supabase = Mock()
+        supabase.rpc = Mock(return_value=Mock(execute=Mock(return_value=Mock(data=True))))
+        events = Mock()
+        events.publish = AsyncMock()
+        return StateMachine(supabase, events=events)
+
+    @pytest.mark.asyncio
+    async def test_terminal_transition_publishes(self, state_machine):
+        """Completing a subtask publishes an event."""
+        await state_machine.transition_subtask_state(
+            "a", SubtaskState.RUNNING, SubtaskState.COMPLETED, 3, run_id="run-1"
+        )
+
+        state_machine.events.publish.assert_awaited_once_with("run-1", "a", SubtaskState.COMPLETED)
+
+    @pytest.mark.asyncio
+    async def test_non_terminal_transition_is_silent(self, state_machine):
+        """Intermediate transitions do not publish."""
+        await state_machine.transition_subtask_state(
+            "a", SubtaskState.PENDING, SubtaskState.QUEUED, 1, run_id="run-1"
+        )
+
+        state_machine.events.publish.assert_not_called()
+
+
+class TestOrchestratorEvents:
+    """Tests for Orchestrator advancing DAGs from events."""
+
+    @pytest.fixture
+    def run(self):
+        return ResearchRun.from_db_row({
+            "id": "run-1",
+            "user_id": "user-1",
+            "status": "executing",
+            "deadline_at": datetime.utcnow() + timedelta(hours=1),
+        })
+
+    @pytest.fixture
+    def orchestrator(self, run):
+        with patch("app.orchestrator.orchestrator.JobQueue"):
+            orchestrator = Orchestrator(Mock(), Mock(), events=make_events())
+        orchestrator.state_machine = Mock()
+        orchestrator.state_machine.transition_subtask_states = AsyncMock(side_effect=apply_all)
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=diamond())
+        orchestrator.state_machine.get_subtask_counts_by_state = AsyncMock(
+            return_value={"completed": 1, "queued": 2, "pending": 1}
+        )
+
+        @asynccontextmanager
+        async def lock(run_id):
+            yield run
+
+        orchestrator._acquire_run_lock = lock
+        return orchestrator
+
+    def enqueued(self, orchestrator):
+        return enqueued_ids(orchestrator.state_machine)
+
+    @pytest.mark.asyncio
+    async def test_completion_event_enqueues_dependents(self, orchestrator, run):
+        """A completion event dispatches newly ready subtasks without a poll."""
+        await orchestrator._phase_schedule(run)
+
+        await orchestrator.handle_subtask_event(
+            SubtaskEvent("run-1", "a", SubtaskState.COMPLETED)
+        )
+
+        assert self.enqueued(orchestrator) == ["a", "b", "c"]
+        assert call("run-1", priority=0) not in orchestrator.job_queue.enqueue.call_args_list
+
+    @pytest.mark.asyncio
+    async def test_last_completion_requeues_run(self, orchestrator, run):
+        """The run is re-enqueued for aggregation once every subtask is terminal."""
+        await orchestrator._phase_schedule(run)
+        orchestrator.state_machine.get_subtask_counts_by_state.return_value = {"completed": 4}
+
+        await orchestrator.handle_subtask_event(
+            SubtaskEvent("run-1", "d", SubtaskState.COMPLETED)
+        )
+
+        orchestrator.job_queue.enqueue.assert_called_with("run-1", priority=0)
+
+    @pytest.mark.asyncio
+    async def test_locked_run_is_handed_to_job_queue(self, orchestrator):
+        """Events for a run locked elsewhere are not dropped."""
+        @asynccontextmanager
+        async def busy(run_id):
+            yield None
+
+        orchestrator._acquire_run_lock = busy
+
+        await orchestrator.handle_subtask_event(
+            SubtaskEvent("run-1", "a", SubtaskState.COMPLETED)
+        )
+
+        orchestrator.job_queue.enqueue.assert_called_once_with("run-1", priority=0)
+
+    @pytest.mark.asyncio
+    async def test_handled_events_are_acked(self, orchestrator):
+        """Events are acknowledged only after handling succeeds."""
+        orchestrator.handle_subtask_events = AsyncMock(side_effect=[None, RuntimeError("db")])
+
+        await orchestrator._handle_subtask_events([
+            SubtaskEvent("run-1", "a", SubtaskState.COMPLETED, "1-0"),
+            SubtaskEvent("run-2", "b", SubtaskState.COMPLETED, "2-0"),
+        ])
+
+        orchestrator.events.redis.xack.assert_awaited_once_with(
+            SUBTASK_EVENTS_KEY, SUBTASK_EVENTS_GROUP, "1-0"
+        )
+
+    @pytest.mark.asyncio
+    async def test_events_for_one_run_are_handled_together(self, orchestrator):
+        """Fan-in: a run's events share one lock and one dispatch."""
+        orchestrator.handle_subtask_events = AsyncMock()
+        events = [
+            SubtaskEvent("run-1", "b", SubtaskState.COMPLETED, "1-0"),
+            SubtaskEvent("run-1", "c", SubtaskState.COMPLETED, "1-0"),
+        ]
+
+        await orchestrator._handle_subtask_events(events)
+
+        orchestrator.handle_subtask_events.assert_awaited_once_with("run-1", events)
+        orchestrator.events.redis.xack.assert_awaited_once_with(
+            SUBTASK_EVENTS_KEY, SUBTASK_EVENTS_GROUP, "1-0"
+        )
+
+
+    @pytest.mark.asyncio
+    async def test_cancelling_pending_subtasks_goes_through_state_machine(self, orchestrator):
+        """Cancellations keep the optimistic lock and are published like any transition."""
+        query = orchestrator.supabase.table.return_value.select.return_value.eq.return_value.in_.return_value
+        query.execute.return_value = Mock(data=[
+            {"id": "b", "state": "pending", "state_version": 1},
+            {"id": "c", "state": "queued", "state_version": 2},
+        ])
+
+        await orchestrator._cancel_pending_subtasks("run-1")
+
+        [transitions] = orchestrator.state_machine.transition_subtask_states.await_args.args
+        assert [(t.subtask_id, t.from_state, t.to_state, t.state_version) for t in transitions] == [
+            ("b", SubtaskState.PENDING, SubtaskState.CANCELLED, 1),
+            ("c", SubtaskState.QUEUED, SubtaskState.CANCELLED, 2),
+        ]
+        orchestrator.supabase.table.return_value.update.assert_not_called()
+
+
+class TestCombinedEvents:
+    """Tests for combined (batch) event entries."""
+
+    @pytest.mark.asyncio
+    async def test_publish_batch_is_one_entry(self):
+        """A batch is a single XADD."""
+        events = make_events()
+
+        await events.publish_batch([
+            ("run-1", "a", SubtaskState.COMPLETED),
+            ("run-1", "b", SubtaskState.FAILED),
+        ])
+
+        events.redis.xadd.assert_awaited_once()
+        assert set(events.redis.xadd.call_args.args[1]) == {"batch"}
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_is_not_published(self):
+        events = make_events()
+
+        assert await events.publish_batch([]) is None
+        events.redis.xadd.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_combined_entry_expands(self):
+        """Consumers see one event per subtask of a combined entry."""
+        events = make_events()
+        await events.publish_batch([
+            ("run-1", "a", SubtaskState.COMPLETED),
+            ("run-1", "b", SubtaskState.FAILED),
+        ])
+        fields = events.redis.xadd.call_args.args[1]
+        events.redis.xreadgroup = AsyncMock(return_value=[[SUBTASK_EVENTS_KEY, [("5-0", fields)]]])
+
+        parsed = await events.read(block_ms=10)
+
+        assert parsed == [
+            SubtaskEvent("run-1", "a", SubtaskState.COMPLETED, "5-0"),
+            SubtaskEvent("run-1", "b", SubtaskState.FAILED, "5-0"),
+        ]
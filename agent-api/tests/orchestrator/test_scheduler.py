@@ -0,0 +1,193 @@
+"""Tests for critical-path scheduling in SubtaskScheduler."""
+
+import heapq
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.orchestrator.dag import SubtaskDAG
+from app.orchestrator.orchestrator import Orchestrator
+from app.orchestrator.scheduler import DurationEstimator, SubtaskScheduler
+from app.orchestrator.types import OrchestratorConfig, ResearchRun, Subtask, SubtaskState
+from tests.orchestrator.conftest import apply_all, enqueued_ids
+
+
+def make_subtask(subtask_id, index, task_type="research", depends_on=(), **row):
+    return Subtask.from_db_row({
+        "id": subtask_id,
+        "run_id": "run-1",
+        "subtask_index": index,
+        "idempotency_key": f"run-1:{index}",
+        "task_type": task_type,
+        "state": row.pop("state", SubtaskState.PENDING.value),
+        "depends_on": list(depends_on),
+        **row,
+    })
+
+
+def wide_dag():
+    """
+    One long chain (research -> analysis -> synthesis) next to many short
+    independent searches; the chain's head is listed last.
+    """
+    subtasks = [make_subtask(f"s{i}", i, "web_search") for i in range(6)]
+    subtasks += [
+        make_subtask("chain-1", 6, "source_research"),
+        make_subtask("chain-2", 7, "dimension_analysis", ["chain-1"]),
+        make_subtask("chain-3", 8, "synthesis", ["chain-2"]),
+    ]
+    return subtasks
+
+
+def simulate(dag, durations, workers):
+    """Makespan of running the DAG on a fixed number of workers."""
+    clock, running = 0.0, []
+    while True:
+        while len(running) < workers:
+            subtask = dag.pop_ready()
+            if subtask is None:
+                break
+            heapq.heappush(running, (clock + durations.estimate(subtask.task_type), subtask.id))
+        if not running:
+            return clock
+        clock, subtask_id = heapq.heappop(running)
+        dag.mark_completed(subtask_id)
+
+
+class TestDurationEstimator:
+    """Tests for DurationEstimator."""
+
+    def test_defaults_before_history(self):
+        """Unknown task types fall back to the default estimate."""
+        estimator = DurationEstimator()
+
+        assert estimator.estimate("synthesis") == 120
+        assert estimator.estimate("unknown") == 60
+
+    def test_moving_average(self):
+        """Observations move the estimate towards recent durations."""
+        estimator = DurationEstimator(alpha=0.5)
+
+        estimator.observe("web_search", 10)
+        estimator.observe("web_search", 20)
+
+        assert estimator.estimate("web_search") == 15
+        assert estimator.get_stats()["web_search"]["samples"] == 2
+
+    def test_learns_from_completed_rows(self):
+        """Durations are taken from database timestamps of completed subtasks."""
+        scheduler = SubtaskScheduler()
+        done = make_subtask(
+            "a", 0, "browser",
+            state="completed",
+            started_at="2026-01-01T10:00:00+00:00",
+            completed_at="2026-01-01T10:00:42+00:00",
+        )
+        pending = make_subtask("b", 1, "browser")
+
+        assert scheduler.learn_durations([done, pending]) == 1
+        assert scheduler.durations.estimate("browser") == 42
+
+    def test_subtask_is_learned_once(self):
+        """History loads and DAG rebuilds that re-read a subtask do not re-weight it."""
+        scheduler = SubtaskScheduler(durations=DurationEstimator(max_tracked=2))
+        rows = [
+            make_subtask(
+                subtask_id, index, "browser",
+                state="completed",
+                started_at="2026-01-01T10:00:00+00:00",
+                completed_at=f"2026-01-01T10:00:{seconds}+00:00",
+            )
+            for index, (subtask_id, seconds) in enumerate([("a", 10), ("b", 20), ("c", 30)])
+        ]
+
+        assert scheduler.learn_durations(rows[:2]) == 2
+        assert scheduler.learn_durations(rows[:2]) == 0
+        assert scheduler.durations.get_stats()["browser"]["samples"] == 2
+
+        # Only the most recent IDs are remembered
+        assert scheduler.learn_durations(rows[2:]) == 1
+        assert scheduler.learn_durations(rows[:1]) == 1
+
+
+class TestCriticalPath:
+    """Tests for SubtaskScheduler.critical_path."""
+
+    def test_ranks_are_longest_remaining_path(self):
+        """A subtask's rank is its estimate plus its longest downstream chain."""
+        scheduler = SubtaskScheduler()
+        dag = SubtaskDAG.from_subtasks("run-1", wide_dag())
+
+        rank = scheduler.critical_path(dag)
+
+        assert rank["chain-3"] == 120
+        assert rank["chain-2"] == 60 + 120
+        assert rank["chain-1"] == 90 + 60 + 120
+        assert rank["s0"] == 30
+
+    def test_completed_subtasks_have_no_remaining_work(self):
+        """Completed subtasks only pass on their dependents' ranks."""
+        subtasks = wide_dag()
+        subtasks[6] = make_subtask("chain-1", 6, "source_research", state="completed")
+        dag = SubtaskDAG.from_subtasks("run-1", subtasks)
+
+        assert SubtaskScheduler().critical_path(dag)["chain-1"] == 180
+
+    def test_ready_queue_follows_rank(self):
+        """The chain head is dispatched before short work listed ahead of it."""
+        scheduler = SubtaskScheduler()
+        dag = SubtaskDAG.from_subtasks("run-1", wide_dag())
+        dag.set_ranks(scheduler.critical_path(dag))
+
+        assert dag.pop_ready().id == "chain-1"
+
+    def test_shorter_makespan_than_fifo(self):
+        """With limited workers, critical-path order finishes wide DAGs sooner."""
+        scheduler = SubtaskScheduler()
+
+        fifo = SubtaskDAG.from_subtasks("run-1", wide_dag())
+        ranked = SubtaskDAG.from_subtasks("run-1", wide_dag())
+        ranked.set_ranks(scheduler.critical_path(ranked))
+
+        fifo_makespan = simulate(fifo, scheduler.durations, workers=2)
+        ranked_makespan = simulate(ranked, scheduler.durations, workers=2)
+
+        assert ranked_makespan == 270
+        assert ranked_makespan < fifo_makespan
+
+    @pytest.mark.asyncio
+    async def test_critical_path_boosts_priority(self):
+        """Subtasks on the critical path get a priority boost."""
+        scheduler = SubtaskScheduler()
+        run = ResearchRun.from_db_row({"id": "run-1", "user_id": "user-1"})
+        subtask = make_subtask("a", 0)
+
+        off_path = await scheduler.schedule(subtask, run, critical_path_share=0.2)
+        on_path = await scheduler.schedule(subtask, run, critical_path_share=1.0)
+
+        assert on_path.priority == off_path.priority + 1
+
+
+class TestOrchestratorCapacity:
+    """Tests for capacity-limited dispatch in the Orchestrator."""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_respects_capacity_in_rank_order(self):
+        """Only free capacity is filled, longest critical path first."""
+        with patch("app.orchestrator.orchestrator.JobQueue"):
+            orchestrator = Orchestrator(
+                Mock(), Mock(), config=OrchestratorConfig(max_parallel_subtasks=2), events=Mock()
+            )
+        orchestrator.state_machine = Mock()
+        orchestrator.state_machine.transition_subtask_states = AsyncMock(side_effect=apply_all)
+        orchestrator.state_machine.get_subtasks_by_run = AsyncMock(return_value=wide_dag())
+        run = ResearchRun.from_db_row({
+            "id": "run-1",
+            "user_id": "user-1",
+            "deadline_at": datetime.utcnow() + timedelta(hours=1),
+        })
+
+        await orchestrator._phase_schedule(run)
+
+        assert enqueued_ids(orchestrator.state_machine) == ["chain-1", "s0"]
+        assert orchestrator._dags["run-1"].ready_count == 5
@@ -6,7 +6,9 @@ from unittest.mock import Mock, AsyncMock, MagicMock
 from app.orchestrator.types import (
     RunState,
     SubtaskState,
+    SubtaskTransition,
     InvalidTransitionError,
+    ConcurrencyError,
 )
 from app.orchestrator.state_machine import StateMachine
 
@@ -212,3 +214,81 @@ class TestStateMachineHelpers:
         result = await state_machine.check_subtask_ready("subtask-123")
 
         assert result is True
+
+
+class TestStateMachineBatchTransitions:
+    """Tests for batched subtask transitions."""
+
+    @pytest.fixture
+    def state_machine(self):
+        """Create state machine whose batch RPC applies all but subtask b."""
+        mock_supabase = Mock()
+        rows = [
+            {"subtask_id": "a", "run_id": "run-1", "to_state": "completed"},
+            {"subtask_id": "c", "run_id": "run-1", "to_state": "completed"},
+        ]
+        mock_supabase.rpc = Mock(return_value=Mock(
+            execute=Mock(return_value=Mock(data=rows))
+        ))
+        events = Mock()
+        events.publish = AsyncMock()
+        events.publish_batch = AsyncMock()
+        return StateMachine(mock_supabase, events=events)
+
+    def completions(self, *ids):
+        return [
+            SubtaskTransition(sid, SubtaskState.RUNNING, SubtaskState.COMPLETED, 3, run_id="run-1")
+            for sid in ids
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batch_is_one_round_trip(self, state_machine):
+        """The whole batch is written with a single RPC."""
+        applied = await state_machine.transition_subtask_states(self.completions("a", "b", "c"))
+
+        assert applied == {"a", "c"}
+        state_machine.supabase.rpc.assert_called_once()
+        name, params = state_machine.supabase.rpc.call_args.args
+        assert name == "transition_subtask_states_batch"
+        assert [t["subtask_id"] for t in params["p_transitions"]] == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_batch_emits_one_combined_event(self, state_machine):
+        """Applied terminal transitions are announced together."""
+        await state_machine.transition_subtask_states(self.completions("a", "b", "c"))
+
+        state_machine.events.publish.assert_not_called()
+        state_machine.events.publish_batch.assert_awaited_once()
+        published = list(state_machine.events.publish_batch.call_args.args[0])
+        assert published == [
+            ("run-1", "a", SubtaskState.COMPLETED),
+            ("run-1", "c", SubtaskState.COMPLETED),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_writes_nothing(self, state_machine):
+        """One invalid transition rejects the batch before any write."""
+        batch = self.completions("a") + [
+            SubtaskTransition("b", SubtaskState.PENDING, SubtaskState.COMPLETED, 1),
+        ]
+
+        with pytest.raises(InvalidTransitionError, match="pending -> completed"):
+            await state_machine.transition_subtask_states(batch)
+
+        state_machine.supabase.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_raises(self, state_machine):
+        """A failed write is an error, not an empty result."""
+        state_machine.supabase.rpc.return_value.execute.side_effect = RuntimeError("timeout")
+
+        with pytest.raises(ConcurrencyError, match="timeout"):
+            await state_machine.transition_subtask_states(self.completions("a", "b"))
+
+        state_machine.events.publish_batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self, state_machine):
+        """An empty batch makes no calls."""
+        assert await state_machine.transition_subtask_states([]) == set()
+        state_machine.supabase.rpc.assert_not_called()
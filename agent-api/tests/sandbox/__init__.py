@@ -0,0 +1 @@
+"""Tests for sandbox module."""
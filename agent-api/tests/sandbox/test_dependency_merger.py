@@ -0,0 +1,70 @@
+"""Tests for memoized dependency merging."""
+
+from app.sandbox.dependency_merger import (
+    ConflictResolution,
+    DependencyMerger,
+    SemVer,
+    TemplateManifest,
+    TemplateMerger,
+)
+
+
+class TestSemVer:
+    """Tests for SemVer parsing and ordering."""
+
+    def test_parse_is_shared(self):
+        assert SemVer.parse("^1.2.3") is SemVer.parse("^1.2.3")
+
+    def test_ordering(self):
+        versions = [SemVer.parse(v) for v in ["1.10.0", "1.2.0", "1.2.0-rc.1", "0.9.9"]]
+        assert [str(v) for v in sorted(versions)] == ["0.9.9", "1.2.0-rc.1", "1.2.0", "1.10.0"]
+        assert SemVer.parse("2.0.0") > SemVer.parse("1.99.99")
+
+
+class TestMemoizedMerge:
+    """Tests for DependencyMerger result caching."""
+
+    def test_repeat_merge_is_cached_and_isolated(self):
+        merger = DependencyMerger()
+        base = {"react": "^18.2.0", "lodash": "^4.17.0"}
+        overlay = {"react": "^18.3.1", "zod": "^3.22.0"}
+
+        first = merger.merge_dependencies(base, overlay)
+        first.merged["mutated"] = "1"
+        second = merger.merge_dependencies(dict(base), dict(overlay))
+
+        assert second.merged == {"react": "^18.3.1", "lodash": "^4.17.0", "zod": "^3.22.0"}
+        assert merger.cache_info() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_cache_key_includes_strategy(self):
+        merger = DependencyMerger()
+        base, overlay = {"vite": "^5.0.0"}, {"vite": "^5.2.0"}
+
+        assert merger.merge_dependencies(base, overlay).merged["vite"] == "^5.2.0"
+        merger.resolution_strategy = ConflictResolution.OLDEST
+        assert merger.merge_dependencies(base, overlay).merged["vite"] == "^5.0.0"
+
+    def test_cache_is_bounded(self):
+        merger = DependencyMerger(cache_size=2)
+        for i in range(5):
+            merger.merge_dependencies({"a": f"^1.{i}.0"}, {"a": "^1.9.0"})
+        assert merger.cache_info()["size"] == 2
+
+    def test_package_json_and_templates_reuse_results(self):
+        merger = DependencyMerger()
+        base = {"dependencies": {"react": "^18.2.0"}, "scripts": {"dev": "vite"}}
+        overlay = {"dependencies": {"react": "^18.3.0"}, "devDependencies": {"vitest": "^1.0.0"}}
+
+        merged = merger.merge_package_json(base, overlay)
+        merged["scripts"]["dev"] = "changed"
+        assert merger.merge_package_json(base, overlay)["scripts"]["dev"] == "vite"
+
+        templates = TemplateMerger(merger)
+        web = TemplateManifest(name="web", description="Web", dependencies={"react": "^18.2.0"})
+        db = TemplateManifest(name="db", description="DB", dependencies={"drizzle-orm": "^0.29.0"})
+        first, _ = templates.merge_templates(web, db)
+        hits = merger.cache_info()["hits"]
+        second, _ = templates.merge_templates(web, db)
+
+        assert second.dependencies == first.dependencies
+        assert merger.cache_info()["hits"] == hits + 2
@@ -0,0 +1,275 @@
+"""Tests for dev server readiness detection and port allocation."""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import pytest
+
+from app.sandbox.dev_server import (
+    CUSTOM_READY_PATTERNS,
+    FRAMEWORK_CONFIGS,
+    DevServerOrchestrator,
+    Framework,
+    PortManager,
+    ServerStatus,
+    _process_start,
+    is_ready_line,
+    ready_wait_command,
+)
+from app.sandbox.resource_sampler import ResourceSampler
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+class TestPortManager:
+    """Tests for the bitmap port allocator."""
+
+    def test_allocates_lowest_free_port_and_reuses_released(self):
+        ports = PortManager(base_port=21000, max_port=21020, reserved_ports={21001})
+
+        assert [ports.allocate() for _ in range(3)] == [21000, 21002, 21003]
+        ports.release(21002)
+        assert ports.allocate() == 21002
+        assert ports.allocate(preferred_port=21010) == 21010
+
+    def test_skips_ports_in_use(self):
+        with socket.socket() as sock:
+            sock.bind(("0.0.0.0", 0))
+            sock.listen()
+            busy = sock.getsockname()[1]
+            ports = PortManager(base_port=busy, max_port=busy + 4, reserved_ports=set())
+            assert ports.allocate() != busy
+
+    def test_raises_when_exhausted(self):
+        ports = PortManager(base_port=21100, max_port=21102, reserved_ports=set())
+        ports.allocate()
+        ports.allocate()
+        with pytest.raises(RuntimeError):
+            ports.allocate()
+
+    def test_state_survives_restart(self, tmp_path):
+        state = str(tmp_path / "ports.json")
+        first = PortManager(base_port=21200, max_port=21300, reserved_ports=set(), state_path=state)
+        allocated = first.allocate()
+
+        # A second worker (or a restarted one) sees the allocation
+        second = PortManager(base_port=21200, max_port=21300, reserved_ports=set(), state_path=state)
+        assert allocated in second.allocated_ports
+        assert second.allocate() != allocated
+
+        second.release(allocated)
+        assert first.allocate() == allocated
+
+    def test_reclaims_ports_of_dead_owners(self, tmp_path):
+        state = tmp_path / "ports.json"
+        bitmap = bytearray(13)
+        bitmap[0] = 0b11  # 21300 and 21301
+        state.write_text(json.dumps({
+            "base_port": 21300,
+            "max_port": 21400,
+            "bitmap": bitmap.hex(),
+            "leases": {"21300": {"pid": _dead_pid(), "at": 0}, "21301": {"pid": 1, "at": 0}},
+        }))
+
+        ports = PortManager(base_port=21300, max_port=21400, reserved_ports=set(), state_path=str(state))
+
+        # 21301's owner (pid 1) is alive, so it is kept
+        assert ports.allocated_ports == {21301}
+
+
+    def test_reclaims_ports_of_reused_pids(self, tmp_path):
+        """A live PID with another start time belongs to a different process."""
+        state = tmp_path / "ports.json"
+        bitmap = bytearray(13)
+        bitmap[0] = 0b11  # 21400 and 21401
+        own = {"pid": os.getpid(), "start": _process_start(os.getpid()), "at": 0}
+        state.write_text(json.dumps({
+            "base_port": 21400,
+            "max_port": 21500,
+            "bitmap": bitmap.hex(),
+            "leases": {"21400": {**own, "start": own["start"] - 1}, "21401": own},
+        }))
+
+        ports = PortManager(base_port=21400, max_port=21500, reserved_ports=set(), state_path=str(state))
+
+        assert ports.allocated_ports == {21401}
+
+
+class TestReadiness:
+    """Tests for ready marker detection."""
+
+    def test_custom_ready_marker_is_a_whole_word(self):
+        assert is_ready_line("Server ready on port 3000", CUSTOM_READY_PATTERNS)
+        assert not is_ready_line("Error: port 3000 already in use", CUSTOM_READY_PATTERNS)
+
+    def test_ready_line_ignores_colour_codes(self):
+        vite = FRAMEWORK_CONFIGS[Framework.VITE].ready_patterns
+        assert is_ready_line("\x1b[32m➜\x1b[39m  \x1b[1mLocal\x1b[22m:   \x1b[36mhttp://localhost:5173/", vite)
+        assert not is_ready_line("building for development...", vite)
+
+    def _run_wait(self, log_path, port, timeout=5):
+        command = ready_wait_command(str(log_path), port, [r"ready in \d+"], timeout)
+        return subprocess.run(["bash", "-c", command], capture_output=True, text=True, timeout=timeout + 5)
+
+    def test_wait_script_returns_on_marker(self, tmp_path):
+        log = tmp_path / "dev.log"
+        log.write_text("starting\n  VITE v5.0.0  ready in 312 ms\n")
+
+        result = self._run_wait(log, _free_port())
+
+        assert result.returncode == 0
+        assert result.stdout.startswith("marker:")
+
+    def test_wait_script_falls_back_to_probe(self, tmp_path):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            sock.listen()
+            result = self._run_wait(tmp_path / "missing.log", sock.getsockname()[1])
+
+        assert result.returncode == 0
+        assert result.stdout.strip() == "probe"
+
+    def test_wait_script_times_out(self, tmp_path):
+        log = tmp_path / "dev.log"
+        log.write_text("compiling...\n")
+
+        assert self._run_wait(log, _free_port(), timeout=1).returncode == 1
+
+
+class TestOrchestratorStartup:
+    """Tests for DevServerOrchestrator.start_server readiness."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        (tmp_path / "node_modules").mkdir()
+        return str(tmp_path)
+
+    def _orchestrator(self, timeout=10.0, sampler=None):
+        ports = PortManager(base_port=21500, max_port=21600, reserved_ports=set())
+        return DevServerOrchestrator(
+            port_manager=ports, startup_timeout=timeout, probe_interval=0.1, sampler=sampler
+        )
+
+    @pytest.mark.asyncio
+    async def test_ready_from_output_marker(self, project):
+        orchestrator = self._orchestrator()
+        urls = []
+
+        start = time.monotonic()
+        server = await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM,
+            custom_command="echo 'Server started'; sleep 30", on_ready=urls.append,
+        )
+
+        assert server.status == ServerStatus.RUNNING
+        assert urls == [f"http://localhost:{server.port}"]
+        assert time.monotonic() - start < 5
+        await orchestrator.stop_all()
+        assert orchestrator.port_manager.allocated_ports == set()
+
+    @pytest.mark.asyncio
+    async def test_ready_from_port_probe(self, project):
+        orchestrator = self._orchestrator()
+
+        server = await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM,
+            custom_command='exec python3 -m http.server "$PORT" --bind 127.0.0.1 2>/dev/null',
+        )
+
+        assert server.status == ServerStatus.RUNNING
+        await orchestrator.stop_all()
+
+    @pytest.mark.asyncio
+    async def test_exit_before_ready_fails_fast_and_frees_port(self, project):
+        orchestrator = self._orchestrator(timeout=30.0)
+
+        start = time.monotonic()
+        server = await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM, custom_command="echo boom; exit 3",
+        )
+
+        assert server.status == ServerStatus.ERROR
+        assert server.error == "Process exited with code 3"
+        assert time.monotonic() - start < 5
+        assert orchestrator.port_manager.allocated_ports == set()
+
+    @pytest.mark.asyncio
+    async def test_failed_server_cannot_release_a_reused_port(self, project):
+        orchestrator = self._orchestrator()
+        failed = await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM, custom_command="exit 1",
+        )
+        assert "s1" not in orchestrator.servers
+
+        running = await orchestrator.start_server(
+            "s2", project, framework=Framework.CUSTOM, custom_command="echo 'Server started'; sleep 30",
+        )
+        assert running.port == failed.port
+
+        assert not await orchestrator.stop_server("s1")
+        assert orchestrator.port_manager.allocated_ports == {running.port}
+        await orchestrator.stop_all()
+
+    @pytest.mark.asyncio
+    async def test_port_allocation_runs_off_the_event_loop(self, project):
+        orchestrator = self._orchestrator()
+        allocate, release = orchestrator.port_manager.allocate, orchestrator.port_manager.release
+        threads = []
+
+        def record(method):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return method(*args)
+            return wrapper
+
+        orchestrator.port_manager.allocate = record(allocate)
+        orchestrator.port_manager.release = record(release)
+        await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM, custom_command="echo 'Server started'; sleep 30",
+        )
+        await orchestrator.stop_all()
+
+        assert len(threads) == 2
+        assert threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_server_process_is_sampled(self, project, tmp_path, monkeypatch):
+        cgroup = tmp_path / "cgroup"
+        cgroup.mkdir()
+        (cgroup / "cpu.stat").write_text("usage_usec 0\n")
+        # The server gets its own cgroup; the worker stays in another one
+        monkeypatch.setattr(
+            "app.sandbox.resource_sampler.cgroup_of_pid",
+            lambda pid: "/sys/fs/cgroup/worker" if pid == os.getpid() else str(cgroup),
+        )
+        sampler = ResourceSampler(enforce=False)
+        orchestrator = self._orchestrator(sampler=sampler)
+
+        await orchestrator.start_server(
+            "s1", project, framework=Framework.CUSTOM,
+            custom_command="echo 'Server started'; sleep 30", tier="free",
+        )
+        sampler.sample_once(now=1.0)
+        (cgroup / "cpu.stat").write_text("usage_usec 500000\n")
+        sampler.sample_once(now=2.0)
+
+        assert sampler.sandboxes["s1"].tier.value == "free"
+        assert [sample.cpu_millicores for sample in sampler.series("s1")] == [500]
+
+        await orchestrator.stop_server("s1")
+        assert "s1" not in sampler.sandboxes
@@ -0,0 +1,171 @@
+"""Tests for bulk sandbox file transfer (write_files/read_tree)."""
+
+import subprocess
+
+import pytest
+
+from app.sandbox.e2b_manager import E2BSandboxManager
+from app.sandbox.file_sync import (
+    build_manifest,
+    diff_manifests,
+    matches_globs,
+    normalize_path,
+    pack_tar,
+    unpack_tar,
+)
+
+
+class LocalProcess:
+    """Runs a sandbox command in a local shell."""
+
+    def __init__(self, command):
+        completed = subprocess.run(["bash", "-c", command], capture_output=True, text=True)
+        self.exit_code = completed.returncode
+        self.stdout = completed.stdout
+        self.stderr = completed.stderr
+
+    def wait(self):
+        pass
+
+
+class LocalFilesystem:
+    def __init__(self, sandbox):
+        self.sandbox = sandbox
+
+    def write(self, path, content):
+        self.sandbox.rpc_calls += 1
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(path, mode) as f:
+            f.write(content)
+
+    def read(self, path, format="text"):
+        self.sandbox.rpc_calls += 1
+        with open(path, "rb" if format == "bytes" else "r") as f:
+            return f.read()
+
+
+class LocalProcesses:
+    def __init__(self, sandbox):
+        self.sandbox = sandbox
+
+    def start(self, command):
+        self.sandbox.rpc_calls += 1
+        return LocalProcess(command)
+
+
+class LocalSandbox:
+    """Sandbox double backed by the local filesystem and shell."""
+
+    id = "local"
+
+    def __init__(self):
+        self.rpc_calls = 0
+        self.filesystem = LocalFilesystem(self)
+        self.process = LocalProcesses(self)
+
+
+@pytest.fixture
+def manager():
+    manager = E2BSandboxManager.__new__(E2BSandboxManager)
+    manager.active_sandboxes = {}
+    manager.sandbox_metadata = {}
+    sandbox = LocalSandbox()
+
+    async def get_or_create_sandbox(run_id, timeout=300):
+        return sandbox
+
+    manager.get_or_create_sandbox = get_or_create_sandbox
+    manager.sandbox = sandbox
+    return manager
+
+
+class TestManifests:
+    """Tests for manifest and tar helpers."""
+
+    def test_diff_reports_changed_deleted_and_unchanged(self):
+        old = build_manifest({"a.txt": b"1", "b.txt": b"2", "gone.txt": b"x"})
+        new = build_manifest({"a.txt": b"1", "b.txt": b"changed", "c.txt": b"3"})
+
+        diff = diff_manifests(old, new)
+
+        assert sorted(diff.changed) == ["b.txt", "c.txt"]
+        assert diff.deleted == ["gone.txt"]
+        assert diff.unchanged == 1
+
+    def test_globs(self):
+        assert matches_globs("src/App.tsx", include=["src/*"])
+        assert not matches_globs("README.md", include=["src/*"])
+        assert not matches_globs("web/node_modules/x.js", exclude=["*/node_modules/*"])
+
+    def test_paths_cannot_escape_root(self):
+        with pytest.raises(ValueError):
+            normalize_path("../etc/passwd")
+        with pytest.raises(ValueError):
+            normalize_path("/etc/passwd")
+        assert normalize_path("src/./a.ts") == "src/a.ts"
+
+    def test_tar_round_trip(self):
+        files = {"src/a.ts": b"export {}", "b.bin": bytes(range(256))}
+        assert unpack_tar(pack_tar(files)) == files
+
+
+class TestBulkTransfer:
+    """Tests for E2BSandboxManager.write_files/read_tree."""
+
+    @pytest.mark.asyncio
+    async def test_write_files_uses_two_calls_for_many_files(self, manager, tmp_path):
+        files = {f"src/file{i}.ts": f"export const x = {i}" for i in range(200)}
+
+        result = await manager.write_files("run-1", files, base_dir=str(tmp_path / "proj"))
+
+        assert result["success"]
+        assert len(result["written"]) == 200
+        assert (tmp_path / "proj/src/file7.ts").read_text() == "export const x = 7"
+        assert manager.sandbox.rpc_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_write_files_skips_known_content(self, manager, tmp_path):
+        files = {"a.txt": "same", "b.txt": "old"}
+        first = await manager.write_files("run-1", files, base_dir=str(tmp_path))
+
+        files["b.txt"] = "new"
+        second = await manager.write_files(
+            "run-1", files, base_dir=str(tmp_path), known_manifest=first["manifest"]
+        )
+
+        assert second["written"] == ["b.txt"]
+        assert second["skipped"] == 1
+        assert (tmp_path / "b.txt").read_text() == "new"
+
+    @pytest.mark.asyncio
+    async def test_read_tree_with_globs_and_default_excludes(self, manager, tmp_path):
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src/App.tsx").write_text("app")
+        (tmp_path / "README.md").write_text("readme")
+        (tmp_path / "node_modules/react").mkdir(parents=True)
+        (tmp_path / "node_modules/react/index.js").write_text("react")
+
+        everything = await manager.read_tree("run-1", str(tmp_path))
+        only_src = await manager.read_tree("run-1", str(tmp_path), include=["src/*"])
+
+        assert everything["success"]
+        assert set(everything["files"]) == {"src/App.tsx", "README.md"}
+        assert only_src["files"] == {"src/App.tsx": b"app"}
+
+    @pytest.mark.asyncio
+    async def test_read_tree_transfers_only_changes(self, manager, tmp_path):
+        (tmp_path / "keep.txt").write_text("keep")
+        (tmp_path / "edit.txt").write_text("v1")
+        (tmp_path / "drop.txt").write_text("drop")
+        first = await manager.read_tree("run-1", str(tmp_path))
+
+        (tmp_path / "edit.txt").write_text("v2")
+        (tmp_path / "drop.txt").unlink()
+        second = await manager.read_tree(
+            "run-1", str(tmp_path), known_manifest=first["manifest"]
+        )
+
+        assert second["files"] == {"edit.txt": b"v2"}
+        assert second["deleted"] == ["drop.txt"]
+        assert second["unchanged"] == 1
+        assert set(second["manifest"]) == {"keep.txt", "edit.txt"}
@@ -0,0 +1,230 @@
+"""Tests for the sandbox package layer cache."""
+
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.sandbox.layer_cache import (
+    PLAYWRIGHT_LAYER,
+    SCRIPTS_ON_PATH,
+    LayerCache,
+    LayerSpec,
+    layer_specs,
+    normalize_packages,
+)
+from app.sandbox.manager_enhanced import EnhancedE2BSandboxManager
+
+
+class FakeS3:
+    """S3 client with a dict of objects and fake presigned URLs."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"LastModified": self.objects[Key]}
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Key']}?op={method}"
+
+
+PY311 = "cpython-311 linux-x86_64\ndebian-12\n"
+PY312 = "cpython-312 linux-x86_64\ndebian-12\n"
+
+
+class FakeSandbox:
+    """Records shell commands; uploads land in the fake S3."""
+
+    def __init__(self, s3, fail_on=None, environment=PY311):
+        self.s3 = s3
+        self.fail_on = fail_on
+        self.environment = environment
+        self.commands = []
+
+    async def run_shell(self, command, timeout):
+        if "os-release" in command:
+            return {"success": True, "stdout": self.environment, "stderr": ""}
+        self.commands.append(command)
+        if self.fail_on and self.fail_on in command:
+            return {"success": False, "stderr": "boom"}
+        if "--upload-file" in command:
+            key = command.split("https://s3.test/")[1].split("?")[0]
+            self.s3.objects[key] = datetime.now(timezone.utc)
+        return {"success": True, "stdout": "", "stderr": ""}
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def cache(s3):
+    return LayerCache(s3_client=s3, bucket="layers")
+
+
+class TestLayerSpecs:
+    """Tests for dependency set normalization and keys."""
+
+    def test_normalize_groups_and_sorts(self):
+        groups = normalize_packages(["Pandas", "npm:lodash", "pip:numpy", "pandas", "apt:curl"])
+        assert groups == {"pip": ["numpy", "pandas"], "npm": ["lodash"], "apt": ["curl"]}
+
+    def test_key_ignores_order_and_duplicates(self):
+        first, _ = layer_specs(["numpy", "pandas"])
+        second, _ = layer_specs(["pip:pandas", "NumPy", "numpy"])
+        assert first[0].key == second[0].key
+
+    def test_key_changes_with_packages(self):
+        assert LayerSpec("pip", ("numpy",)).key != LayerSpec("pip", ("numpy==1.26",)).key
+
+    def test_apt_is_not_layered(self):
+        layers, uncached = layer_specs(["apt:curl", "requests"])
+        assert [spec.kind for spec in layers] == ["pip"]
+        assert uncached == ["apt:curl"]
+
+
+class TestLayerCache:
+    """Tests for restoring and building layers."""
+
+    @pytest.mark.asyncio
+    async def test_first_use_builds_and_uploads(self, cache, s3):
+        sandbox = FakeSandbox(s3)
+        spec = LayerSpec("pip", ("pandas",))
+
+        assert await cache.ensure_layer(sandbox.run_shell, spec)
+
+        assert cache.object_key(spec.with_environment("base|cpython-311 linux-x86_64|debian-12")) in s3.objects
+        assert cache.metrics["built"] == 1
+        assert "pip install" in sandbox.commands[0]
+
+    @pytest.mark.asyncio
+    async def test_second_sandbox_restores_with_one_extract(self, cache, s3):
+        spec = LayerSpec("pip", ("pandas",))
+        await cache.ensure_layer(FakeSandbox(s3).run_shell, spec)
+
+        sandbox = FakeSandbox(s3)
+        assert await cache.ensure_layer(sandbox.run_shell, spec)
+
+        assert len(sandbox.commands) == 1
+        assert "| tar -xzf - -C /" in sandbox.commands[0]
+        assert cache.metrics["restored"] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_interpreter_does_not_restore(self, cache, s3):
+        """A layer built under one Python ABI is never restored into another."""
+        spec = LayerSpec("pip", ("pandas",))
+        await cache.ensure_layer(FakeSandbox(s3, environment=PY311).run_shell, spec)
+
+        sandbox = FakeSandbox(s3, environment=PY312)
+        assert await cache.ensure_layer(sandbox.run_shell, spec)
+
+        assert "pip install" in sandbox.commands[0]
+        assert cache.metrics["built"] == 2
+        assert len(s3.objects) == 2
+
+    @pytest.mark.asyncio
+    async def test_template_is_part_of_the_key(self, cache, s3):
+        spec = LayerSpec("pip", ("pandas",))
+        await cache.ensure_layer(FakeSandbox(s3).run_shell, spec)
+
+        await cache.ensure_layer(FakeSandbox(s3).run_shell, spec, template="data-science")
+
+        assert cache.metrics["built"] == 2
+
+    @pytest.mark.asyncio
+    async def test_manager_keys_layers_by_sandbox_template(self, cache, s3):
+        manager = EnhancedE2BSandboxManager()
+        manager.layer_cache = cache
+        manager.sandbox_templates["run-1"] = "data-science"
+        sandbox = FakeSandbox(s3)
+        manager.execute_shell = lambda run_id, command, timeout: sandbox.run_shell(command, timeout)
+
+        assert await manager._install_packages("run-1", ["pandas"])
+
+        spec = LayerSpec("pip", ("pandas",))
+        assert list(s3.objects) == [
+            cache.object_key(spec.with_environment("data-science|cpython-311 linux-x86_64|debian-12"))
+        ]
+
+    @pytest.mark.asyncio
+    async def test_pip_layer_puts_scripts_on_path(self, cache, s3):
+        spec = LayerSpec("pip", ("pytest",))
+        built = FakeSandbox(s3)
+        await cache.ensure_layer(built.run_shell, spec)
+        restored = FakeSandbox(s3)
+        await cache.ensure_layer(restored.run_shell, spec)
+
+        assert "~/.bashrc" in built.commands[0]
+        assert "~/.bashrc" in restored.commands[0]
+
+    def test_path_entry_is_added_once(self, tmp_path):
+        env = dict(os.environ, HOME=str(tmp_path))
+        for _ in range(2):
+            subprocess.run(["bash", "-c", SCRIPTS_ON_PATH], env=env, check=True)
+
+        [line] = (tmp_path / ".bashrc").read_text().splitlines()
+        assert line.startswith('export PATH="/') and line.endswith('/bin:$PATH"')
+
+    @pytest.mark.asyncio
+    async def test_unprobed_sandbox_installs_without_cache(self, cache, s3):
+        sandbox = FakeSandbox(s3, environment="")
+
+        assert not await cache.ensure_layer(sandbox.run_shell, LayerSpec("pip", ("pandas",)))
+        assert sandbox.commands == []
+        assert not s3.objects
+
+    @pytest.mark.asyncio
+    async def test_stale_layer_is_rebuilt(self, cache, s3):
+        spec = LayerSpec("npm", ("typescript",))
+        node = "v20.11.0 linux-x64\ndebian-12\n"
+        stale_key = cache.object_key(spec.with_environment("base|v20.11.0 linux-x64|debian-12"))
+        s3.objects[stale_key] = datetime.now(timezone.utc) - timedelta(days=30)
+
+        sandbox = FakeSandbox(s3, environment=node)
+        assert await cache.ensure_layer(sandbox.run_shell, spec)
+
+        assert cache.metrics["built"] == 1
+        assert "npm install -g" in sandbox.commands[0]
+        assert s3.objects[stale_key] > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+    @pytest.mark.asyncio
+    async def test_build_failure_reports_false(self, cache, s3):
+        sandbox = FakeSandbox(s3, fail_on="playwright install")
+        assert not await cache.ensure_layer(sandbox.run_shell, PLAYWRIGHT_LAYER)
+        assert cache.metrics["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_s3(self):
+        cache = LayerCache(s3_client=None, bucket="layers")
+        cache.s3 = None
+        run_shell = Mock()
+
+        assert not await cache.ensure_layer(run_shell, LayerSpec("pip", ("x",)))
+        run_shell.assert_not_called()
+
+
+class TestPrebakedTemplates:
+    """Tests for template matching."""
+
+    def test_smallest_covering_template_wins(self):
+        cache = LayerCache(
+            s3_client=FakeS3(),
+            prebaked_templates={
+                "data-full": ["pandas", "numpy", "scipy", "npm:typescript"],
+                "data": ["pandas", "numpy"],
+            },
+        )
+        assert cache.match_template(["numpy", "Pandas"]) == "data"
+        assert cache.match_template(["scipy"]) == "data-full"
+
+    def test_no_match_when_package_missing(self):
+        cache = LayerCache(s3_client=FakeS3(), prebaked_templates={"data": ["pandas"]})
+        assert cache.match_template(["pandas", "torch"]) is None
+        assert cache.match_template([]) is None
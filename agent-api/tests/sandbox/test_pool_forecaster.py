@@ -0,0 +1,180 @@
+"""Tests for the warm pool demand forecaster and pool resizing."""
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.sandbox.pool_forecaster import (
+    PoolDemandForecaster,
+    expected_served,
+    predicted_hit_rate,
+)
+from app.sandbox.pool_manager import PooledSandbox, SandboxPoolManager, SandboxState
+
+
+def _arrivals(forecaster, template, count, now, hit=True):
+    for _ in range(count):
+        forecaster.record_acquire(template, hit=hit, now=now)
+
+
+class TestPoissonModel:
+    """Tests for the pool sizing model."""
+
+    def test_single_sandbox_serves_probability_of_any_arrival(self):
+        assert expected_served(2.0, 1) == pytest.approx(1 - math.exp(-2.0))
+
+    def test_large_pool_serves_all_demand(self):
+        assert predicted_hit_rate(3.0, 30) == pytest.approx(1.0)
+
+    def test_no_demand_is_always_a_hit(self):
+        assert predicted_hit_rate(0.0, 0) == 1.0
+
+
+class TestPoolDemandForecaster:
+    """Tests for PoolDemandForecaster."""
+
+    def test_floors_without_traffic(self):
+        forecaster = PoolDemandForecaster(min_warm={"base": 2})
+        assert forecaster.observe({}, now=0) == {"base": 2}
+
+    def test_burst_grows_pool(self):
+        forecaster = PoolDemandForecaster(min_warm={"base": 1})
+        forecaster.observe({}, now=0)
+        _arrivals(forecaster, "webdev", 10, now=10)
+
+        targets = forecaster.observe({}, now=30)
+
+        assert targets["webdev"] > 1
+        assert targets["base"] == 1
+
+    def test_queue_backlog_raises_target(self):
+        quiet = PoolDemandForecaster()
+        busy = PoolDemandForecaster()
+        for forecaster, pending in ((quiet, 0), (busy, 6)):
+            forecaster.observe({}, now=0)
+            _arrivals(forecaster, "base", 1, now=10)
+            forecaster.observe({"pending": pending, "processing": 50}, now=30)
+
+        assert busy.targets()["base"] > quiet.targets()["base"]
+        assert busy.backlog == 6
+
+    def test_idle_period_decays_to_floor(self):
+        forecaster = PoolDemandForecaster(min_warm={"base": 1})
+        forecaster.observe({}, now=0)
+        _arrivals(forecaster, "base", 20, now=10)
+        assert forecaster.observe({}, now=30)["base"] > 1
+
+        assert forecaster.observe({}, now=8 * 3600)["base"] == 1
+
+    def test_cost_cap_limits_total(self):
+        forecaster = PoolDemandForecaster(sandbox_hourly_cost=0.5, max_hourly_cost=2.0)
+        forecaster.observe({}, now=0)
+        _arrivals(forecaster, "base", 30, now=10)
+        _arrivals(forecaster, "webdev", 30, now=10)
+
+        targets = forecaster.observe({}, now=30)
+
+        assert forecaster.budget == 4
+        assert sum(targets.values()) == 4
+
+    def test_budget_goes_to_busier_template(self):
+        forecaster = PoolDemandForecaster(max_warm_total=3)
+        forecaster.observe({}, now=0)
+        _arrivals(forecaster, "base", 30, now=10)
+        _arrivals(forecaster, "webdev", 1, now=10)
+
+        targets = forecaster.observe({}, now=30)
+
+        assert targets["base"] > targets["webdev"]
+
+    def test_stats_report_predicted_and_actual_hit_rate(self):
+        forecaster = PoolDemandForecaster()
+        forecaster.observe({}, now=0)
+        _arrivals(forecaster, "base", 3, now=10, hit=True)
+        _arrivals(forecaster, "base", 1, now=10, hit=False)
+        forecaster.observe({}, now=30)
+
+        stats = forecaster.stats()
+
+        assert stats["templates"]["base"]["actual_hit_rate"] == 0.75
+        assert stats["templates"]["base"]["hits"] == 3
+        assert 0 < stats["predicted_hit_rate"] <= 1
+        assert stats["actual_hit_rate"] == 0.75
+
+
+class FakePoolManager(SandboxPoolManager):
+    """Pool manager that creates sandboxes without E2B."""
+
+    async def _create_sandbox(self, template="base"):
+        sandbox = PooledSandbox(
+            id=f"{template}-{len(self.sandboxes)}-{self.metrics['total_created']}",
+            sandbox_id="e2b",
+            state=SandboxState.READY,
+            created_at=datetime.utcnow(),
+            template=template,
+        )
+        self.sandboxes[sandbox.id] = sandbox
+        self.metrics["total_created"] += 1
+        return sandbox
+
+    async def _terminate_sandbox(self, sandbox):
+        del self.sandboxes[sandbox.id]
+        self.metrics["total_terminated"] += 1
+
+
+class TestForecastedPool:
+    """Tests for SandboxPoolManager resizing from the forecast."""
+
+    @pytest.mark.asyncio
+    async def test_without_forecaster_keeps_min_pool_size(self):
+        manager = FakePoolManager("key", min_pool_size=2)
+        await manager._ensure_min_pool_size()
+
+        assert len(manager._ready_sandboxes("base")) == 2
+        assert manager.get_stats()["forecast"] is None
+
+    @pytest.mark.asyncio
+    async def test_without_forecaster_idle_cleanup_uses_min_pool_size(self):
+        """Idle non-base sandboxes survive while the pool is at min size."""
+        manager = FakePoolManager("key", min_pool_size=2, max_idle_seconds=0)
+        await manager._create_sandbox("base")
+        await manager._create_sandbox("python")
+        await manager._create_sandbox("python")
+        for sandbox in manager.sandboxes.values():
+            sandbox.last_activity = datetime.utcnow() - timedelta(seconds=10)
+
+        await manager._cleanup_sandboxes()
+
+        assert len(manager.sandboxes) == 2
+
+    @pytest.mark.asyncio
+    async def test_pool_follows_targets(self):
+        forecaster = PoolDemandForecaster(min_warm={"base": 1})
+        stats = {"pending": 0}
+        manager = FakePoolManager(
+            "key", max_pool_size=20, forecaster=forecaster, queue_stats=lambda: dict(stats)
+        )
+        await manager._ensure_min_pool_size()
+        assert manager.targets == {"base": 1}
+
+        stats["pending"] = 5
+        await manager._ensure_min_pool_size()
+        assert len(manager._ready_sandboxes("base")) > 1
+
+        stats["pending"] = 0
+        await manager._ensure_min_pool_size()
+        assert len(manager._ready_sandboxes("base")) == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_records_hits_and_misses(self):
+        forecaster = PoolDemandForecaster(min_warm={"base": 1})
+        manager = FakePoolManager("key", forecaster=forecaster, queue_stats=lambda: {})
+        await manager._ensure_min_pool_size()
+
+        await manager.acquire("run-1", "base")
+        await manager.acquire("run-2", "base")
+
+        forecast = manager.get_stats()["forecast"]
+        assert forecast["templates"]["base"]["hits"] == 1
+        assert forecast["templates"]["base"]["misses"] == 1
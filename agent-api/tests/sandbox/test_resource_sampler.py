@@ -0,0 +1,248 @@
+"""Tests for cgroup resource sampling and enforcement."""
+
+import os
+import shutil
+
+from app.sandbox.resource_limits import ResourceTier, get_tier_limits
+from app.sandbox.resource_sampler import (
+    ResourceSampler,
+    cgroup_of_pid,
+    cgroup_of_pod,
+    read_cgroup_stats,
+)
+
+FREE = get_tier_limits(ResourceTier.FREE)
+
+
+class FakeCgroup:
+    """A cgroup v2 directory with writable counters."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.cpu_usec = 0
+        self.io_bytes = 0
+        self.oom_kills = 0
+        self.update(memory=0, anon=0)
+
+    def update(self, cpu_ms=0, memory=None, anon=None, io_bytes=0, pids=1, oom_kills=0):
+        self.cpu_usec += cpu_ms * 1000
+        self.io_bytes += io_bytes
+        self.oom_kills += oom_kills
+        self._write("cpu.stat", f"usage_usec {self.cpu_usec}\nuser_usec 0\nsystem_usec 0\n")
+        if memory is not None:
+            self._write("memory.current", f"{memory}\n")
+        if anon is not None:
+            self._write("memory.stat", f"anon {anon}\nfile {max((memory or 0) - anon, 0)}\n")
+        self._write("memory.events", f"low 0\nhigh 0\nmax 0\noom {self.oom_kills}\noom_kill {self.oom_kills}\n")
+        self._write("io.stat", f"8:0 rbytes={self.io_bytes} wbytes=0 rios=0 wios=0 dbytes=0 dios=0\n")
+        self._write("pids.current", f"{pids}\n")
+
+    def read(self, name):
+        with open(os.path.join(self.path, name)) as f:
+            return f.read()
+
+    def _write(self, name, content):
+        with open(os.path.join(self.path, name), "w") as f:
+            f.write(content)
+
+
+def _sample(sampler, cgroup, seconds, **usage):
+    """Advance the fake clock by `seconds` with the given usage"""
+    sampler.clock += seconds
+    cgroup.update(**usage)
+    return sampler.sample_once(now=sampler.clock)
+
+
+def _sampler(**kwargs):
+    sampler = ResourceSampler(sustain_samples=3, history_size=5, **kwargs)
+    sampler.clock = 100.0
+    return sampler
+
+
+class TestReadCgroupStats:
+    """Tests for parsing cgroup v2 files."""
+
+    def test_reads_counters_and_tolerates_missing_files(self, tmp_path):
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        cgroup.update(cpu_ms=1500, memory=4096, anon=1024, io_bytes=10, pids=3, oom_kills=1)
+        os.remove(os.path.join(cgroup.path, "pids.current"))
+
+        stats = read_cgroup_stats(cgroup.path, now=1.0)
+
+        assert (stats.cpu_usage_usec, stats.memory_bytes, stats.io_read_bytes) == (1_500_000, 4096, 10)
+        assert (stats.memory_anon_bytes, stats.memory_oom_events) == (1024, 2)
+        assert stats.pids == 0
+        assert stats.io_devices == ["8:0"]
+
+    def test_resolves_own_process_cgroup(self):
+        path = cgroup_of_pid(os.getpid())
+        assert path is None or path.startswith("/sys/fs/cgroup")
+
+    def test_does_not_register_own_cgroup(self):
+        sampler = ResourceSampler()
+        assert not sampler.register_process("worker", "free", os.getpid())
+        assert not sampler.sandboxes
+
+    def test_resolves_pod_cgroup(self, tmp_path):
+        uid = "1234-abcd"
+        pod_dir = tmp_path / "kubepods.slice" / "kubepods-burstable.slice" / "kubepods-burstable-pod1234_abcd.slice"
+        pod_dir.mkdir(parents=True)
+
+        assert cgroup_of_pod(uid, root=str(tmp_path)) == str(pod_dir)
+        assert cgroup_of_pod("other", root=str(tmp_path)) is None
+
+
+class TestResourceSampler:
+    """Tests for ResourceSampler."""
+
+    def test_rates_and_ring_buffer(self, tmp_path):
+        sampler = _sampler()
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", "free", cgroup.path)
+
+        assert _sample(sampler, cgroup, 0) == {}  # First read has no delta
+        sample = _sample(sampler, cgroup, 2, cpu_ms=500, memory=1024, io_bytes=2048)["sb-1"]
+
+        assert sample.cpu_millicores == 250
+        assert sample.io_read_bps == 1024
+        for _ in range(10):
+            _sample(sampler, cgroup, 1)
+        assert len(sampler.series("sb-1")) == 5
+
+    def test_sustained_cpu_overuse_is_throttled_once(self, tmp_path):
+        actions = []
+        sampler = _sampler(on_action=lambda *a: actions.append(a))
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", "free", cgroup.path)
+        _sample(sampler, cgroup, 0)
+
+        # 900m against a 500m limit: a short burst is tolerated
+        _sample(sampler, cgroup, 1, cpu_ms=900)
+        _sample(sampler, cgroup, 1, cpu_ms=100)
+        assert actions == []
+
+        for _ in range(5):
+            _sample(sampler, cgroup, 1, cpu_ms=900)
+
+        assert actions == [("sb-1", "cpu", "throttle")]
+        quota = FREE.cpu.request_millicores * FREE.cpu.period_microseconds // 1000
+        assert cgroup.read("cpu.max") == f"{quota} {FREE.cpu.period_microseconds}"
+
+    def test_sustained_memory_at_limit_kills(self, tmp_path):
+        sampler = _sampler()
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", ResourceTier.FREE, cgroup.path)
+        _sample(sampler, cgroup, 0)
+
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, memory=FREE.memory.limit_bytes, anon=FREE.memory.limit_bytes)
+
+        assert cgroup.read("cgroup.kill") == "1"
+        assert sampler.metrics["killed"] == 1
+
+    def test_page_cache_at_limit_is_not_killed(self, tmp_path):
+        """memory.current at the limit from reclaimable page cache is tolerated."""
+        sampler = _sampler()
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", ResourceTier.FREE, cgroup.path)
+        _sample(sampler, cgroup, 0)
+
+        for _ in range(5):
+            _sample(sampler, cgroup, 1, memory=FREE.memory.limit_bytes, anon=FREE.memory.limit_bytes // 4)
+
+        assert not os.path.exists(os.path.join(cgroup.path, "cgroup.kill"))
+
+    def test_repeated_oom_kills_kill_the_sandbox(self, tmp_path):
+        sampler = _sampler()
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", ResourceTier.FREE, cgroup.path)
+        _sample(sampler, cgroup, 0)
+
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, oom_kills=1)
+
+        assert cgroup.read("cgroup.kill") == "1"
+
+    def test_throttle_is_lifted_after_calm_period(self, tmp_path):
+        actions = []
+        sampler = _sampler(on_action=lambda *a: actions.append(a), release_samples=4)
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        cgroup._write("cpu.max", "50000 100000\n")
+        sampler.register("sb-1", "free", cgroup.path)
+        _sample(sampler, cgroup, 0)
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, cpu_ms=900)
+
+        # Pinned at the throttled rate: the throttle is still binding
+        for _ in range(6):
+            _sample(sampler, cgroup, 1, cpu_ms=FREE.cpu.request_millicores)
+        # A calm streak broken by one busy sample does not count
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, cpu_ms=10)
+        _sample(sampler, cgroup, 1, cpu_ms=FREE.cpu.request_millicores)
+        assert actions == [("sb-1", "cpu", "throttle")]
+
+        for _ in range(4):
+            _sample(sampler, cgroup, 1, cpu_ms=10)
+
+        assert actions[-1] == ("sb-1", "cpu", "release")
+        assert cgroup.read("cpu.max") == "50000 100000"
+        assert sampler.metrics["released"] == 1
+
+    def test_io_throttle_release_removes_limit(self, tmp_path):
+        sampler = _sampler(release_samples=2)
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", "free", cgroup.path)
+        _sample(sampler, cgroup, 0)
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, io_bytes=FREE.io.read_bytes_per_second * 2)
+
+        for _ in range(2):
+            _sample(sampler, cgroup, 1)
+
+        assert cgroup.read("io.max") == "8:0 rbps=max wbps=max riops=max wiops=max"
+        assert not sampler.sandboxes["sb-1"].throttled["io"]
+
+    def test_io_overuse_throttles_seen_devices(self, tmp_path):
+        sampler = _sampler()
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", "free", cgroup.path)
+        _sample(sampler, cgroup, 0)
+
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, io_bytes=FREE.io.read_bytes_per_second * 2)
+
+        assert cgroup.read("io.max").startswith("8:0 rbps=")
+
+    def test_record_only_mode(self, tmp_path):
+        sampler = _sampler(enforce=False)
+        cgroup = FakeCgroup(str(tmp_path / "sb"))
+        sampler.register("sb-1", "free", cgroup.path)
+        _sample(sampler, cgroup, 0)
+        for _ in range(3):
+            _sample(sampler, cgroup, 1, cpu_ms=900)
+
+        assert sampler.metrics["violations"] == 1
+        assert not os.path.exists(os.path.join(cgroup.path, "cpu.max"))
+
+    def test_tier_utilization_and_removed_cgroups(self, tmp_path):
+        sampler = _sampler()
+        a = FakeCgroup(str(tmp_path / "a"))
+        b = FakeCgroup(str(tmp_path / "b"))
+        sampler.register("a", "free", a.path)
+        sampler.register("b", "free", b.path)
+        sampler.sample_once(now=sampler.clock)
+        sampler.clock += 1
+        a.update(cpu_ms=250, memory=FREE.memory.limit_bytes // 4, anon=FREE.memory.limit_bytes // 4)
+        b.update(cpu_ms=50)
+        sampler.sample_once(now=sampler.clock)
+
+        free = sampler.tier_utilization()["free"]
+        assert free["sandboxes"] == 2
+        assert free["cpu_mean"] == 0.3
+        assert free["cpu_p95"] == 0.5
+
+        shutil.rmtree(b.path)
+        sampler.sample_once(now=sampler.clock + 1)
+        assert list(sampler.sandboxes) == ["a"]
@@ -0,0 +1,344 @@
+"""Tests for incremental, blob-backed S3 workspace sync."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.config import get_settings
+from app.storage.s3_workspace import (
+    DELETE_BATCH_SIZE,
+    LEGACY_LOCAL_MANIFEST_NAME,
+    MANIFEST_NAME,
+    S3Workspace,
+    collect_workspace_garbage,
+)
+
+
+class FakeBody:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class FakePaginator:
+    def __init__(self, s3):
+        self.s3 = s3
+
+    def paginate(self, Bucket, Prefix):
+        yield {"Contents": [
+            {"Key": key, "Size": len(data), "LastModified": self.s3.modified.get(key, datetime.now(timezone.utc))}
+            for key, data in sorted(self.s3.objects.items()) if key.startswith(Prefix)
+        ]}
+
+
+class FakeS3:
+    """In-memory S3 client recording transfer calls."""
+
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+        self.calls = []
+
+    def _missing(self, op):
+        return ClientError({"Error": {"Code": "NoSuchKey"}}, op)
+
+    def etag(self, key):
+        return f'"{hash(self.objects[key])}"' if key in self.objects else None
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        self.calls.append(("put_object", Key))
+        if (IfMatch and IfMatch != self.etag(Key)) or (IfNoneMatch == "*" and Key in self.objects):
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing("GetObject")
+        return {"Body": FakeBody(self.objects[Key]), "ETag": self.etag(Key)}
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(("head_object", Key))
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"LastModified": self.modified.get(Key, datetime.now(timezone.utc))}
+
+    def copy_object(self, Bucket, Key, CopySource, **kwargs):
+        self.calls.append(("copy_object", Key))
+        if CopySource["Key"] not in self.objects:
+            raise self._missing("CopyObject")
+        self.objects[Key] = self.objects[CopySource["Key"]]
+        self.modified.pop(Key, None)
+
+    def delete_object(self, Bucket, Key):
+        self.calls.append(("delete_object", Key))
+        self.objects.pop(Key, None)
+
+    def delete_objects(self, Bucket, Delete):
+        self.calls.append(("delete_objects", len(Delete["Objects"])))
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+    def upload_file(self, filename, bucket, key, Config=None):
+        self.calls.append(("upload_file", key))
+        self.objects[key] = Path(filename).read_bytes()
+
+    def download_file(self, bucket, key, filename, Config=None):
+        self.calls.append(("download_file", key))
+        Path(filename).write_bytes(self.objects[key])
+
+    def list_objects_v2(self, Bucket, Prefix):
+        return next(FakePaginator(self).paginate(Bucket, Prefix))
+
+    def get_paginator(self, name):
+        return FakePaginator(self)
+
+    def count(self, op):
+        return sum(1 for call in self.calls if call[0] == op)
+
+    def blobs(self):
+        return [key for key in self.objects if key.startswith("blobs/")]
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path_factory, monkeypatch):
+    path = tmp_path_factory.mktemp("workspace-state")
+    monkeypatch.setattr(get_settings(), "s3_workspace_state_dir", str(path))
+    return path
+
+
+@pytest.fixture
+def s3():
+    fake = FakeS3()
+    with patch("app.storage.s3_workspace.boto3.client", return_value=fake):
+        yield fake
+
+
+def _write(root: Path, files):
+    for relative, data in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+class TestIncrementalSync:
+    """Tests for download_to_pod/upload_from_pod."""
+
+    @pytest.mark.asyncio
+    async def test_upload_only_sends_changes(self, s3, tmp_path):
+        workspace = S3Workspace("user-1", "run-1")
+        _write(tmp_path, {"a.txt": b"a", "src/b.py": b"b", "src/c.py": b"c"})
+
+        first = await workspace.upload_from_pod(tmp_path)
+        assert first == {"uploaded": 3, "deleted": 0, "unchanged": 0}
+
+        s3.calls.clear()
+        _write(tmp_path, {"src/b.py": b"changed"})
+        (tmp_path / "a.txt").unlink()
+        second = await workspace.upload_from_pod(tmp_path)
+
+        assert second == {"uploaded": 1, "deleted": 1, "unchanged": 1}
+        assert s3.count("upload_file") == 1
+        assert await workspace.read_file("src/b.py") == b"changed"
+        assert not await workspace.file_exists("a.txt")
+
+        s3.calls.clear()
+        third = await workspace.upload_from_pod(tmp_path)
+        assert third["uploaded"] == 0
+        assert s3.calls == []
+
+    @pytest.mark.asyncio
+    async def test_download_mirrors_workspace_incrementally(self, s3, tmp_path, state_dir):
+        workspace = S3Workspace("user-1", "run-1")
+        source = tmp_path / "source"
+        _write(source, {"a.txt": b"a", "src/b.py": b"b"})
+        await workspace.upload_from_pod(source)
+
+        pod = tmp_path / "pod"
+        _write(pod, {"a.txt": b"a", "stale.txt": b"old"})
+        result = await workspace.download_to_pod(pod)
+
+        assert result == {"downloaded": 1, "deleted": 1, "unchanged": 1}
+        assert (pod / "src/b.py").read_bytes() == b"b"
+        assert not (pod / "stale.txt").exists()
+        assert sorted(p.relative_to(pod).as_posix() for p in pod.rglob("*") if p.is_file()) == ["a.txt", "src/b.py"]
+        assert workspace._local_cache_file(pod).exists()
+
+        s3.calls.clear()
+        again = await workspace.download_to_pod(pod)
+        assert again["downloaded"] == 0
+        assert s3.count("download_file") == 0
+
+    @pytest.mark.asyncio
+    async def test_hash_cache_stays_out_of_synced_tree(self, s3, tmp_path, state_dir):
+        workspace = S3Workspace("user-1", "run-1")
+        _write(tmp_path, {"a.txt": b"a", LEGACY_LOCAL_MANIFEST_NAME: b"{}"})
+
+        await workspace.upload_from_pod(tmp_path)
+
+        assert [f["filepath"] for f in await workspace.list_files()] == ["a.txt"]
+        assert not (tmp_path / LEGACY_LOCAL_MANIFEST_NAME).exists()
+        other = S3Workspace("user-1", "run-2")
+        assert other._local_cache_file(tmp_path) != workspace._local_cache_file(tmp_path)
+        assert workspace._local_cache_file(tmp_path).parent == state_dir
+
+    @pytest.mark.asyncio
+    async def test_direct_writes_update_manifest(self, s3, tmp_path):
+        workspace = S3Workspace("user-1", "run-1")
+        _write(tmp_path, {"a.txt": b"a"})
+        await workspace.upload_from_pod(tmp_path)
+
+        await workspace.write_file("notes.md", b"hello")
+        pod = tmp_path / "pod"
+        result = await workspace.download_to_pod(pod)
+
+        assert result["downloaded"] == 2
+        assert (pod / "notes.md").read_bytes() == b"hello"
+        assert [f["filepath"] for f in await workspace.list_files()] == ["a.txt", "notes.md"]
+
+        await workspace.delete_file("notes.md")
+        assert [f["filepath"] for f in await workspace.list_files()] == ["a.txt"]
+        with pytest.raises(FileNotFoundError):
+            await workspace.read_file("notes.md")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writer_in_other_process_is_not_lost(self, s3):
+        """A manifest replaced between read and write is re-read, not overwritten."""
+        workspace = S3Workspace("user-1", "run-1")
+        await workspace.write_file("a.txt", b"a")
+        other = S3Workspace("user-1", "run-1")
+        get_object = s3.get_object
+        raced = []
+
+        def racing_get_object(Bucket, Key):
+            response = get_object(Bucket, Key)
+            if Key == workspace.manifest_key and not raced:
+                raced.append(Key)
+                manifest = json.loads(s3.objects[Key])
+                manifest["b.txt"] = {**manifest["a.txt"], "sha256": other.blobs.put_bytes(b"b")}
+                s3.objects[Key] = json.dumps(manifest).encode()
+            return response
+
+        s3.get_object = racing_get_object
+        assert await workspace.write_file("c.txt", b"c")
+
+        assert [f["filepath"] for f in await other.list_files()] == ["a.txt", "b.txt", "c.txt"]
+        manifest_puts = [call for call in s3.calls if call == ("put_object", workspace.manifest_key)]
+        assert len(manifest_puts) == 3  # First write, lost race, retry
+
+    @pytest.mark.asyncio
+    async def test_clear_workspace_removes_manifest(self, s3, tmp_path):
+        workspace = S3Workspace("user-1", "run-1")
+        _write(tmp_path, {"a.txt": b"a", "b.txt": b"b"})
+        await workspace.upload_from_pod(tmp_path)
+
+        assert await workspace.clear_workspace() == 2
+        assert not [key for key in s3.objects if key.startswith(workspace.prefix)]
+        assert await workspace.list_files() == []
+
+
+class TestContentAddressedStorage:
+    """Tests for deduplication through the blob store."""
+
+    @pytest.mark.asyncio
+    async def test_known_content_is_head_only(self, s3, tmp_path):
+        template = {"package.json": b"{}", "src/index.js": b"console.log(1)"}
+        _write(tmp_path / "one", template)
+        _write(tmp_path / "two", {**template, "src/extra.js": b"2"})
+
+        await S3Workspace("user-1", "run-1").upload_from_pod(tmp_path / "one")
+        s3.calls.clear()
+        result = await S3Workspace("user-2", "run-2").upload_from_pod(tmp_path / "two")
+
+        assert result["uploaded"] == 3
+        assert s3.count("head_object") == 3
+        assert s3.count("upload_file") == 1
+        assert len(s3.blobs()) == 3
+
+    @pytest.mark.asyncio
+    async def test_regenerated_artifact_is_not_reuploaded(self, s3):
+        workspace = S3Workspace("user-1", "run-1")
+        await workspace.write_file("documents/report.pdf", b"%PDF")
+        s3.calls.clear()
+        await S3Workspace("user-1", "run-2").write_file("documents/report.pdf", b"%PDF")
+
+        assert s3.count("put_object") == 1  # Only the manifest
+        assert len(s3.blobs()) == 1
+
+    @pytest.mark.asyncio
+    async def test_dedupe_refreshes_old_blob(self, s3):
+        """Reusing content older than half the grace period resets its age."""
+        await S3Workspace("user-1", "run-1").write_file("report.pdf", b"%PDF")
+        [blob] = s3.blobs()
+        s3.modified[blob] = datetime.now(timezone.utc) - timedelta(hours=20)
+        await S3Workspace("user-1", "run-1").clear_workspace()
+
+        await S3Workspace("user-1", "run-2").write_file("report.pdf", b"%PDF")
+
+        assert s3.count("copy_object") == 1
+        assert blob not in s3.modified
+        assert (await collect_workspace_garbage(grace_seconds=86400))["deleted"] == 0
+
+    @pytest.mark.asyncio
+    async def test_legacy_objects_migrate_into_blobs(self, s3, tmp_path):
+        workspace = S3Workspace("user-1", "run-1", max_concurrency=4)
+        count = DELETE_BATCH_SIZE + 5
+        for i in range(count):
+            s3.objects[f"{workspace.prefix}f{i}.txt"] = str(i).encode()
+
+        assert await workspace.read_file("f7.txt") == b"7"
+        pod = tmp_path / "pod"
+        assert (await workspace.download_to_pod(pod))["downloaded"] == count
+
+        s3.calls.clear()
+        await workspace.upload_from_pod(pod)
+
+        # Per-run copies are removed in delete_objects batches
+        assert [c for c in s3.calls if c[0] == "delete_objects"] == [
+            ("delete_objects", DELETE_BATCH_SIZE), ("delete_objects", 5)
+        ]
+        assert [key for key in s3.objects if key.startswith(workspace.prefix)] == [workspace.manifest_key]
+        assert await workspace.read_file("f7.txt") == b"7"
+
+    @pytest.mark.asyncio
+    async def test_garbage_collection_keeps_referenced_blobs(self, s3):
+        keep = S3Workspace("user-1", "run-1")
+        drop = S3Workspace("user-1", "run-2")
+        await keep.write_file("shared.txt", b"shared")
+        await drop.write_file("shared.txt", b"shared")
+        await drop.write_file("only-here.txt", b"gone")
+        await drop.clear_workspace()
+
+        assert len(s3.blobs()) == 2
+        assert (await collect_workspace_garbage(grace_seconds=3600))["deleted"] == 0
+
+        for key in s3.blobs():
+            s3.modified[key] = datetime.now(timezone.utc) - timedelta(hours=2)
+        result = await collect_workspace_garbage(grace_seconds=3600)
+        assert result == {"referenced": 1, "deleted": 1, "retained": 0}
+        assert await keep.read_file("shared.txt") == b"shared"
+
+    @pytest.mark.asyncio
+    async def test_garbage_collection_spares_blob_refreshed_after_listing(self, s3):
+        workspace = S3Workspace("user-1", "run-1")
+        await workspace.write_file("a.txt", b"a")
+        await workspace.clear_workspace()
+        [blob] = s3.blobs()
+        s3.modified[blob] = datetime.now(timezone.utc) - timedelta(hours=2)
+        head_object = s3.head_object
+
+        def refreshed_head_object(Bucket, Key):
+            # A writer deduplicated the blob after GC listed it
+            s3.modified.pop(Key, None)
+            return head_object(Bucket, Key)
+
+        s3.head_object = refreshed_head_object
+        result = await collect_workspace_garbage(grace_seconds=3600)
+
+        assert result == {"referenced": 0, "deleted": 0, "retained": 1}
+        assert s3.blobs() == [blob]
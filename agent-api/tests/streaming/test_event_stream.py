@@ -0,0 +1,215 @@
+"""Tests for the Redis Streams run event log and SSE streaming."""
+
+import json
+import pytest
+from unittest.mock import Mock, AsyncMock, MagicMock, patch
+
+from app.redis.event_stream import (
+    RunEventStream,
+    STREAM_START_ID,
+    insert_run_message,
+    run_events_key,
+)
+
+
+def _mock_redis():
+    """Create mock async Redis client with a pipeline context manager."""
+    redis = Mock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=["1-0", True])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    redis.pipeline.return_value = pipe
+    redis.xread = AsyncMock(return_value=[])
+    redis.xrevrange = AsyncMock(return_value=[])
+    return redis, pipe
+
+
+def _entry(entry_id, event_type, data):
+    return (entry_id, {"event": event_type, "data": json.dumps(data)})
+
+
+class TestRunEventStream:
+    """Tests for RunEventStream append/read."""
+
+    @pytest.mark.asyncio
+    async def test_append_caps_and_expires(self):
+        """Appends are capped with approximate MAXLEN and refresh the TTL."""
+        redis, pipe = _mock_redis()
+        events = RunEventStream(redis, maxlen=50, ttl_seconds=60)
+
+        entry_id = await events.append("run-1", "message", {"content": "hi"})
+
+        assert entry_id == "1-0"
+        key, fields = pipe.xadd.call_args.args
+        assert key == run_events_key("run-1")
+        assert fields["event"] == "message"
+        assert json.loads(fields["data"]) == {"content": "hi"}
+        assert pipe.xadd.call_args.kwargs == {"maxlen": 50, "approximate": True}
+        pipe.expire.assert_called_once_with(key, 60)
+
+    @pytest.mark.asyncio
+    async def test_append_swallows_errors(self):
+        """A Redis failure never propagates into the worker."""
+        redis, pipe = _mock_redis()
+        pipe.execute.side_effect = ConnectionError("down")
+
+        assert await RunEventStream(redis).append("run-1", "status", {}) is None
+
+    @pytest.mark.asyncio
+    async def test_terminal_status_appends_complete(self):
+        """Terminal statuses are followed by a complete event."""
+        redis, pipe = _mock_redis()
+
+        await RunEventStream(redis).append_status("run-1", "failed", error_message="boom")
+
+        types = [call.args[1]["event"] for call in pipe.xadd.call_args_list]
+        assert types == ["status", "complete"]
+        assert json.loads(pipe.xadd.call_args.args[1]["data"])["message"] == "boom"
+
+    @pytest.mark.asyncio
+    async def test_last_id_empty_stream(self):
+        """An empty stream resumes from the start id."""
+        redis, _ = _mock_redis()
+
+        assert await RunEventStream(redis).last_id("run-1") == STREAM_START_ID
+
+    @pytest.mark.asyncio
+    async def test_read_decodes_entries(self):
+        """read returns (id, type, data) tuples and passes the block timeout."""
+        redis, _ = _mock_redis()
+        redis.xread.return_value = [
+            (run_events_key("run-1"), [_entry("5-0", "tool_call", {"step_id": "s1"})]),
+        ]
+
+        events = await RunEventStream(redis).read("run-1", "4-0", block_ms=1000)
+
+        assert events == [("5-0", "tool_call", {"step_id": "s1"})]
+        redis.xread.assert_called_once_with(
+            {run_events_key("run-1"): "4-0"}, count=100, block=1000,
+        )
+
+
+class TestInsertRunMessage:
+    """Tests for insert_run_message."""
+
+    @pytest.mark.asyncio
+    async def test_message_reaches_stream(self):
+        """Messages stored after a client connected are streamed, not only backfilled."""
+        redis, pipe = _mock_redis()
+        supabase = Mock()
+        supabase.table.return_value.insert.return_value.execute.return_value = Mock(
+            data=[{"id": "m1", "run_id": "run-1", "role": "assistant", "content": "done"}]
+        )
+
+        row = await insert_run_message(
+            supabase, "run-1", "assistant", "done", events=RunEventStream(redis)
+        )
+
+        assert row["id"] == "m1"
+        supabase.table.assert_called_once_with("agent_messages")
+        assert pipe.xadd.call_args.args[1]["event"] == "message"
+        assert json.loads(pipe.xadd.call_args.args[1]["data"]) == {
+            "message_id": "m1", "role": "assistant", "content": "done",
+        }
+
+    @pytest.mark.asyncio
+    async def test_send_message_tool_appends(self):
+        """The send_message tool goes through the event stream."""
+        from app.agent.models.types import ToolContext
+        from app.agent.tools.router import ToolRouter
+
+        with patch("app.agent.tools.router.get_settings") as settings, \
+                patch("app.agent.tools.router.insert_run_message", new_callable=AsyncMock) as insert:
+            settings.return_value.e2b_api_key = None
+            router = ToolRouter(Mock())
+            result = await router._send_message(
+                {"message": "hello"}, ToolContext(run_id="run-1", user_id="u", step_id="s")
+            )
+
+        assert result.success
+        insert.assert_awaited_once_with(router.supabase, "run-1", "assistant", "hello")
+
+
+class TestAgentEventStream:
+    """Tests for the SSE endpoint stream generator."""
+
+    @pytest.fixture
+    def mock_supabase(self):
+        """Supabase mock returning a running run with no steps or messages."""
+        supabase = Mock()
+        table = Mock()
+        table.select.return_value = table
+        table.eq.return_value = table
+        table.order.return_value = table
+        runs = Mock(data=[{"id": "run-1", "status": "executing", "current_phase": 1}])
+        empty = Mock(data=[])
+
+        def execute():
+            return runs if supabase.table.call_args.args[0] == "agent_runs" else empty
+
+        table.execute.side_effect = execute
+        supabase.table.return_value = table
+        return supabase
+
+    @pytest.fixture
+    def request_mock(self):
+        request = Mock()
+        request.is_disconnected = AsyncMock(return_value=False)
+        return request
+
+    def _stream(self, supabase, redis, last_event_id=None):
+        from app.routes.stream import AgentEventStream
+
+        with patch("app.routes.stream.get_stream_redis", return_value=redis), \
+                patch("app.routes.stream.get_api_redis", return_value=Mock()):
+            return AgentEventStream(supabase, "run-1", "user-1", last_event_id=last_event_id)
+
+    @pytest.mark.asyncio
+    async def test_first_connect_backfills_then_streams(self, mock_supabase, request_mock):
+        """Backfill ends with the captured tail id; live events follow from it."""
+        redis, _ = _mock_redis()
+        redis.xrevrange.return_value = [_entry("7-0", "status", {})]
+        redis.xread.return_value = [(run_events_key("run-1"), [
+            _entry("8-0", "message", {"content": "done"}),
+            _entry("9-0", "complete", {"status": "completed"}),
+        ])]
+        stream = self._stream(mock_supabase, redis)
+
+        events = [event async for event in stream.stream(request_mock)]
+
+        assert events[0] == 'id: 7-0\nevent: status\ndata: {"status": "executing", "current_phase": 1, "total_phases": 0}\n\n'
+        assert events[1].startswith("id: 8-0\nevent: message\n")
+        assert events[2].startswith("id: 9-0\nevent: complete\n")
+        assert redis.xread.call_args.args[0] == {run_events_key("run-1"): "7-0"}
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_backfill(self, mock_supabase, request_mock):
+        """Last-Event-ID resumes the stream without re-reading steps/messages."""
+        redis, _ = _mock_redis()
+        redis.xread.return_value = [(run_events_key("run-1"), [
+            _entry("12-0", "complete", {"status": "completed"}),
+        ])]
+        stream = self._stream(mock_supabase, redis, last_event_id="11-0")
+
+        events = [event async for event in stream.stream(request_mock)]
+
+        assert len(events) == 1
+        assert redis.xread.call_args.args[0] == {run_events_key("run-1"): "11-0"}
+        tables = [call.args[0] for call in mock_supabase.table.call_args_list]
+        assert tables == ["agent_runs"]
+
+    @pytest.mark.asyncio
+    async def test_idle_timeout_heartbeats_and_checks_run(self, mock_supabase, request_mock):
+        """A block timeout sends a heartbeat and completes a run that finished silently."""
+        redis, _ = _mock_redis()
+        stream = self._stream(mock_supabase, redis, last_event_id="3-0")
+        finished = {"id": "run-1", "status": "failed", "error_message": "crashed"}
+        stream._get_run = AsyncMock(side_effect=[{"id": "run-1", "status": "executing"}, finished])
+
+        events = [event async for event in stream.stream(request_mock)]
+
+        assert [e.split("\n")[0] for e in events] == ["event: heartbeat", "id: 3-0"]
+        assert '"message": "crashed"' in events[1]
+        assert redis.xread.call_args_list[0].kwargs["block"] == stream.BLOCK_MS
+        assert redis.xread.call_args_list[-1].kwargs["block"] is None
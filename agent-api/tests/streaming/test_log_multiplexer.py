@@ -0,0 +1,91 @@
+"""Tests for the shared pub/sub log multiplexer."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from app.redis.subscriber import LogMultiplexer, LogSubscriber
+
+
+@pytest.fixture
+def pubsub():
+    """Mock pub/sub connection fed from an asyncio queue."""
+    pubsub = Mock()
+    pubsub.subscribe = AsyncMock()
+    pubsub.unsubscribe = AsyncMock()
+    pubsub.aclose = AsyncMock()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    async def get_message(ignore_subscribe_messages=True, timeout=1.0):
+        try:
+            return await asyncio.wait_for(inbox.get(), timeout=0.01)
+        except asyncio.TimeoutError:
+            return None
+
+    pubsub.get_message = get_message
+    pubsub.inbox = inbox
+    return pubsub
+
+
+@pytest.fixture
+async def multiplexer(pubsub):
+    redis = Mock()
+    redis.pubsub.return_value = pubsub
+    multiplexer = LogMultiplexer(redis, queue_size=2)
+    yield multiplexer
+    await multiplexer.close()
+
+
+def _message(channel, data):
+    return {"type": "message", "channel": channel, "data": json.dumps(data)}
+
+
+class TestLogMultiplexer:
+    """Tests for LogMultiplexer."""
+
+    @pytest.mark.asyncio
+    async def test_one_connection_reference_counted(self, multiplexer, pubsub):
+        """Channels are subscribed once and released with their last listener."""
+        first = await multiplexer.subscribe("agent:logs:a")
+        second = await multiplexer.subscribe("agent:logs:a")
+
+        pubsub.subscribe.assert_awaited_once_with("agent:logs:a")
+        assert multiplexer.redis.pubsub.call_count == 1
+        assert multiplexer.stats()["listeners"] == 2
+
+        await multiplexer.unsubscribe("agent:logs:a", first)
+        pubsub.unsubscribe.assert_not_awaited()
+        await multiplexer.unsubscribe("agent:logs:a", second)
+        pubsub.unsubscribe.assert_awaited_once_with("agent:logs:a")
+        assert multiplexer.stats()["channels"] == 0
+
+    @pytest.mark.asyncio
+    async def test_fans_out_and_drops_oldest(self, multiplexer, pubsub):
+        """Every listener gets each message; full queues drop the oldest."""
+        queues = [await multiplexer.subscribe("agent:logs:a") for _ in range(2)]
+        other = await multiplexer.subscribe("agent:logs:b")
+
+        for i in range(3):
+            await pubsub.inbox.put(_message("agent:logs:a", {"i": i}))
+        while not pubsub.inbox.empty():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+
+        for queue in queues:
+            assert [queue.get_nowait()["i"] for _ in range(queue.qsize())] == [1, 2]
+        assert other.empty()
+        assert multiplexer.stats()["dropped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_subscriber_stops_on_complete(self, multiplexer, pubsub):
+        """LogSubscriber yields until the completion event and then unsubscribes."""
+        subscriber = LogSubscriber("a", multiplexer=multiplexer)
+        await subscriber.subscribe()
+        await pubsub.inbox.put(_message("agent:logs:a", {"type": "log"}))
+        await pubsub.inbox.put(_message("agent:logs:a", {"type": "complete"}))
+
+        received = [data async for data in subscriber.listen()]
+
+        assert [data["type"] for data in received] == ["log", "complete"]
+        pubsub.unsubscribe.assert_awaited_once_with("agent:logs:a")
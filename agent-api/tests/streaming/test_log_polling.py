@@ -0,0 +1,119 @@
+"""Tests for incremental agent log polling."""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.routes.logs import (
+    AdaptivePollInterval,
+    LOG_COLUMNS,
+    encode_cursor,
+    fetch_logs_after,
+    handle_polling,
+    parse_cursor,
+    suggest_poll_interval,
+)
+
+
+@pytest.fixture
+def mock_supabase():
+    """Supabase mock with a chainable agent_task_logs query."""
+    supabase = Mock()
+    query = Mock()
+    for method in ("select", "eq", "or_", "gt", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value = Mock(data=[])
+    supabase.table.return_value = query
+    return supabase, query
+
+
+class TestLogCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        log = {"id": "b2", "created_at": "2026-10-18T10:00:00+00:00"}
+
+        assert parse_cursor(encode_cursor(log)) == ("2026-10-18T10:00:00+00:00", "b2")
+
+    def test_legacy_timestamp(self):
+        """A plain timestamp is accepted as a created_at-only cursor."""
+        assert parse_cursor("2026-10-18T10:00:00") == ("2026-10-18T10:00:00", None)
+        assert parse_cursor(None) == (None, None)
+
+
+class TestFetchLogsAfter:
+    """Tests for the keyset query."""
+
+    def test_keyset_filter(self, mock_supabase):
+        """Composite cursors filter on (created_at, id) and order by both."""
+        supabase, query = mock_supabase
+
+        fetch_logs_after(supabase, "run-1", "2026-10-18T10:00:00+00:00|b2", 50)
+
+        query.select.assert_called_once_with(LOG_COLUMNS)
+        query.or_.assert_called_once_with(
+            'created_at.gt."2026-10-18T10:00:00+00:00",'
+            'and(created_at.eq."2026-10-18T10:00:00+00:00",id.gt.b2)'
+        )
+        assert [c.args[0] for c in query.order.call_args_list] == ["created_at", "id"]
+        query.limit.assert_called_once_with(50)
+
+    def test_legacy_since(self, mock_supabase):
+        supabase, query = mock_supabase
+
+        fetch_logs_after(supabase, "run-1", "2026-10-18T10:00:00", 50)
+
+        query.gt.assert_called_once_with("created_at", "2026-10-18T10:00:00")
+        query.or_.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_polling_returns_cursor(self, mock_supabase):
+        """next_cursor points after the last log even when the page is not full."""
+        supabase, query = mock_supabase
+        query.execute.return_value = Mock(data=[
+            {"id": "a1", "created_at": "2026-10-18T10:00:00+00:00"},
+        ])
+
+        response = await handle_polling(supabase, "run-1", None, 100)
+
+        assert response["has_more"] is False
+        assert response["next_cursor"] == "2026-10-18T10:00:00+00:00|a1"
+        assert response["poll_interval"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_long_poll_subscribes_before_first_read(self, mock_supabase):
+        """A log published right after the first (empty) read still wakes the poll."""
+        supabase, query = mock_supabase
+        order = []
+        log = {"id": "a1", "created_at": "2026-10-18T10:00:00+00:00"}
+        query.execute.side_effect = lambda: order.append("fetch") or Mock(
+            data=[log] if order.count("fetch") > 1 else []
+        )
+        wakeup = Mock()
+        wakeup.start = AsyncMock(side_effect=lambda: order.append("subscribe"))
+        wakeup.wait = AsyncMock(return_value=True)
+        wakeup.stop = AsyncMock()
+
+        with patch("app.routes.logs.LogWakeup", return_value=wakeup):
+            response = await handle_polling(supabase, "run-1", None, 100, wait=5)
+
+        assert order == ["subscribe", "fetch", "fetch"]
+        assert response["logs"] == [log]
+        wakeup.stop.assert_awaited_once()
+
+
+class TestAdaptivePollInterval:
+    """Tests for poll backoff."""
+
+    def test_backs_off_and_resets(self):
+        interval = AdaptivePollInterval(minimum=0.5, maximum=3.0, factor=2.0)
+
+        assert [interval.record(0) for _ in range(3)] == [1.0, 2.0, 3.0]
+        assert interval.record(5) == 0.5
+
+    def test_suggested_interval_grows_with_idle_time(self):
+        recent = (datetime.now(timezone.utc) - timedelta(seconds=2)).isoformat()
+        stale = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+
+        assert suggest_poll_interval([], f"{recent}|a1") == 1.0
+        assert suggest_poll_interval([], f"{stale}|a1") == 10.0
@@ -0,0 +1,105 @@
+"""Tests for the coalescing log publisher and subscriber batches."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, AsyncMock, MagicMock
+
+from app.redis.publisher import LogPublisher, log_channel
+from app.redis.subscriber import LogSubscriber
+
+
+@pytest.fixture
+def redis():
+    """Mock async Redis client recording pipelined commands."""
+    redis = Mock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    redis.pipeline.return_value = pipe
+    redis.pipe = pipe
+    return redis
+
+
+def _published(pipe):
+    return [(c.args[0], json.loads(c.args[1])) for c in pipe.publish.call_args_list]
+
+
+class TestLogPublisher:
+    """Tests for LogPublisher batching."""
+
+    @pytest.mark.asyncio
+    async def test_logs_coalesce_into_one_flush(self, redis):
+        """Logs within the flush interval share a pipeline and one PUBLISH."""
+        publisher = LogPublisher(redis, flush_interval_ms=10)
+
+        for i in range(3):
+            await publisher.publish_log("run-1", "info", f"line {i}")
+        redis.pipe.execute.assert_not_awaited()
+        await asyncio.sleep(0.05)
+
+        redis.pipe.execute.assert_awaited_once()
+        redis.pipe.xadd.assert_not_called()
+        [(channel, payload)] = _published(redis.pipe)
+        assert channel == log_channel("run-1")
+        assert payload["type"] == "batch"
+        assert [log["message"] for log in payload["logs"]] == ["line 0", "line 1", "line 2"]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_flushes_immediately(self, redis):
+        publisher = LogPublisher(redis, flush_interval_ms=10_000, max_batch=2)
+
+        await publisher.publish_log("run-1", "info", "a")
+        await publisher.publish_log("run-1", "info", "b")
+
+        redis.pipe.execute.assert_awaited_once()
+        await publisher.close()
+
+    @pytest.mark.asyncio
+    async def test_multi_channel_batch_is_one_round_trip(self, redis):
+        """publish_logs pipelines one PUBLISH per run in a single execute."""
+        publisher = LogPublisher(redis)
+
+        await publisher.publish_logs([
+            ("run-1", "info", "a", None),
+            ("run-2", "error", "b", {"code": 1}),
+        ])
+
+        redis.pipe.execute.assert_awaited_once()
+        published = _published(redis.pipe)
+        assert [channel for channel, _ in published] == [log_channel("run-1"), log_channel("run-2")]
+        assert published[1][1]["metadata"] == {"code": 1}
+
+    @pytest.mark.asyncio
+    async def test_completion_flushes_pending_logs_first(self, redis):
+        publisher = LogPublisher(redis, flush_interval_ms=10_000)
+
+        await publisher.publish_log("run-1", "info", "last line")
+        await publisher.publish_completion("run-1", "completed")
+
+        [(_, payload)] = _published(redis.pipe)
+        assert [log["type"] for log in payload["logs"]] == ["log", "complete"]
+
+
+class TestLogSubscriberBatches:
+    """Tests for batch unwrapping in LogSubscriber."""
+
+    @pytest.mark.asyncio
+    async def test_batches_unwrap_until_complete(self):
+        multiplexer = Mock()
+        queue: asyncio.Queue = asyncio.Queue()
+        multiplexer.subscribe = AsyncMock(return_value=queue)
+        multiplexer.unsubscribe = AsyncMock()
+        queue.put_nowait({"type": "log", "id": "a", "message": "single"})
+        queue.put_nowait({"type": "batch", "logs": [
+            {"type": "log", "id": "b", "message": "live"},
+            {"type": "complete", "id": "c"},
+            {"type": "log", "id": "d", "message": "after completion"},
+        ]})
+        subscriber = LogSubscriber("run-1", multiplexer=multiplexer)
+
+        received = [data async for data in subscriber.listen()]
+
+        assert [data["id"] for data in received] == ["a", "b", "c"]
+        multiplexer.unsubscribe.assert_awaited_once()
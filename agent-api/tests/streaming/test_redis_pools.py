@@ -0,0 +1,133 @@
+"""Tests for the Redis connection pool registry."""
+
+import threading
+
+import pytest
+import redis
+
+from app.redis.pools import (
+    InstrumentedAsyncBlockingConnectionPool,
+    InstrumentedAsyncConnectionPool,
+    InstrumentedBlockingConnectionPool,
+    InstrumentedConnectionPool,
+    PoolMetrics,
+    PoolSpec,
+    RedisPoolRegistry,
+    RedisRole,
+    normalize_redis_url,
+)
+
+
+class StubConnection:
+    """Connection that never touches the network."""
+
+    def __init__(self, **kwargs):
+        self.pid = None
+
+    def connect(self):
+        pass
+
+    def can_read(self):
+        return False
+
+    def disconnect(self):
+        pass
+
+
+SPECS = {
+    RedisRole.API: PoolSpec(max_connections=3),
+    RedisRole.QUEUE: PoolSpec(max_connections=2),
+    RedisRole.WORKER: PoolSpec(max_connections=4),
+    RedisRole.STREAM: PoolSpec(max_connections=None),
+}
+
+
+class TestRedisPoolRegistry:
+    """Tests for RedisPoolRegistry."""
+
+    def test_clients_shared_per_role(self):
+        registry = RedisPoolRegistry("redis://localhost:6379/0", SPECS)
+
+        assert registry.get_sync(RedisRole.API) is registry.get_sync(RedisRole.API)
+        assert registry.get_sync(RedisRole.API) is not registry.get_sync(RedisRole.QUEUE)
+        assert registry.get_async(RedisRole.WORKER) is registry.get_async(RedisRole.WORKER)
+
+    def test_pool_types_and_sizes(self):
+        registry = RedisPoolRegistry("redis://localhost:6379/0", SPECS)
+
+        api_pool = registry.get_sync(RedisRole.API).connection_pool
+        worker_pool = registry.get_async(RedisRole.WORKER).connection_pool
+        stream_pool = registry.get_async(RedisRole.STREAM).connection_pool
+
+        assert isinstance(api_pool, InstrumentedBlockingConnectionPool)
+        assert api_pool.max_connections == 3
+        assert isinstance(worker_pool, InstrumentedAsyncBlockingConnectionPool)
+        assert worker_pool.max_connections == 4
+        assert isinstance(stream_pool, InstrumentedAsyncConnectionPool)
+
+    def test_unbounded_sync_pool_is_not_blocking(self):
+        """Unbounded roles get a plain pool instead of pre-filling a blocking queue."""
+        registry = RedisPoolRegistry("redis://localhost:6379/0", SPECS)
+
+        pool = registry.get_sync(RedisRole.STREAM).connection_pool
+
+        assert isinstance(pool, InstrumentedConnectionPool)
+        assert not isinstance(pool, redis.BlockingConnectionPool)
+
+    def test_consistent_tls_and_keepalive(self):
+        """Upstash URLs are upgraded to TLS with the same settings for every role."""
+        registry = RedisPoolRegistry(normalize_redis_url("redis://default:pw@eu1.upstash.io:6379"), SPECS)
+
+        for pool in (
+            registry.get_sync(RedisRole.QUEUE).connection_pool,
+            registry.get_async(RedisRole.WORKER).connection_pool,
+        ):
+            assert pool.connection_kwargs["ssl_cert_reqs"] == "none"
+            assert pool.connection_kwargs["socket_keepalive"] is True
+            assert pool.connection_kwargs["decode_responses"] is True
+
+    def test_metrics_keyed_by_role(self):
+        registry = RedisPoolRegistry("redis://localhost:6379/0", SPECS)
+        registry.get_sync(RedisRole.API)
+        registry.get_async(RedisRole.STREAM)
+
+        metrics = registry.metrics()
+
+        assert set(metrics) == {"api:sync", "stream:async"}
+        assert metrics["stream:async"]["utilization"] is None
+
+
+class TestPoolMetrics:
+    """Tests for pool utilization and wait metrics."""
+
+    def test_exhaustion_and_wait_time(self):
+        metrics = PoolMetrics(RedisRole.API, "sync", 1)
+        pool = InstrumentedBlockingConnectionPool(
+            connection_class=StubConnection, max_connections=1, timeout=0.01, metrics=metrics,
+        )
+
+        held = pool.get_connection("PING")
+        assert metrics.snapshot()["utilization"] == 1.0
+        with pytest.raises(redis.ConnectionError):
+            pool.get_connection("PING")
+
+        pool.timeout = 1
+        threading.Timer(0.02, pool.release, args=(held,)).start()
+        pool.release(pool.get_connection("PING"))
+
+        snapshot = metrics.snapshot()
+        assert snapshot["exhausted"] == 1
+        assert snapshot["acquired"] == 2
+        assert snapshot["in_use"] == 0
+        assert snapshot["peak_in_use"] == 1
+        assert snapshot["wait_ms_max"] > 0
+
+    def test_release_of_unacquired_connection_ignored(self):
+        """Connections released after a failed connect do not skew in_use."""
+        metrics = PoolMetrics(RedisRole.QUEUE, "sync", 2)
+        first, second = object(), object()
+        metrics.record_acquire(first, 0.0)
+
+        metrics.record_release(second)
+
+        assert metrics.in_use == 1
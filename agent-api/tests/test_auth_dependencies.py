@@ -0,0 +1,119 @@
+"""Tests for cached request authentication."""
+
+import base64
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import Mock, patch
+
+from app.auth import dependencies
+from app.auth.dependencies import (
+    DIRECT_PROJECT_REF,
+    LOVABLE_PROJECT_REF,
+    get_current_user,
+    get_current_user_with_email,
+    get_supabase_client,
+)
+from app.auth.token_cache import VerifiedTokenCache, hash_token
+
+
+def _token(**claims) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """Isolate the module-level token cache per test."""
+    with patch.object(dependencies, "token_cache", VerifiedTokenCache()) as cache:
+        yield cache
+
+
+class TestVerifiedTokenCache:
+    """Tests for VerifiedTokenCache."""
+
+    def test_expires_at_token_exp(self):
+        cache = VerifiedTokenCache()
+        cache.put("t", {"id": "u"}, exp=time.time() - 1)
+
+        assert cache.get("t") is None
+
+    def test_ttl_capped(self):
+        cache = VerifiedTokenCache(max_ttl_seconds=0.01)
+        cache.put("t", {"id": "u"}, exp=time.time() + 3600)
+        time.sleep(0.02)
+
+        assert cache.get("t") is None
+
+    def test_lru_eviction(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        cache.put("a", {"id": "a"})
+        cache.put("b", {"id": "b"})
+        cache.get("a")
+        cache.put("c", {"id": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"id": "a"}
+        assert len(cache) == 2
+
+    def test_stores_hash_not_token(self):
+        cache = VerifiedTokenCache()
+        cache.put("secret-token", {"id": "u"})
+
+        assert list(cache._entries) == [hash_token("secret-token")]
+
+
+class TestCachedAuthentication:
+    """Tests for get_current_user caching."""
+
+    @pytest.mark.asyncio
+    async def test_direct_token_verified_once(self, fresh_cache):
+        token = _token(sub="user-1", iss=f"https://{DIRECT_PROJECT_REF}.supabase.co", exp=time.time() + 600)
+        supabase = Mock()
+        supabase.auth.get_user.return_value = Mock(user=Mock(id="user-1"))
+
+        for _ in range(3):
+            assert await get_current_user(f"Bearer {token}", supabase) == "user-1"
+
+        supabase.auth.get_user.assert_called_once_with(token)
+        assert fresh_cache.hits == 2
+
+    @pytest.mark.asyncio
+    async def test_email_shares_cache(self):
+        token = _token(sub="user-2", email="a@b.c", iss=LOVABLE_PROJECT_REF, exp=time.time() + 600)
+        supabase = Mock()
+
+        await get_current_user(f"Bearer {token}", supabase)
+        with patch.object(dependencies, "decode_jwt") as decode:
+            user = await get_current_user_with_email(f"Bearer {token}", supabase)
+
+        decode.assert_not_called()
+        assert user == {"id": "user-2", "email": "a@b.c"}
+
+    @pytest.mark.asyncio
+    async def test_expired_token_rejected_and_not_cached(self, fresh_cache):
+        token = _token(sub="user-3", exp=time.time() - 10)
+
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(f"Bearer {token}", Mock())
+
+        assert exc.value.status_code == 401
+        assert len(fresh_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_header(self):
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(None, Mock())
+
+        assert exc.value.detail == "Missing authorization header"
+
+
+def test_supabase_client_shared():
+    """Every request reuses one client (and its HTTP pool)."""
+    get_supabase_client.cache_clear()
+    with patch.object(dependencies, "create_client", side_effect=lambda *_: Mock()) as create:
+        assert get_supabase_client() is get_supabase_client()
+    create.assert_called_once()
+    get_supabase_client.cache_clear()
@@ -0,0 +1,174 @@
+-- Migration: Billing Usage Rollups
+-- Description: Hourly and daily token usage rollups maintained incrementally on
+--              every token_records insert, plus a rebuild function for backfills.
+-- Depends on: 20260116000002_billing_system.sql
+
+-- ============================================================================
+-- Part 1: Token Usage Rollups Table
+-- ============================================================================
+-- One row per (org, granularity, bucket, model, provider). Only actual
+-- (non-estimated) token records are rolled up, matching what
+-- BillingLedger.get_org_usage_summary reports.
+
+CREATE TABLE IF NOT EXISTS token_usage_rollups (
+    -- Bucket Identification
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    granularity VARCHAR(10) NOT NULL,
+        -- 'hour', 'day'
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,  -- UTC-aligned bucket start
+    model VARCHAR(100) NOT NULL,
+    provider VARCHAR(50) NOT NULL DEFAULT 'openai',
+
+    -- Aggregates
+    input_tokens BIGINT NOT NULL DEFAULT 0 CHECK (input_tokens >= 0),
+    output_tokens BIGINT NOT NULL DEFAULT 0 CHECK (output_tokens >= 0),
+    cost_usd DECIMAL(18, 8) NOT NULL DEFAULT 0 CHECK (cost_usd >= 0),
+    call_count INTEGER NOT NULL DEFAULT 0 CHECK (call_count >= 0),
+
+    -- Timestamps
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (org_id, granularity, bucket_start, model, provider),
+
+    CONSTRAINT check_rollup_granularity
+        CHECK (granularity IN ('hour', 'day'))
+);
+
+-- Index for summary range scans (org + granularity + time range)
+CREATE INDEX idx_token_usage_rollups_range
+    ON token_usage_rollups(org_id, granularity, bucket_start);
+
+
+-- ============================================================================
+-- Part 2: Incremental Maintenance
+-- ============================================================================
+-- The trigger fires on every token_records insert, whoever the writer is:
+-- record_token_call() for billed calls, and direct inserts such as the
+-- supervisor's usage tracking (app/agent/supervisor.py). It runs inside the
+-- inserting transaction, so rollups commit (or roll back) with the row.
+-- Idempotent replays of record_token_call() never insert and therefore never
+-- double count; direct writers must use unique idempotency keys to get the same.
+
+CREATE OR REPLACE FUNCTION apply_token_usage_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.is_estimated THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO token_usage_rollups (
+        org_id, granularity, bucket_start, model, provider,
+        input_tokens, output_tokens, cost_usd, call_count
+    ) VALUES
+        (
+            NEW.org_id, 'hour', date_trunc('hour', NEW.created_at, 'UTC'),
+            NEW.model, NEW.provider,
+            NEW.input_tokens, NEW.output_tokens, NEW.cost_usd, 1
+        ),
+        (
+            NEW.org_id, 'day', date_trunc('day', NEW.created_at, 'UTC'),
+            NEW.model, NEW.provider,
+            NEW.input_tokens, NEW.output_tokens, NEW.cost_usd, 1
+        )
+    ON CONFLICT (org_id, granularity, bucket_start, model, provider) DO UPDATE SET
+        input_tokens = token_usage_rollups.input_tokens + EXCLUDED.input_tokens,
+        output_tokens = token_usage_rollups.output_tokens + EXCLUDED.output_tokens,
+        cost_usd = token_usage_rollups.cost_usd + EXCLUDED.cost_usd,
+        call_count = token_usage_rollups.call_count + EXCLUDED.call_count,
+        updated_at = CURRENT_TIMESTAMP;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_token_records_usage_rollup
+    AFTER INSERT ON token_records
+    FOR EACH ROW
+    EXECUTE FUNCTION apply_token_usage_rollup();
+
+
+-- ============================================================================
+-- Part 3: Rebuild / Backfill
+-- ============================================================================
+-- Recomputes rollups from token_records for an org (or all orgs) over a time
+-- range. The range is widened to whole UTC days so hourly and daily buckets
+-- stay consistent. token_records is locked in SHARE mode for the duration so
+-- concurrent charges wait instead of racing the rebuild.
+
+CREATE OR REPLACE FUNCTION rebuild_token_usage_rollups(
+    p_org_id UUID DEFAULT NULL,
+    p_start TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_end TIMESTAMP WITH TIME ZONE DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    v_start TIMESTAMP WITH TIME ZONE;
+    v_end TIMESTAMP WITH TIME ZONE;
+    v_hour_rows INTEGER;
+    v_day_rows INTEGER;
+BEGIN
+    v_start := CASE WHEN p_start IS NULL THEN NULL
+                    ELSE date_trunc('day', p_start, 'UTC') END;
+    v_end := CASE WHEN p_end IS NULL THEN NULL
+                  ELSE date_trunc('day', p_end, 'UTC') + INTERVAL '1 day' END;
+
+    LOCK TABLE token_records IN SHARE MODE;
+
+    DELETE FROM token_usage_rollups
+    WHERE (p_org_id IS NULL OR org_id = p_org_id)
+        AND (v_start IS NULL OR bucket_start >= v_start)
+        AND (v_end IS NULL OR bucket_start < v_end);
+
+    INSERT INTO token_usage_rollups (
+        org_id, granularity, bucket_start, model, provider,
+        input_tokens, output_tokens, cost_usd, call_count
+    )
+    SELECT
+        org_id, 'hour', date_trunc('hour', created_at, 'UTC'), model, provider,
+        SUM(input_tokens), SUM(output_tokens), SUM(cost_usd), COUNT(*)
+    FROM token_records
+    WHERE is_estimated = FALSE
+        AND (p_org_id IS NULL OR org_id = p_org_id)
+        AND (v_start IS NULL OR created_at >= v_start)
+        AND (v_end IS NULL OR created_at < v_end)
+    GROUP BY 1, 3, 4, 5;
+    GET DIAGNOSTICS v_hour_rows = ROW_COUNT;
+
+    INSERT INTO token_usage_rollups (
+        org_id, granularity, bucket_start, model, provider,
+        input_tokens, output_tokens, cost_usd, call_count
+    )
+    SELECT
+        org_id, 'day', date_trunc('day', created_at, 'UTC'), model, provider,
+        SUM(input_tokens), SUM(output_tokens), SUM(cost_usd), COUNT(*)
+    FROM token_records
+    WHERE is_estimated = FALSE
+        AND (p_org_id IS NULL OR org_id = p_org_id)
+        AND (v_start IS NULL OR created_at >= v_start)
+        AND (v_end IS NULL OR created_at < v_end)
+    GROUP BY 1, 3, 4, 5;
+    GET DIAGNOSTICS v_day_rows = ROW_COUNT;
+
+    RETURN v_hour_rows + v_day_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Initial backfill of existing history
+SELECT rebuild_token_usage_rollups();
+
+
+-- ============================================================================
+-- Part 4: Row Level Security (RLS)
+-- ============================================================================
+
+ALTER TABLE token_usage_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own org usage rollups"
+    ON token_usage_rollups FOR SELECT
+    USING (org_id IN (
+        SELECT organization_id FROM profiles WHERE id = auth.uid()
+    ));
+
+
+-- ============================================================================
+-- Done
+-- ============================================================================
@@ -0,0 +1,7 @@
+-- Migration: Agent Task Logs Keyset Index
+-- Description: Composite index backing incremental log reads, which page by
+--              (created_at, id) within a run instead of re-reading all logs.
+-- Depends on: 20260113000007_agent_task_logs.sql
+
+CREATE INDEX IF NOT EXISTS idx_agent_task_logs_run_cursor
+    ON agent_task_logs(run_id, created_at, id);
@@ -0,0 +1,66 @@
+-- Migration: Batch Subtask Transitions
+-- Description: Applies many subtask state transitions in one round trip.
+--              Each row keeps the optimistic lock of transition_subtask_state
+--              (state and state_version must match); rows that lost the race
+--              are skipped and simply not returned.
+-- Depends on: 20260116000001_orchestrator_state_machine.sql
+
+CREATE OR REPLACE FUNCTION transition_subtask_states_batch(
+    p_transitions JSONB,
+    p_transitioned_by VARCHAR(255) DEFAULT 'orchestrator',
+    p_reason TEXT DEFAULT NULL
+) RETURNS TABLE (subtask_id UUID, run_id UUID, to_state VARCHAR(20)) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH requested AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_transitions) AS t(
+            subtask_id UUID,
+            from_state VARCHAR(20),
+            to_state VARCHAR(20),
+            state_version INTEGER,
+            result_data JSONB,
+            error TEXT
+        )
+    ),
+    applied AS (
+        UPDATE subtasks s
+        SET
+            state = r.to_state,
+            state_version = r.state_version + 1,
+            result_data = COALESCE(r.result_data, s.result_data),
+            last_error = COALESCE(r.error, s.last_error),
+            started_at = CASE WHEN r.to_state = 'running' AND s.started_at IS NULL THEN NOW() ELSE s.started_at END,
+            completed_at = CASE WHEN r.to_state IN ('completed', 'failed', 'skipped', 'cancelled') THEN NOW() ELSE s.completed_at END
+        FROM requested r
+        WHERE
+            s.id = r.subtask_id
+            AND s.state = r.from_state
+            AND s.state_version = r.state_version
+        RETURNING s.id, s.run_id, r.from_state, r.to_state, s.state_version
+    ),
+    audit AS (
+        INSERT INTO subtask_state_transitions (subtask_id, from_state, to_state, state_version, transitioned_by, transition_reason)
+        SELECT a.id, a.from_state, a.to_state, a.state_version, p_transitioned_by, p_reason
+        FROM applied a
+    ),
+    progress AS (
+        UPDATE agent_runs ar
+        SET
+            completed_subtasks = ar.completed_subtasks + c.completed,
+            failed_subtasks = ar.failed_subtasks + c.failed,
+            last_progress_at = NOW()
+        FROM (
+            SELECT
+                a.run_id,
+                COUNT(*) FILTER (WHERE a.to_state = 'completed') AS completed,
+                COUNT(*) FILTER (WHERE a.to_state = 'failed') AS failed
+            FROM applied a
+            GROUP BY a.run_id
+        ) c
+        WHERE ar.id = c.run_id AND (c.completed > 0 OR c.failed > 0)
+    )
+    SELECT a.id, a.run_id, a.to_state FROM applied a;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,221 @@
+-- Migration: Report Idempotent Replays From record_token_call
+-- Description: Adds an is_idempotent_replay column to the result of
+--              record_token_call(). A replay returns the existing charge
+--              without debiting again, and callers that mirror charges
+--              (the Redis credit cache) must not apply it a second time.
+--              The body is unchanged otherwise.
+-- Depends on: 20260116000002_billing_system.sql
+
+-- The result type changes, so the function has to be dropped first
+DROP FUNCTION IF EXISTS record_token_call(
+    UUID, UUID, UUID, UUID, UUID, VARCHAR, INTEGER, INTEGER, VARCHAR, VARCHAR, BOOLEAN
+);
+
+CREATE OR REPLACE FUNCTION record_token_call(
+    p_org_id UUID,
+    p_run_id UUID,
+    p_agent_id UUID,
+    p_task_id UUID,
+    p_step_id UUID,
+    p_idempotency_key VARCHAR(255),
+    p_input_tokens INTEGER,
+    p_output_tokens INTEGER,
+    p_model VARCHAR(100),
+    p_provider VARCHAR(50),
+    p_is_estimated BOOLEAN DEFAULT FALSE
+) RETURNS TABLE (
+    success BOOLEAN,
+    token_record_id UUID,
+    cost_usd DECIMAL(12, 8),
+    new_balance_usd DECIMAL(12, 8),
+    error_code VARCHAR(50),
+    error_message TEXT,
+    is_idempotent_replay BOOLEAN
+) AS $$
+DECLARE
+    v_input_price DECIMAL(12, 6);
+    v_output_price DECIMAL(12, 6);
+    v_input_cost DECIMAL(12, 8);
+    v_output_cost DECIMAL(12, 8);
+    v_total_cost DECIMAL(12, 8);
+    v_token_record_id UUID;
+    v_ledger_id UUID;
+    v_current_balance DECIMAL(12, 8);
+    v_new_balance DECIMAL(12, 8);
+    v_existing_record UUID;
+BEGIN
+    -- Phase 1: Check idempotency
+    IF p_idempotency_key IS NOT NULL THEN
+        SELECT id INTO v_existing_record
+        FROM token_records
+        WHERE idempotency_key = p_idempotency_key;
+
+        IF v_existing_record IS NOT NULL THEN
+            -- Return existing record (idempotent replay)
+            RETURN QUERY
+            SELECT
+                TRUE,
+                tr.id,
+                tr.cost_usd,
+                cb.balance_usd,
+                NULL::VARCHAR(50),
+                NULL::TEXT,
+                TRUE
+            FROM token_records tr
+            JOIN credit_balances cb ON cb.org_id = tr.org_id
+            WHERE tr.id = v_existing_record;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Phase 2: Get pricing
+    SELECT input_price_per_million, output_price_per_million
+    INTO v_input_price, v_output_price
+    FROM model_pricing
+    WHERE model = p_model
+        AND provider = COALESCE(p_provider, 'openai')
+        AND effective_from <= CURRENT_TIMESTAMP
+        AND (effective_until IS NULL OR effective_until > CURRENT_TIMESTAMP)
+    ORDER BY effective_from DESC
+    LIMIT 1;
+
+    -- Fallback pricing if model not found
+    IF v_input_price IS NULL THEN
+        v_input_price := 5.00;  -- Conservative fallback
+        v_output_price := 15.00;
+    END IF;
+
+    -- Phase 3: Calculate cost
+    v_input_cost := (p_input_tokens::DECIMAL / 1000000) * v_input_price;
+    v_output_cost := (p_output_tokens::DECIMAL / 1000000) * v_output_price;
+    v_total_cost := v_input_cost + v_output_cost;
+
+    -- Phase 4: Check balance (with row lock)
+    SELECT balance_usd INTO v_current_balance
+    FROM credit_balances
+    WHERE org_id = p_org_id
+    FOR UPDATE;
+
+    IF v_current_balance IS NULL THEN
+        -- Create balance record if doesn't exist
+        INSERT INTO credit_balances (org_id, balance_usd)
+        VALUES (p_org_id, 0)
+        ON CONFLICT (org_id) DO NOTHING
+        RETURNING balance_usd INTO v_current_balance;
+
+        IF v_current_balance IS NULL THEN
+            SELECT balance_usd INTO v_current_balance
+            FROM credit_balances WHERE org_id = p_org_id FOR UPDATE;
+        END IF;
+    END IF;
+
+    -- Check sufficient balance (allow negative for now, will flag for review)
+    v_new_balance := v_current_balance - v_total_cost;
+
+    -- Phase 5: Insert token record
+    INSERT INTO token_records (
+        org_id, run_id, agent_id, task_id, step_id,
+        idempotency_key,
+        input_tokens, output_tokens,
+        model, provider,
+        cost_usd, input_cost_usd, output_cost_usd,
+        is_estimated
+    ) VALUES (
+        p_org_id, p_run_id, p_agent_id, p_task_id, p_step_id,
+        p_idempotency_key,
+        p_input_tokens, p_output_tokens,
+        p_model, COALESCE(p_provider, 'openai'),
+        v_total_cost, v_input_cost, v_output_cost,
+        p_is_estimated
+    ) RETURNING id INTO v_token_record_id;
+
+    -- Phase 6: Insert billing ledger entry
+    INSERT INTO billing_ledger (
+        org_id,
+        transaction_type,
+        amount_usd,
+        direction,
+        run_id,
+        agent_id,
+        task_id,
+        token_record_id,
+        reason,
+        idempotency_key,
+        created_by
+    ) VALUES (
+        p_org_id,
+        'charge',
+        v_total_cost,
+        'debit',
+        p_run_id,
+        p_agent_id,
+        p_task_id,
+        v_token_record_id,
+        'LLM API call: ' || p_model || ' (' || p_input_tokens || ' in / ' || p_output_tokens || ' out)',
+        'charge:' || COALESCE(p_idempotency_key, v_token_record_id::TEXT),
+        'system'
+    ) RETURNING id INTO v_ledger_id;
+
+    -- Phase 7: Update balance
+    UPDATE credit_balances
+    SET
+        balance_usd = v_new_balance,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE org_id = p_org_id;
+
+    -- Phase 8: Record balance history
+    INSERT INTO credit_balance_history (
+        org_id,
+        balance_before_usd,
+        balance_after_usd,
+        change_usd,
+        reason,
+        billing_ledger_id
+    ) VALUES (
+        p_org_id,
+        v_current_balance,
+        v_new_balance,
+        -v_total_cost,
+        'LLM API charge',
+        v_ledger_id
+    );
+
+    -- Return success
+    RETURN QUERY
+    SELECT
+        TRUE,
+        v_token_record_id,
+        v_total_cost,
+        v_new_balance,
+        NULL::VARCHAR(50),
+        NULL::TEXT,
+        FALSE;
+
+EXCEPTION
+    WHEN unique_violation THEN
+        -- Handle race condition on idempotency key
+        RETURN QUERY
+        SELECT
+            TRUE,
+            tr.id,
+            tr.cost_usd,
+            cb.balance_usd,
+            NULL::VARCHAR(50),
+            NULL::TEXT,
+            TRUE
+        FROM token_records tr
+        JOIN credit_balances cb ON cb.org_id = tr.org_id
+        WHERE tr.idempotency_key = p_idempotency_key;
+
+    WHEN OTHERS THEN
+        RETURN QUERY
+        SELECT
+            FALSE,
+            NULL::UUID,
+            NULL::DECIMAL(12, 8),
+            NULL::DECIMAL(12, 8),
+            SQLSTATE,
+            SQLERRM,
+            FALSE;
+END;
+$$ LANGUAGE plpgsql;